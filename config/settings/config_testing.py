@@ -18,8 +18,40 @@ SECRET_KEY = 'fake-key'
 
 SORTINGHAT_GENDERIZE_API_KEY = 'fake-key'
 
+SORTINGHAT_GENDERIZE_API_URL = 'https://api.genderize.io/'
+
+SORTINGHAT_GENDERIZE_BATCH_SIZE = 10
+
+SORTINGHAT_GENDERIZE_WORKERS = 1
+
+SORTINGHAT_GENDERIZE_RATE_LIMIT = 0
+
+SORTINGHAT_GENDERIZE_CACHE_TTL = 3600
+
+SORTINGHAT_GENDER_PROVIDER = 'genderize'
+
+SORTINGHAT_GENDER_DICTIONARY_PATH = None
+
 MATCH_TRUSTED_SOURCES = ['github', 'gitlab', 'slack']
 
+MATCH_MEMORY_BUDGET = 0
+
+MATCH_MAX_GROUP_SIZE = 0
+
+MATCH_WORKERS = 1
+
+MATCH_FUZZY_NAME_THRESHOLD = 0.6
+
+MATCH_CACHE_TTL = 0
+
+MATCH_CACHE_MAX_SIZE = 10000
+
+MATCH_BATCH_SIZE = 0
+
+MATCH_MIN_SCORE = 0
+
+AFFILIATE_INCREMENTAL = False
+
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 
 INSTALLED_APPS = [
@@ -96,6 +96,20 @@ MEDIA_URL = 'http://media.example.com/'
 
 SORTINGHAT_GENDERIZE_API_KEY = None
 
+SORTINGHAT_GENDERIZE_API_URL = os.environ.get('SORTINGHAT_GENDERIZE_API_URL', 'https://api.genderize.io/')
+
+SORTINGHAT_GENDERIZE_BATCH_SIZE = int(os.environ.get('SORTINGHAT_GENDERIZE_BATCH_SIZE', 10))
+
+SORTINGHAT_GENDERIZE_WORKERS = int(os.environ.get('SORTINGHAT_GENDERIZE_WORKERS', 4))
+
+SORTINGHAT_GENDERIZE_RATE_LIMIT = float(os.environ.get('SORTINGHAT_GENDERIZE_RATE_LIMIT', 5))
+
+SORTINGHAT_GENDER_PROVIDER = os.environ.get('SORTINGHAT_GENDER_PROVIDER', 'genderize')
+
+SORTINGHAT_GENDER_DICTIONARY_PATH = os.environ.get('SORTINGHAT_GENDER_DICTIONARY_PATH', None)
+
+SORTINGHAT_GENDERIZE_CACHE_TTL = int(os.environ.get('SORTINGHAT_GENDERIZE_CACHE_TTL', 30 * 24 * 3600))
+
 INSTALLED_APPS = [
     'django_rq',
     'graphene_django',
@@ -180,3 +194,21 @@ MULTI_TENANT = os.environ.get('SORTINGHAT_MULTI_TENANT', 'False').lower() in ('t
 
 MATCH_TRUSTED_SOURCES = os.environ.get('SORTINGHAT_MATCH_TRUSTED_SOURCES',
                                        'github,gitlab,slack').split(',')
+
+MATCH_MEMORY_BUDGET = int(os.environ.get('SORTINGHAT_MATCH_MEMORY_BUDGET', 0))
+
+MATCH_MAX_GROUP_SIZE = int(os.environ.get('SORTINGHAT_MATCH_MAX_GROUP_SIZE', 0))
+
+MATCH_WORKERS = int(os.environ.get('SORTINGHAT_MATCH_WORKERS', 1))
+
+MATCH_FUZZY_NAME_THRESHOLD = float(os.environ.get('SORTINGHAT_MATCH_FUZZY_NAME_THRESHOLD', 0.6))
+
+MATCH_CACHE_TTL = int(os.environ.get('SORTINGHAT_MATCH_CACHE_TTL', 0))
+
+MATCH_CACHE_MAX_SIZE = int(os.environ.get('SORTINGHAT_MATCH_CACHE_MAX_SIZE', 10000))
+
+MATCH_BATCH_SIZE = int(os.environ.get('SORTINGHAT_MATCH_BATCH_SIZE', 0))
+
+MATCH_MIN_SCORE = int(os.environ.get('SORTINGHAT_MATCH_MIN_SCORE', 0))
+
+AFFILIATE_INCREMENTAL = os.environ.get('SORTINGHAT_AFFILIATE_INCREMENTAL', 'False').lower() in ('true', '1')
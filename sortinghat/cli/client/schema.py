@@ -82,7 +82,7 @@ class GroupFilterType(sgqlc.types.Input):
 
 class IdentityFilterType(sgqlc.types.Input):
     __schema__ = sh_schema
-    __field_names__ = ('uuid', 'term', 'is_locked', 'is_bot', 'gender', 'country', 'source', 'enrollment', 'enrollment_parent_org', 'enrollment_date', 'is_enrolled', 'last_updated', 'last_reviewed', 'is_reviewed')
+    __field_names__ = ('uuid', 'term', 'is_locked', 'is_bot', 'gender', 'country', 'source', 'email_domain', 'enrollment', 'enrollment_parent_org', 'enrollment_date', 'is_enrolled', 'last_updated', 'last_reviewed', 'is_reviewed')
     uuid = sgqlc.types.Field(String, graphql_name='uuid')
     term = sgqlc.types.Field(String, graphql_name='term')
     is_locked = sgqlc.types.Field(Boolean, graphql_name='isLocked')
@@ -90,6 +90,7 @@ class IdentityFilterType(sgqlc.types.Input):
     gender = sgqlc.types.Field(String, graphql_name='gender')
     country = sgqlc.types.Field(String, graphql_name='country')
     source = sgqlc.types.Field(String, graphql_name='source')
+    email_domain = sgqlc.types.Field(String, graphql_name='emailDomain')
     enrollment = sgqlc.types.Field(String, graphql_name='enrollment')
     enrollment_parent_org = sgqlc.types.Field(String, graphql_name='enrollmentParentOrg')
     enrollment_date = sgqlc.types.Field(String, graphql_name='enrollmentDate')
@@ -339,12 +340,13 @@ class IdentityPaginatedType(sgqlc.types.Type):
 
 class IdentityType(sgqlc.types.Type):
     __schema__ = sh_schema
-    __field_names__ = ('created_at', 'last_modified', 'uuid', 'name', 'email', 'username', 'source', 'individual')
+    __field_names__ = ('created_at', 'last_modified', 'uuid', 'name', 'email', 'email_domain', 'username', 'source', 'individual')
     created_at = sgqlc.types.Field(sgqlc.types.non_null(DateTime), graphql_name='createdAt')
     last_modified = sgqlc.types.Field(sgqlc.types.non_null(DateTime), graphql_name='lastModified')
     uuid = sgqlc.types.Field(sgqlc.types.non_null(String), graphql_name='uuid')
     name = sgqlc.types.Field(String, graphql_name='name')
     email = sgqlc.types.Field(String, graphql_name='email')
+    email_domain = sgqlc.types.Field(String, graphql_name='emailDomain')
     username = sgqlc.types.Field(String, graphql_name='username')
     source = sgqlc.types.Field(sgqlc.types.non_null(String), graphql_name='source')
     individual = sgqlc.types.Field(sgqlc.types.non_null('IndividualType'), graphql_name='individual')
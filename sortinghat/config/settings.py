@@ -385,6 +385,39 @@ SORTINGHAT_API_PAGE_SIZE = 10
 
 SORTINGHAT_GENDERIZE_API_KEY = os.environ.get('SORTINGHAT_GENDERIZE_API_KEY', None)
 
+#
+# genderize.io client. Names are sent in batches of up to
+# `BATCH_SIZE` names per request (the API accepts 10), using
+# `WORKERS` concurrent requests and sending at most
+# `RATE_LIMIT` requests per second (0 means no limit).
+# Change the URL to use a compatible service.
+#
+
+SORTINGHAT_GENDERIZE_API_URL = os.environ.get('SORTINGHAT_GENDERIZE_API_URL', 'https://api.genderize.io/')
+SORTINGHAT_GENDERIZE_BATCH_SIZE = int(os.environ.get('SORTINGHAT_GENDERIZE_BATCH_SIZE', 10))
+SORTINGHAT_GENDERIZE_WORKERS = int(os.environ.get('SORTINGHAT_GENDERIZE_WORKERS', 4))
+SORTINGHAT_GENDERIZE_RATE_LIMIT = float(os.environ.get('SORTINGHAT_GENDERIZE_RATE_LIMIT', 5))
+
+#
+# Provider of the genders of the names used by gender
+# recommendations: 'genderize', to use the genderize.io API,
+# or 'dictionary', to use a local CSV file with the columns
+# 'name', 'gender' and 'probability' (set its path on
+# SORTINGHAT_GENDER_DICTIONARY_PATH). The dictionary doesn't
+# need network access.
+#
+
+SORTINGHAT_GENDER_PROVIDER = os.environ.get('SORTINGHAT_GENDER_PROVIDER', 'genderize')
+SORTINGHAT_GENDER_DICTIONARY_PATH = os.environ.get('SORTINGHAT_GENDER_DICTIONARY_PATH', None)
+
+#
+# Time, in seconds, that the genders of the names are cached
+# in the database. The cache is shared by all the tenants.
+# Set it to 0 to disable the cache.
+#
+
+SORTINGHAT_GENDERIZE_CACHE_TTL = int(os.environ.get('SORTINGHAT_GENDERIZE_CACHE_TTL', 30 * 24 * 3600))
+
 #
 # Path of the permission groups configuration file
 #
@@ -401,6 +434,86 @@ PERMISSION_GROUPS_LIST_PATH = os.environ.get('SORTINGHAT_PERMISSION_GROUPS_LIST_
 MATCH_TRUSTED_SOURCES = os.environ.get('SORTINGHAT_MATCH_TRUSTED_SOURCES',
                                        'github,gitlab,slack').split(',')
 
+#
+# Memory budget, in megabytes, for matching identities.
+# When it is set, identities are partitioned on disk and
+# matched partition by partition. Set it to 0 to match
+# all the identities in memory.
+#
+
+MATCH_MEMORY_BUDGET = int(os.environ.get('SORTINGHAT_MATCH_MEMORY_BUDGET', 0))
+
+#
+# Maximum number of individuals of a group of matches that
+# will be merged by the unify job. Larger groups are skipped
+# and reported as errors. Set it to 0 to merge any group.
+#
+
+MATCH_MAX_GROUP_SIZE = int(os.environ.get('SORTINGHAT_MATCH_MAX_GROUP_SIZE', 0))
+
+#
+# Number of processes used to join identities when
+# finding matches. Each criterion, or each partition
+# of it, is joined in parallel.
+#
+
+MATCH_WORKERS = int(os.environ.get('SORTINGHAT_MATCH_WORKERS', 1))
+
+#
+# Minimum similarity, from 0 to 1, between two names
+# to match them using the `fuzzy_name` criterion
+#
+
+MATCH_FUZZY_NAME_THRESHOLD = float(os.environ.get('SORTINGHAT_MATCH_FUZZY_NAME_THRESHOLD', 0.6))
+
+#
+# Time, in seconds, that match recommendations are cached.
+# Cached results are discarded as soon as identities or
+# exclusion terms change. Only recommendations for a list
+# of individuals are cached. Set it to 0 to disable the cache.
+#
+
+MATCH_CACHE_TTL = int(os.environ.get('SORTINGHAT_MATCH_CACHE_TTL', 0))
+
+#
+# Maximum size of the cached match recommendations, as the
+# number of individuals plus the number of their matches.
+# Larger results are not cached.
+#
+
+MATCH_CACHE_MAX_SIZE = int(os.environ.get('SORTINGHAT_MATCH_CACHE_MAX_SIZE', 10000))
+
+#
+# Number of individuals matched at a time when generating
+# match recommendations. Recommendations are generated
+# batch by batch, as soon as each one is matched. Set it
+# to 0 to match all the individuals at once. Each batch
+# finds its candidates using the matching index, instead
+# of joining the whole registry, so values over 10000 are
+# lowered to 10000.
+#
+
+MATCH_BATCH_SIZE = int(os.environ.get('SORTINGHAT_MATCH_BATCH_SIZE', 0))
+
+#
+# Minimum confidence score, from 0 to 100, of a pair of
+# matching individuals to merge them with the unify job.
+# Merge recommendations are stored with their score, so
+# they can be reviewed from the highest to the lowest.
+# Set it to 0 to merge any pair.
+#
+
+MATCH_MIN_SCORE = int(os.environ.get('SORTINGHAT_MATCH_MIN_SCORE', 0))
+
+#
+# Queue the individuals with new identities and the new
+# domains to affiliate them incrementally with the
+# `affiliate_pending` job, instead of affiliating the
+# whole registry again.
+#
+
+AFFILIATE_INCREMENTAL = os.environ.get('SORTINGHAT_AFFILIATE_INCREMENTAL', 'False').lower() in ('true', '1')
+
 #
 # Session cookies configuration
 #
@@ -20,10 +20,13 @@
 #     Miguel Ángel Fernández <mafesan@bitergia.com>
 #
 
+import itertools
 import logging
 
 from grimoirelab_toolkit.datetime import datetime_to_utc, datetime_utcnow
 
+from django.db.models import Q
+
 from .db import (find_individual_by_uuid,
                  find_identity,
                  find_organization,
@@ -48,9 +51,16 @@ from .db import (find_individual_by_uuid,
                  delete_domain as delete_domain_db,
                  delete_alias as delete_alias_db,
                  delete_merge_recommendations as delete_merge_recommendations_db,
+                 move_merge_recommendations as move_merge_recommendations_db,
+                 reject_merge_recommendations as reject_merge_recommendations_db,
+                 update_merge_recommendations_scores,
                  update_profile as update_profile_db,
                  update_scheduled_task as update_scheduled_task_db,
                  move_identity as move_identity_db,
+                 move_identities as move_identities_db,
+                 replace_enrollments as replace_enrollments_db,
+                 update_profiles as update_profiles_db,
+                 delete_individuals as delete_individuals_db,
                  lock as lock_db,
                  unlock as unlock_db,
                  add_enrollment,
@@ -59,15 +69,24 @@ from .db import (find_individual_by_uuid,
                  move_team,
                  move_alias,
                  review as review_db)
-from .errors import (InvalidValueError,
+from .errors import (BaseError,
+                     InvalidValueError,
                      AlreadyExistsError,
                      NotFoundError,
                      DuplicateRangeError,
-                     EqualIndividualError)
+                     EqualIndividualError,
+                     LockedIdentityError)
 from .log import TransactionsLog
-from .models import Identity, MergeRecommendation, MIN_PERIOD_DATE, MAX_PERIOD_DATE
+from .models import (Enrollment,
+                     Identity,
+                     Individual,
+                     MergeRecommendation,
+                     MIN_PERIOD_DATE,
+                     MAX_PERIOD_DATE)
 from .aux import merge_datetime_ranges
 from .decorators import atomic_using_tenant
+from .recommendations.components import UnionFind
+from .recommendations.matching import score_matches
 from ..utils import generate_uuid
 
 
@@ -1237,25 +1256,6 @@ def merge(ctx, from_uuids, to_uuid):
 
         return to_individual
 
-    def _merge_profiles(from_individuals, to_individual):
-        """Merge the profiles from `Individual` objects"""
-
-        for from_indv in from_individuals:
-            if not to_individual.profile.is_bot and from_indv.profile.is_bot:
-                to_individual.profile.is_bot = True
-            if not to_individual.profile.name:
-                to_individual.profile.name = from_indv.profile.name
-            if not to_individual.profile.email:
-                to_individual.profile.email = from_indv.profile.email
-            if not to_individual.profile.gender:
-                to_individual.profile.gender = from_indv.profile.gender
-            if not to_individual.profile.gender_acc:
-                to_individual.profile.gender_acc = from_indv.profile.gender_acc
-            if not to_individual.profile.country:
-                to_individual.profile.country = from_indv.profile.country
-
-        return to_individual
-
     def _delete_individuals(trxl, individuals):
         """Delete individuals from the database"""
 
@@ -1301,6 +1301,90 @@ def merge(ctx, from_uuids, to_uuid):
     return to_individual
 
 
+@atomic_using_tenant
+def bulk_merge(ctx, groups):
+    """
+    Merge several groups of individuals at once.
+
+    Use this function to run many merges in a single transaction.
+    Each group is a tuple with the identifier of the individual where
+    the rest will be merged to (`to_uuid`) and the list of identifiers
+    of the individuals to merge (`from_uuids`), as they are given
+    to `merge`. The end state of the registry is the same as calling
+    `merge` for each group, but identities, enrollments, profiles and
+    individuals of all the groups are updated with a few set-based
+    queries, and their operations are logged in bulk.
+
+    Groups are checked before any change is made. Groups which can't
+    be merged (i.e. any of their individuals do not exist, are locked
+    or are part of another group) are skipped and the error is
+    returned with the rest of errors. An individual can only be part
+    of one group.
+
+    :param ctx: context from where this method is called
+    :param groups: list of tuples with the identifier of the individual
+        where the rest will be merged to, and the list of identifiers
+        of the individuals to merge
+
+    :returns: a tuple with the list of main keys of the individuals
+        resulting from the merges, and the list of exceptions
+        raised by the groups that were skipped
+    """
+    uuids = {uuid for to_uuid, from_uuids in groups
+             for uuid in itertools.chain([to_uuid], from_uuids or []) if uuid}
+    individuals = _find_individuals_by_uuids(uuids)
+
+    mks = {individual.mk for individual in individuals.values()}
+    enrollments = {}
+    for enrollment in Enrollment.objects.filter(individual__in=mks).select_related('group'):
+        enrollments.setdefault(enrollment.individual_id, []).append(enrollment)
+
+    merges = []
+    errors = []
+    in_use = set()
+
+    for to_uuid, from_uuids in groups:
+        try:
+            to_individual, from_individuals = _check_merge_group(to_uuid, from_uuids,
+                                                                 individuals, in_use)
+            new_enrollments = _merge_enrollments(to_individual, from_individuals, enrollments)
+        except BaseError as exc:
+            errors.append(exc)
+            continue
+
+        group_mks = [indv.mk for indv in itertools.chain([to_individual], from_individuals)]
+        in_use.update(group_mks)
+        merges.append((to_individual, from_individuals, group_mks, new_enrollments))
+
+    if not merges:
+        return [], errors
+
+    trxl = TransactionsLog.open('merge', ctx)
+
+    move_identities_db(trxl, {from_indv.mk: to_individual.mk
+                              for to_individual, from_individuals, _, _ in merges
+                              for from_indv in from_individuals})
+    replace_enrollments_db(trxl,
+                           [mk for _, _, group_mks, _ in merges for mk in group_mks],
+                           [enrollment for _, _, _, new_enrollments in merges
+                            for enrollment in new_enrollments])
+
+    for to_individual, from_individuals, _, _ in merges:
+        _merge_profiles(from_individuals, to_individual)
+    update_profiles_db(trxl, [to_individual.profile for to_individual, _, _, _ in merges])
+
+    delete_individuals_db(trxl, [from_indv.mk for _, from_individuals, _, _ in merges
+                                 for from_indv in from_individuals])
+
+    trxl.close()
+
+    merged = [to_individual.mk for to_individual, _, _, _ in merges]
+
+    logger.info(f"{len(merged)} groups of individuals merged; {len(errors)} groups skipped")
+
+    return merged, errors
+
+
 @atomic_using_tenant
 def unmerge_identities(ctx, uuids):
     """
@@ -1642,6 +1726,124 @@ def delete_merge_recommendations(ctx):
     return recommendations
 
 
+@atomic_using_tenant
+def apply_merge_recommendations(ctx, recommendation_ids):
+    """Apply several merge recommendations at once.
+
+    This function merges the individuals of a list of merge
+    recommendations. Recommendations that share individuals
+    (e.g. A-B and B-C) are chained and each resulting group
+    of individuals is merged once into the individual with
+    the lowest main key, which is the same result of applying
+    the recommendations one by one. Groups are merged in bulk
+    (see `bulk_merge`).
+
+    Only pending recommendations can be applied. The applied
+    recommendations are removed. The rest of pending
+    recommendations of the merged individuals are moved to the
+    individuals where they were merged with a few set-based
+    statements. When they become duplicated or they would merge
+    an individual with itself, they are removed too. Once the
+    individuals are merged, the pending recommendations of the
+    resulting individuals are scored again (see `score_matches`),
+    as their identities have changed.
+
+    The whole operation is run in a single transaction, so when
+    any group can't be merged, no change is made.
+
+    :param ctx: context from where this method is called
+    :param recommendation_ids: list of merge recommendations ids
+
+    :returns: list of main keys of the individuals resulting
+        from the merges
+
+    :raises InvalidValueError: raised when `recommendation_ids`
+        is `None` or an empty list
+    :raises NotFoundError: raised when any of the recommendations
+        does not exist in the registry or it was already applied
+        or rejected
+    :raises LockedIdentityError: raised when any of the individuals
+        is locked
+    """
+    recommendations = _find_pending_merge_recommendations(recommendation_ids)
+    pairs = list(recommendations.values_list('id', 'individual1', 'individual2'))
+
+    components = UnionFind()
+    components.union_pairs((mk1, mk2) for _, mk1, mk2 in pairs)
+
+    groups = []
+    targets = {}
+    for members in components.components():
+        to_mk = min(members)
+        from_mks = sorted(members - {to_mk})
+        groups.append((to_mk, from_mks))
+        targets.update({mk: to_mk for mk in from_mks})
+
+    trxl = TransactionsLog.open('apply_merge_recommendations', ctx)
+
+    delete_merge_recommendations_db(trxl, recommendations=recommendations)
+    move_merge_recommendations_db(trxl, targets)
+
+    merged, errors = bulk_merge(ctx, groups)
+
+    # Individuals already merged don't prevent the rest from being merged
+    errors = [exc for exc in errors if not isinstance(exc, EqualIndividualError)]
+    if errors:
+        raise errors[0]
+
+    # Scores were calculated with the identities before the merge
+    q = Q(individual1__in=merged) | Q(individual2__in=merged)
+    pending = MergeRecommendation.objects.filter(q, applied__isnull=True)
+    pending = {
+        (mk1, mk2): rec_id
+        for rec_id, mk1, mk2 in pending.values_list('id', 'individual1', 'individual2')
+    }
+    scores = {
+        pending[pair]: result
+        for pair, result in score_matches(pending.keys()).items()
+    }
+    update_merge_recommendations_scores(trxl, scores)
+
+    trxl.close()
+
+    logger.info(f"{len(pairs)} merge recommendations applied; {len(merged)} individuals merged")
+
+    return merged
+
+
+@atomic_using_tenant
+def reject_merge_recommendations(ctx, recommendation_ids):
+    """Reject several merge recommendations at once.
+
+    This function marks a list of pending merge recommendations
+    as rejected, so they are not applied nor recommended again.
+
+    :param ctx: context from where this method is called
+    :param recommendation_ids: list of merge recommendations ids
+
+    :returns: list of ids of the rejected recommendations
+
+    :raises InvalidValueError: raised when `recommendation_ids`
+        is `None` or an empty list
+    :raises NotFoundError: raised when any of the recommendations
+        does not exist in the registry or it was already applied
+        or rejected
+    """
+    recommendations = _find_pending_merge_recommendations(recommendation_ids)
+
+    trxl = TransactionsLog.open('reject_merge_recommendations', ctx)
+
+    reject_merge_recommendations_db(trxl, recommendations=recommendations)
+
+    trxl.close()
+
+    rejected = sorted(set(recommendation_ids))
+
+    logger.info(f"{len(rejected)} merge recommendations rejected")
+
+    return rejected
+
+
 @atomic_using_tenant
 def review(ctx, uuid):
     """Mark an individual as reviewed.
@@ -1678,3 +1880,148 @@ def review(ctx, uuid):
     logger.info(f"Individual {uuid} successfully updated")
 
     return individual
+
+
+def _find_pending_merge_recommendations(recommendation_ids):
+    """Find the pending merge recommendations of a list of ids"""
+
+    if recommendation_ids is None:
+        raise InvalidValueError(msg="'recommendation_ids' cannot be None")
+    if recommendation_ids == []:
+        raise InvalidValueError(msg="'recommendation_ids' cannot be an empty list")
+
+    recommendation_ids = set(recommendation_ids)
+    recommendations = MergeRecommendation.objects.filter(id__in=recommendation_ids,
+                                                         applied__isnull=True)
+
+    found = set(recommendations.values_list('id', flat=True))
+    missing = recommendation_ids - found
+    if missing:
+        raise NotFoundError(entity=str(min(missing)))
+
+    return recommendations
+
+
+def _merge_profiles(from_individuals, to_individual):
+    """Merge the profiles from `Individual` objects"""
+
+    for from_indv in from_individuals:
+        if not to_individual.profile.is_bot and from_indv.profile.is_bot:
+            to_individual.profile.is_bot = True
+        if not to_individual.profile.name:
+            to_individual.profile.name = from_indv.profile.name
+        if not to_individual.profile.email:
+            to_individual.profile.email = from_indv.profile.email
+        if not to_individual.profile.gender:
+            to_individual.profile.gender = from_indv.profile.gender
+        if not to_individual.profile.gender_acc:
+            to_individual.profile.gender_acc = from_indv.profile.gender_acc
+        if not to_individual.profile.country:
+            to_individual.profile.country = from_indv.profile.country
+
+    return to_individual
+
+
+def _find_individuals_by_uuids(uuids):
+    """Find the individuals of a set of uuids.
+
+    Returns a dictionary with the individual of each uuid. Uuids
+    are first searched as main keys and then as identities uuids,
+    like `find_individual_by_uuid` does. Uuids not found are not
+    included in the dictionary.
+    """
+    individuals = {
+        indv.mk: indv
+        for indv in Individual.objects.filter(mk__in=uuids).select_related('profile__country')
+    }
+
+    pending = set(uuids) - individuals.keys()
+
+    if pending:
+        identities = Identity.objects.filter(uuid__in=pending).select_related('individual__profile__country')
+        for identity in identities:
+            individuals[identity.uuid] = identity.individual
+
+    return individuals
+
+
+def _check_merge_group(to_uuid, from_uuids, individuals, in_use):
+    """Check whether a group of individuals can be merged.
+
+    Returns the target individual and the list of individuals to
+    merge into it. The checks and the exceptions raised are
+    the same as in `merge`. An `InvalidValueError` exception is
+    also raised when any of the individuals is in `in_use`.
+    """
+    if from_uuids is None:
+        raise InvalidValueError(msg="'from_uuids' cannot be None")
+    if from_uuids == []:
+        raise InvalidValueError(msg="'from_uuids' cannot be an empty list")
+    if to_uuid is None:
+        raise InvalidValueError(msg="'to_uuid' cannot be None")
+    if to_uuid == '':
+        raise InvalidValueError(msg="'to_uuid' cannot be an empty string")
+
+    if to_uuid not in individuals:
+        raise NotFoundError(entity=to_uuid)
+
+    to_individual = individuals[to_uuid]
+    from_individuals = {}
+
+    for from_uuid in from_uuids:
+        if from_uuid is None:
+            raise InvalidValueError(msg="'from_uuid' cannot be None")
+        if from_uuid == '':
+            raise InvalidValueError(msg="'from_uuid' cannot be an empty string")
+        if from_uuid == to_individual.mk:
+            msg = "'to_uuid' {} cannot be part of 'from_uuids'".format(to_individual.mk)
+            raise EqualIndividualError(msg=msg)
+        if from_uuid not in individuals:
+            raise NotFoundError(entity=from_uuid)
+
+        from_indv = individuals[from_uuid]
+
+        if from_indv.mk == to_individual.mk:
+            msg = "'to_uuid' {} cannot be part of 'from_uuids'".format(to_individual.mk)
+            raise EqualIndividualError(msg=msg)
+
+        from_individuals[from_indv.mk] = from_indv
+
+    from_individuals = list(from_individuals.values())
+
+    for indv in itertools.chain(from_individuals, [to_individual]):
+        if indv.is_locked:
+            raise LockedIdentityError(uuid=indv.mk)
+
+    for indv in itertools.chain([to_individual], from_individuals):
+        if indv.mk in in_use:
+            msg = "individual {} is part of another group".format(indv.mk)
+            raise InvalidValueError(msg=msg)
+
+    return to_individual, from_individuals
+
+
+def _merge_enrollments(to_individual, from_individuals, enrollments):
+    """Calculate the enrollments of a merged individual.
+
+    Returns a list with the new `Enrollment` objects of
+    `to_individual`, merging the ranges of the current
+    enrollments of every individual, by group.
+    """
+    periods = {}
+
+    for indv in itertools.chain([to_individual], from_individuals):
+        for enrollment in enrollments.get(indv.mk, []):
+            periods.setdefault(enrollment.group, []).append((enrollment.start, enrollment.end))
+
+    new_enrollments = []
+
+    for group, dates in periods.items():
+        try:
+            for start_dt, end_dt in merge_datetime_ranges(dates, exclude_limits=True):
+                new_enrollments.append(Enrollment(individual=to_individual, group=group,
+                                                  start=start_dt, end=end_dt))
+        except ValueError as e:
+            raise InvalidValueError(msg=str(e))
+
+    return new_enrollments
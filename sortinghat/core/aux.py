@@ -19,13 +19,20 @@
 #     Santiago Dueñas <sduenas@bitergia.com>
 #
 
+import itertools
 import re
 
 from urllib.parse import urlparse
 
+from .fuzzy import fuzzy_name_keys
 from .models import MIN_PERIOD_DATE, MAX_PERIOD_DATE
 
 
+GITHUB_EMAIL_ADDRESS_REGEX = r"^(\d+\+)?(?P<username>[a-zA-Z0-9._%+-]+)(\b@users.noreply.github.com\b)"
+GITHUB_EMAIL_ADDRESS_PATTERN = re.compile(GITHUB_EMAIL_ADDRESS_REGEX)
+EMAIL_ADDRESS_PATTERN = re.compile(r"^(?P<email>[^\s@]+@[^\s@.]+\.[^\s@]+)$")
+
+
 def merge_datetime_ranges(dates, exclude_limits=False):
     """Merge datetime ranges.
 
@@ -133,3 +140,97 @@ def validate_field(name, value, allow_none=False):
 
     if urlparse(value).scheme:
         raise ValueError(f"'{name}' cannot be a URL")
+
+
+def generate_matching_keys(name=None, email=None, username=None):
+    """Generate the normalized keys to index an identity for matching.
+
+    Returns the set of `(criterion, value)` tuples that represent
+    an identity on the matching index. Values are converted to
+    lowercase and empty ones are discarded, so `email`, `name` and
+    `username` criteria can be looked up case-insensitively.
+
+    When `email` is a GitHub generated address (i.e
+    `1234+jsmith@users.noreply.github.com`), the username included
+    on it is also returned under the `github` criterion.
+
+    The blocking keys of `name` used for fuzzy matching are
+    returned under the `fuzzy_name` criterion.
+
+    :param name: full name of the identity
+    :param email: email of the identity
+    :param username: user name used by the identity
+
+    :returns: a set of `(criterion, value)` tuples
+    """
+    keys = set()
+
+    for criterion, value in (('name', name), ('email', email), ('username', username)):
+        if value:
+            keys.add((criterion, value.lower()))
+
+    if email:
+        m = GITHUB_EMAIL_ADDRESS_PATTERN.match(email)
+        if m:
+            keys.add(('github', m.group('username').lower()))
+
+    if name:
+        keys.update(('fuzzy_name', key) for key in fuzzy_name_keys(name))
+
+    return keys
+
+
+def get_email_domain(email):
+    """Get the normalized domain of an email address.
+
+    The domain is the part of the address after the `@`,
+    converted to lowercase. Only well-formed addresses,
+    with a local part and a domain with at least two labels,
+    have a domain.
+
+    :param email: email address
+
+    :returns: the domain of the address or `None` when
+        the address is not well-formed
+    """
+    if not email or not EMAIL_ADDRESS_PATTERN.match(email):
+        return None
+
+    return email.split('@')[-1].lower()
+
+
+def reverse_domain(domain):
+    """Reverse the order of the labels of a domain name.
+
+    The labels of the domain are converted to lowercase and
+    joined in reverse order, so 'us.Example.com' becomes
+    'com.example.us'. Sub-domains of a domain share the reversed
+    name of their parent as a prefix, so they can be found
+    using an index.
+
+    :param domain: name of the domain
+
+    :returns: the reversed name or `None` when `domain`
+        is empty
+    """
+    if not domain:
+        return None
+
+    return '.'.join(reversed(domain.lower().split('.')))
+
+
+def iter_chunks(iterable, size):
+    """Split an iterable in lists of `size` elements.
+
+    :param iterable: iterable to split
+    :param size: maximum number of elements of each list
+
+    :returns: a generator of lists
+    """
+    iterator = iter(iterable)
+
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            break
+        yield chunk
@@ -0,0 +1,480 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2021 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import json
+import logging
+import math
+import multiprocessing
+import random
+import resource
+import sys
+import time
+import unittest.mock
+
+import django_rq
+import requests
+
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from ..utils import generate_uuid
+from . import jobs
+from .aux import generate_matching_keys, get_email_domain, reverse_domain
+from .context import SortingHatContext
+from .models import (Domain,
+                     Group,
+                     Identity,
+                     Individual,
+                     MatchingKey,
+                     Organization,
+                     Profile,
+                     RecommenderExclusionTerm)
+from .recommendations.affiliation import recommend_affiliations
+from .recommendations.gender import recommend_gender
+from .recommendations.matching import recommend_matches
+
+
+BULK_SIZE = 5000
+
+BENCHMARK_USER = 'sortinghat-benchmark'
+
+DEFAULT_CRITERIA = ['email', 'name', 'username']
+
+FIRST_NAMES = [
+    'Aaron', 'Ada', 'Alejandro', 'Alice', 'Amara', 'Ana', 'Andrea', 'Arjun',
+    'Beatriz', 'Bruno', 'Carlos', 'Carmen', 'Chen', 'Chloe', 'Daniel', 'Diego',
+    'Elena', 'Emma', 'Fatima', 'Felipe', 'Grace', 'Hannah', 'Hiroshi', 'Ines',
+    'Ivan', 'Jakub', 'James', 'Jane', 'John', 'Jose', 'Julia', 'Kenji',
+    'Laura', 'Lucas', 'Maria', 'Mateo', 'Mei', 'Mohamed', 'Nadia', 'Noah',
+    'Olga', 'Omar', 'Pablo', 'Priya', 'Quan', 'Rosa', 'Santiago', 'Sofia',
+    'Tomas', 'Yuki'
+]
+
+# A small set of names shared by many people, so
+# matching by name generates wrong candidates
+COMMON_NAMES = [
+    'John Smith', 'Maria Garcia', 'Wei Zhang', 'David Lee', 'Anna Muller'
+]
+
+SYLLABLES = [
+    'ba', 'ce', 'di', 'fo', 'gu', 'ha', 'je', 'ki', 'lo', 'mu',
+    'na', 'pe', 'ri', 'so', 'tu', 'va', 'we', 'xi', 'yo', 'zu'
+]
+
+PUBLIC_DOMAINS = ['gmail.com', 'yahoo.com', 'outlook.com', 'protonmail.com', 'example.net']
+
+SOURCES = ['git', 'github', 'mls', 'gitlab', 'slack', 'jira']
+
+GITHUB_NOREPLY_DOMAIN = 'users.noreply.github.com'
+
+# Read-only benchmarks run before the jobs that modify the registry
+BENCHMARKS = ['matches', 'affiliations', 'gender', 'affiliate', 'unify']
+
+
+logger = logging.getLogger(__name__)
+
+
+def generate_registry(num_identities, identities_per_individual=3,
+                      num_organizations=100, duplicate_rate=0.1,
+                      collision_rate=0.05, github_noreply_rate=0.1,
+                      num_exclusion_terms=100, seed=0):
+    """Populate the registry with synthetic data.
+
+    Identities are generated for a set of fictitious people. Each
+    person has a unique surname, an email address of the domain of an
+    organization or of a public email provider and a username. Their
+    identities are spread across several data sources, with some of the
+    GitHub ones using noreply addresses.
+
+    To give work to the recommendation engines, some people are split
+    in two individuals that share their email address (`duplicate_rate`)
+    and some others get one of a few common names (`collision_rate`).
+    The first `num_exclusion_terms` people are bots, whose email
+    addresses are added to the exclusion list.
+
+    The same `seed` always generates the same registry. Data is
+    inserted in bulk, so the registry must be empty.
+
+    :param num_identities: number of identities to generate
+    :param identities_per_individual: identities of each person
+    :param num_organizations: number of organizations, each one
+        with its own domain
+    :param duplicate_rate: ratio of people split in two individuals
+    :param collision_rate: ratio of people with a common name
+    :param github_noreply_rate: ratio of GitHub identities with a
+        noreply email address
+    :param num_exclusion_terms: number of bots added to the
+        exclusion list
+    :param seed: seed of the random generator
+
+    :returns: a dictionary with the number of entities generated
+    """
+    rnd = random.Random(seed)
+
+    org_domains = []
+
+    for i in range(num_organizations):
+        organization = Organization(name=f"Organization {i}")
+        Group.add_root(instance=organization)
+        org_domains.append(Domain(domain=f"{_syllables(i)}.com",
+                                  is_top_domain=True,
+                                  organization=organization))
+    Domain.objects.bulk_create(org_domains, batch_size=BULK_SIZE)
+
+    org_domains = [domain.domain for domain in org_domains]
+
+    num_people = math.ceil(num_identities / identities_per_individual)
+    writer = _BulkWriter()
+    terms = []
+    summary = {
+        'individuals': 0,
+        'identities': 0,
+        'organizations': num_organizations,
+        'exclusion_terms': 0
+    }
+
+    for n in range(num_people):
+        surname = _syllables(n).capitalize()
+        first_name = rnd.choice(FIRST_NAMES)
+        name = f"{first_name} {surname}"
+        username = f"{first_name[0]}{surname}".lower()
+
+        if org_domains and rnd.random() < 0.5:
+            domain = rnd.choice(org_domains)
+        else:
+            domain = rnd.choice(PUBLIC_DOMAINS)
+
+        if n < num_exclusion_terms:
+            name = f"{surname} Bot"
+            email = f"{surname.lower()}-bot@{domain}"
+            terms.append(RecommenderExclusionTerm(term=email, normalized_term=email))
+        else:
+            email = f"{first_name}.{surname}@{domain}".lower()
+            if rnd.random() < collision_rate:
+                name = rnd.choice(COMMON_NAMES)
+
+        size = min(identities_per_individual, num_identities - summary['identities'])
+        identities = []
+
+        for i in range(size):
+            source = SOURCES[i % len(SOURCES)]
+            if i >= len(SOURCES):
+                source = f"{source}-{i // len(SOURCES)}"
+
+            if source.startswith('github'):
+                noreply = rnd.random() < github_noreply_rate
+                identity_email = f"{n}+{username}@{GITHUB_NOREPLY_DOMAIN}" if noreply else None
+                identities.append((source, identity_email, name, username))
+            elif source.startswith('git'):
+                identities.append((source, email, name, None))
+            else:
+                identities.append((source, email, name, username))
+
+        if size > 1 and rnd.random() < duplicate_rate:
+            half = size // 2
+            individuals = [identities[:half], identities[half:]]
+        else:
+            individuals = [identities]
+
+        for data in individuals:
+            mk = generate_uuid(*data[0])
+            writer.add_individual(mk, name, email, data)
+            summary['individuals'] += 1
+            summary['identities'] += len(data)
+
+    writer.flush()
+
+    RecommenderExclusionTerm.objects.bulk_create(terms, batch_size=BULK_SIZE)
+    summary['exclusion_terms'] = len(terms)
+
+    logger.info(f"Synthetic registry generated; {summary}")
+
+    return summary
+
+
+def run_benchmarks(names=None, criteria=None, isolate=True):
+    """Run a set of benchmarks over the registry.
+
+    For each benchmark, the wall time, the peak resident set size
+    (RSS) of the process and the number of queries sent to the
+    database are measured. The genderize.io API is replaced by a
+    stub, so no request leaves the machine.
+
+    Benchmarks run in the order of `BENCHMARKS`, so the jobs that
+    modify the registry, `affiliate` and `unify`, run at the end.
+
+    When `isolate` is set, each benchmark runs in a forked process,
+    so the peak RSS only accounts for that benchmark. Otherwise,
+    the peak RSS is the one of the current process since it started.
+    Jobs run synchronously in the process of the benchmark; they
+    need a Redis server, like any other SortingHat job.
+
+    :param names: list of benchmarks to run; by default, all
+    :param criteria: matching criteria used by `matches` and `unify`
+    :param isolate: run each benchmark in its own process
+
+    :returns: a list of dictionaries with the measures of each benchmark
+    """
+    names = names or BENCHMARKS
+    criteria = criteria or DEFAULT_CRITERIA
+
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    user, _ = get_user_model().objects.get_or_create(username=BENCHMARK_USER)
+    ctx = SortingHatContext(user)
+
+    if isolate and 'fork' not in multiprocessing.get_all_start_methods():
+        logger.warning("Processes cannot be forked; benchmarks will not be isolated")
+        isolate = False
+
+    measures = []
+
+    for name in BENCHMARKS:
+        if name not in names:
+            continue
+
+        logger.info(f"Running benchmark '{name}'; ...")
+
+        if isolate:
+            measure = _run_isolated_benchmark(name, ctx, criteria)
+        else:
+            measure = _run_benchmark(name, ctx, criteria)
+        measures.append(measure)
+
+        logger.info(f"Benchmark '{name}' completed; {measure}")
+
+    return measures
+
+
+def _run_benchmark(name, ctx, criteria):
+    """Run a benchmark and measure it"""
+
+    counter = _QueryCounter()
+    connection = connections[DEFAULT_DB_ALIAS]
+
+    start = time.perf_counter()
+
+    with connection.execute_wrapper(counter), _stub_genderize():
+        _BENCHMARK_RUNNERS[name](ctx, criteria)
+
+    wall_time = time.perf_counter() - start
+
+    return {
+        'benchmark': name,
+        'wall_time': wall_time,
+        'peak_rss': _peak_rss(),
+        'queries': counter.count
+    }
+
+
+def _run_isolated_benchmark(name, ctx, criteria):
+    """Run a benchmark in a forked process"""
+
+    def _run(writer):
+        try:
+            writer.send(_run_benchmark(name, ctx, criteria))
+        except Exception as exc:
+            writer.send(exc)
+        finally:
+            connections.close_all()
+            writer.close()
+
+    # Connections can't be shared with the child process
+    connections.close_all()
+
+    mp = multiprocessing.get_context('fork')
+    reader, writer = mp.Pipe(duplex=False)
+    process = mp.Process(target=_run, args=(writer,))
+    process.start()
+    writer.close()
+
+    try:
+        measure = reader.recv()
+    except EOFError:
+        measure = RuntimeError(f"benchmark '{name}' process exited with code {process.exitcode}")
+    finally:
+        process.join()
+        reader.close()
+
+    if isinstance(measure, Exception):
+        raise measure
+
+    return measure
+
+
+def _bench_matches(ctx, criteria):
+    for _ in recommend_matches(None, None, criteria):
+        pass
+
+
+def _bench_affiliations(ctx, criteria):
+    for _ in recommend_affiliations(None):
+        pass
+
+
+def _bench_gender(ctx, criteria):
+    uuids = list(Individual.objects.order_by('mk').values_list('mk', flat=True))
+    for _ in recommend_gender(uuids):
+        pass
+
+
+def _bench_affiliate(ctx, criteria):
+    _run_job(jobs.affiliate, ctx=ctx)
+
+
+def _bench_unify(ctx, criteria):
+    _run_job(jobs.unify, ctx=ctx, criteria=criteria)
+
+
+_BENCHMARK_RUNNERS = {
+    'matches': _bench_matches,
+    'affiliations': _bench_affiliations,
+    'gender': _bench_gender,
+    'affiliate': _bench_affiliate,
+    'unify': _bench_unify
+}
+
+
+def _run_job(func, **kwargs):
+    """Run a job synchronously in the current process"""
+
+    queue = django_rq.get_queue(is_async=False)
+    job = queue.enqueue(func, **kwargs)
+
+    if job.is_failed:
+        raise RuntimeError(f"job {job.id} failed")
+
+    return job
+
+
+def _stub_genderize():
+    """Replace the requests to genderize.io by a stub.
+
+    Genders and probabilities are derived from the name, so
+    the same name always gets the same answer.
+    """
+    def _genderize(name):
+        seed = sum(ord(c) for c in name)
+
+        return {
+            'name': name,
+            'gender': 'female' if seed % 2 else 'male',
+            'probability': 0.5 + (seed % 50) / 100,
+            'count': seed
+        }
+
+    def _get(session, url, params=None, **kwargs):
+        names = [value for key, value in (params or []) if key == 'name[]']
+
+        response = requests.models.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = json.dumps([
+            _genderize(name) for name in names
+        ]).encode('utf-8')
+
+        return response
+
+    return unittest.mock.patch('requests.Session.get', _get)
+
+
+def _peak_rss():
+    """Peak resident set size of the current process, in megabytes"""
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports the size in kilobytes; macOS in bytes
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    else:
+        return peak / 1024
+
+
+def _syllables(n):
+    """Convert a number into a unique pronounceable word"""
+
+    word = []
+
+    while True:
+        n, idx = divmod(n, len(SYLLABLES))
+        word.append(SYLLABLES[idx])
+        if n == 0 and len(word) >= 2:
+            break
+
+    return ''.join(word)
+
+
+class _QueryCounter:
+    """Count the queries sent to the database"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class _BulkWriter:
+    """Insert individuals and their identities in bulk.
+
+    Identities are not added with `add_identity`, so the fields
+    derived from their data, the domain of the email and the
+    matching keys, are calculated here.
+    """
+
+    def __init__(self):
+        self.individuals = []
+        self.profiles = []
+        self.identities = []
+        self.keys = []
+
+    def add_individual(self, mk, name, email, identities):
+        individual = Individual(mk=mk)
+
+        self.individuals.append(individual)
+        self.profiles.append(Profile(individual=individual, name=name, email=email))
+
+        for source, email, name, username in identities:
+            uuid = generate_uuid(source, email=email, name=name, username=username)
+            email_domain = get_email_domain(email)
+            self.identities.append(Identity(uuid=uuid, name=name, email=email,
+                                            username=username, source=source,
+                                            email_domain=email_domain,
+                                            email_domain_reversed=reverse_domain(email_domain),
+                                            individual=individual))
+            for criterion, value in generate_matching_keys(name, email, username):
+                self.keys.append(MatchingKey(identity_id=uuid, individual_id=mk,
+                                             source=source, criterion=criterion,
+                                             value=value))
+
+        if len(self.identities) >= BULK_SIZE:
+            self.flush()
+
+    def flush(self):
+        Individual.objects.bulk_create(self.individuals, batch_size=BULK_SIZE)
+        Profile.objects.bulk_create(self.profiles, batch_size=BULK_SIZE)
+        Identity.objects.bulk_create(self.identities, batch_size=BULK_SIZE)
+        MatchingKey.objects.bulk_create(self.keys, batch_size=BULK_SIZE)
+
+        self.individuals = []
+        self.profiles = []
+        self.identities = []
+        self.keys = []
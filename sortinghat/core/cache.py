@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2021 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import hashlib
+import json
+
+import django_rq
+
+from django.db import transaction
+
+from . import tenant
+
+
+IDENTITIES = 'identities'
+EXCLUSION_TERMS = 'exclusion_terms'
+
+VERSION_KEY = 'sortinghat:{tenant}:version:{name}'
+CACHE_KEY = 'sortinghat:{tenant}:cache:{name}:{digest}'
+
+
+def get_registry_version(*names):
+    """Get the current version of some parts of the registry.
+
+    Each part of the registry, like the identities or the
+    exclusion terms, has its own version for the tenant in use.
+    The version is a counter stored in Redis, so it's shared by
+    every process of the server and of the workers. Versions
+    grow each time the data of that part changes; data cached
+    under an old version must not be used anymore.
+
+    :param names: names of the parts of the registry
+
+    :returns: a tuple with the versions of each part, in
+        the same order
+    """
+    conn = django_rq.get_connection()
+    keys = [_version_key(name) for name in names]
+
+    return tuple(int(version or 0) for version in conn.mget(keys))
+
+
+def bump_registry_version(name):
+    """Increase the version of a part of the registry.
+
+    The version is increased when the current transaction is
+    committed, so no process can read the new version before
+    the changes are visible. When there is no transaction
+    in progress, the version is increased immediately.
+
+    :param name: name of the part of the registry
+    """
+    key = _version_key(name)
+
+    def _bump_version():
+        django_rq.get_connection().incr(key)
+
+    transaction.on_commit(_bump_version, using=tenant.get_db_tenant())
+
+
+def cache_key(name, version, **kwargs):
+    """Build the key to cache a value under a version.
+
+    :param name: name of the cached data
+    :param version: version of the registry the data was
+        obtained from
+    :param kwargs: arguments used to obtain the data;
+        they must be serializable to JSON
+
+    :returns: a key unique to the tenant in use, the name,
+        the version and the arguments
+    """
+    data = json.dumps([version, kwargs], sort_keys=True, default=str)
+    digest = hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+    return CACHE_KEY.format(tenant=_current_tenant(), name=name, digest=digest)
+
+
+def get_cached_value(key):
+    """Get a value from the cache.
+
+    :param key: key of the value
+
+    :returns: the value or `None` when it is not cached
+    """
+    value = django_rq.get_connection().get(key)
+
+    if value is None:
+        return None
+
+    return json.loads(value)
+
+
+def set_cached_value(key, value, ttl):
+    """Store a value in the cache for `ttl` seconds.
+
+    :param key: key of the value
+    :param value: value to store; it must be serializable to JSON
+    :param ttl: seconds the value will be kept in the cache
+    """
+    django_rq.get_connection().set(key, json.dumps(value), ex=ttl)
+
+
+def _version_key(name):
+    return VERSION_KEY.format(tenant=_current_tenant(), name=name)
+
+
+def _current_tenant():
+    return tenant.get_db_tenant() or 'default'
@@ -27,7 +27,7 @@ import re
 import django.core.exceptions
 import django.db.utils
 
-from django.db.models import Q
+from django.db.models import Case, CharField, Q, Value, When
 
 from grimoirelab_toolkit.datetime import datetime_utcnow, datetime_to_utc
 
@@ -42,13 +42,19 @@ from .models import (MIN_PERIOD_DATE,
                      Country,
                      Individual,
                      Identity,
+                     MatchingKey,
                      Profile,
                      Enrollment,
                      Operation,
                      ScheduledTask,
                      Alias,
                      MergeRecommendation)
-from .aux import validate_field
+from .aux import (validate_field,
+                  generate_matching_keys,
+                  get_email_domain,
+                  reverse_domain)
+from .cache import IDENTITIES, bump_registry_version
+from .pending import add_pending_affiliations
 
 
 logger = logging.getLogger(__name__)
@@ -123,6 +129,31 @@ def find_individual_by_uuid(uuid):
         return individual
 
 
+def find_individuals_keys(uuids):
+    """Find the main keys of the individuals of a list of UUIDs.
+
+    Bulk version of `find_individual_by_uuid`. UUIDs are searched
+    as main keys and then as identities UUIDs, using at most two
+    queries. UUIDs not found are not included in the result.
+
+    :param uuids: list of ids to search the individuals
+
+    :returns: a dictionary with the main key of the individual
+        of each UUID found
+    """
+    uuids = set(uuids)
+
+    individuals = Individual.objects.filter(mk__in=uuids).order_by()
+    keys = {mk: mk for mk in individuals.values_list('mk', flat=True)}
+    pending = uuids - keys.keys()
+
+    if pending:
+        identities = Identity.objects.filter(uuid__in=pending).order_by()
+        keys.update(identities.values_list('uuid', 'individual'))
+
+    return keys
+
+
 def find_identity(uuid):
     """Find an identity.
 
@@ -456,6 +487,9 @@ def add_domain(trxl, organization, domain_name, is_top_domain=True):
 
     As a result, the function returns a new `Domain` object.
 
+    The domain is queued to affiliate the individuals with an
+    email address on it (see `add_pending_affiliations`).
+
     :param trxl: TransactionsLog object from the method calling this one
     :param organization: links the new domain to this organization object
     :param domain_name: name of the domain
@@ -486,6 +520,8 @@ def add_domain(trxl, organization, domain_name, is_top_domain=True):
     except django.db.utils.IntegrityError as exc:
         _handle_integrity_error(Domain, exc)
 
+    add_pending_affiliations(domains=[domain.domain])
+
     trxl.log_operation(op_type=Operation.OpType.ADD, entity_type='domain',
                        timestamp=datetime_utcnow(), args=op_args,
                        target=op_args['organization'])
@@ -602,6 +638,7 @@ def delete_individual(trxl, individual):
         raise LockedIdentityError(uuid=individual.mk)
 
     individual.delete()
+    bump_registry_version(IDENTITIES)
 
     trxl.log_operation(op_type=Operation.OpType.DELETE, entity_type='individual',
                        timestamp=datetime_utcnow(), args=op_args,
@@ -620,6 +657,16 @@ def add_identity(trxl, individual, uuid, source,
     be `None` or empty. Moreover, `name`, `email` or `username`
     parameters need a non empty value.
 
+    The normalized values of the identity are also stored on
+    the matching index (see `MatchingKey`), so they can be used
+    to look for matches without scanning the whole registry.
+    The normalized domain of the email address is stored in
+    `email_domain` (see `get_email_domain`) and, with its labels
+    in reverse order, in `email_domain_reversed` to find the
+    addresses of sub-domains (see `reverse_domain`). When the identity
+    has a domain, the individual is queued to be affiliated
+    (see `add_pending_affiliations`).
+
     As a result, the function returns a new `Identity` object.
 
     :param trxl: TransactionsLog object from the method calling this one
@@ -657,8 +704,12 @@ def add_identity(trxl, individual, uuid, source,
     if not (name or email or username):
         raise ValueError("identity data cannot be None or empty")
 
+    email_domain = get_email_domain(email)
+
     try:
         identity = Identity(uuid=uuid, name=name, email=email,
+                            email_domain=email_domain,
+                            email_domain_reversed=reverse_domain(email_domain),
                             username=username, source=source,
                             individual=individual)
         identity.save(force_insert=True)
@@ -666,6 +717,12 @@ def add_identity(trxl, individual, uuid, source,
     except django.db.utils.IntegrityError as exc:
         _handle_integrity_error(Identity, exc)
 
+    _add_matching_keys(identity)
+    bump_registry_version(IDENTITIES)
+
+    if identity.email_domain:
+        add_pending_affiliations(individuals=[individual.mk])
+
     trxl.log_operation(op_type=Operation.OpType.ADD, entity_type='identity',
                        timestamp=datetime_utcnow(), args=op_args,
                        target=op_args['individual'])
@@ -678,7 +735,8 @@ def delete_identity(trxl, identity):
 
     This function removes from the database the identity given
     in `identity`. Take into account this function does not
-    remove individual in the case they get empty.
+    remove individual in the case they get empty. Matching keys
+    of the identity are removed too.
 
     :param trxl: TransactionsLog object from the method calling this one
     :param identity: identity to remove
@@ -693,6 +751,7 @@ def delete_identity(trxl, identity):
 
     identity.delete()
     identity.individual.save()
+    bump_registry_version(IDENTITIES)
 
     trxl.log_operation(op_type=Operation.OpType.DELETE, entity_type='identity',
                        timestamp=datetime_utcnow(), args=op_args,
@@ -931,6 +990,9 @@ def move_identity(trxl, identity, individual):
     old_individual.save()
     individual.save()
 
+    MatchingKey.objects.filter(identity=identity).update(individual=individual)
+    bump_registry_version(IDENTITIES)
+
     trxl.log_operation(op_type=Operation.OpType.UPDATE, entity_type='identity',
                        timestamp=datetime_utcnow(), args=op_args,
                        target=op_args['identity'])
@@ -938,6 +1000,175 @@ def move_identity(trxl, identity, individual):
     return individual
 
 
+def move_identities(trxl, targets):
+    """Move the identities of several individuals at once.
+
+    This is the set-based version of `move_identity`. Each key of
+    `targets` is the main key of an individual whose identities will
+    be moved to the individual of its value. Identities and their
+    matching keys are updated with a single statement, no matter
+    how many individuals are given. Individuals are not checked for
+    locks; callers must check it before moving their identities.
+
+    :param trxl: TransactionsLog object from the method calling this one
+    :param targets: dictionary with the main key of the individual
+        where the identities of each individual will be moved
+
+    :returns: the number of identities moved
+    """
+    if not targets:
+        return 0
+
+    identities = Identity.objects.filter(individual__in=targets.keys())
+
+    operations = [
+        {
+            'op_type': Operation.OpType.UPDATE,
+            'entity_type': 'identity',
+            'timestamp': datetime_utcnow(),
+            'args': {'identity': uuid, 'individual': targets[mk]},
+            'target': uuid
+        }
+        for uuid, mk in identities.values_list('uuid', 'individual')
+    ]
+
+    target_mk = Case(*[When(individual=from_mk, then=Value(to_mk))
+                       for from_mk, to_mk in targets.items()],
+                     output_field=CharField())
+    now = datetime_utcnow()
+
+    identities.update(individual=target_mk, last_modified=now)
+    MatchingKey.objects.filter(individual__in=targets.keys()).update(individual=target_mk)
+    Individual.objects.filter(mk__in=set(targets.values())).update(last_modified=now)
+    bump_registry_version(IDENTITIES)
+
+    trxl.log_operations(operations)
+
+    return len(operations)
+
+
+def replace_enrollments(trxl, individuals, enrollments):
+    """Replace the enrollments of several individuals at once.
+
+    Enrollments of the individuals with the main keys in
+    `individuals` are removed and the new `enrollments` are
+    inserted in bulk. Individuals are not checked for locks
+    and dates are not validated; callers must do it.
+
+    :param trxl: TransactionsLog object from the method calling this one
+    :param individuals: main keys of the individuals whose enrollments
+        will be removed
+    :param enrollments: list of new `Enrollment` objects
+    """
+    current = Enrollment.objects.filter(individual__in=individuals).select_related('group')
+
+    operations = [
+        {
+            'op_type': Operation.OpType.DELETE,
+            'entity_type': 'enrollment',
+            'timestamp': datetime_utcnow(),
+            'args': {
+                'mk': enrollment.individual_id,
+                'group': enrollment.group.name,
+                'start': str(enrollment.start),
+                'end': str(enrollment.end)
+            },
+            'target': enrollment.individual_id
+        }
+        for enrollment in current
+    ]
+
+    current.delete()
+
+    try:
+        Enrollment.objects.bulk_create(enrollments)
+    except django.db.utils.IntegrityError as exc:
+        _handle_integrity_error(Enrollment, exc)
+
+    operations.extend([
+        {
+            'op_type': Operation.OpType.ADD,
+            'entity_type': 'enrollment',
+            'timestamp': datetime_utcnow(),
+            'args': {
+                'individual': enrollment.individual_id,
+                'group': enrollment.group.name,
+                'start': str(enrollment.start),
+                'end': str(enrollment.end)
+            },
+            'target': enrollment.individual_id
+        }
+        for enrollment in enrollments
+    ])
+
+    Individual.objects.filter(mk__in=individuals).update(last_modified=datetime_utcnow())
+
+    trxl.log_operations(operations)
+
+
+def update_profiles(trxl, profiles):
+    """Save several profiles at once.
+
+    Profiles are updated in bulk with the values they have. Like
+    `update_profile` without parameters, an update operation is
+    logged for each profile. Individuals are not checked for locks;
+    callers must do it.
+
+    :param trxl: TransactionsLog object from the method calling this one
+    :param profiles: list of `Profile` objects to update
+    """
+    if not profiles:
+        return
+
+    now = datetime_utcnow()
+
+    for profile in profiles:
+        profile.last_modified = now
+
+    Profile.objects.bulk_update(profiles, ['name', 'email', 'gender', 'gender_acc',
+                                           'is_bot', 'country', 'last_modified'])
+    Individual.objects.filter(mk__in=[profile.individual_id for profile in profiles]).update(last_modified=now)
+
+    trxl.log_operations([
+        {
+            'op_type': Operation.OpType.UPDATE,
+            'entity_type': 'profile',
+            'timestamp': datetime_utcnow(),
+            'args': {'individual': profile.individual_id},
+            'target': profile.individual_id
+        }
+        for profile in profiles
+    ])
+
+
+def delete_individuals(trxl, individuals):
+    """Remove several individuals at once.
+
+    This is the set-based version of `delete_individual`. Data
+    related to the individuals is also removed. Individuals are
+    not checked for locks; callers must do it.
+
+    :param trxl: TransactionsLog object from the method calling this one
+    :param individuals: main keys of the individuals to remove
+    """
+    if not individuals:
+        return
+
+    Individual.objects.filter(mk__in=individuals).delete()
+    bump_registry_version(IDENTITIES)
+
+    trxl.log_operations([
+        {
+            'op_type': Operation.OpType.DELETE,
+            'entity_type': 'individual',
+            'timestamp': datetime_utcnow(),
+            'args': {'individual': mk},
+            'target': mk
+        }
+        for mk in individuals
+    ])
+
+
 def lock(trxl, individual):
     """Lock a given individual.
 
@@ -988,6 +1219,18 @@ def unlock(trxl, individual):
     return individual
 
 
+def _add_matching_keys(identity):
+    """Add the matching keys of an identity to the matching index."""
+
+    keys = generate_matching_keys(identity.name, identity.email, identity.username)
+
+    MatchingKey.objects.bulk_create([
+        MatchingKey(identity=identity, individual=identity.individual,
+                    source=identity.source, criterion=criterion, value=value)
+        for criterion, value in keys
+    ])
+
+
 _MYSQL_DUPLICATE_ENTRY_ERROR_REGEX = re.compile(r"Duplicate entry '(?P<value>.+)' for key")
 
 
@@ -1017,6 +1260,9 @@ def move_domain(trxl, domain, organization):
 
     As a result, it returns the `Domain` object with the updated data.
 
+    The domain is queued to affiliate the individuals with an
+    email address on it (see `add_pending_affiliations`).
+
     :param trxl: TransactionsLog object from the method calling this one
     :param domain: domain to be moved
     :param organization: organization to move the domain to
@@ -1042,6 +1288,8 @@ def move_domain(trxl, domain, organization):
     old_organization.save()
     organization.save()
 
+    add_pending_affiliations(domains=[domain.domain])
+
     trxl.log_operation(op_type=Operation.OpType.UPDATE, entity_type='domain',
                        timestamp=datetime_utcnow(), args=op_args,
                        target=op_args['domain'])
@@ -1145,7 +1393,7 @@ def add_scheduled_task(trxl, job_type, interval=None, args=None, job_id=None):
 
     :returns: a new ImportIdentitiesTask
     """
-    unique_job_types = ['affiliate', 'unify']
+    unique_job_types = ['affiliate', 'affiliate_pending', 'unify']
 
     # Setting operation arguments before they are modified
     op_args = {
@@ -1359,6 +1607,119 @@ def delete_merge_recommendations(trxl, recommendations):
                        target='merge_recommendations')
 
 
+def move_merge_recommendations(trxl, targets):
+    """Move the pending merge recommendations of several individuals.
+
+    Each key of `targets` is the main key of an individual that will
+    be merged into the individual of its value. Pending merge
+    recommendations of these individuals are updated to point to
+    their targets, keeping the lowest main key as the first
+    individual of the pair. Recommendations that would recommend
+    merging an individual with itself, or that already exist,
+    are deleted. Recommendations are updated and deleted with
+    a few set-based statements, instead of one by one.
+
+    :param trxl: TransactionsLog object from the method calling this one
+    :param targets: dictionary with the main key of the individual
+        where each individual will be merged
+
+    :returns: a tuple with the number of recommendations updated
+        and deleted
+    """
+    if not targets:
+        return 0, 0
+
+    q = Q(individual1__in=targets.keys()) | Q(individual2__in=targets.keys())
+    recommendations = MergeRecommendation.objects.filter(q, applied__isnull=True)
+    recommendations = recommendations.order_by('id').values_list('id', 'individual1', 'individual2')
+
+    pairs = {}
+    for rec_id, mk1, mk2 in recommendations:
+        pairs[rec_id] = tuple(sorted((targets.get(mk1, mk1), targets.get(mk2, mk2))))
+
+    # Targets are never merged, so the new pairs can only
+    # clash with recommendations that are not moved
+    existing = MergeRecommendation.objects.filter(individual1__in={mk1 for mk1, _ in pairs.values()},
+                                                  individual2__in={mk2 for _, mk2 in pairs.values()})
+    existing = set(existing.exclude(id__in=pairs.keys()).values_list('individual1', 'individual2'))
+
+    updated = []
+    deleted = []
+    for rec_id, (mk1, mk2) in pairs.items():
+        if mk1 == mk2 or (mk1, mk2) in existing:
+            deleted.append(rec_id)
+        else:
+            existing.add((mk1, mk2))
+            updated.append(MergeRecommendation(id=rec_id, individual1_id=mk1, individual2_id=mk2))
+
+    MergeRecommendation.objects.filter(id__in=deleted).delete()
+    MergeRecommendation.objects.bulk_update(updated, ['individual1', 'individual2'])
+
+    op_args = {
+        'individuals': targets,
+        'updated': [rec.id for rec in updated],
+        'deleted': deleted
+    }
+    trxl.log_operation(op_type=Operation.OpType.UPDATE, entity_type='merge_recommendation',
+                       timestamp=datetime_utcnow(), args=op_args,
+                       target='merge_recommendations')
+
+    return len(updated), len(deleted)
+
+
+def reject_merge_recommendations(trxl, recommendations):
+    """Mark merge recommendations as rejected.
+
+    :param trxl: TransactionsLog object from the method calling this one
+    :param recommendations: MergeRecommendation queryset to reject
+
+    :raises ValueError: raised when `recommendations` is not a MergeRecommendation queryset;
+    """
+    if recommendations.model is not MergeRecommendation:
+        raise ValueError("'recommendations' must be a MergeRecommendation queryset")
+
+    # Setting operation arguments before they are modified
+    op_args = {
+        'merge_recommendations': [rec.id for rec in recommendations],
+        'applied': False
+    }
+
+    recommendations.update(applied=False)
+
+    trxl.log_operation(op_type=Operation.OpType.UPDATE, entity_type='merge_recommendation',
+                       timestamp=datetime_utcnow(), args=op_args,
+                       target='merge_recommendations')
+
+
+def update_merge_recommendations_scores(trxl, scores):
+    """Update the confidence score of several merge recommendations.
+
+    :param trxl: TransactionsLog object from the method calling this one
+    :param scores: dictionary with a tuple `(score, details)` for
+        the id of each recommendation to update
+
+    :returns: number of recommendations updated
+    """
+    if not scores:
+        return 0
+
+    updated = [
+        MergeRecommendation(id=rec_id, score=score, score_details=details)
+        for rec_id, (score, details) in scores.items()
+    ]
+    MergeRecommendation.objects.bulk_update(updated, ['score', 'score_details'])
+
+    op_args = {
+        'merge_recommendations': sorted(scores.keys()),
+        'scores': {rec_id: score for rec_id, (score, _) in scores.items()}
+    }
+    trxl.log_operation(op_type=Operation.OpType.UPDATE, entity_type='merge_recommendation',
+                       timestamp=datetime_utcnow(), args=op_args,
+                       target='merge_recommendations')
+
+    return len(updated)
+
+
 def review(trxl, individual, review_date):
     """Mark a given individual as reviewed.
 
@@ -141,11 +141,18 @@ def job_using_tenant(func):
         if not ctx:
             raise InvalidValueError(msg="Context not provided to the Job")
 
+        # Jobs can run other jobs synchronously, so the tenant
+        # of the calling job is restored when this one ends.
+        previous_tenant = tenant.get_db_tenant()
+
         tenant.set_db_tenant(ctx.tenant)
         try:
             return func(*args, **kwargs)
         finally:
-            tenant.unset_db_tenant()
+            if previous_tenant is None:
+                tenant.unset_db_tenant()
+            else:
+                tenant.set_db_tenant(previous_tenant)
     return using_tenant
 
 
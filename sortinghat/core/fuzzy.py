@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2021 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import re
+import zlib
+
+import numpy
+
+from ..utils import unaccent_string
+
+
+NGRAM_SIZE = 2
+
+# MinHash signatures are split in bands; two names are candidates
+# to match when all the hashes of any of their bands are equal.
+# With these values, names with a similarity of 0.6 are blocked
+# together with a probability over 0.9 while names with a
+# similarity under 0.2 rarely are.
+NUM_BANDS = 10
+ROWS_PER_BAND = 3
+
+_MERSENNE_PRIME = numpy.uint64((1 << 61) - 1)
+_MAX_HASH = (1 << 32) - 1
+_random = numpy.random.RandomState(seed=2147483647)
+_PERM_A = _random.randint(1, 1 << 31, size=NUM_BANDS * ROWS_PER_BAND, dtype=numpy.uint64)
+_PERM_B = _random.randint(0, 1 << 31, size=NUM_BANDS * ROWS_PER_BAND, dtype=numpy.uint64)
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def normalize_name(name):
+    """Normalize a name to compare it with other names.
+
+    The name is converted to lowercase and accents and symbols
+    are removed. Its words are sorted, so the order of first
+    names and surnames does not matter. For instance, 'Smith, Jóhn'
+    and 'john smith' have the same normalized form.
+
+    :param name: name to normalize
+
+    :returns: the normalized name
+    """
+    tokens = _TOKEN_PATTERN.findall(unaccent_string(name).lower())
+    return ' '.join(sorted(tokens))
+
+
+def name_ngrams(name):
+    """Get the set of character n-grams of a normalized name"""
+
+    if not name:
+        return set()
+
+    padded = f" {name} "
+
+    if len(padded) <= NGRAM_SIZE:
+        return {padded}
+
+    return {padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)}
+
+
+def name_similarity(name_a, name_b):
+    """Calculate the similarity between two names.
+
+    The similarity is the Jaccard index of the sets of character
+    n-grams of both normalized names. It goes from 0, when the
+    names do not share any n-gram, to 1, when they are equal.
+
+    :param name_a: first name to compare
+    :param name_b: second name to compare
+
+    :returns: the similarity between the names
+    """
+    ngrams_a = name_ngrams(normalize_name(name_a))
+    ngrams_b = name_ngrams(normalize_name(name_b))
+
+    if not ngrams_a or not ngrams_b:
+        return 0.0
+
+    return len(ngrams_a & ngrams_b) / len(ngrams_a | ngrams_b)
+
+
+def fuzzy_name_keys(name):
+    """Generate the blocking keys of a name for fuzzy matching.
+
+    Keys are calculated using locality-sensitive hashing over the
+    MinHash signature of the character n-grams of the normalized
+    name. Similar names are likely to share, at least, one key, so
+    only names sharing a key need to be compared with each other.
+
+    :param name: name to generate the keys for
+
+    :returns: a list of keys; empty when the name has no words
+    """
+    normalized = normalize_name(name)
+
+    if not normalized:
+        return []
+
+    hashes = numpy.array([zlib.crc32(ngram.encode('utf-8')) for ngram in name_ngrams(normalized)],
+                         dtype=numpy.uint64)
+    signature = ((_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % _MERSENNE_PRIME) & _MAX_HASH
+    signature = signature.min(axis=1)
+
+    keys = []
+
+    for band in range(NUM_BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        keys.append(f"{band}-" + '.'.join(f"{int(value):08x}" for value in rows))
+
+    return keys
@@ -19,6 +19,7 @@
 #     Jose Javier Merchante <jjmerchante@bitergia.com>
 #
 
+import itertools
 import logging
 
 from django.db import DataError
@@ -46,6 +47,10 @@ class IdentitiesImporter:
     or define:
      - :func:`get_individuals`, that returns a list of individuals with
         their identities.
+     - :func:`iter_individuals` (optional), that generates the individuals
+        one by one. Implement it when the data can be parsed incrementally,
+        so large sources are imported without keeping every individual
+        in memory.
      - :func:`__init__` (optional), with the required arguments that will
         be asked for the user in the UI.
      - :data:`NAME`, to define the name of the backend used for the UI.
@@ -72,7 +77,17 @@ class IdentitiesImporter:
         """
         raise NotImplementedError
 
-    def import_identities(self):
+    def iter_individuals(self):
+        """Generate individuals one by one.
+
+        By default, it iterates over the list returned by
+        `get_individuals`. Backends able to parse their data
+        incrementally override this method to yield each
+        individual as soon as it is complete.
+        """
+        yield from self.get_individuals()
+
+    def import_identities(self, offset=0, progress=None):
         """Import individuals information on the registry.
 
         New individuals, organizations and enrollment data will be added to the
@@ -85,28 +100,44 @@ class IdentitiesImporter:
         After being inserted, every new individual created will be post processed
         by the method `post_processing_individual`. By default, this method does
         nothing.
+
+        An interrupted import can be resumed setting `offset` to the number
+        of individuals already imported. These individuals will be fetched,
+        but not loaded again. Take into account this only works when the
+        backend returns the individuals in the same order on each run.
+
+        :param offset: number of fetched individuals to skip
+        :param progress: function called after loading each individual,
+            with the number of individuals processed, including the
+            skipped ones, and the number of identities imported so far
+            by this call
+
+        :returns: number of identities imported
         """
         logger.info("Importing individuals")
 
-        individuals = self.get_individuals()
+        individuals = self.iter_individuals()
 
         total = 0
+        processed = offset
 
-        for individual in individuals:
+        for individual in itertools.islice(individuals, offset, None):
             uuid, nidentities = self.__load_identities(individual.identities)
+            processed += 1
 
-            if not uuid:
-                continue
+            if uuid:
+                self.__load_enrollments(individual.enrollments, uuid)
 
-            self.__load_enrollments(individual.enrollments, uuid)
+                if individual.profile:
+                    # Use the profile defined in the individual
+                    self.__load_profile(individual.profile, uuid)
 
-            if individual.profile:
-                # Use the profile defined in the individual
-                self.__load_profile(individual.profile, uuid)
+                self.post_process_individual(individual, uuid)
 
-            self.post_process_individual(individual, uuid)
+                total += nidentities
 
-            total += nidentities
+            if progress:
+                progress(processed, total)
 
         logger.info("Individuals loaded")
 
@@ -23,6 +23,7 @@ from urllib.request import urlopen
 
 import dateutil.parser
 import dateutil.tz
+import io
 import logging
 import re
 
@@ -51,22 +52,26 @@ class GitdmImporter(IdentitiesImporter):
     def get_individuals(self):
         """Get the individuals for the given url"""
 
-        data = self._fetch_data(self.url)
+        return list(self.iter_individuals())
+
+    def iter_individuals(self):
+        """Generate the individuals for the given url one by one"""
+
         # Some files include '!' instead of '@'
-        data = data.replace('!', '@')
+        data = (line.replace('!', '@') for line in self._fetch_data(self.url))
 
         aliases = None
         if self.aliases_url:
             aliases = self._fetch_data(self.aliases_url)
 
-        parser = GitdmParser(aliases=aliases, email_to_employer=data,
-                             email_validation=self.email_validation)
-        return parser.individuals
+        parser = GitdmParser(email_validation=self.email_validation)
+        return parser.iter_individuals(aliases=aliases, email_to_employer=data)
 
     def _fetch_data(self, url):
+        """Generate the lines of the file while it is read"""
+
         with urlopen(url) as fd:
-            content = fd.read().decode()
-        return content
+            yield from io.TextIOWrapper(fd, encoding='utf-8')
 
 
 class GitdmParser(object):
@@ -111,13 +116,9 @@ class GitdmParser(object):
         self.source = source
         self.email_validation = email_validation
 
-        # Raw data
-        self.__raw_identities = {}
-        self.__raw_aliases = {}
-        self.__raw_orgs = {}
-
-        self.__parse(aliases, email_to_employer,
-                     domain_to_employer)
+        for individual in self.iter_individuals(aliases, email_to_employer,
+                                                domain_to_employer):
+            self._individuals[individual.uuid] = individual
 
     @property
     def individuals(self):
@@ -129,84 +130,105 @@ class GitdmParser(object):
         orgs = [o for o in self._organizations.values()]
         return orgs
 
-    def __parse(self, aliases, email_to_employer, domain_to_employer):
-        """Parse Gitdm streams"""
+    def iter_individuals(self, aliases=None, email_to_employer=None, domain_to_employer=None):
+        """Parse Gitdm streams and generate their individuals.
+
+        Streams are read line by line, so they can be strings or
+        iterables of lines, like files. The enrollments of an email
+        address depend on all of its lines and aliases can be
+        anywhere in their stream, so both streams are read into
+        compact indexes of strings and dates first. Individuals are
+        created from these indexes one at a time, when they are
+        requested, in the same order `individuals` stores them.
+
+        :param aliases: aliases stream
+        :param email_to_employer: enrollments stream
+        :param domain_to_employer: organizations stream
+
+        :returns: a generator of individuals
+        """
         self.__parse_organizations(domain_to_employer)
-        self.__parse_identities(aliases, email_to_employer)
 
-    def __parse_identities(self, aliases, email_to_employer):
-        """Parse Gitdm identities"""
+        raw_aliases = self.__parse_aliases_stream(aliases)
+        raw_identities = self.__parse_email_to_employer_stream(email_to_employer)
 
-        # Parse streams
-        self.__parse_aliases_stream(aliases)
-        self.__parse_email_to_employer_stream(email_to_employer)
+        # Aliases of each email address, in order of appearance
+        canonicals = {}
+        for alias, email in raw_aliases.items():
+            canonicals.setdefault(email, []).append(alias)
+
+        # Addresses with enrollments for each individual with aliases
+        enrolled = {}
+        for email in raw_identities:
+            canonical = email if email in canonicals else raw_aliases.get(email, None)
+            if canonical is not None:
+                enrolled.setdefault(canonical, []).append(email)
 
         # Create individuals from aliases list
-        for alias, email in self.__raw_aliases.items():
-            individual = self._individuals.get(email, None)
+        for email, alias_list in canonicals.items():
+            individual = Individual(uuid=email)
+            individual.identities.append(self.__create_identity(email))
 
-            if not individual:
-                individual = Individual(uuid=email)
-                e = re.match(self.EMAIL_ADDRESS_REGEX, email, re.UNICODE)
-                if e:
-                    identity = Identity(email=email, source=self.source)
-                else:
-                    identity = Identity(username=email, source=self.source)
+            for alias in alias_list:
+                individual.identities.append(self.__create_identity(alias))
 
-                individual.identities.append(identity)
+            for address in enrolled.get(email, []):
+                self.__add_enrollments(individual, raw_identities[address])
 
-                self._individuals[email] = individual
+            yield individual
 
-            # Create identity with alias
-            e = re.match(self.EMAIL_ADDRESS_REGEX, alias, re.UNICODE)
-            if e:
-                identity = Identity(email=alias, source=self.source)
-            else:
-                identity = Identity(username=alias, source=self.source)
+        # Create individuals from enrollments list
+        for email, enrs in raw_identities.items():
+            if email in canonicals or email in raw_aliases:
+                continue
+
+            individual = Individual(uuid=email)
+            identity = Identity(email=email, source=self.source)
             individual.identities.append(identity)
 
-        # Create individuals from enrollments list
-        for email, enrs in self.__raw_identities.items():
+            self.__add_enrollments(individual, enrs)
 
-            if email in self._individuals:
-                individual = self._individuals[email]
-            elif email in self.__raw_aliases:
-                canonical = self.__raw_aliases[email]
-                individual = self._individuals[canonical]
-            else:
-                individual = Individual(uuid=email)
-                identity = Identity(email=email, source=self.source)
-                individual.identities.append(identity)
-                self._individuals[email] = individual
+            yield individual
+
+    def __create_identity(self, value):
+        """Create an identity using an email address or a username"""
+
+        e = re.match(self.EMAIL_ADDRESS_REGEX, value, re.UNICODE)
+        if e:
+            return Identity(email=value, source=self.source)
+        else:
+            return Identity(username=value, source=self.source)
 
-            # Assign enrollments
-            enrs.sort(key=lambda r: r[1])
-            start_date = MIN_PERIOD_DATE
+    def __add_enrollments(self, individual, enrs):
+        """Assign the enrollments of an email address to an individual"""
 
-            for rol in enrs:
-                name = rol[0]
-                org = self._organizations.get(name, None)
+        enrs = sorted(enrs, key=lambda r: r[1])
+        start_date = MIN_PERIOD_DATE
 
-                if not org:
-                    org = Organization(name=name)
-                    self._organizations[name] = org
+        for rol in enrs:
+            name = rol[0]
+            org = self._organizations.get(name, None)
 
-                end_date = rol[1]
+            if not org:
+                org = Organization(name=name)
+                self._organizations[name] = org
 
-                enrollment = Enrollment(start=start_date, end=end_date,
-                                        organization=org)
-                individual.enrollments.append(enrollment)
+            end_date = rol[1]
 
-                if end_date != MAX_PERIOD_DATE:
-                    start_date = end_date
+            enrollment = Enrollment(start=start_date, end=end_date,
+                                    organization=org)
+            individual.enrollments.append(enrollment)
+
+            if end_date != MAX_PERIOD_DATE:
+                start_date = end_date
 
     def __parse_organizations(self, domain_to_employer):
         """Parse Gitdm organizations"""
 
         # Parse streams
-        self.__parse_domain_to_employer_stream(domain_to_employer)
+        raw_orgs = self.__parse_domain_to_employer_stream(domain_to_employer)
 
-        for org, doms in self.__raw_orgs.items():
+        for org, doms in raw_orgs.items():
             o = Organization(name=org)
             for dom in doms:
                 o.domains.append(dom)
@@ -227,8 +249,10 @@ class GitdmParser(object):
         jdoe@example.com      john_doe@example.com
         jdoe@example          john_doe@example.com
         """
+        raw_aliases = {}
+
         if not stream:
-            return
+            return raw_aliases
 
         f = self.__parse_aliases_line
 
@@ -236,7 +260,9 @@ class GitdmParser(object):
             alias = alias_entries[0]
             username = alias_entries[1]
 
-            self.__raw_aliases[alias] = username
+            raw_aliases[alias] = username
+
+        return raw_aliases
 
     def __parse_email_to_employer_stream(self, stream):
         """Parse email to employer stream.
@@ -254,23 +280,27 @@ class GitdmParser(object):
         jdoe@example.com    Example Company   # John Doe
         jsmith@example.com    Bitergia < 2015-01-01  # John Smith - Bitergia
         """
+        raw_identities = {}
+
         if not stream:
-            return
+            return raw_identities
 
         f = self.__parse_email_to_employer_line
 
+        # Share the same string for each organization name
+        names = {}
+
         for rol in self.__parse_stream(stream, f):
             email = rol[0]
-            org = rol[1]
+            org = names.setdefault(rol[1], rol[1])
             rol_date = rol[2]
 
-            if org not in self.__raw_orgs:
-                self.__raw_orgs[org] = []
-
-            if email not in self.__raw_identities:
-                self.__raw_identities[email] = [(org, rol_date)]
+            if email not in raw_identities:
+                raw_identities[email] = [(org, rol_date)]
             else:
-                self.__raw_identities[email].append((org, rol_date))
+                raw_identities[email].append((org, rol_date))
+
+        return raw_identities
 
     def __parse_domain_to_employer_stream(self, stream):
         """Parse domain to employer stream.
@@ -288,8 +318,10 @@ class GitdmParser(object):
         libresoft.es       LibreSoft
         example.org        LibreSoft
         """
+        raw_orgs = {}
+
         if not stream:
-            return
+            return raw_orgs
 
         f = self.__parse_domain_to_employer_line
 
@@ -297,10 +329,12 @@ class GitdmParser(object):
             org = o[0]
             dom = o[1]
 
-            if org not in self.__raw_orgs:
-                self.__raw_orgs[org] = []
+            if org not in raw_orgs:
+                raw_orgs[org] = []
 
-            self.__raw_orgs[org].append(dom)
+            raw_orgs[org].append(dom)
+
+        return raw_orgs
 
     def __parse_stream(self, stream, parse_line):
         """Generic method to parse gitdm streams"""
@@ -309,7 +343,11 @@ class GitdmParser(object):
             raise InvalidFormatError(cause='stream cannot be empty or None')
 
         nline = 0
-        lines = stream.split('\n')
+
+        if isinstance(stream, str):
+            lines = stream.split('\n')
+        else:
+            lines = (line.rstrip('\n') for line in stream)
 
         for line in lines:
             nline += 1
@@ -21,6 +21,7 @@
 #
 
 import email.utils
+import io
 import logging
 import re
 from urllib.request import urlopen
@@ -48,10 +49,16 @@ class MailmapImporter(IdentitiesImporter):
         parser = MailmapParser(data, has_orgs=False)
         return parser.individuals
 
+    def iter_individuals(self):
+        data = self._fetch_data()
+        parser = MailmapParser(has_orgs=False)
+        return parser.iter_individuals(data)
+
     def _fetch_data(self):
+        """Generate the lines of the file while it is read"""
+
         with urlopen(self.url) as fd:
-            content = fd.read().decode()
-        return content
+            yield from io.TextIOWrapper(fd, encoding='utf-8')
 
 
 class MailmapParser:
@@ -70,7 +77,10 @@ class MailmapParser:
     are the name of the organizations and each organization object is
     related to a list of domains.
 
-    :param data: data to parse
+    When no data is given, nothing is parsed on initialization.
+    Use `iter_individuals` to parse a stream incrementally.
+
+    :param data: data to parse; a string or an iterable of lines
     :param has_orgs: set if the stream maps data about organizations
     :param source: source of the identities
 
@@ -79,12 +89,14 @@ class MailmapParser:
     """
     LINES_TO_IGNORE_REGEX = r"^\s*(?:#.*)?\s*$"
 
-    def __init__(self, data, has_orgs=False, source='mailmap'):
+    def __init__(self, data=None, has_orgs=False, source='mailmap'):
         self._individuals = {}
         self._organizations = {}
+        self.has_orgs = has_orgs
         self.source = source
 
-        self.__parse(data, has_orgs)
+        if data is not None:
+            self.__parse(data)
 
     @property
     def individuals(self):
@@ -96,7 +108,7 @@ class MailmapParser:
         orgs = [o for o in self._organizations.values()]
         return orgs
 
-    def __parse(self, stream, has_orgs):
+    def iter_individuals(self, stream):
         """Parse identities and organizations using mailmap format.
 
         Mailmap format is a text plain document that stores on each
@@ -113,63 +125,103 @@ class MailmapParser:
 
             Organization Name <org@email.xx> Proper Name <proper@email.xx>
 
-        :parse data: mailmap stream to parse
+        Lines are read one by one and consecutive lines of the same
+        email address are grouped in one individual, which is
+        generated once the lines of the next address are found.
+        If an address appears again later in the stream, a new
+        individual is generated with the first identity of that
+        address and the new aliases or enrollments, so they are
+        imported into the same individual.
+
+        Aliases and enrollments are released once their individual
+        is generated, but the name of the first identity of every
+        address is kept until the whole stream is parsed. Memory
+        still grows with the number of distinct addresses, not
+        with the number of lines.
+
+        :param stream: mailmap stream to parse; a string or
+            an iterable of lines
+
+        :returns: a generator of individuals
 
         :raise InvalidFormatError: raised when the format of the stream is
             not valid.
         """
-        if has_orgs:
-            self.__parse_organizations(stream)
+        if self.has_orgs:
+            parse_entry = self.__parse_organization_entry
         else:
-            self.__parse_identities(stream)
+            parse_entry = self.__parse_identity_entry
 
-    def __parse_organizations(self, stream):
-        """Parse organizations stream"""
+        # Name of the first identity of each address
+        names = {}
+        individual = None
 
         for aliases in self.__parse_stream(stream):
-            # Parse identity
-            identity = self.__parse_alias(aliases[1])
+            identity, entries = parse_entry(aliases)
             uuid = identity.email
 
-            individual = self._individuals.get(uuid, None)
+            if individual is None or individual.uuid != uuid:
+                if individual is not None:
+                    yield individual
+
+                if uuid in names:
+                    identity = Identity(name=names[uuid], email=uuid, username=None,
+                                        source=self.source)
+                else:
+                    names[uuid] = identity.name
 
-            if not individual:
                 individual = Individual(uuid=uuid)
                 individual.identities.append(identity)
-                self._individuals[uuid] = individual
 
-            # Parse organization
-            mailmap_id = aliases[0]
-            name = self.__encode(mailmap_id[0])
+            if self.has_orgs:
+                individual.enrollments.extend(entries)
+            else:
+                individual.identities.extend(entries)
+
+        if individual is not None:
+            yield individual
+
+    def __parse(self, stream):
+        """Parse the whole stream, merging the individuals of the same address"""
+
+        for individual in self.iter_individuals(stream):
+            stored = self._individuals.get(individual.uuid, None)
 
-            if name in MAILMAP_NO_ORGS:
+            if not stored:
+                self._individuals[individual.uuid] = individual
                 continue
 
-            org = Organization(name=name)
-            self._organizations[name] = org
+            # The first identity was already added to this individual
+            stored.identities.extend(individual.identities[1:])
+            stored.enrollments.extend(individual.enrollments)
 
-            enrollment = Enrollment(start=MIN_PERIOD_DATE, end=MAX_PERIOD_DATE,
-                                    organization=org, individual=individual)
-            individual.enrollments.append(enrollment)
+    def __parse_organization_entry(self, aliases):
+        """Parse the identity and the enrollments of an organizations line"""
 
-    def __parse_identities(self, stream):
-        """Parse identities stream"""
+        identity = self.__parse_alias(aliases[1])
 
-        for aliases in self.__parse_stream(stream):
-            identity = self.__parse_alias(aliases[0])
-            uuid = identity.email
+        # Parse organization
+        mailmap_id = aliases[0]
+        name = self.__encode(mailmap_id[0])
 
-            individual = self._individuals.get(uuid, None)
+        if name in MAILMAP_NO_ORGS:
+            return identity, []
 
-            if not individual:
-                individual = Individual(uuid=uuid)
-                individual.identities.append(identity)
+        org = Organization(name=name)
+        self._organizations[name] = org
 
-            for alias in aliases[1:]:
-                identity = self.__parse_alias(alias)
-                individual.identities.append(identity)
+        enrollment = Enrollment(start=MIN_PERIOD_DATE, end=MAX_PERIOD_DATE,
+                                organization=org)
 
-            self._individuals[uuid] = individual
+        return identity, [enrollment]
+
+    def __parse_identity_entry(self, aliases):
+        """Parse the identity and its aliases of an identities line"""
+
+        identity = self.__parse_alias(aliases[0])
+        aliases = [self.__parse_alias(alias) for alias in aliases[1:]]
+
+        return identity, aliases
 
     def __parse_alias(self, alias):
         name = self.__encode(alias[0])
@@ -182,7 +234,11 @@ class MailmapParser:
         """Generic method to parse mailmap streams"""
 
         nline = 0
-        lines = stream.split('\n')
+
+        if isinstance(stream, str):
+            lines = stream.split('\n')
+        else:
+            lines = (line.rstrip('\n') for line in stream)
 
         for line in lines:
             nline += 1
@@ -21,21 +21,25 @@
 #
 
 import datetime
+import hashlib
 import itertools
+import json
 import logging
+import math
+import time
 
 import django_rq
 import django_rq.utils
 import rq
 import redis.exceptions
 
-from django.core.exceptions import ObjectDoesNotExist
-from django.db import IntegrityError, transaction, connection
+from django.conf import settings
+from django.db import transaction, connection, connections, router
 from grimoirelab_toolkit.datetime import datetime_utcnow
-from rq.job import Job
+from rq.job import Job, JobStatus
 
-from .db import find_individual_by_uuid, find_organization
-from .api import enroll, merge, update_profile, add_scheduled_task, delete_scheduled_task
+from .db import find_individuals_keys, update_merge_recommendations_scores
+from .api import enroll, merge, bulk_merge, update_profile, add_scheduled_task, delete_scheduled_task
 from .context import SortingHatContext
 from .decorators import job_using_tenant, job_callback_using_tenant
 from .errors import (BaseError,
@@ -46,16 +50,31 @@ from .errors import (BaseError,
 from .importer.backend import find_import_identities_backends
 from .log import TransactionsLog
 from .models import (Individual,
+                     Organization,
+                     Alias,
                      AffiliationRecommendation,
                      MergeRecommendation,
                      GenderRecommendation,
                      ScheduledTask,
                      MIN_PERIOD_DATE)
+from .pending import (INDIVIDUALS,
+                      DOMAINS,
+                      pop_pending_affiliations,
+                      restore_pending_affiliations)
+from .recommendations.affiliation import find_individuals_by_domains
 from .recommendations.engine import RecommendationEngine
+from .recommendations.matching import find_match_groups, score_matches
 
 
 MAX_CHUNK_SIZE = 2000
+MERGE_CHUNK_SIZE = 1000
+UNIFY_CHUNK_TIMEOUT = 60 * 60  # seconds
+UNIFY_WAIT_TIMEOUT = 5 * 60  # seconds
+CHECKPOINT_INTERVAL = 30  # seconds
+CHECKPOINT_TTL = 60 * 60 * 24 * 7  # seconds
+PROGRESS_INTERVAL = 5  # seconds
 DEFAULT_JOB_RESULT_TTL = 60 * 60 * 24 * 7  # seconds
+RECOMMENDATIONS_BATCH_SIZE = 5000
 
 
 logger = logging.getLogger(__name__)
@@ -159,6 +178,378 @@ class SortingHatJob(Job):
         return result
 
 
+class JobCheckpoint:
+    """Progress of a job that can be resumed.
+
+    Long running jobs store their progress in the metadata of
+    the job, under the key `checkpoint`. When the job is run
+    again after a failure (i.e. the worker died or it was
+    redeployed), it is resumed from the last checkpoint instead
+    of processing everything again. This happens when the job
+    is requeued or retried, or when a failed scheduled task is
+    rescheduled.
+
+    The checkpoint is only valid for the same arguments of the
+    job. When the arguments do not match, the job starts from
+    scratch. To reduce the overhead, the progress is written
+    at most once every `interval` seconds, unless the save is
+    forced.
+
+    The state of the checkpoint should only keep where the job
+    is (i.e. a cursor) and some counters. Results and errors
+    generated by the job are added with `add_result` and
+    `add_errors`. They are kept out of the metadata, in a Redis
+    hash and a Redis list, and only the ones added since the
+    last save are written on each save, so the cost of a save
+    does not grow while the job runs. These keys are named after
+    the id of the checkpoint, which is the id of the job that
+    created it. The id is kept in the metadata, so a job created
+    from the metadata of another one (i.e. a rescheduled task)
+    finds the results and errors of the previous runs.
+
+    Large data the job needs to resume, and that is written only
+    once (i.e. the groups of individuals to merge), is kept out
+    of the metadata too, using `store` and `load`.
+
+    :param job: RQ job which progress is stored
+    :param interval: minimum number of seconds between saves
+    """
+    META_KEY = 'checkpoint'
+    RESULTS_KEY = 'sortinghat:checkpoint:{checkpoint_id}:results'
+    ERRORS_KEY = 'sortinghat:checkpoint:{checkpoint_id}:errors'
+    DATA_KEY = 'sortinghat:checkpoint:{checkpoint_id}:data'
+
+    def __init__(self, job, interval=CHECKPOINT_INTERVAL):
+        self.job = job
+        self.interval = interval
+        self.results = {}
+        self.errors = []
+        self._digest = self._args_digest(job)
+        self._last_save = time.monotonic()
+        self._new_results = {}
+        self._new_errors = []
+
+        checkpoint = job.meta.get(self.META_KEY, None)
+
+        if checkpoint and checkpoint.get('digest', None) == self._digest:
+            self._set_id(checkpoint.get('id', job.id))
+            self.state = checkpoint['state']
+            self._load_results()
+            logger.info(f"Resuming job {job.id} from its last checkpoint")
+        else:
+            if checkpoint:
+                # Results of a checkpoint for other arguments
+                self._set_id(checkpoint.get('id', job.id))
+                self._delete_results()
+            self._set_id(job.id)
+            self.state = {}
+            self._delete_results()
+
+    @property
+    def resumed(self):
+        """Whether the job was resumed from a checkpoint"""
+
+        return bool(self.state)
+
+    def update(self, force=False, **kwargs):
+        """Update the progress of the job.
+
+        :param force: write the checkpoint even when the
+            interval did not expire
+        :param kwargs: values of the progress to update
+        """
+        self.state.update(kwargs)
+
+        if force or time.monotonic() - self._last_save >= self.interval:
+            self.save()
+
+    def add_result(self, key, value):
+        """Add a result of the job.
+
+        The result is written with the next save.
+
+        :param key: key of the result
+        :param value: value of the result
+        """
+        self.results[key] = value
+        self._new_results[key] = value
+
+    def add_errors(self, errors):
+        """Add a list of errors of the job.
+
+        The errors are written with the next save.
+
+        :param errors: list of errors to add
+        """
+        self.errors.extend(errors)
+        self._new_errors.extend(errors)
+
+    def store(self, key, value):
+        """Store data needed to resume the job.
+
+        The data is written immediately and it is not part of
+        the metadata, so it is not written again on each save.
+
+        :param key: key of the data
+        :param value: value of the data
+        """
+        pipe = self.job.connection.pipeline()
+        pipe.hset(self._data_key, key, self.job.serializer.dumps(value))
+        pipe.expire(self._data_key, CHECKPOINT_TTL)
+        pipe.execute()
+
+    def load(self, key, default=None):
+        """Load data stored with `store`.
+
+        :param key: key of the data
+        :param default: value returned when the data is not found
+
+        :returns: the value of the data
+        """
+        value = self.job.connection.hget(self._data_key, key)
+
+        if value is None:
+            return default
+        return self.job.serializer.loads(value)
+
+    def save(self):
+        """Write the checkpoint into the metadata of the job"""
+
+        if self._new_results or self._new_errors:
+            pipe = self.job.connection.pipeline()
+            if self._new_results:
+                pipe.hset(self._results_key,
+                          mapping={key: self.job.serializer.dumps(value)
+                                   for key, value in self._new_results.items()})
+                pipe.expire(self._results_key, CHECKPOINT_TTL)
+            if self._new_errors:
+                pipe.rpush(self._errors_key,
+                           *[self.job.serializer.dumps(error) for error in self._new_errors])
+                pipe.expire(self._errors_key, CHECKPOINT_TTL)
+            pipe.execute()
+
+            self._new_results = {}
+            self._new_errors = []
+
+        self.job.meta[self.META_KEY] = {
+            'id': self.id,
+            'digest': self._digest,
+            'state': self.state
+        }
+        self.job.save_meta()
+        self._last_save = time.monotonic()
+
+    def clear(self):
+        """Remove the checkpoint once the job is completed"""
+
+        self.state = {}
+        self._new_results = {}
+        self._new_errors = []
+        self._delete_results()
+
+        if self.job.meta.pop(self.META_KEY, None) is not None:
+            self.job.save_meta()
+
+    def _set_id(self, checkpoint_id):
+        self.id = checkpoint_id
+        self._results_key = self.RESULTS_KEY.format(checkpoint_id=checkpoint_id)
+        self._errors_key = self.ERRORS_KEY.format(checkpoint_id=checkpoint_id)
+        self._data_key = self.DATA_KEY.format(checkpoint_id=checkpoint_id)
+
+    def _load_results(self):
+        conn = self.job.connection
+
+        for key, value in conn.hgetall(self._results_key).items():
+            self.results[key.decode('utf-8')] = self.job.serializer.loads(value)
+
+        for error in conn.lrange(self._errors_key, 0, -1):
+            self.errors.append(self.job.serializer.loads(error))
+
+    def _delete_results(self):
+        self.job.connection.delete(self._results_key, self._errors_key, self._data_key)
+
+    @staticmethod
+    def _args_digest(job):
+        # The context is not part of the arguments to compare
+        args = list(job.args) if 'ctx' in job.kwargs else list(job.args[1:])
+        kwargs = {k: v for k, v in job.kwargs.items() if k != 'ctx'}
+        data = json.dumps([job.func_name, args, kwargs], sort_keys=True, default=str)
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+class JobProgress:
+    """Live progress of a running job.
+
+    Jobs publish how they are progressing in the metadata of
+    the job, under the key `progress`, so it can be checked
+    while the job is still running. A job runs one or more
+    phases (i.e. `matching` and `merging`); for the current
+    phase, the number of items processed, the total number of
+    items, when it is known, the rate of items processed per
+    second and the estimated time to finish it are published.
+    The time spent on each phase is also kept, so it is
+    available once the job has finished.
+
+    To reduce the overhead, the progress is written at most
+    once every `interval` seconds, unless the save is forced.
+    Starting or finishing a phase always writes the progress.
+
+    :param job: RQ job which progress is published
+    :param interval: minimum number of seconds between saves
+    """
+    META_KEY = 'progress'
+
+    def __init__(self, job, interval=PROGRESS_INTERVAL):
+        self.job = job
+        self.interval = interval
+        self.phase = None
+        self.processed = 0
+        self.total = None
+        self.phases = {}
+        self._initial = 0
+        self._started_at = None
+        self._last_save = time.monotonic()
+
+    def start(self, phase, total=None, processed=0):
+        """Start a new phase of the job.
+
+        :param phase: name of the phase
+        :param total: number of items to process in the phase
+        :param processed: number of items already processed,
+            i.e. when the job was resumed
+        """
+        self._close_phase()
+
+        self.phase = phase
+        self.total = total
+        self.processed = processed
+        self._initial = processed
+        self._started_at = time.monotonic()
+
+        self.save()
+
+    def update(self, processed=None, advance=0, force=False):
+        """Update the number of items processed in the phase.
+
+        :param processed: number of items processed so far
+        :param advance: number of items processed since the
+            last update; ignored when `processed` is given
+        :param force: write the progress even when the
+            interval did not expire
+        """
+        if processed is None:
+            processed = self.processed + advance
+
+        self.processed = processed
+
+        if force or time.monotonic() - self._last_save >= self.interval:
+            self.save()
+
+    def finish(self):
+        """Finish the current phase and write the progress"""
+
+        self._close_phase()
+        self.phase = None
+        self.save()
+
+    def save(self):
+        """Write the progress into the metadata of the job"""
+
+        rate, eta = None, None
+
+        if self.phase:
+            elapsed = time.monotonic() - self._started_at
+            if elapsed > 0:
+                rate = (self.processed - self._initial) / elapsed
+            if rate and self.total is not None:
+                eta = max(self.total - self.processed, 0) / rate
+
+        self.job.meta[self.META_KEY] = {
+            'phase': self.phase,
+            'processed': self.processed,
+            'total': self.total,
+            'rate': rate,
+            'eta': eta,
+            'phases': self.phases,
+            'updated_at': datetime_utcnow()
+        }
+        self.job.save_meta()
+        self._last_save = time.monotonic()
+
+    def _close_phase(self):
+        if not self.phase:
+            return
+
+        elapsed = time.monotonic() - self._started_at
+        self.phases[self.phase] = self.phases.get(self.phase, 0) + elapsed
+
+        logger.info(
+            f"Job {self.job.id} phase '{self.phase}' completed; "
+            f"{self.processed} items processed in {elapsed:.2f} seconds"
+        )
+
+
+class RecommendationsWriter:
+    """Store recommendations in the database in batches.
+
+    Recommendations are kept in a buffer and written with a few
+    bulk queries when the buffer is full, instead of running one
+    transaction per recommendation. Call `flush` to write the
+    recommendations left in the buffer.
+
+    Existing affiliation and merge recommendations are not
+    duplicated; conflicting affiliation rows are ignored, while
+    the score of conflicting merge rows is updated. Gender
+    recommendations are updated when the gender or the accuracy
+    change, setting them as not applied.
+
+    Recommendations are added with `add`, with these arguments
+    depending on the model:
+      - `AffiliationRecommendation`: main key of the individual
+        and name of the organization
+      - `MergeRecommendation`: main keys, or UUIDs, of both
+        individuals
+      - `GenderRecommendation`: main key of the individual,
+        gender and accuracy
+
+    :param model: recommendation model to store
+    :param batch_size: maximum number of recommendations
+        written at once
+    """
+    def __init__(self, model, batch_size=RECOMMENDATIONS_BATCH_SIZE):
+        stores = {
+            AffiliationRecommendation: _store_affiliation_recommendations,
+            MergeRecommendation: _store_merge_recommendations,
+            GenderRecommendation: _store_gender_recommendations
+        }
+
+        self.model = model
+        self.batch_size = batch_size
+        self.buffer = []
+        self._store = stores[model]
+
+    def add(self, *recommendation):
+        """Add a recommendation to the buffer, writing it when full"""
+
+        self.buffer.append(recommendation)
+
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write the recommendations of the buffer"""
+
+        if not self.buffer:
+            return
+
+        with transaction.atomic():
+            self._store(self.buffer, self.batch_size)
+
+        logger.debug(f"{len(self.buffer)} {self.model.__name__} stored")
+
+        self.buffer = []
+
+
 @django_rq.job
 @job_using_tenant
 def recommend_affiliations(ctx, uuids=None, last_modified=MIN_PERIOD_DATE):
@@ -204,6 +595,8 @@ def recommend_affiliations(ctx, uuids=None, last_modified=MIN_PERIOD_DATE):
     # will generate the 'enroll' transactions.
     trxl = TransactionsLog.open('recommend_affiliations', job_ctx)
 
+    writer = RecommendationsWriter(AffiliationRecommendation)
+
     for rec in engine.recommend('affiliation', uuids, last_modified):
         # Avoid storing empty recommendations
         if not rec.options:
@@ -212,21 +605,9 @@ def recommend_affiliations(ctx, uuids=None, last_modified=MIN_PERIOD_DATE):
         results[rec.key] = rec.options
 
         for org_name in rec.options:
-            try:
-                org = find_organization(org_name)
-            except NotFoundError:
-                logger.warning(f"Job {job.id} 'Organization {org_name} not found'")
-                continue
+            writer.add(rec.mk, org_name)
 
-            try:
-                with transaction.atomic():
-                    AffiliationRecommendation.objects.create(individual_id=rec.mk,
-                                                             organization=org)
-            except (IntegrityError, ObjectDoesNotExist):
-                logger.debug(
-                    f"Job {job.id} 'Unable to create affiliation recommendation for"
-                    f"Individual {rec.key} and Organization {org_name}"
-                )
+    writer.flush()
 
     trxl.close()
 
@@ -265,7 +646,7 @@ def recommend_matches(ctx, source_uuids,
     :param source_uuids: list of individuals identifiers to look matches for
     :param target_uuids: list of individuals identifiers where to look for matches
     :param criteria: list of fields which the match will be based on
-        (`email`, `name` and/or `username`)
+        (`email`, `name`, `username` and/or `fuzzy_name`)
     :param exclude: if set to `True`, the results list will ignore individual identities
         if any value from the `email`, `name`, or `username` fields are found in the
         RecommenderExclusionTerm table. Otherwise, results will not ignore them.
@@ -306,25 +687,17 @@ def recommend_matches(ctx, source_uuids,
                                        match_source,
                                        guess_github_user,
                                        last_modified)
+    writer = RecommendationsWriter(MergeRecommendation)
+
     for rec in recommendations:
         results[rec.key] = list(rec.options)
-        # Store matches in the database
+        # Store matches in the database. In verbose mode,
+        # matches are identities; the writer finds their
+        # individuals.
         for match in rec.options:
-            if verbose:
-                try:
-                    match_indiv = find_individual_by_uuid(match)
-                    match = match_indiv.mk
-                except NotFoundError:
-                    logger.info(f"'Individual {match} does not exists'")
-                    continue
+            writer.add(rec.mk, match)
 
-            indiv_1, indiv_2 = rec.mk, match
-
-            try:
-                with transaction.atomic():
-                    MergeRecommendation.objects.create(individual1_id=indiv_1, individual2_id=indiv_2)
-            except (IntegrityError, ObjectDoesNotExist):
-                pass
+    writer.flush()
 
     trxl.close()
 
@@ -369,6 +742,8 @@ def recommend_gender(ctx, uuids, exclude=True, no_strict_matching=False):
 
     trxl = TransactionsLog.open('recommend_gender', job_ctx)
 
+    writer = RecommendationsWriter(GenderRecommendation)
+
     for rec in engine.recommend('gender', uuids, exclude, no_strict_matching):
         gender, accuracy = rec.options[0], rec.options[1]
         results[rec.key] = {'gender': gender,
@@ -376,18 +751,9 @@ def recommend_gender(ctx, uuids, exclude=True, no_strict_matching=False):
         # Store result in the database
         if not gender or not accuracy:
             continue
-        try:
-            individual = find_individual_by_uuid(rec.key)
-        except NotFoundError:
-            logger.warning(f"Job {job.id} 'Individual {rec.key} not found'")
-            continue
-        genrec, _ = GenderRecommendation.objects.get_or_create(individual=individual,
-                                                               defaults={'gender': gender, 'accuracy': accuracy})
-        if genrec.gender != gender or genrec.accuracy != accuracy:
-            genrec.gender = gender
-            genrec.accuracy = accuracy
-            genrec.applied = None
-            genrec.save()
+        writer.add(rec.mk, gender, accuracy)
+
+    writer.flush()
 
     trxl.close()
 
@@ -399,6 +765,77 @@ def recommend_gender(ctx, uuids, exclude=True, no_strict_matching=False):
     return job_result
 
 
+@django_rq.job
+@job_using_tenant
+def score_merge_recommendations(ctx):
+    """Calculate again the confidence score of pending merge recommendations.
+
+    Merge recommendations stored before they had a confidence
+    score have a score of 0, so they can't be sorted when they
+    are reviewed. This job calculates the score of every merge
+    recommendation that was not applied or dismissed yet. They
+    are scored in chunks of `MAX_CHUNK_SIZE` recommendations.
+
+    :param ctx: context where this job is run
+
+    :returns: a dictionary with the score of each recommendation
+    """
+    job = rq.get_current_job()
+    progress = JobProgress(job)
+
+    logger.info(f"Running job {job.id} 'score merge recommendations'; ...")
+
+    results = {}
+    job_result = {
+        'results': results
+    }
+
+    # Create a new context to include the reference
+    # to the job id that will perform the transaction.
+    job_ctx = SortingHatContext(ctx.user, job.id, ctx.tenant)
+
+    trxl = TransactionsLog.open('score_merge_recommendations', job_ctx)
+
+    pending = MergeRecommendation.objects.filter(applied__isnull=True).order_by('id')
+
+    progress.start('scoring', total=pending.count())
+
+    last_id = 0
+
+    while True:
+        chunk = pending.filter(id__gt=last_id)[:MAX_CHUNK_SIZE]
+        chunk = {
+            (mk1, mk2): rec_id
+            for rec_id, mk1, mk2 in chunk.values_list('id', 'individual1', 'individual2')
+        }
+
+        if not chunk:
+            break
+
+        scores = {
+            chunk[pair]: result
+            for pair, result in score_matches(chunk.keys()).items()
+        }
+
+        with transaction.atomic():
+            update_merge_recommendations_scores(trxl, scores)
+
+        results.update({rec_id: score for rec_id, (score, _) in scores.items()})
+        last_id = max(chunk.values())
+
+        progress.update(advance=len(chunk))
+
+    trxl.close()
+    progress.finish()
+
+    logger.info(
+        f"Job {job.id} 'score merge recommendations' completed; "
+        f"{len(results)} recommendations scored"
+    )
+
+    return job_result
+
+
 @django_rq.job
 @job_using_tenant
 def affiliate(ctx, uuids=None, last_modified=MIN_PERIOD_DATE):
@@ -423,12 +860,107 @@ def affiliate(ctx, uuids=None, last_modified=MIN_PERIOD_DATE):
         and the errors found running the job
     """
     job = rq.get_current_job()
+    checkpoint = JobCheckpoint(job)
+    progress = JobProgress(job)
+
+    job_result = {
+        'results': checkpoint.results,
+        'errors': checkpoint.errors
+    }
 
     if not uuids:
         logger.info(f"Running job {job.id} 'affiliate'; uuids='all'; ...")
+        offset = None
+        individuals = Individual.objects.filter(last_modified__gte=last_modified)
+        total = checkpoint.state.get('total', None)
+        if total is None:
+            total = individuals.count()
+        processed = checkpoint.state.get('processed', 0)
+        last_mk = checkpoint.state.get('last_mk', None)
+        if last_mk:
+            # Individuals are affiliated sorted by their main key
+            individuals = individuals.filter(mk__gt=last_mk)
+            uuids = individuals.order_by('mk').values_list('mk', flat=True).iterator()
+        progress.start('affiliating', total=total, processed=processed)
+        checkpoint.update(total=total, processed=processed)
     else:
         logger.info(f"Running job {job.id} 'affiliate'; uuids={uuids}; ...")
-        uuids = iter(uuids)
+        uuids = list(uuids)
+        offset = checkpoint.state.get('offset', 0)
+        progress.start('affiliating', total=len(uuids), processed=offset)
+
+    engine = RecommendationEngine()
+
+    # Create a new context to include the reference
+    # to the job id that will perform the transaction.
+    job_ctx = SortingHatContext(ctx.user, job.id, ctx.tenant)
+
+    # Create an empty transaction to log which job
+    # will generate the 'enroll' transactions.
+    trxl = TransactionsLog.open('affiliate', job_ctx)
+
+    nsuccess = 0
+
+    if offset is None:
+        recs = engine.recommend('affiliation', uuids, last_modified)
+    elif offset < len(uuids):
+        recs = engine.recommend('affiliation', iter(uuids[offset:]), last_modified)
+    else:
+        recs = []
+
+    for rec in recs:
+        affiliated, errs = _affiliate_individual(job_ctx, rec.key, rec.options)
+
+        checkpoint.add_errors(errs)
+
+        if affiliated:
+            checkpoint.add_result(rec.key, affiliated)
+            nsuccess += 1
+
+        if offset is None:
+            processed += 1
+            checkpoint.update(last_mk=rec.mk, processed=processed)
+            progress.update(processed=processed)
+        else:
+            offset = uuids.index(rec.key, offset) + 1
+            checkpoint.update(offset=offset)
+            progress.update(processed=offset)
+
+    trxl.close()
+    checkpoint.clear()
+    progress.finish()
+
+    logger.info(
+        f"Job {job.id} 'affiliate' completed; "
+        f"{nsuccess} individuals have new affiliations"
+    )
+
+    return job_result
+
+
+@django_rq.job
+@job_using_tenant
+def affiliate_pending(ctx):
+    """Affiliate the individuals queued as pending.
+
+    This job affiliates incrementally the registry. Instead of
+    affiliating every individual, it only affiliates the ones on
+    the queue of pending affiliations: individuals with new
+    identities and individuals with email addresses on new or
+    moved domains (see `add_pending_affiliations`). The queue is
+    drained in batches until it is empty.
+
+    The job returns the same result than the `affiliate` job.
+
+    :param ctx: context where this job is run
+
+    :returns: a dictionary with which individuals were enrolled
+        and the errors found running the job
+    """
+    job = rq.get_current_job()
+    progress = JobProgress(job)
+
+    logger.info(f"Running job {job.id} 'affiliate pending'; ...")
 
     results = {}
     errors = []
@@ -447,22 +979,40 @@ def affiliate(ctx, uuids=None, last_modified=MIN_PERIOD_DATE):
     # will generate the 'enroll' transactions.
     trxl = TransactionsLog.open('affiliate', job_ctx)
 
-    nsuccess = 0
+    progress.start('affiliating')
 
-    for rec in engine.recommend('affiliation', uuids, last_modified):
-        affiliated, errs = _affiliate_individual(job_ctx, rec.key, rec.options)
+    while True:
+        domains = pop_pending_affiliations(DOMAINS, MAX_CHUNK_SIZE)
+        individuals = pop_pending_affiliations(INDIVIDUALS, MAX_CHUNK_SIZE)
 
-        errors.extend(errs)
+        if not domains and not individuals:
+            break
 
-        if affiliated:
-            results[rec.key] = affiliated
-            nsuccess += 1
+        try:
+            uuids = set(individuals)
+            uuids.update(find_individuals_by_domains(domains))
+
+            for rec in engine.recommend('affiliation', sorted(uuids)):
+                affiliated, errs = _affiliate_individual(job_ctx, rec.key, rec.options)
+
+                errors.extend(errs)
+
+                if affiliated:
+                    results[rec.key] = affiliated
+        except Exception:
+            # Keep the batch in the queue to process it on the next run
+            restore_pending_affiliations(DOMAINS, domains)
+            restore_pending_affiliations(INDIVIDUALS, individuals)
+            raise
+
+        progress.update(advance=len(uuids))
 
     trxl.close()
+    progress.finish()
 
     logger.info(
-        f"Job {job.id} 'affiliate' completed; "
-        f"{nsuccess} individuals have new affiliations"
+        f"Job {job.id} 'affiliate pending' completed; "
+        f"{len(results)} individuals have new affiliations"
     )
 
     return job_result
@@ -471,7 +1021,8 @@ def affiliate(ctx, uuids=None, last_modified=MIN_PERIOD_DATE):
 @django_rq.job
 @job_using_tenant
 def unify(ctx, criteria, source_uuids=None, target_uuids=None, exclude=True,
-          strict=True, match_source=False, guess_github_user=False, last_modified=MIN_PERIOD_DATE):
+          strict=True, match_source=False, guess_github_user=False, last_modified=MIN_PERIOD_DATE,
+          max_group_size=None, min_score=None):
     """Unify a set of individuals by merging them using matching recommendations.
 
     This function automates the identities unify process obtaining
@@ -487,57 +1038,38 @@ def unify(ctx, criteria, source_uuids=None, target_uuids=None, exclude=True,
     When the parameter `sources_uuid` is empty, matches will be found comparing all
     the identities on the registry against `target_uuids`.
 
+    Groups of matching individuals are disjoint, so they are merged in
+    chunks. When there is more than one chunk, each one is enqueued as a
+    `unify_groups` child job on the queue of the tenant, so several
+    workers can merge them in parallel. The results and errors of the
+    child jobs are returned as the result of this job.
+
     :param ctx: context where this job is run
     :param source_uuids: list of individuals identifiers to look matches for
     :param target_uuids: list of individuals identifiers where to look for matches
     :param criteria: list of fields which the unify will be based on
-        (`email`, `name` and/or `username`)
+        (`email`, `name`, `username` and/or `fuzzy_name`)
     :param exclude: if set to `True`, the results list will ignore individual identities
         if any value from the `email`, `name`, or `username` fields are found in the
         RecommenderExclusionTerm table. Otherwise, results will not ignore them.
     :param match_source: only unify individuals that share the same source
     :param guess_github_user: match GitHub-generated emails with usernames
     :param last_modified: only unify individuals that have been modified after this date
+    :param max_group_size: groups of matching individuals larger than this value
+        are not merged and they are reported as errors; when it is `None`, the
+        value of `MATCH_MAX_GROUP_SIZE` setting is used; `0` means no limit
+    :param min_score: pairs of matching individuals with a lower confidence
+        score are not merged; when it is `None`, the value of `MATCH_MIN_SCORE`
+        setting is used; `0` means any pair is merged
 
     :returns: a list with the individuals resulting from merge operations
         and the errors found running the job
     """
-    def _group_recommendations(recs):
-        """Calculate unique sets of identities from matching recommendations.
-
-        For instance, given a dictionary of matching groups like
-        {A: [B], B: [A,C], D: [E]} the output will be the groups
-        [{A, B, C}, {D, E}].
-
-        :param recs: recommendations of matching identities
-
-        :returns: a list including unique groups of matches
-        """
-        visited = set()
-        result = []
-
-        for key in recs:
-            if key in visited:
-                continue
-            current_set = set()
-            stack = [key]
-
-            while stack:
-                node = stack.pop()
-                if node in visited:
-                    continue
-                current_set.add(node)
-                visited.add(node)
-                stack.extend(recs.get(node, []))
-
-            if len(current_set) > 1:
-                result.append(current_set)
-
-        return result
-
     check_criteria(criteria)
 
     job = rq.get_current_job()
+    checkpoint = JobCheckpoint(job)
+    progress = JobProgress(job)
 
     results = []
     errors = []
@@ -547,39 +1079,82 @@ def unify(ctx, criteria, source_uuids=None, target_uuids=None, exclude=True,
         'errors': errors
     }
 
-    engine = RecommendationEngine()
-
     # Create a new context to include the reference
     # to the job id that will perform the transaction.
     job_ctx = SortingHatContext(ctx.user, job.id, ctx.tenant)
 
     trxl = TransactionsLog.open('unify', job_ctx)
 
-    match_recs = {}
-    for rec in engine.recommend('matches',
-                                source_uuids,
-                                target_uuids,
-                                criteria,
-                                exclude=exclude,
-                                strict=strict,
-                                match_source=match_source,
-                                guess_github_user=guess_github_user,
-                                last_modified=last_modified):
-        match_recs[rec.mk] = list(rec.options)
-
-    match_groups = _group_recommendations(match_recs)
-
-    # Apply the merge of the matching identities
-    for group in match_groups:
-        group = sorted(group)
-        uuid = group[0]
-        result = group[1:]
-        merged_to, errs = _merge_individuals(job_ctx, uuid, result)
-        if merged_to:
-            results.append(merged_to)
+    groups = checkpoint.load('groups') if checkpoint.state.get('grouped', False) else None
+    resumed = groups is not None
+
+    if resumed:
+        # Groups found before the job was interrupted; errors
+        # include the skipped groups and those of merged chunks
+        errors.extend(checkpoint.errors)
+
+        logger.info(f"Job {job.id} 'unify' resumed with {len(groups)} groups")
+    else:
+        if max_group_size is None:
+            max_group_size = settings.MATCH_MAX_GROUP_SIZE
+
+        progress.start('matching')
+
+        match_groups = find_match_groups(source_uuids,
+                                         target_uuids,
+                                         criteria,
+                                         exclude=exclude,
+                                         strict=strict,
+                                         match_source=match_source,
+                                         guess_github_user=guess_github_user,
+                                         last_modified=last_modified,
+                                         min_score=min_score)
+
+        stats = match_groups.stats(max_size=max_group_size)
+
+        job.meta['groups'] = stats
+        job.save_meta()
+
+        logger.info(
+            f"Job {job.id} 'unify' found {stats['components']} groups of "
+            f"{stats['elements']} individuals; max_size={stats['max_size']} "
+            f"mean_size={stats['mean_size']:.2f} oversized={stats['oversized']}"
+        )
+
+        groups = []
+
+        for group in match_groups.components():
+            group = sorted(group)
+            if max_group_size and len(group) > max_group_size:
+                msg = (f"Group of {len(group)} individuals with {group[0]} exceeds "
+                       f"the maximum size of {max_group_size}; skipped")
+                logger.warning(f"Job {job.id} 'unify': {msg}")
+                errors.append(msg)
+                continue
+            groups.append((group[0], group[1:]))
+
+    # Apply the merge of the matching identities in chunks of groups
+    chunks = [groups[i:i + MERGE_CHUNK_SIZE] for i in range(0, len(groups), MERGE_CHUNK_SIZE)]
+
+    progress.start('merging', total=len(groups))
+
+    if len(chunks) > 1:
+        if not resumed:
+            checkpoint.store('groups', groups)
+            checkpoint.add_errors(errors)
+            checkpoint.update(force=True, grouped=True)
+        chunk_results = _run_unify_chunks(ctx, job_ctx, chunks, checkpoint, progress)
+    else:
+        chunk_results = [_bulk_merge_individuals(job_ctx, chunk) for chunk in chunks]
+        progress.update(processed=len(groups))
+
+    for merged_to, errs in chunk_results:
+        results.extend(merged_to)
         errors.extend(errs)
 
     trxl.close()
+    checkpoint.clear()
+    progress.finish()
 
     logger.info(
         f"Job {job.id} 'unify' completed; "
@@ -589,6 +1164,44 @@ def unify(ctx, criteria, source_uuids=None, target_uuids=None, exclude=True,
     return job_result
 
 
+@django_rq.job
+@job_using_tenant
+def unify_groups(ctx, groups):
+    """Merge a chunk of groups of matching individuals.
+
+    This job is enqueued by `unify` to merge in parallel the
+    groups of matching individuals it found. Groups are disjoint,
+    so each chunk can be merged by a different worker.
+
+    :param ctx: context where this job is run
+    :param groups: list of tuples with the identifier of the
+        individual where the rest will be merged to and the
+        list of identifiers of the individuals to merge
+
+    :returns: a list with the individuals resulting from merge
+        operations and the errors found running the job
+    """
+    job = rq.get_current_job()
+
+    logger.info(f"Running job {job.id} 'unify groups'; groups={len(groups)}; ...")
+
+    # Create a new context to include the reference
+    # to the job id that will perform the transaction.
+    job_ctx = SortingHatContext(ctx.user, job.id, ctx.tenant)
+
+    results, errors = _bulk_merge_individuals(job_ctx, groups)
+
+    logger.info(
+        f"Job {job.id} 'unify groups' completed; "
+        f"{len(results)} individuals have been merged"
+    )
+
+    return {
+        'results': results,
+        'errors': errors
+    }
+
+
 @django_rq.job
 @job_using_tenant
 def genderize(ctx, uuids=None, exclude=True, no_strict_matching=False):
@@ -613,19 +1226,34 @@ def genderize(ctx, uuids=None, exclude=True, no_strict_matching=False):
         updated and the errors found running the job
     """
     job = rq.get_current_job()
+    checkpoint = JobCheckpoint(job)
+    progress = JobProgress(job)
 
     if not uuids:
         logger.info(f"Running job {job.id} 'genderize'; uuids='all'; ...")
-        uuids = Individual.objects.values_list('mk', flat=True).iterator()
+        offset = None
+        # Individuals are sorted by their main key to resume the job
+        individuals = Individual.objects.order_by('mk')
+        total = checkpoint.state.get('total', None)
+        if total is None:
+            total = individuals.count()
+        processed = checkpoint.state.get('processed', 0)
+        last_mk = checkpoint.state.get('last_mk', None)
+        if last_mk:
+            individuals = individuals.filter(mk__gt=last_mk)
+        progress.start('genderizing', total=total, processed=processed)
+        checkpoint.update(total=total, processed=processed)
+        uuids = individuals.values_list('mk', flat=True).iterator()
     else:
         logger.info(f"Running job {job.id} 'genderize'; uuids={list(uuids)}; ...")
-        uuids = iter(uuids)
+        uuids = list(uuids)
+        offset = checkpoint.state.get('offset', 0)
+        progress.start('genderizing', total=len(uuids), processed=offset)
+        uuids = iter(uuids[offset:])
 
-    results = {}
-    errors = []
     job_result = {
-        'results': results,
-        'errors': errors
+        'results': checkpoint.results,
+        'errors': checkpoint.errors
     }
 
     engine = RecommendationEngine()
@@ -641,16 +1269,29 @@ def genderize(ctx, uuids=None, exclude=True, no_strict_matching=False):
     nsuccess = 0
 
     for chunk in _iter_split(uuids, size=MAX_CHUNK_SIZE):
+        chunk = list(chunk)
+
         for rec in engine.recommend('gender', chunk, exclude, no_strict_matching):
             gender, acc = rec.options
             updated, errs = _update_individual_gender(job_ctx, rec.key, rec.options)
-            results[rec.key] = updated
-            errors.extend(errs)
+            checkpoint.add_result(rec.key, updated)
+            checkpoint.add_errors(errs)
 
             if updated:
                 nsuccess += 1
 
+        if offset is None:
+            processed += len(chunk)
+            checkpoint.update(last_mk=chunk[-1], processed=processed)
+        else:
+            offset += len(chunk)
+            checkpoint.update(offset=offset)
+
+        progress.update(advance=len(chunk))
+
     trxl.close()
+    checkpoint.clear()
+    progress.finish()
 
     logger.info(
         f"Job {job.id} 'genderize' completed; "
@@ -688,10 +1329,24 @@ def import_identities(ctx, backend_name, url, **kwargs):
     job_ctx = SortingHatContext(ctx.user, job.id, ctx.tenant)
     trxl = TransactionsLog.open('import_identities', job_ctx)
 
+    checkpoint = JobCheckpoint(job)
+    offset = checkpoint.state.get('offset', 0)
+    imported = checkpoint.state.get('imported', 0)
+
+    progress = JobProgress(job)
+    progress.start('importing', processed=offset)
+
+    def _update_progress(processed, nidentities):
+        checkpoint.update(offset=processed, imported=imported + nidentities)
+        progress.update(processed=processed)
+
     importer = klass(ctx=job_ctx, url=url, **kwargs)
-    nidentities = importer.import_identities()
+    nidentities = imported + importer.import_identities(offset=offset,
+                                                        progress=_update_progress)
 
     trxl.close()
+    checkpoint.clear()
+    progress.finish()
 
     logger.info(
         f"Job {job.id} 'import_identities' completed; "
@@ -744,6 +1399,229 @@ def _merge_individuals(job_ctx, source_indv, target_indvs):
     return to_indv, errors
 
 
+def _run_unify_chunks(ctx, job_ctx, chunks, checkpoint, progress):
+    """Merge chunks of groups of individuals using child jobs.
+
+    Each chunk is enqueued as a `unify_groups` job on the queue
+    of the tenant, so idle workers can merge them in parallel.
+    Workers stop the child jobs that run for more than
+    `UNIFY_CHUNK_TIMEOUT` seconds.
+
+    The parent job waits for the result of each child blocking
+    on Redis, instead of polling the queue, and every wait is
+    bounded. Chunks that no worker started after `UNIFY_WAIT_TIMEOUT`
+    seconds are taken out of the queue and merged by the parent.
+    When no other worker listens to the queue, the parent does
+    not wait for them at all. Chunks of child jobs that failed,
+    were stopped or were lost are merged again by the parent.
+    An error is only reported for a chunk when this retry fails
+    too, or when its child job is still running after its
+    timeout.
+
+    Returns a list of tuples, one for each chunk and in the same
+    order, with the uuids from the individuals resulting from
+    the merges and the errors found while merging the chunk.
+
+    The results and errors of the chunks are added to the
+    checkpoint as soon as they are merged, using the index of
+    the chunk as the key of its results. When the parent job is
+    resumed, merged chunks are skipped and the child jobs that
+    are still alive are reused. The errors of the chunks merged
+    before resuming are not returned again; they are available
+    in the errors of the checkpoint. The ids of the child jobs
+    are stored in the checkpoint too, and they are only added to
+    the metadata of the parent job, under `children`, once all
+    the chunks were merged.
+
+    :param ctx: context where the parent job is run
+    :param job_ctx: context of the parent job
+    :param chunks: list of chunks of groups to merge
+    :param checkpoint: checkpoint of the parent job
+    :param progress: progress of the parent job; it is updated
+        with the number of groups of the chunks completed
+
+    :returns: list of tuples with the results of each chunk
+    """
+    job = rq.get_current_job()
+    queue = get_tenant_queue(ctx.tenant)
+
+    chunk_results = [None] * len(chunks)
+    for key, merged_to in checkpoint.results.items():
+        chunk_results[int(key)] = (merged_to, [])
+
+    previous_ids = checkpoint.load('children', [])
+    previous = [job_id for job_id in previous_ids if job_id]
+    previous = dict(zip(previous, Job.fetch_many(previous, connection=queue.connection)))
+
+    children = []
+    alive = (JobStatus.QUEUED, JobStatus.STARTED, JobStatus.FINISHED)
+
+    for idx, chunk in enumerate(chunks):
+        child = previous.get(previous_ids[idx], None) if idx < len(previous_ids) else None
+
+        if chunk_results[idx] is None and (not child or child.get_status() not in alive):
+            child = queue.enqueue(unify_groups, ctx, chunk,
+                                  meta={'parent': job.id},
+                                  job_timeout=UNIFY_CHUNK_TIMEOUT,
+                                  result_ttl=DEFAULT_JOB_RESULT_TTL,
+                                  failure_ttl=DEFAULT_JOB_RESULT_TTL)
+        children.append(child)
+
+    # Kept out of the metadata, so saving it doesn't depend on the number of chunks
+    children_ids = [child.id if child else None for child in children]
+    checkpoint.store('children', children_ids)
+
+    logger.info(f"Job {job.id} 'unify' merging {len(children)} chunks in child jobs")
+
+    # The parent does not wait for workers when it's the only one of the queue
+    workers = rq.Worker.count(queue=queue)
+    if job.origin == queue.name:
+        workers -= 1
+    deadline = time.monotonic() + (UNIFY_WAIT_TIMEOUT if workers > 0 else 0)
+
+    processed = sum(len(chunks[idx]) for idx in range(len(chunks))
+                    if chunk_results[idx] is not None)
+
+    for idx, child in enumerate(children):
+        if chunk_results[idx] is not None:
+            continue
+
+        status, result = _wait_unify_chunk(queue, child, deadline)
+        merged = True
+
+        if status == JobStatus.FINISHED:
+            chunk_results[idx] = (result['results'], result['errors'])
+        elif status == JobStatus.STARTED:
+            # Merging the chunk again could clash with the child job
+            msg = (f"Child job {child.id} did not finish after {UNIFY_CHUNK_TIMEOUT} seconds; "
+                   f"{len(chunks[idx])} groups were not merged")
+            logger.error(f"Job {job.id} 'unify': {msg}")
+            chunk_results[idx] = ([], [msg])
+            merged = False
+        else:
+            state = status.value if status else 'missing'
+            logger.info(f"Job {job.id} 'unify': child job {child.id} did not finish ({state}); "
+                        f"merging its {len(chunks[idx])} groups")
+            try:
+                chunk_results[idx] = _bulk_merge_individuals(job_ctx, chunks[idx])
+            except Exception as exc:
+                msg = (f"Child job {child.id} did not finish ({state}) and merging "
+                       f"its chunk again failed: {exc}; {len(chunks[idx])} groups were not merged")
+                logger.error(f"Job {job.id} 'unify': {msg}")
+                chunk_results[idx] = ([], [msg])
+                merged = False
+
+        # Failed chunks are not stored, so they run again when resuming
+        if merged:
+            checkpoint.add_result(str(idx), chunk_results[idx][0])
+            checkpoint.add_errors(chunk_results[idx][1])
+            checkpoint.update(force=True)
+
+        processed += len(chunks[idx])
+        progress.update(processed=processed)
+
+    job.meta['children'] = children_ids
+    job.save_meta()
+
+    return chunk_results
+
+
+def _wait_unify_chunk(queue, child, deadline):
+    """Wait until a child job of `unify` ends or the wait expires.
+
+    Returns a tuple with the status of the child job and the value
+    it returned, when it finished. A child job still waiting in the
+    queue at `deadline` is taken out of the queue and canceled,
+    so no worker will run it. A child job already running is waited
+    for up to `UNIFY_CHUNK_TIMEOUT` seconds; when it is still running
+    after that, its status is returned anyway.
+
+    :param queue: queue where the child job was enqueued
+    :param child: child job to wait for
+    :param deadline: time, from `time.monotonic`, when the child
+        job must have been started by a worker
+
+    :returns: tuple with the status of the job, or `None` when the
+        job does not exist, and the value returned by the job
+    """
+    waited = False
+
+    while True:
+        try:
+            status = child.get_status(refresh=True)
+        except rq.exceptions.InvalidJobOperation:
+            return None, None
+
+        if status == JobStatus.FINISHED:
+            return status, child.return_value()
+        elif status == JobStatus.QUEUED:
+            timeout = deadline - time.monotonic()
+
+            if timeout <= 0:
+                if queue.remove(child):
+                    child.cancel()
+                    return JobStatus.CANCELED, None
+                # A worker started the job in the meantime
+                continue
+        elif status == JobStatus.STARTED and not waited:
+            waited = True
+            timeout = UNIFY_CHUNK_TIMEOUT
+        else:
+            return status, None
+
+        child.latest_result(timeout=math.ceil(timeout))
+
+
+def _bulk_merge_individuals(job_ctx, groups):
+    """Merge several groups of individuals in a single transaction.
+
+    Returns a tuple with two elements: list of the uuids from
+    the individuals resulting from the merges; list of errors
+    found during the process. When the bulk merge fails, groups
+    are merged one by one, so a single group can't prevent the
+    rest from being merged.
+
+    :param job_ctx: job context
+    :param groups: list of tuples with the identifier of the
+        individual where the rest will be merged to and the
+        list of identifiers of the individuals to merge
+
+    :returns: tuple with the list of uuids from the individuals
+        resulting from the merges, and list of errors found
+        during the process
+    """
+    logger.debug(
+        f"Merging {len(groups)} groups of individuals; "
+        f"job={job_ctx.job_id}; ..."
+    )
+
+    try:
+        results, excs = bulk_merge(job_ctx, groups)
+    except BaseError as exc:
+        logger.warning(
+            f"Bulk merge failed; merging groups one by one; "
+            f"job={job_ctx.job_id} error={exc}"
+        )
+        results = []
+        errors = []
+        for to_indv, from_indvs in groups:
+            merged_to, errs = _merge_individuals(job_ctx, to_indv, from_indvs)
+            if merged_to:
+                results.append(merged_to)
+            errors.extend(errs)
+        return results, errors
+
+    # When source identity is already part of the destination, the merge is not applied
+    errors = [str(exc) for exc in excs if not isinstance(exc, EqualIndividualError)]
+
+    logger.debug(
+        f"Groups of individuals merged with {len(errors)} errors; "
+        f"job={job_ctx.job_id}"
+    )
+
+    return results, errors
+
+
 def _affiliate_individual(job_ctx, uuid, organizations):
     """Affiliate an individual to a list of organizations.
 
@@ -803,6 +1681,129 @@ def _update_individual_gender(job_ctx, uuid, recommendation):
     return recommendation, errors
 
 
+def _store_affiliation_recommendations(recommendations, batch_size):
+    """Store affiliation recommendations in bulk.
+
+    Organizations are found by their names or aliases.
+    Recommendations for organizations or individuals that
+    don't exist are skipped.
+    """
+    org_names = {org_name for _, org_name in recommendations}
+
+    orgs = Organization.objects.all_organizations().filter(name__in=org_names).order_by()
+    orgs = dict(orgs.values_list('name', 'id'))
+
+    missing = org_names - orgs.keys()
+    if missing:
+        aliases = Alias.objects.filter(alias__in=missing,
+                                       organization__type='organization').order_by()
+        orgs.update(aliases.values_list('alias', 'organization'))
+
+    keys = find_individuals_keys({mk for mk, _ in recommendations})
+
+    objs = {}
+    for mk, org_name in recommendations:
+        if org_name not in orgs:
+            logger.warning(f"Organization {org_name} not found")
+            continue
+        if mk not in keys:
+            logger.debug(f"Individual {mk} not found")
+            continue
+
+        objs[(mk, orgs[org_name])] = AffiliationRecommendation(individual_id=mk,
+                                                               organization_id=orgs[org_name])
+
+    AffiliationRecommendation.objects.bulk_create(objs.values(),
+                                                  batch_size=batch_size,
+                                                  ignore_conflicts=True)
+
+
+def _store_merge_recommendations(recommendations, batch_size):
+    """Store merge recommendations in bulk.
+
+    Individuals are found by their main keys or by the UUIDs
+    of their identities. Pairs are sorted, so the main key of
+    the first individual is always the lowest one, and pairs of
+    the same individual are skipped. Each recommendation is
+    stored with its confidence score (see `score_matches`).
+    The score of recommendations that already exist is updated.
+    """
+    keys = find_individuals_keys(itertools.chain.from_iterable(recommendations))
+
+    objs = {}
+    for uuid1, uuid2 in recommendations:
+        if uuid1 not in keys or uuid2 not in keys:
+            logger.info(f"'Individual {uuid2 if uuid1 in keys else uuid1} does not exists'")
+            continue
+
+        mk1, mk2 = sorted((keys[uuid1], keys[uuid2]))
+
+        if mk1 == mk2:
+            continue
+
+        objs[(mk1, mk2)] = MergeRecommendation(individual1_id=mk1,
+                                               individual2_id=mk2)
+
+    for (mk1, mk2), (score, details) in score_matches(objs.keys()).items():
+        objs[(mk1, mk2)].score = score
+        objs[(mk1, mk2)].score_details = details
+
+    # Only some backends (i.e. not MySQL) need the fields of the conflict
+    features = connections[router.db_for_write(MergeRecommendation)].features
+    unique_fields = None
+    if features.supports_update_conflicts_with_target:
+        unique_fields = ['individual1', 'individual2']
+
+    MergeRecommendation.objects.bulk_create(objs.values(),
+                                            batch_size=batch_size,
+                                            update_conflicts=True,
+                                            update_fields=['score', 'score_details'],
+                                            unique_fields=unique_fields)
+
+
+def _store_gender_recommendations(recommendations, batch_size):
+    """Store gender recommendations in bulk.
+
+    Existing recommendations are updated only when the gender or
+    the accuracy change. Recommendations for individuals that
+    don't exist are skipped.
+    """
+    genders = {mk: (gender, accuracy) for mk, gender, accuracy in recommendations}
+    keys = find_individuals_keys(genders.keys())
+
+    existing = GenderRecommendation.objects.filter(individual__in=keys.keys())
+    existing = {genrec.individual_id: genrec for genrec in existing}
+
+    timestamp = datetime_utcnow()
+    new_objs = []
+    updated_objs = []
+
+    for mk, (gender, accuracy) in genders.items():
+        if mk not in keys:
+            logger.warning(f"Individual {mk} not found")
+            continue
+
+        genrec = existing.get(mk, None)
+
+        if not genrec:
+            new_objs.append(GenderRecommendation(individual_id=mk,
+                                                 gender=gender,
+                                                 accuracy=accuracy))
+        elif genrec.gender != gender or genrec.accuracy != accuracy:
+            genrec.gender = gender
+            genrec.accuracy = accuracy
+            genrec.applied = None
+            genrec.last_modified = timestamp
+            updated_objs.append(genrec)
+
+    GenderRecommendation.objects.bulk_create(new_objs,
+                                             batch_size=batch_size,
+                                             ignore_conflicts=True)
+    GenderRecommendation.objects.bulk_update(updated_objs,
+                                             ['gender', 'accuracy', 'applied', 'last_modified'],
+                                             batch_size=batch_size)
+
+
 def _iter_split(iterator, size=None):
     """Split an iterator in chunks of the same size.
 
@@ -830,11 +1831,11 @@ def check_criteria(criteria):
     """ Check if all given criteria are valid.
 
     Raises an error if a criterion is not in the valid criteria list
-    (`email`, `name` and/or `username`).
+    (`email`, `name`, `username` and/or `fuzzy_name`).
 
     :param criteria: list of criteria to check
     """
-    valid_criteria = ['name', 'email', 'username']
+    valid_criteria = ['name', 'email', 'username', 'fuzzy_name']
     if any(criterion not in valid_criteria for criterion in criteria):
         raise ValueError(f"Invalid criteria {criteria}. Valid values are: {valid_criteria}")
 
@@ -857,6 +1858,8 @@ def create_scheduled_task(ctx, job, interval, params):
     """
     if job == 'affiliate':
         job_fn = affiliate
+    elif job == 'affiliate_pending':
+        job_fn = affiliate_pending
     elif job == 'unify':
         job_fn = unify
     elif job == 'import_identities':
@@ -878,7 +1881,7 @@ def create_scheduled_task(ctx, job, interval, params):
     return task
 
 
-def schedule_task(ctx, fn, task, scheduled_datetime=None, **kwargs):
+def schedule_task(ctx, fn, task, scheduled_datetime=None, meta=None, **kwargs):
     """Schedule a task at a specific time and return the job created"""
 
     if not scheduled_datetime:
@@ -892,6 +1895,7 @@ def schedule_task(ctx, fn, task, scheduled_datetime=None, **kwargs):
                                                   job_timeout=-1,
                                                   result_ttl=DEFAULT_JOB_RESULT_TTL,
                                                   failure_ttl=DEFAULT_JOB_RESULT_TTL,
+                                                  meta=meta,
                                                   **kwargs)
     task.scheduled_datetime = scheduled_datetime
     task.job_id = job.id
@@ -918,8 +1922,6 @@ def get_tenant_queue(tenant):
     :raises JobError: when there's no queue available for
         the given tenant
     """
-    from django.conf import settings
-
     try:
         if settings.MULTI_TENANT and tenant in settings.TENANTS_DEDICATED_QUEUES:
             return django_rq.get_queue(tenant)
@@ -993,7 +1995,12 @@ def on_failed_job(job, connection, result, *args, **kwargs):
     else:
         scheduled_datetime = datetime_utcnow() + datetime.timedelta(minutes=task.interval)
         ctx = job.kwargs.pop('ctx')
-        schedule_task(ctx, job.func, task, scheduled_datetime=scheduled_datetime, **job.kwargs)
+        # Keep the progress of the job, so the next run resumes from there
+        meta = None
+        if JobCheckpoint.META_KEY in job.meta:
+            meta = {JobCheckpoint.META_KEY: job.meta[JobCheckpoint.META_KEY]}
+        schedule_task(ctx, job.func, task, scheduled_datetime=scheduled_datetime,
+                      meta=meta, **job.kwargs)
         logger.info(f"Reschedule task ID '{task.id}' at '{scheduled_datetime}'.")
 
     task.save()
@@ -40,6 +40,9 @@ from .models import (Operation,
 from .aux import validate_field
 
 
+BULK_OPERATIONS_SIZE = 2000
+
+
 logger = logging.getLogger(__name__)
 
 
@@ -179,6 +182,49 @@ class TransactionsLog:
 
         return operation
 
+    def log_operations(self, operations):
+        """Create several operation objects and save them into the DB at once.
+
+        Operations are inserted in bulk, so this method is faster
+        than calling `log_operation` for each one of them when
+        many operations are logged.
+
+        :param operations: list of dictionaries with the parameters
+            of each operation, as they are given to `log_operation`
+
+        :raises ClosedTransactionError: When trying to log an operation on a closed transaction
+        :raises TypeError: When the `op_type` is not an instance of `Operation.OpType` class
+
+        :returns: a list with the new Operation objects
+        """
+        if self.trx.is_closed:
+            msg = 'Log operation not allowed, transaction {} is already closed'.format(self.trx.tuid)
+            raise ClosedTransactionError(msg=msg)
+
+        objs = []
+
+        for op in operations:
+            validate_field('entity_type', op['entity_type'])
+            validate_field('target', op['target'])
+            if not isinstance(op['op_type'], Operation.OpType):
+                msg = "'op_type' value must be a 'Operation.OpType'; {} given".format(op['op_type'].__class__.__name__)
+                raise TypeError(msg)
+
+            objs.append(Operation(ouid=uuid.uuid4().hex, trx=self.trx, op_type=op['op_type'],
+                                  target=op['target'], entity_type=op['entity_type'],
+                                  timestamp=op['timestamp'], args=json.dumps(op['args'])))
+
+        try:
+            Operation.objects.bulk_create(objs, batch_size=BULK_OPERATIONS_SIZE)
+        except django.db.utils.IntegrityError as exc:
+            _handle_integrity_error(Operation, exc, self.trx.tuid)
+
+        logger.debug(
+            f"{len(objs)} operations completed; trx='{self.trx.tuid}'"
+        )
+
+        return objs
+
 
 _MYSQL_DUPLICATE_ENTRY_ERROR_REGEX = re.compile(r"Duplicate entry '(?P<value>.+)' for key")
 
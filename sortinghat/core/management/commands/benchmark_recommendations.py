@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2022 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import json
+
+from django.core.management import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+from django.test.utils import setup_databases, teardown_databases
+
+from sortinghat.core.benchmarks import (BENCHMARKS,
+                                        DEFAULT_CRITERIA,
+                                        generate_registry,
+                                        run_benchmarks)
+
+
+class Command(BaseCommand):
+    help = ("Benchmark the recommendation engines and jobs on synthetic registries. "
+            "Each registry is generated on a new test database, which is "
+            "destroyed at the end, so the user of the database needs "
+            "permissions to create databases.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--identities',
+            type=int,
+            nargs='+',
+            default=[10000],
+            help='Number of identities of each registry. Default is 10000.',
+        )
+        parser.add_argument(
+            '--identities-per-individual',
+            type=int,
+            default=3,
+            help='Number of identities of each person. Default is 3.',
+        )
+        parser.add_argument(
+            '--organizations',
+            type=int,
+            default=100,
+            help='Number of organizations. Default is 100.',
+        )
+        parser.add_argument(
+            '--duplicate-rate',
+            type=float,
+            default=0.1,
+            help='Ratio of people split in two individuals. Default is 0.1.',
+        )
+        parser.add_argument(
+            '--collision-rate',
+            type=float,
+            default=0.05,
+            help='Ratio of people with a common name. Default is 0.05.',
+        )
+        parser.add_argument(
+            '--github-noreply-rate',
+            type=float,
+            default=0.1,
+            help='Ratio of GitHub identities with a noreply address. Default is 0.1.',
+        )
+        parser.add_argument(
+            '--exclusion-terms',
+            type=int,
+            default=100,
+            help='Number of terms of the exclusion list. Default is 100.',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Seed used to generate the registries. Default is 0.',
+        )
+        parser.add_argument(
+            '--benchmarks',
+            nargs='+',
+            choices=BENCHMARKS,
+            default=BENCHMARKS,
+            help='Benchmarks to run. By default, all of them.',
+        )
+        parser.add_argument(
+            '--criteria',
+            nargs='+',
+            default=DEFAULT_CRITERIA,
+            help='Matching criteria. Default is email, name and username.',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Write the results in JSON format.',
+        )
+
+    def handle(self, *args, **options):
+        results = []
+
+        for num_identities in options['identities']:
+            old_config = setup_databases(verbosity=0, interactive=False,
+                                         aliases={DEFAULT_DB_ALIAS})
+            try:
+                registry = generate_registry(num_identities,
+                                             identities_per_individual=options['identities_per_individual'],
+                                             num_organizations=options['organizations'],
+                                             duplicate_rate=options['duplicate_rate'],
+                                             collision_rate=options['collision_rate'],
+                                             github_noreply_rate=options['github_noreply_rate'],
+                                             num_exclusion_terms=options['exclusion_terms'],
+                                             seed=options['seed'])
+                measures = run_benchmarks(names=options['benchmarks'],
+                                          criteria=options['criteria'])
+            finally:
+                teardown_databases(old_config, verbosity=0)
+
+            results.append({
+                'registry': registry,
+                'measures': measures
+            })
+
+            if not options['json']:
+                self._write_table(registry, measures)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=4))
+
+    def _write_table(self, registry, measures):
+        self.stdout.write(f"Registry: {registry['identities']} identities, "
+                          f"{registry['individuals']} individuals, "
+                          f"{registry['organizations']} organizations, "
+                          f"{registry['exclusion_terms']} exclusion terms")
+        self.stdout.write(f"{'benchmark':<14}{'time (s)':>12}{'peak RSS (MB)':>16}{'queries':>12}")
+
+        for measure in measures:
+            self.stdout.write(f"{measure['benchmark']:<14}"
+                              f"{measure['wall_time']:>12.2f}"
+                              f"{measure['peak_rss']:>16.1f}"
+                              f"{measure['queries']:>12}")
+
+        self.stdout.write("")
@@ -44,24 +44,26 @@ class TenantDatabaseRouter:
     """
     This class routes database queries to the right database.
     Queries to applications with labels in 'auth_app_labels' will use the 'default' database.
-    Queries to 'core.tenant' model will use the 'default' database too.
+    Queries to 'core.tenant' and 'core.gendercache' models will use the 'default'
+    database too, so they are shared by all the tenants.
     Queries to a different model will obtain the database name from a threading local variable
     that is set for every request using a middleware.
     """
 
     auth_app_labels = {'auth', 'contenttypes', 'admin', 'sessions'}
+    shared_model_names = {'tenant', 'gendercache'}
 
     def db_for_read(self, model, **hints):
         if model._meta.app_label in self.auth_app_labels:
             return 'default'
-        elif model._meta.app_label == 'core' and model._meta.model_name == 'tenant':
+        elif model._meta.app_label == 'core' and model._meta.model_name in self.shared_model_names:
             return 'default'
         return tenant.get_db_tenant()
 
     def db_for_write(self, model, **hints):
         if model._meta.app_label in self.auth_app_labels:
             return 'default'
-        elif model._meta.app_label == 'core' and model._meta.model_name == 'tenant':
+        elif model._meta.app_label == 'core' and model._meta.model_name in self.shared_model_names:
             return 'default'
         return tenant.get_db_tenant()
 
@@ -79,13 +81,13 @@ class TenantDatabaseRouter:
 
     def allow_migrate(self, db, app_label, model_name=None, **hints):
         """
-        Make sure the 'auth', 'contenttypes', 'admin' and 'core.tenant' apps
-        and models only appear in the 'default' database. Don't include any
+        Make sure the 'auth', 'contenttypes', 'admin', 'core.tenant' and
+        'core.gendercache' apps and models only appear in the 'default' database. Don't include any
         other model in that database.
         """
         if app_label in self.auth_app_labels:
             return db == 'default'
-        elif app_label == 'core' and model_name == 'tenant':
+        elif app_label == 'core' and model_name in self.shared_model_names:
             return db == 'default'
         elif db == 'default':
             return False
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:13
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Frozen copy of the key generation at the time of this migration,
+# so it doesn't depend on the current code of the application.
+GITHUB_EMAIL_ADDRESS_PATTERN = re.compile(
+    r"^(\d+\+)?(?P<username>[a-zA-Z0-9._%+-]+)(\b@users.noreply.github.com\b)"
+)
+
+
+def generate_matching_keys(name=None, email=None, username=None):
+    keys = set()
+
+    for criterion, value in (('name', name), ('email', email), ('username', username)):
+        if value:
+            keys.add((criterion, value.lower()))
+
+    if email:
+        m = GITHUB_EMAIL_ADDRESS_PATTERN.match(email)
+        if m:
+            keys.add(('github', m.group('username').lower()))
+
+    return keys
+
+
+def populate_matching_keys(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    Identity = apps.get_model('core', 'Identity')
+    MatchingKey = apps.get_model('core', 'MatchingKey')
+
+    batch = []
+    identities = Identity.objects.using(db_alias).values_list(
+        'uuid', 'individual_id', 'source', 'name', 'email', 'username'
+    )
+    for uuid, mk, source, name, email, username in identities.iterator(chunk_size=2000):
+        for criterion, value in generate_matching_keys(name, email, username):
+            batch.append(MatchingKey(identity_id=uuid, individual_id=mk,
+                                     source=source, criterion=criterion,
+                                     value=value))
+        if len(batch) >= 2000:
+            MatchingKey.objects.using(db_alias).bulk_create(batch)
+            batch = []
+
+    MatchingKey.objects.using(db_alias).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_index_operation_op_target'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchingKey',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=32)),
+                ('criterion', models.CharField(max_length=32)),
+                ('value', models.CharField(max_length=191)),
+                ('identity', models.ForeignKey(db_column='uuid', on_delete=django.db.models.deletion.CASCADE, related_name='matching_keys', to='core.identity')),
+                ('individual', models.ForeignKey(db_column='mk', on_delete=django.db.models.deletion.CASCADE, related_name='matching_keys', to='core.individual')),
+            ],
+            options={
+                'db_table': 'matching_keys',
+                'indexes': [models.Index(fields=['criterion', 'value'], name='matching_key_value')],
+            },
+        ),
+        migrations.RunPython(populate_matching_keys, migrations.RunPython.noop),
+    ]
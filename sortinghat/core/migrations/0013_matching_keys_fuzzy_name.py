@@ -0,0 +1,101 @@
+# Generated by Django 5.2.18 on 2026-10-17 09:02
+
+import re
+import unicodedata
+import zlib
+
+import numpy
+
+from django.db import migrations
+
+
+# Frozen copy of the blocking keys generation at the time of this
+# migration, so it doesn't depend on the current code of the application.
+NGRAM_SIZE = 2
+NUM_BANDS = 10
+ROWS_PER_BAND = 3
+
+_MERSENNE_PRIME = numpy.uint64((1 << 61) - 1)
+_MAX_HASH = (1 << 32) - 1
+_random = numpy.random.RandomState(seed=2147483647)
+_PERM_A = _random.randint(1, 1 << 31, size=NUM_BANDS * ROWS_PER_BAND, dtype=numpy.uint64)
+_PERM_B = _random.randint(0, 1 << 31, size=NUM_BANDS * ROWS_PER_BAND, dtype=numpy.uint64)
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def normalize_name(name):
+    unaccented = ''.join(c for c in unicodedata.normalize('NFD', name)
+                         if unicodedata.category(c) != 'Mn')
+    tokens = _TOKEN_PATTERN.findall(unaccented.lower())
+    return ' '.join(sorted(tokens))
+
+
+def name_ngrams(name):
+    padded = f" {name} "
+
+    if len(padded) <= NGRAM_SIZE:
+        return {padded}
+
+    return {padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)}
+
+
+def fuzzy_name_keys(name):
+    normalized = normalize_name(name)
+
+    if not normalized:
+        return []
+
+    hashes = numpy.array([zlib.crc32(ngram.encode('utf-8')) for ngram in name_ngrams(normalized)],
+                         dtype=numpy.uint64)
+    signature = ((_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % _MERSENNE_PRIME) & _MAX_HASH
+    signature = signature.min(axis=1)
+
+    keys = []
+
+    for band in range(NUM_BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        keys.append(f"{band}-" + '.'.join(f"{int(value):08x}" for value in rows))
+
+    return keys
+
+
+def populate_fuzzy_name_keys(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    Identity = apps.get_model('core', 'Identity')
+    MatchingKey = apps.get_model('core', 'MatchingKey')
+
+    MatchingKey.objects.using(db_alias).filter(criterion='fuzzy_name').delete()
+
+    batch = []
+    identities = Identity.objects.using(db_alias).filter(name__isnull=False).values_list(
+        'uuid', 'individual_id', 'source', 'name'
+    )
+    for uuid, mk, source, name in identities.iterator(chunk_size=2000):
+        for value in fuzzy_name_keys(name):
+            batch.append(MatchingKey(identity_id=uuid, individual_id=mk,
+                                     source=source, criterion='fuzzy_name',
+                                     value=value))
+        if len(batch) >= 2000:
+            MatchingKey.objects.using(db_alias).bulk_create(batch)
+            batch = []
+
+    MatchingKey.objects.using(db_alias).bulk_create(batch)
+
+
+def remove_fuzzy_name_keys(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    MatchingKey = apps.get_model('core', 'MatchingKey')
+
+    MatchingKey.objects.using(db_alias).filter(criterion='fuzzy_name').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_matching_keys'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_fuzzy_name_keys, remove_fuzzy_name_keys),
+    ]
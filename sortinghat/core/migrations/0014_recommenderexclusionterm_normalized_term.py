@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 09:41
+
+from django.db import migrations, models
+
+
+def populate_normalized_terms(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    RecommenderExclusionTerm = apps.get_model('core', 'RecommenderExclusionTerm')
+
+    batch = []
+    terms = RecommenderExclusionTerm.objects.using(db_alias).only('id', 'term')
+    for term in terms.iterator(chunk_size=2000):
+        term.normalized_term = term.term.lower()
+        batch.append(term)
+        if len(batch) >= 2000:
+            RecommenderExclusionTerm.objects.using(db_alias).bulk_update(batch, ['normalized_term'])
+            batch = []
+
+    RecommenderExclusionTerm.objects.using(db_alias).bulk_update(batch, ['normalized_term'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_matching_keys_fuzzy_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recommenderexclusionterm',
+            name='normalized_term',
+            field=models.CharField(db_index=True, default='', max_length=191),
+            preserve_default=False,
+        ),
+        migrations.RunPython(populate_normalized_terms, migrations.RunPython.noop),
+    ]
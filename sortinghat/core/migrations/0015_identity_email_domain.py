@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 15:12
+
+import re
+
+from django.db import migrations, models
+
+
+EMAIL_ADDRESS_PATTERN = re.compile(r"^(?P<email>[^\s@]+@[^\s@.]+\.[^\s@]+)$")
+
+
+def populate_email_domains(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    Identity = apps.get_model('core', 'Identity')
+
+    batch = []
+    identities = Identity.objects.using(db_alias).filter(email__isnull=False).only('uuid', 'email')
+    for identity in identities.iterator(chunk_size=2000):
+        if not EMAIL_ADDRESS_PATTERN.match(identity.email):
+            continue
+        identity.email_domain = identity.email.split('@')[-1].lower()
+        batch.append(identity)
+        if len(batch) >= 2000:
+            Identity.objects.using(db_alias).bulk_update(batch, ['email_domain'])
+            batch = []
+
+    Identity.objects.using(db_alias).bulk_update(batch, ['email_domain'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_recommenderexclusionterm_normalized_term'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='identity',
+            name='email_domain',
+            field=models.CharField(db_index=True, max_length=128, null=True),
+        ),
+        migrations.RunPython(populate_email_domains, migrations.RunPython.noop),
+    ]
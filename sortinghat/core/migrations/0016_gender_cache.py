@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 08:33
+
+import grimoirelab_toolkit.datetime
+import sortinghat.core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_identity_email_domain'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenderCache',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', sortinghat.core.models.CreationDateTimeField(default=grimoirelab_toolkit.datetime.datetime_utcnow, editable=False)),
+                ('last_modified', sortinghat.core.models.LastModificationDateTimeField(default=grimoirelab_toolkit.datetime.datetime_utcnow, editable=False)),
+                ('name', models.CharField(max_length=191, unique=True)),
+                ('gender', models.CharField(default=None, max_length=128, null=True)),
+                ('accuracy', models.PositiveIntegerField(default=None, null=True)),
+            ],
+            options={
+                'db_table': 'gender_cache',
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 08:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_gender_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mergerecommendation',
+            name='score',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='mergerecommendation',
+            name='score_details',
+            field=models.JSONField(default=None, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='mergerecommendation',
+            index=models.Index(fields=['applied', '-score'], name='merge_recommendation_score'),
+        ),
+    ]
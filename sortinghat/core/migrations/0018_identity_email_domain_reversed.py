@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:40
+
+from django.db import migrations, models
+
+
+def populate_email_domains_reversed(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    Identity = apps.get_model('core', 'Identity')
+
+    batch = []
+    identities = Identity.objects.using(db_alias).filter(email_domain__isnull=False).only('uuid', 'email_domain')
+    for identity in identities.iterator(chunk_size=2000):
+        identity.email_domain_reversed = '.'.join(reversed(identity.email_domain.split('.')))
+        batch.append(identity)
+        if len(batch) >= 2000:
+            Identity.objects.using(db_alias).bulk_update(batch, ['email_domain_reversed'])
+            batch = []
+
+    Identity.objects.using(db_alias).bulk_update(batch, ['email_domain_reversed'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_merge_recommendation_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='identity',
+            name='email_domain_reversed',
+            field=models.CharField(db_index=True, max_length=128, null=True),
+        ),
+        migrations.RunPython(populate_email_domains_reversed, migrations.RunPython.noop),
+    ]
@@ -262,6 +262,8 @@ class Identity(EntityBase):
     uuid = CharField(max_length=MAX_SIZE_CHAR_FIELD, primary_key=True)
     name = CharField(max_length=MAX_SIZE_CHAR_FIELD, null=True)
     email = CharField(max_length=MAX_SIZE_CHAR_FIELD, null=True)
+    email_domain = CharField(max_length=MAX_SIZE_CHAR_FIELD, null=True, db_index=True)
+    email_domain_reversed = CharField(max_length=MAX_SIZE_CHAR_FIELD, null=True, db_index=True)
     username = CharField(max_length=MAX_SIZE_CHAR_FIELD, null=True)
     source = CharField(max_length=32)
     individual = ForeignKey(Individual, related_name='identities',
@@ -275,6 +277,25 @@ class Identity(EntityBase):
         return self.uuid
 
 
+class MatchingKey(Model):
+    identity = ForeignKey(Identity, related_name='matching_keys',
+                          on_delete=CASCADE, db_column='uuid')
+    individual = ForeignKey(Individual, related_name='matching_keys',
+                            on_delete=CASCADE, db_column='mk')
+    source = CharField(max_length=32)
+    criterion = CharField(max_length=32)
+    value = CharField(max_length=MAX_SIZE_CHAR_INDEX)
+
+    class Meta:
+        db_table = 'matching_keys'
+        indexes = [
+            Index(fields=['criterion', 'value'], name='matching_key_value'),
+        ]
+
+    def __str__(self):
+        return '%s - %s - %s' % (self.identity_id, self.criterion, self.value)
+
+
 class Profile(EntityBase):
     individual = OneToOneField(Individual, related_name='profile',
                                on_delete=CASCADE, db_column='mk')
@@ -311,11 +332,18 @@ class Enrollment(EntityBase):
 
 class RecommenderExclusionTerm(EntityBase):
     term = CharField(max_length=MAX_SIZE_CHAR_INDEX)
+    normalized_term = CharField(max_length=MAX_SIZE_CHAR_INDEX, db_index=True)
 
     class Meta:
         db_table = 'recommender_exclusion_terms'
         unique_together = ('term',)
 
+    def save(self, *args, **kwargs):
+        # Terms are compared in lowercase with the identities
+        self.normalized_term = self.term.lower()
+
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.term
 
@@ -346,10 +374,15 @@ class MergeRecommendation(EntityBase):
     individual1 = ForeignKey(Individual, on_delete=CASCADE, related_name='match_recommendation_individual_1')
     individual2 = ForeignKey(Individual, on_delete=CASCADE, related_name='match_recommendation_individual_2')
     applied = BooleanField(null=True, default=None)
+    score = PositiveIntegerField(default=0)
+    score_details = JSONField(null=True, default=None)
 
     class Meta:
         db_table = 'merge_recommendations'
         unique_together = ('individual1', 'individual2')
+        indexes = [
+            Index(fields=['applied', '-score'], name='merge_recommendation_score'),
+        ]
 
     def save(self, *args, **kwargs):
         # Ensure individual1.mk is always less than individual2.mk
@@ -378,6 +411,18 @@ class GenderRecommendation(EntityBase):
         return '%s - %s - %s' % (self.individual, self.gender, self.accuracy)
 
 
+class GenderCache(EntityBase):
+    name = CharField(max_length=MAX_SIZE_CHAR_INDEX, unique=True)
+    gender = CharField(max_length=MAX_SIZE_CHAR_FIELD, null=True, default=None)
+    accuracy = PositiveIntegerField(null=True, default=None)
+
+    class Meta:
+        db_table = 'gender_cache'
+
+    def __str__(self):
+        return '%s - %s - %s' % (self.name, self.gender, self.accuracy)
+
+
 class ScheduledTask(EntityBase):
     job_type = CharField(max_length=MAX_SIZE_CHAR_FIELD)
     interval = PositiveIntegerField(null=True, default=None)
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2021 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import django_rq
+
+from django.conf import settings
+from django.db import transaction
+
+from . import tenant
+
+
+INDIVIDUALS = 'individuals'
+DOMAINS = 'domains'
+
+PENDING_KEY = 'sortinghat:{tenant}:pending:affiliation:{name}'
+
+
+def add_pending_affiliations(individuals=None, domains=None):
+    """Queue individuals and domains to be affiliated.
+
+    When the incremental affiliation is enabled (see the setting
+    `AFFILIATE_INCREMENTAL`), individuals with new identities and
+    new domains are added to a queue of pending affiliations of the
+    tenant in use. The `affiliate_pending` job drains this queue,
+    so only these individuals, and the ones with an email address
+    in these domains, are affiliated again.
+
+    The queue is stored in Redis. Elements are added when the
+    current transaction is committed, so they are never processed
+    before their changes are visible. Each element is queued only
+    once, no matter how many times it is added.
+
+    :param individuals: main keys of the individuals to queue
+    :param domains: names of the domains to queue
+    """
+    if not settings.AFFILIATE_INCREMENTAL:
+        return
+
+    pending = {
+        INDIVIDUALS: list(individuals or []),
+        DOMAINS: list(domains or [])
+    }
+    keys = {name: _pending_key(name) for name in pending}
+
+    def _add_pending():
+        pipe = django_rq.get_connection().pipeline()
+        for name, values in pending.items():
+            if values:
+                pipe.sadd(keys[name], *values)
+        pipe.execute()
+
+    transaction.on_commit(_add_pending, using=tenant.get_db_tenant())
+
+
+def pop_pending_affiliations(name, count):
+    """Take some elements from the queue of pending affiliations.
+
+    :param name: type of the elements to take; `individuals`
+        or `domains`
+    :param count: maximum number of elements to take
+
+    :returns: a list with the elements taken
+    """
+    values = django_rq.get_connection().spop(_pending_key(name), count)
+
+    return [value.decode('utf-8') for value in values]
+
+
+def restore_pending_affiliations(name, values):
+    """Put back elements into the queue of pending affiliations.
+
+    Use it when the elements taken from the queue could not
+    be processed.
+
+    :param name: type of the elements; `individuals` or `domains`
+    :param values: elements to put back
+    """
+    if values:
+        django_rq.get_connection().sadd(_pending_key(name), *values)
+
+
+def count_pending_affiliations(name):
+    """Count the elements in the queue of pending affiliations.
+
+    :param name: type of the elements; `individuals` or `domains`
+
+    :returns: number of elements in the queue
+    """
+    return django_rq.get_connection().scard(_pending_key(name))
+
+
+def _pending_key(name):
+    return PENDING_KEY.format(tenant=tenant.get_db_tenant() or 'default', name=name)
@@ -19,23 +19,112 @@
 #     Santiago Dueñas <sduenas@bitergia.com>
 #
 
-import functools
+import collections
 import logging
-import re
 
-from ..db import (find_individual_by_uuid,
-                  find_domain,
-                  search_enrollments_in_period)
-from ..errors import NotFoundError
-from ..models import (Individual,
+from django.db.models import Count, Max, Q
+
+from .. import tenant
+from ..aux import iter_chunks, reverse_domain
+from ..db import find_individuals_keys
+from ..models import (Domain,
+                      Enrollment,
+                      Identity,
+                      Individual,
                       MIN_PERIOD_DATE)
 
 
-EMAIL_ADDRESS_PATTERN = re.compile(r"^(?P<email>[^\s@]+@[^\s@.]+\.[^\s@]+)$")
+AFFILIATION_CHUNK_SIZE = 5000
 
 
 logger = logging.getLogger(__name__)
 
+# Index of domains of each tenant, cached in memory
+# together with the fingerprint of the table when it was built
+_domains_index_cache = {}
+
+
+DomainEntry = collections.namedtuple(
+    'DomainEntry',
+    ['domain', 'is_top_domain', 'organization']
+)
+
+
+class DomainsIndex:
+    """In-memory index to find the domain of an email address.
+
+    Domains are stored in a trie where each level is a label of
+    the domain name, in reverse order. For instance, the labels
+    of 'es.u.example.com' are stored as 'com', 'example', 'u'
+    and 'es'. This way, the domain of an address and all its
+    parent domains are found walking the trie once, without
+    querying the database.
+
+    Domain names are compared ignoring the case.
+
+    :param domains: iterable of tuples with the name of the
+        domain, whether it is a top domain and the name of
+        its organization
+    """
+    _ENTRY = object()
+
+    def __init__(self, domains=()):
+        self._root = {}
+        self._size = 0
+
+        for domain, is_top_domain, organization in domains:
+            self.add(domain, is_top_domain, organization)
+
+    def __len__(self):
+        return self._size
+
+    def add(self, domain, is_top_domain, organization):
+        """Add a domain to the index.
+
+        :param domain: name of the domain
+        :param is_top_domain: whether it is a top domain
+        :param organization: name of the organization of the domain
+        """
+        node = self._root
+
+        for label in reversed(domain.lower().split('.')):
+            node = node.setdefault(label, {})
+
+        if self._ENTRY not in node:
+            self._size += 1
+
+        node[self._ENTRY] = DomainEntry(domain, is_top_domain, organization)
+
+    def find(self, domain):
+        """Find the domain that matches with the given one.
+
+        When `domain` is not in the index, the closest parent
+        domain is looked up instead. The parent domain is only
+        returned when it is a top domain; otherwise there is no
+        match.
+
+        :param domain: name of the domain to find
+
+        :returns: a `DomainEntry` or `None` when there is no match
+        """
+        labels = domain.lower().split('.')
+        node = self._root
+        entry = None
+        depth = 0
+
+        for level, label in enumerate(reversed(labels), start=1):
+            node = node.get(label, None)
+            if node is None:
+                break
+            if self._ENTRY in node:
+                entry = node[self._ENTRY]
+                depth = level
+
+        if entry and depth < len(labels) and not entry.is_top_domain:
+            entry = None
+
+        return entry
+
 
 def recommend_affiliations(uuids, last_modified=MIN_PERIOD_DATE):
     """Recommend organizations for a list of individuals.
@@ -60,25 +149,33 @@ def recommend_affiliations(uuids, last_modified=MIN_PERIOD_DATE):
     The function will not return the organizations in which
     the individual is already enrolled.
 
+    Individuals are processed in chunks of `AFFILIATION_CHUNK_SIZE`.
+    The email addresses and the enrollments of the individuals of
+    a chunk are read at once, so the number of queries depends
+    on the number of chunks and not on the number of individuals.
+
     :param uuids: list of individual keys
     :param last_modified: only affiliate individuals that have been
         modified after this date
 
     :returns: a generator of recommendations
     """
+    domains_index = fetch_domains_index()
+
     if uuids:
         logger.debug(
             f"Generating affiliation recommendations; "
             f"uuids={uuids}; ..."
         )
 
-        for uuid in uuids:
-            try:
-                individual = find_individual_by_uuid(uuid)
-            except NotFoundError:
-                continue
-            else:
-                yield uuid, individual.mk, _suggest_affiliations(individual)
+        for chunk in iter_chunks(uuids, AFFILIATION_CHUNK_SIZE):
+            keys = find_individuals_keys(chunk)
+            suggestions = _suggest_affiliations(set(keys.values()), domains_index)
+
+            for uuid in chunk:
+                mk = keys.get(uuid, None)
+                if mk:
+                    yield uuid, mk, suggestions[mk]
 
         logger.info(f"Affiliation recommendations generated; uuids='{uuids}'")
     else:
@@ -87,87 +184,114 @@ def recommend_affiliations(uuids, last_modified=MIN_PERIOD_DATE):
         )
 
         individuals = Individual.objects.filter(
-            last_modified__gte=last_modified).order_by('mk').iterator()
+            last_modified__gte=last_modified).order_by('mk').values_list('mk', flat=True)
+        individuals = individuals.iterator(chunk_size=AFFILIATION_CHUNK_SIZE)
+
+        for chunk in iter_chunks(individuals, AFFILIATION_CHUNK_SIZE):
+            suggestions = _suggest_affiliations(chunk, domains_index)
+
+            for mk in chunk:
+                yield mk, mk, suggestions[mk]
 
-        for individual in individuals:
-            yield individual.mk, individual.mk, _suggest_affiliations(individual)
         logger.info("Affiliation recommendations generated; uuids=all")
 
 
-def _suggest_affiliations(individual):
-    """Generate a list of organizations where the individual is not affiliated."""
+def find_individuals_by_domains(domains):
+    """Find the individuals with an email address in a set of domains.
 
-    orgs = set()
-    domains = _retrieve_individual_email_domains(individual)
+    Individuals are found using the email domains of their
+    identities. Addresses in sub-domains of a top domain are also
+    taken into account. They are found by the prefix of the
+    reversed email domain (see `reverse_domain`), so the lookup
+    uses the index of that column instead of reading every
+    email domain of the registry. Domains which are not in the
+    registry are ignored.
 
-    for domain in domains:
-        org_name = domain.organization.name
+    :param domains: names of the domains
 
-        if _is_enrolled(individual, org_name):
-            continue
+    :returns: a set with the main keys of the individuals
+    """
+    domains = Domain.objects.filter(domain__in=domains)
+    domains = list(domains.values_list('domain', 'is_top_domain'))
 
-        orgs.add(org_name)
+    if not domains:
+        return set()
 
-    return sorted(list(orgs))
+    query = Q(email_domain_reversed__in={reverse_domain(domain) for domain, _ in domains})
 
+    for domain, is_top_domain in domains:
+        if is_top_domain:
+            query |= Q(email_domain_reversed__startswith=reverse_domain(domain) + '.')
 
-def _retrieve_individual_email_domains(individual):
-    """Return a list of possible domains linked to an individual."""
+    individuals = Identity.objects.filter(query)
+    individuals = individuals.values_list('individual', flat=True).distinct()
 
-    domains = set()
+    return set(individuals)
 
-    for identity in individual.identities.all():
-        # Only check email address to find new affiliations
-        if not identity.email:
-            continue
-        if not EMAIL_ADDRESS_PATTERN.match(identity.email):
-            continue
 
-        domain = identity.email.split('@')[-1]
+def fetch_domains_index():
+    """Fetch the index of domains of the registry.
 
-        if domain in domains:
-            continue
+    The index is cached in memory for each tenant, so the
+    domains are only read again when they change. Adding,
+    deleting or moving a domain, in this or in any other
+    process, is detected comparing the number of domains
+    and the time of the last change with the ones of the
+    cached index.
 
-        dom = _find_matching_domain(domain)
+    :returns: a `DomainsIndex` object
+    """
+    tenant_name = tenant.get_db_tenant() or 'default'
+    fingerprint = Domain.objects.aggregate(total=Count('id'),
+                                           last_modified=Max('last_modified'))
+    fingerprint = (fingerprint['total'], fingerprint['last_modified'])
+
+    cached = _domains_index_cache.get(tenant_name, None)
+
+    if cached and cached[0] == fingerprint:
+        return cached[1]
+
+    domains = Domain.objects.values_list('domain', 'is_top_domain', 'organization__name')
+    domains_index = DomainsIndex(domains.iterator())
+
+    _domains_index_cache[tenant_name] = (fingerprint, domains_index)
+
+    logger.debug(f"Domains index built; domains={len(domains_index)}")
+
+    return domains_index
+
+
+def _suggest_affiliations(mks, domains_index):
+    """Generate the organizations where a set of individuals are not affiliated.
+
+    Returns a dictionary with the sorted list of organizations
+    suggested for each individual.
+    """
+    orgs = {mk: set() for mk in mks}
 
-        if dom:
-            domains.add(dom)
+    if not orgs:
+        return {}
 
-    return domains
+    # Only domains of well-formed email addresses are stored
+    domains = Identity.objects.filter(individual__in=orgs.keys(),
+                                      email_domain__isnull=False)
+    domains = domains.values_list('individual', 'email_domain').distinct()
 
+    for mk, email_domain in domains.iterator():
+        domain = domains_index.find(email_domain)
 
-def _is_enrolled(individual, org_name):
-    """Determine if an individual is enrolled to an organization."""
+        if domain:
+            orgs[mk].add(domain.organization)
 
-    result = search_enrollments_in_period(individual.mk,
-                                          org_name)
-    return len(result) > 0
+    candidates = [mk for mk, names in orgs.items() if names]
 
+    if candidates:
+        enrollments = Enrollment.objects.filter(individual__in=candidates,
+                                                group__parent_org__isnull=True)
+        enrollments = enrollments.values_list('individual', 'group__name').distinct()
 
-@functools.lru_cache(512)
-def _find_matching_domain(domain):
-    """Look for domains and sub-domains that match with the given one."""
+        for mk, org_name in enrollments.iterator():
+            orgs[mk].discard(org_name)
 
-    keep_looking = True
-    is_subdomain = False
+    return {mk: sorted(names) for mk, names in orgs.items()}
 
-    # Splits the domain into root domains until
-    # is found in the database.
-    while keep_looking:
-        try:
-            result = find_domain(domain)
-            if is_subdomain and not result.is_top_domain:
-                result = None
-            keep_looking = False
-        except NotFoundError:
-            index = domain.find('.')
-            if index > -1:
-                domain = domain[index + 1:]
-                is_subdomain = True
-            else:
-                result = None
-                keep_looking = False
-        except ValueError:
-            result = None
-            keep_looking = False
-    return result
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2021 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import array
+
+from collections import defaultdict
+
+import numpy
+
+
+class UnionFind:
+    """Find connected components of a graph using a disjoint-set forest.
+
+    Elements are added when they are found in an edge for the first
+    time. Each element is mapped to an integer and the forest is
+    stored in two compact arrays, with the parent and the size of
+    the tree of each element. Edges are not stored, so the memory
+    used depends only on the number of elements, no matter how many
+    edges are added.
+
+    Trees are merged by size and paths are halved while they are
+    traversed, so adding an edge takes almost constant time.
+    """
+    def __init__(self):
+        self._index = {}
+        self._keys = []
+        self._parent = array.array('q')
+        self._size = array.array('q')
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def add(self, key):
+        """Add an element to the forest, when it is not there yet.
+
+        :param key: element to add
+
+        :returns: the integer id of the element
+        """
+        idx = self._index.get(key, None)
+
+        if idx is None:
+            idx = len(self._keys)
+            self._index[key] = idx
+            self._keys.append(key)
+            self._parent.append(idx)
+            self._size.append(1)
+
+        return idx
+
+    def find(self, key):
+        """Find the representative element of the component of `key`.
+
+        :param key: element to find
+
+        :returns: the representative element
+
+        :raises KeyError: when `key` is not in the forest
+        """
+        return self._keys[self._find(self._index[key])]
+
+    def union(self, key_a, key_b):
+        """Join the components of two elements.
+
+        :param key_a: first element of the edge
+        :param key_b: second element of the edge
+        """
+        root_a = self._find(self.add(key_a))
+        root_b = self._find(self.add(key_b))
+
+        if root_a == root_b:
+            return
+
+        if self._size[root_a] < self._size[root_b]:
+            root_a, root_b = root_b, root_a
+
+        self._parent[root_b] = root_a
+        self._size[root_a] += self._size[root_b]
+
+    def union_pairs(self, pairs):
+        """Join the components of each pair of elements.
+
+        :param pairs: iterable of pairs of elements
+        """
+        for key_a, key_b in pairs:
+            self.union(key_a, key_b)
+
+    def components(self, min_size=2):
+        """Generate the connected components of the graph.
+
+        :param min_size: only components with, at least,
+            this number of elements are returned
+
+        :returns: a generator of sets of elements
+        """
+        groups = defaultdict(list)
+
+        for idx in range(len(self._keys)):
+            root = self._find(idx)
+            if self._size[root] >= min_size:
+                groups[root].append(self._keys[idx])
+
+        for members in groups.values():
+            yield set(members)
+
+    def stats(self, max_size=None):
+        """Calculate statistics about the size of the components.
+
+        Components with a single element are not taken into
+        account.
+
+        :param max_size: components with more elements than this
+            value are counted as oversized
+
+        :returns: a dictionary with the number of components, the
+            number of elements in them, the maximum, mean and median
+            sizes and the number of oversized components
+        """
+        sizes = numpy.array([self._size[idx] for idx in range(len(self._keys))
+                             if self._parent[idx] == idx and self._size[idx] > 1],
+                            dtype=numpy.int64)
+
+        if sizes.size == 0:
+            return {
+                'components': 0,
+                'elements': 0,
+                'max_size': 0,
+                'mean_size': 0.0,
+                'median_size': 0.0,
+                'oversized': 0
+            }
+
+        oversized = int((sizes > max_size).sum()) if max_size else 0
+
+        return {
+            'components': int(sizes.size),
+            'elements': int(sizes.sum()),
+            'max_size': int(sizes.max()),
+            'mean_size': float(sizes.mean()),
+            'median_size': float(numpy.median(sizes)),
+            'oversized': oversized
+        }
+
+    def _find(self, idx):
+        parent = self._parent
+
+        while parent[idx] != idx:
+            parent[idx] = parent[parent[idx]]
+            idx = parent[idx]
+
+        return idx
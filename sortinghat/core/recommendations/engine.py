@@ -20,7 +20,16 @@
 #
 
 import collections
+import inspect
 
+from django.conf import settings
+
+from ..cache import (IDENTITIES,
+                     EXCLUSION_TERMS,
+                     cache_key,
+                     get_cached_value,
+                     get_registry_version,
+                     set_cached_value)
 from ..errors import RecommendationEngineError
 from .affiliation import recommend_affiliations
 from .matching import recommend_matches
@@ -46,6 +55,25 @@ class RecommendationEngine:
         'gender': recommend_gender
     }
 
+    # Types of recommendations which results are cached.
+    # Each type defines the settings with the time to keep
+    # the results and the maximum size of the cached results,
+    # the parts of the registry and the settings they depend on
+    # and the arguments that do not change them. Results are not cached when any
+    # of the `required_args` is empty or when any of the
+    # `default_args` has a value different than its default.
+    CACHED_TYPES = {
+        'matches': {
+            'ttl': 'MATCH_CACHE_TTL',
+            'max_size': 'MATCH_CACHE_MAX_SIZE',
+            'depends_on': (IDENTITIES, EXCLUSION_TERMS),
+            'settings': ('MATCH_TRUSTED_SOURCES', 'MATCH_FUZZY_NAME_THRESHOLD'),
+            'required_args': ('source_uuids',),
+            'default_args': ('last_modified',),
+            'ignored_args': ('memory_budget', 'workers', 'batch_size')
+        }
+    }
+
     def recommend(self, name, *args, **kwargs):
         """Generate a list of recommendations.
 
@@ -61,6 +89,13 @@ class RecommendationEngine:
         method will raise a `RecommendationEngineError`
         exception.
 
+        Results of the types listed in `CACHED_TYPES` are cached.
+        When the same arguments are given again and the parts of
+        the registry the results depend on did not change, the
+        cached recommendations are returned without running the
+        recommender. Results for the whole registry or too large
+        to be stored are not cached.
+
         :param name: recommendation type
         :param *args: positional arguments to run the engine
         :param **args: keyword arguments to run the engine
@@ -76,6 +111,20 @@ class RecommendationEngine:
             msg = "Unknown '{}' recommendation type".format(name)
             raise RecommendationEngineError(msg=msg)
 
+        cached_type = self.CACHED_TYPES.get(name, None)
+        params = None
+
+        if cached_type and getattr(settings, cached_type['ttl'], 0) > 0:
+            params = self._cache_params(recommender, cached_type, *args, **kwargs)
+
+        if params is not None:
+            return self._generate_cached_recommendations(name,
+                                                         recommender,
+                                                         cached_type,
+                                                         params,
+                                                         *args,
+                                                         **kwargs)
+
         return self._generate_recommendations(name,
                                               recommender,
                                               *args,
@@ -88,6 +137,74 @@ class RecommendationEngine:
         for rec in recommender(*args, **kwargs):
             yield Recommendation(rec[0], rec[1], name, rec[2])
 
+    @staticmethod
+    def _cache_params(recommender, cached_type, *args, **kwargs):
+        """Get the arguments that identify the results in the cache.
+
+        The values of the settings the results depend on are
+        included too. Returns `None` when the results of these
+        arguments can't be cached.
+        """
+        signature = inspect.signature(recommender)
+        bound_args = signature.bind(*args, **kwargs)
+        bound_args.apply_defaults()
+
+        for arg in cached_type['required_args']:
+            if not bound_args.arguments[arg]:
+                return None
+
+        for arg in cached_type['default_args']:
+            if bound_args.arguments[arg] != signature.parameters[arg].default:
+                return None
+
+        params = {
+            arg: value for arg, value in bound_args.arguments.items()
+            if arg not in cached_type['ignored_args']
+        }
+        params.update({name: getattr(settings, name) for name in cached_type['settings']})
+
+        return params
+
+    @staticmethod
+    def _generate_cached_recommendations(name, recommender, cached_type, params,
+                                         *args, **kwargs):
+        """Generator of recommendations stored in the cache.
+
+        The version of the registry is read before running the
+        recommender, so results generated while the registry
+        changes are stored under the old version and never used.
+        Results are only cached when all of them were generated
+        and their size, the number of keys plus the number of
+        options, is not over the maximum size.
+        """
+        version = get_registry_version(*cached_type['depends_on'])
+        key = cache_key(name, version, **params)
+
+        cached = get_cached_value(key)
+
+        if cached is not None:
+            for rec in cached:
+                yield Recommendation(rec[0], rec[1], name, rec[2])
+            return
+
+        max_size = getattr(settings, cached_type['max_size'])
+        results = []
+        size = 0
+
+        for rec in recommender(*args, **kwargs):
+            if results is not None:
+                size += 1 + len(rec[2])
+
+                if size > max_size:
+                    results = None
+                else:
+                    results.append([rec[0], rec[1], rec[2]])
+
+            yield Recommendation(rec[0], rec[1], name, rec[2])
+
+        if results is not None:
+            set_cached_value(key, results, getattr(settings, cached_type['ttl']))
+
     @classmethod
     def types(cls):
         """List of supported types of recommendations."""
@@ -23,6 +23,9 @@ import logging
 
 import django.db.utils
 
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.functions import Lower
+
 from grimoirelab_toolkit.datetime import datetime_utcnow
 
 from ..errors import (InvalidValueError,
@@ -32,11 +35,19 @@ from ..db import _handle_integrity_error
 from ..log import TransactionsLog
 from ..models import (Operation,
                       RecommenderExclusionTerm)
+from .. import tenant
 from ..aux import validate_field
+from ..cache import (EXCLUSION_TERMS,
+                     bump_registry_version,
+                     get_registry_version)
 
 
 logger = logging.getLogger(__name__)
 
+# Normalized exclusion terms of each tenant, cached in memory
+# together with the version of the exclusion terms when they were read
+_excluded_terms_cache = {}
+
 
 def add_recommender_exclusion_term(ctx, term):
     """Add a term to the registry.
@@ -117,6 +128,73 @@ def fetch_recommender_exclusion_list():
     return [exclusion.term for exclusion in exclusion_terms]
 
 
+def fetch_excluded_terms():
+    """Fetch the set of normalized terms of the exclusion list.
+
+    Terms are normalized to lowercase. The set is cached in memory
+    for each tenant under the version of the exclusion terms (see
+    `get_registry_version`), so checking whether the cached set
+    is still valid does not query the database. The version is
+    increased when a term is added or removed, by this or by any
+    other process, once the transaction is committed.
+
+    Until then, the process that changed the terms reads them
+    from the database on every call, so it sees its own changes
+    and does not cache a set that could be rolled back.
+
+    :returns: a frozen set of normalized terms
+    """
+    tenant_name = tenant.get_db_tenant() or 'default'
+    version = get_registry_version(EXCLUSION_TERMS)[0]
+
+    cached = _excluded_terms_cache.get(tenant_name, None)
+
+    if cached and cached[0] == version and cached[1] is not None:
+        return cached[1]
+
+    terms = RecommenderExclusionTerm.objects.values_list('normalized_term', flat=True)
+    terms = frozenset(terms)
+
+    if not cached or cached[0] != version:
+        _excluded_terms_cache[tenant_name] = (version, terms)
+
+    return terms
+
+
+def exclude_identities(identities):
+    """Remove identities with excluded terms from a queryset.
+
+    Identities are excluded when their name, email or username,
+    in lowercase, is in the exclusion list, whether the field is
+    one of the matching criteria or not. The filter runs on the
+    database, comparing the values with the indexed column of
+    normalized terms.
+
+    :param identities: queryset of identities
+
+    :returns: a queryset without the excluded identities
+    """
+    excluded = RecommenderExclusionTerm.objects.filter(
+        Q(normalized_term=Lower(OuterRef('name'))) |
+        Q(normalized_term=Lower(OuterRef('email'))) |
+        Q(normalized_term=Lower(OuterRef('username')))
+    )
+
+    return identities.exclude(Exists(excluded))
+
+
+def _invalidate_excluded_terms():
+    """Stop using the cached set of exclusion terms of the current tenant.
+
+    The set is not cached again until the version of the exclusion
+    terms changes, when the current transaction is committed.
+    """
+    tenant_name = tenant.get_db_tenant() or 'default'
+    version = get_registry_version(EXCLUSION_TERMS)[0]
+
+    _excluded_terms_cache[tenant_name] = (version, None)
+
+
 def _add_excluded_term(trxl, term):
     """Add a term to the database.
 
@@ -145,6 +223,9 @@ def _add_excluded_term(trxl, term):
     except django.db.utils.IntegrityError as exc:
         _handle_integrity_error(RecommenderExclusionTerm, exc)
 
+    bump_registry_version(EXCLUSION_TERMS)
+    _invalidate_excluded_terms()
+
     trxl.log_operation(op_type=Operation.OpType.ADD, entity_type='recommender_exclusion_terms',
                        timestamp=datetime_utcnow(), args=op_args,
                        target=op_args['term'])
@@ -167,6 +248,8 @@ def _delete_excluded_term(trxl, term):
     }
 
     term.delete()
+    bump_registry_version(EXCLUSION_TERMS)
+    _invalidate_excluded_terms()
 
     trxl.log_operation(op_type=Operation.OpType.DELETE, entity_type='recommender_exclusion_terms',
                        timestamp=datetime_utcnow(), args=op_args,
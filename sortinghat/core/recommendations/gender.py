@@ -22,19 +22,34 @@
 #
 
 
+import array
+import bisect
+import csv
+import datetime
 import logging
+import os
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 
 import requests
 import urllib3.util
 
-from ..db import find_individual_by_uuid, find_identity
-from ..errors import NotFoundError, InvalidValueError
-from .exclusion import fetch_recommender_exclusion_list
+from django.conf import settings
+
+from grimoirelab_toolkit.datetime import datetime_utcnow
+
+from ..aux import iter_chunks
+from ..errors import InvalidValueError
+from ..models import GenderCache, Identity, Individual, Profile
+from .exclusion import fetch_excluded_terms
 
 logger = logging.getLogger(__name__)
 
+GENDER_CHUNK_SIZE = 2000
+
 strict_name_pattern = re.compile(r"(^\w{2,})\s+\w+")
 loose_name_pattern = re.compile(r"(^\w{2,})")
 
@@ -43,8 +58,9 @@ def recommend_gender(uuids, exclude=True, no_strict_matching=False):
     """Recommend possible genders for a list of individuals.
 
     Returns a generator of gender recommendations based on the
-    individuals first name, using the genderize.io API. The
-    genders returned by the API are 'male' and 'female'.
+    individuals first name, using the gender provider set in
+    `SORTINGHAT_GENDER_PROVIDER`; by default, the genderize.io
+    API. The genders returned by the API are 'male' and 'female'.
 
     Each recommendation contains the uuid of the individual, the
     suggested gender and the accuracy of the prediction.
@@ -54,6 +70,11 @@ def recommend_gender(uuids, exclude=True, no_strict_matching=False):
     the name will also need to follow a 'Name LastName' pattern, but
     this validation can be disabled with the 'no_strict_matching' flag.
 
+    Individuals are processed in chunks. The individuals of a chunk,
+    their identities and profiles are read in bulk, with a fixed
+    number of queries. Then, each distinct first name of the chunk
+    is requested only once to the provider (see `genderize_names`).
+
     :param uuids: list of individual identifiers
     :param exclude: if set to `True`, the results list will ignore individual identities
         if any value from the `email`, `name`, or `username` fields are found in the
@@ -66,53 +87,396 @@ def recommend_gender(uuids, exclude=True, no_strict_matching=False):
         f"uuids={uuids}; ..."
     )
 
-    if exclude:
-        excluded_terms = set(fetch_recommender_exclusion_list())
-
+    excluded_terms = fetch_excluded_terms() if exclude else None
     strict = not no_strict_matching
-    for uuid in uuids:
-        try:
-            if exclude and _exclude_uuid(uuid, excluded_terms):
+    provider = get_gender_provider()
+
+    for chunk in iter_chunks(uuids, GENDER_CHUNK_SIZE):
+        names = _find_first_names(chunk, excluded_terms, strict)
+        genders = genderize_names({name for _, name in names.values()},
+                                  provider=provider)
+
+        for uuid, (mk, name) in names.items():
+            if name not in genders:
+                message = f"Skipping {uuid} due to a connection error"
+                logger.warning(message)
                 continue
-            individual = find_individual_by_uuid(uuid)
-            name = _get_individual_name(individual, strict)
-            gender, accuracy = _genderize(name)
-        except NotFoundError:
-            message = f"Skipping {uuid}: Individual not found"
-            logger.warning(message)
-            continue
-        except InvalidValueError:
-            message = f"Skipping {uuid}: No valid name"
-            logger.warning(message)
-            continue
-        except requests.exceptions.RequestException as e:
-            message = f"Skipping {uuid} due to a connection error: {str(e)}"
-            logger.warning(message)
-            continue
-        else:
-            yield uuid, individual.mk, (gender, accuracy)
+
+            yield uuid, mk, genders[name]
 
     logger.info(f"Gender recommendations generated; uuids='{uuids}'")
 
 
-def _exclude_uuid(uuid, excluded_terms):
-    """If one of username, email, or name are in excluded_terms
-    it will return True and False if not.
+def genderize_names(names, provider=None):
+    """Find the gender of a set of first names.
+
+    Genders are found by a gender provider. By default, the one
+    set in `SORTINGHAT_GENDER_PROVIDER` (see `get_gender_provider`).
+
+    When the provider is a remote service, genders are read first
+    from the cache of names stored in the database. The names not
+    found there, or cached for longer than
+    `SORTINGHAT_GENDERIZE_CACHE_TTL` seconds, are requested to
+    the provider and stored in the cache.
+
+    Names that could not be requested because of connection
+    errors are not included in the result.
+
+    :param names: list of first names, in lowercase
+    :param provider: gender provider to use
+
+    :returns: a dictionary with a tuple `(gender, accuracy)`
+        for each name
+    """
+    names = set(names)
+    provider = provider or get_gender_provider()
+
+    if not provider.cached:
+        return provider.genderize(names)
+
+    ttl = settings.SORTINGHAT_GENDERIZE_CACHE_TTL
+
+    genders = _fetch_cached_genders(names, ttl) if ttl else {}
+    pending = names - genders.keys()
+
+    if pending:
+        found = provider.genderize(pending)
+        if ttl:
+            _store_cached_genders(found)
+        genders.update(found)
+
+    return genders
+
+
+def get_gender_provider(name=None):
+    """Create a gender provider.
+
+    :param name: name of the provider; by default, the one set
+        in `SORTINGHAT_GENDER_PROVIDER`
+
+    :returns: a `GenderProvider` instance
+
+    :raises InvalidValueError: when the provider is not available
+    """
+    name = name or settings.SORTINGHAT_GENDER_PROVIDER
+
+    try:
+        provider_class = GENDER_PROVIDERS[name]
+    except KeyError:
+        msg = f"'{name}' gender provider not available; valid providers: {', '.join(GENDER_PROVIDERS)}"
+        raise InvalidValueError(msg=msg)
+
+    return provider_class()
+
 
-    :param uuid: Individual UUID
-    :excluded_terms: Set of terms (RecommenderExclusionTerm)
+class GenderProvider:
+    """Abstract class for gender providers.
 
-    :returns: True | False
+    A gender provider guesses the gender of a list of first
+    names, together with the accuracy of the guess, from 0 to 100.
+    Names are always given in lowercase.
+
+    Set `cached` to `True` when the genders found by the provider
+    should be stored in the database cache of names, as it is the
+    case of remote services.
     """
-    identity = find_identity(uuid)
-    identity_set = {identity.username, identity.name, identity.email}
-    identity_set.discard(None)
+    cached = False
+
+    def genderize(self, names):
+        """Find the gender of a list of names.
+
+        :param names: list of names
+
+        :returns: a dictionary with a tuple `(gender, accuracy)` for
+            each name; when the gender is unknown, the tuple is
+            `(None, None)`
+        """
+        raise NotImplementedError
+
+
+class GenderizeProvider(GenderProvider):
+    """Gender provider based on the genderize.io API.
+
+    Names are sent in batches of `batch_size` names per request.
+    Batches are requested concurrently by `workers` threads,
+    sending at most `rate_limit` requests per second. All the
+    requests share the same HTTP session.
+
+    By default, the parameters are read from the settings.
+    Names requested with errors are not included in the results.
+
+    :param url: URL of the genderize.io API
+    :param api_key: key to access the API
+    :param batch_size: maximum number of names per request
+    :param workers: number of concurrent requests
+    :param rate_limit: maximum number of requests per second;
+        0 means no limit
+    """
+    cached = True
+
+    TOTAL_RETRIES = 10
+    MAX_RETRIES = 5
+    SLEEP_TIME = 0.25
+    STATUS_FORCELIST = [429, 502]
+
+    def __init__(self, url=None, api_key=None, batch_size=None,
+                 workers=None, rate_limit=None):
+        self.url = url or settings.SORTINGHAT_GENDERIZE_API_URL
+        self.api_key = api_key or settings.SORTINGHAT_GENDERIZE_API_KEY
+        self.batch_size = max(batch_size or settings.SORTINGHAT_GENDERIZE_BATCH_SIZE, 1)
+        self.workers = max(workers or settings.SORTINGHAT_GENDERIZE_WORKERS, 1)
+
+        if rate_limit is None:
+            rate_limit = settings.SORTINGHAT_GENDERIZE_RATE_LIMIT
+
+        self._limiter = _RateLimiter(rate_limit)
+        self.session = self._create_session()
+
+    def genderize(self, names):
+        """Fetch the gender of a list of names.
+
+        :param names: list of names
+
+        :returns: a dictionary with a tuple `(gender, accuracy)` for
+            each name; names of failed requests are not included
+        """
+        names = sorted(set(names))
+        batches = [names[i:i + self.batch_size]
+                   for i in range(0, len(names), self.batch_size)]
+
+        genders = {}
+
+        if self.workers > 1 and len(batches) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for result in executor.map(self._fetch_batch, batches):
+                    genders.update(result)
+        else:
+            for batch in batches:
+                genders.update(self._fetch_batch(batch))
+
+        return genders
+
+    def _fetch_batch(self, batch):
+        """Fetch the genders of a batch of names"""
+
+        params = [('name[]', name) for name in batch]
+
+        if self.api_key:
+            params.append(('apikey', self.api_key))
+
+        self._limiter.wait()
+
+        try:
+            r = self.session.get(self.url, params=params)
+            r.raise_for_status()
+            results = r.json()
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Unable to genderize {len(batch)} names due to a connection error: {str(e)}")
+            return {}
+
+        if isinstance(results, dict):
+            results = [results]
+
+        genders = {}
+
+        # Results are returned in the same order as the names
+        for name, result in zip(batch, results):
+            prob = result.get('probability', None)
+            acc = int(prob * 100) if prob else None
+            genders[name] = (result.get('gender', None), acc)
+
+        return genders
+
+    def _create_session(self):
+        session = requests.Session()
+
+        retries = urllib3.util.Retry(total=self.TOTAL_RETRIES,
+                                     connect=self.MAX_RETRIES,
+                                     status=self.MAX_RETRIES,
+                                     status_forcelist=self.STATUS_FORCELIST,
+                                     backoff_factor=self.SLEEP_TIME,
+                                     raise_on_status=True)
+        adapter = requests.adapters.HTTPAdapter(max_retries=retries,
+                                                pool_maxsize=self.workers)
 
-    return not identity_set.isdisjoint(excluded_terms)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
 
+        return session
 
-def _get_individual_name(individual, strict):
-    """Get the first name of an individual from their profile"""
+
+class DictionaryProvider(GenderProvider):
+    """Gender provider based on a local dictionary of names.
+
+    The dictionary is a CSV file with the columns `name`, `gender`
+    and `probability`, where the probability goes from 0 to 1, like
+    the ones returned by genderize.io. The first row must be the
+    header. For example:
+
+        name,gender,probability
+        john,male,0.99
+        jane,female,0.98
+
+    The file is loaded once per process into a compact structure,
+    and loaded again when it is modified. No request leaves the
+    machine, so this provider can be used on offline deployments.
+
+    :param path: path to the dictionary; by default, the one set
+        in `SORTINGHAT_GENDER_DICTIONARY_PATH`
+
+    :raises InvalidValueError: when the path is not set
+    """
+    def __init__(self, path=None):
+        self.path = path or settings.SORTINGHAT_GENDER_DICTIONARY_PATH
+
+        if not self.path:
+            raise InvalidValueError(msg="path to the gender dictionary not set")
+
+        self.dictionary = _load_gender_dictionary(self.path, os.path.getmtime(self.path))
+
+    def genderize(self, names):
+        return {name: self.dictionary.get(name) for name in names}
+
+
+class _GenderDictionary:
+    """Compact in-memory table of names with their genders.
+
+    Names are kept in a sorted list and searched with a binary
+    search. Genders are stored as indexes of the list of distinct
+    genders and accuracies as bytes, so each name only takes two
+    extra bytes.
+    """
+    def __init__(self, entries):
+        entries = sorted(entries)
+
+        self.genders = sorted({gender for _, gender, _ in entries})
+        codes = {gender: code for code, gender in enumerate(self.genders)}
+
+        self.names = [name for name, _, _ in entries]
+        self.codes = array.array('B', (codes[gender] for _, gender, _ in entries))
+        self.accuracies = array.array('B', (acc for _, _, acc in entries))
+
+    def get(self, name):
+        """Get the gender and accuracy of a name; `(None, None)` when not found"""
+
+        idx = bisect.bisect_left(self.names, name)
+
+        if idx == len(self.names) or self.names[idx] != name:
+            return None, None
+
+        return self.genders[self.codes[idx]], self.accuracies[idx]
+
+    def __len__(self):
+        return len(self.names)
+
+
+@lru_cache(maxsize=4)
+def _load_gender_dictionary(path, mtime):
+    """Load a dictionary of names from a CSV file.
+
+    The modification time is part of the cache key, so the
+    dictionary is loaded again when the file changes.
+    """
+    logger.info(f"Loading gender dictionary; path='{path}'; ...")
+
+    entries = {}
+
+    with open(path, 'r', newline='', encoding='utf-8') as fd:
+        for row in csv.DictReader(fd):
+            try:
+                name = row['name'].strip().lower()
+                gender = row['gender'].strip().lower()
+                prob = float(row['probability'])
+            except (KeyError, AttributeError, TypeError, ValueError):
+                raise InvalidValueError(msg=f"invalid row in gender dictionary: {row}")
+
+            if not name or not gender:
+                continue
+
+            acc = min(max(int(prob * 100), 0), 100)
+            entries[name] = (name, gender, acc)
+
+    dictionary = _GenderDictionary(entries.values())
+
+    logger.info(f"Gender dictionary loaded; path='{path}'; names={len(dictionary)}")
+
+    return dictionary
+
+
+GENDER_PROVIDERS = {
+    'genderize': GenderizeProvider,
+    'dictionary': DictionaryProvider
+}
+
+
+def _find_first_names(uuids, excluded_terms, strict):
+    """Find the first names of a list of individuals.
+
+    Uuids are searched as main keys and then as identities
+    uuids, like `find_individual_by_uuid` does. The first name
+    is taken from the profile of the individual. Individuals,
+    identities and profiles are read with three queries.
+
+    When `excluded_terms` is given, uuids whose identity has
+    a username, name or email in these terms are skipped.
+
+    :param uuids: list of individual identifiers
+    :param excluded_terms: set of normalized terms to exclude;
+        `None` to not exclude any identity
+    :param strict: validate the name with the strict pattern
+
+    :returns: a dictionary with a tuple `(mk, first_name)` for
+        each uuid
+    """
+    identities = Identity.objects.filter(uuid__in=uuids).order_by()
+    identities = {
+        uuid: (mk, (username, name, email))
+        for uuid, mk, username, name, email
+        in identities.values_list('uuid', 'individual', 'username', 'name', 'email')
+    }
+    mks = set(Individual.objects.filter(mk__in=uuids).order_by().values_list('mk', flat=True))
+
+    keys = {}
+
+    for uuid in uuids:
+        if excluded_terms is not None:
+            if uuid not in identities:
+                logger.warning(f"Skipping {uuid}: Individual not found")
+                continue
+            if _is_excluded(identities[uuid][1], excluded_terms):
+                continue
+
+        if uuid in mks:
+            keys[uuid] = uuid
+        elif uuid in identities:
+            keys[uuid] = identities[uuid][0]
+        else:
+            logger.warning(f"Skipping {uuid}: Individual not found")
+
+    profiles = Profile.objects.filter(individual__in=set(keys.values())).order_by()
+    profiles = dict(profiles.values_list('individual', 'name'))
+
+    names = {}
+
+    for uuid, mk in keys.items():
+        try:
+            names[uuid] = (mk, _get_first_name(profiles.get(mk), strict))
+        except InvalidValueError:
+            logger.warning(f"Skipping {uuid}: No valid name")
+
+    return names
+
+
+def _is_excluded(terms, excluded_terms):
+    """Check if any of the terms of an identity is excluded"""
+
+    terms = {value.lower() for value in terms if value is not None}
+
+    return not terms.isdisjoint(excluded_terms)
+
+
+def _get_first_name(name, strict):
+    """Get the first name from the name of a profile"""
 
     name_pattern = loose_name_pattern
 
@@ -120,7 +484,7 @@ def _get_individual_name(individual, strict):
         name_pattern = strict_name_pattern
 
     try:
-        name_match = name_pattern.match(individual.profile.name)
+        name_match = name_pattern.match(name)
         first_name = name_match.group(1).lower()
     except Exception as e:
         raise InvalidValueError(msg=str(e))
@@ -128,46 +492,51 @@ def _get_individual_name(individual, strict):
         return first_name
 
 
-@lru_cache(maxsize=128)
-def _genderize(name):
-    """Fetch gender from genderize.io"""
+def _fetch_cached_genders(names, ttl):
+    """Read the genders of the names cached after the TTL"""
 
-    from django.conf import settings
+    since = datetime_utcnow() - datetime.timedelta(seconds=ttl)
 
-    api_key = settings.SORTINGHAT_GENDERIZE_API_KEY
-    genderize_api_url = "https://api.genderize.io/"
-    total_retries = 10
-    max_retries = 5
-    sleep_time = 0.25
-    status_forcelist = [502]
+    cached = GenderCache.objects.filter(name__in=names,
+                                        last_modified__gte=since)
+    cached = cached.values_list('name', 'gender', 'accuracy')
 
-    params = {
-        'name': name
-    }
+    return {name: (gender, accuracy) for name, gender, accuracy in cached}
+
+
+def _store_cached_genders(genders):
+    """Store the genders of the names in the cache, replacing the old ones"""
+
+    if not genders:
+        return
 
-    if api_key:
-        params['apikey'] = api_key
+    GenderCache.objects.filter(name__in=genders.keys()).delete()
 
-    session = requests.Session()
+    entries = [
+        GenderCache(name=name, gender=gender, accuracy=accuracy)
+        for name, (gender, accuracy) in genders.items()
+    ]
+    GenderCache.objects.bulk_create(entries, ignore_conflicts=True)
 
-    retries = urllib3.util.Retry(total=total_retries,
-                                 connect=max_retries,
-                                 status=max_retries,
-                                 status_forcelist=status_forcelist,
-                                 backoff_factor=sleep_time,
-                                 raise_on_status=True)
 
-    session.mount('http://', requests.adapters.HTTPAdapter(max_retries=retries))
-    session.mount('https://', requests.adapters.HTTPAdapter(max_retries=retries))
+class _RateLimiter:
+    """Limit the number of calls per second shared by several threads"""
 
-    r = session.get(genderize_api_url, params=params)
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self._next_call = 0.0
+        self._lock = threading.Lock()
 
-    result = r.json()
+    def wait(self):
+        """Block until the next call is allowed"""
 
-    r.raise_for_status()
+        if not self.interval:
+            return
 
-    gender = result.get('gender', None)
-    prob = result.get('probability', None)
-    acc = int(prob * 100) if prob else None
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_call - now
+            self._next_call = max(now, self._next_call) + self.interval
 
-    return gender, acc
+        if delay > 0:
+            time.sleep(delay)
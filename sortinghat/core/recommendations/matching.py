@@ -21,34 +21,84 @@
 #
 
 
+import concurrent.futures
+import itertools
 import logging
+import multiprocessing
+import tempfile
+
 import pandas
 import numpy
 
-from collections import defaultdict
+from collections import defaultdict, deque
 
 from django.conf import settings
-from django.forms.models import model_to_dict
+from pandas.api.types import union_categoricals
 
+from ..aux import GITHUB_EMAIL_ADDRESS_REGEX, generate_matching_keys
 from ..db import (find_individual_by_uuid)
 from ..errors import NotFoundError
-from ..models import Identity, MIN_PERIOD_DATE
+from ..fuzzy import fuzzy_name_keys, name_similarity
+from ..models import Identity, MatchingKey, MIN_PERIOD_DATE
 
-from .exclusion import fetch_recommender_exclusion_list
+from .exclusion import exclude_identities
+from .components import UnionFind
+from .partitioning import HashPartitionStore, estimate_num_partitions
 
 logger = logging.getLogger(__name__)
 
 EMAIL_ADDRESS_REGEX = r"^(?P<email>[^\s@]+@[^\s@.]+\.[^\s@]+)$"
-GITHUB_EMAIL_ADDRESS_REGEX = r"^(\d+\+)?(?P<username>[a-zA-Z0-9._%+-]+)(\b@users.noreply.github.com\b)"
 NAME_REGEX = r"^\w+\s\w+"
 
+# Criterion to match similar names; it is based on the
+# values of the `name` field
+FUZZY_NAME = 'fuzzy_name'
+
+# Blocks of fuzzy name keys that would generate more pairs
+# of names to compare than this value are ignored
+MAX_FUZZY_BLOCK_PAIRS = 1000000
+
+# Maximum number of input identities to look for matches
+# using the matching index instead of the whole registry
+MAX_INDEX_LOOKUP_IDENTITIES = 10000
+INDEX_LOOKUP_CHUNK_SIZE = 1000
+
+# Identities are loaded in columnar form, reading
+# rows from the database in chunks of this size
+LOAD_CHUNK_SIZE = 10000
+IDENTITY_FIELDS = ['uuid', 'individual', 'name', 'email', 'username', 'source']
+CATEGORICAL_FIELDS = ['individual', 'source']
+
+# Tasks submitted to each worker of the pool at the same time
+MAX_PENDING_TASKS_PER_WORKER = 2
+
+# Points of the confidence score of a match given by each
+# criterion both individuals match on. Similar names get
+# the points of `fuzzy_name` multiplied by their similarity.
+MATCH_SCORE_POINTS = {
+    'email': 50,
+    'username': 20,
+    'github': 20,
+    'name': 20,
+    FUZZY_NAME: 20
+}
+# Extra points when usernames match on trusted sources
+TRUSTED_SOURCE_POINTS = 20
+# Extra points for each matching identity after the first two
+IDENTITY_POINTS = 5
+MAX_IDENTITY_POINTS = 20
+MAX_MATCH_SCORE = 100
+
 
 def recommend_matches(source_uuids, target_uuids,
                       criteria, exclude=True,
                       verbose=False, strict=True,
                       match_source=False,
                       guess_github_user=False,
-                      last_modified=MIN_PERIOD_DATE):
+                      last_modified=MIN_PERIOD_DATE,
+                      memory_budget=None,
+                      workers=None,
+                      batch_size=None):
     """Recommend identity matches for a list of individuals.
 
     Returns a generator of identity matches recommendations
@@ -72,11 +122,28 @@ def recommend_matches(source_uuids, target_uuids,
 
     When there are no `target_uuids`, the recommendations will
     be returned for each `source_uuids` against all identities
-    on the registry.
+    on the registry. In that case, when the number of input
+    identities is small, only the identities of the registry
+    that share any normalized value with them are loaded, using
+    the matching index.
+
+    When a `memory_budget` is set, identities are not loaded in
+    memory at once. Instead, they are hash-partitioned on disk by
+    the values of each criterion and matched partition by partition,
+    keeping the memory used by each join under the budget. The
+    results are the same in both modes.
+
+    Joins of each criterion, or of each partition, can run in
+    parallel in a pool of `workers` processes.
+
+    When `batch_size` is set, source individuals are matched in
+    batches of that size. The recommendations of a batch are
+    generated as soon as it is matched, so they are available
+    early and only the matches of a batch are kept in memory.
 
     :param source_uuids: list of individual keys to find matches for
     :param target_uuids: list of individual keys where to find matches
-    :param criteria: list of matching criteria (`email`, `name`, `username`)
+    :param criteria: list of matching criteria (`email`, `name`, `username`, `fuzzy_name`)
     :param exclude: if set to `True`, the results list will ignore individual identities
         if any value from the `email`, `name`, or `username` fields are found in the
         RecommenderExclusionTerm table. Otherwise, results will not ignore them.
@@ -87,90 +154,534 @@ def recommend_matches(source_uuids, target_uuids,
     :param guess_github_user: infer usernames from GitHub-generated email addresses
     :param last_modified: generate recommendations only for individuals modified after
         this date
+    :param memory_budget: memory, in megabytes, available to find matches; when
+        it is `None`, the value of `MATCH_MEMORY_BUDGET` setting is used; a value
+        of `0` loads all the identities in memory
+    :param workers: number of processes used to join identities; when it is
+        `None`, the value of `MATCH_WORKERS` setting is used
+    :param batch_size: number of source individuals matched at a time; when it
+        is `None`, the value of `MATCH_BATCH_SIZE` setting is used; a value
+        of `0` matches all of them at once; it can't be larger than
+        `MAX_INDEX_LOOKUP_IDENTITIES`
 
     :returns: a generator of recommendations
     """
 
-    def _get_identities(uuid):
-        """Get the identities from a given Individual based on one of its uuids"""
+    logger.debug(
+        f"Generating matching recommendations; "
+        f"source={source_uuids} target={target_uuids} criteria='{criteria}'; ..."
+    )
+
+    if memory_budget is None:
+        memory_budget = settings.MATCH_MEMORY_BUDGET
+    if workers is None:
+        workers = settings.MATCH_WORKERS
+    if batch_size is None:
+        batch_size = settings.MATCH_BATCH_SIZE
 
-        try:
-            individual = find_individual_by_uuid(uuid)
-        except NotFoundError:
-            identities = []
-        else:
-            identities = individual.identities.all()
+    target_mks = _find_target_individuals(target_uuids) if target_uuids else None
 
-        return identities
+    # Batches always look up their candidates in the matching index;
+    # otherwise, each one would join the whole registry
+    if batch_size:
+        batch_size = max(min(batch_size, MAX_INDEX_LOOKUP_IDENTITIES), 1)
 
+    batches = _iter_source_batches(source_uuids, last_modified, verbose, batch_size)
+
+    for batch_uuids, input_set, aliases, mk_sources in batches:
+        target_set = _select_target_identities(target_mks, input_set, criteria, guess_github_user,
+                                               lookup=bool(batch_size))
+
+        matched = _find_matches(input_set, target_set, criteria, exclude=exclude, verbose=verbose, strict=strict,
+                                match_source=match_source, guess_github_user=guess_github_user,
+                                memory_budget=memory_budget, workers=workers)
+
+        # Return filtered results
+        for uuid in batch_uuids:
+            result = set()
+            if uuid in matched.keys():
+                result = set(matched[uuid])
+            else:
+                for alias in aliases[uuid]:
+                    if alias in matched.keys():
+                        result = set(matched[alias])
+            # Remove input uuid from results if needed
+            try:
+                result.remove(uuid)
+            except KeyError:
+                pass
+            yield uuid, mk_sources[uuid], sorted(result)
+
+    logger.info(f"Matching recommendations generated; criteria='{criteria}'")
+
+
+def find_match_groups(source_uuids, target_uuids,
+                      criteria, exclude=True, strict=True,
+                      match_source=False,
+                      guess_github_user=False,
+                      last_modified=MIN_PERIOD_DATE,
+                      memory_budget=None,
+                      workers=None,
+                      min_score=None):
+    """Find groups of matching individuals.
+
+    Instead of generating a recommendation with the matches of each
+    individual, like `recommend_matches` does, the pairs of matching
+    individuals found joining the identities are added, as edges of
+    a graph, to a union-find structure. Each connected component of
+    that graph is a group of individuals that can be merged.
+
+    Pairs are processed as they are generated, so no set of matches
+    per individual is kept in memory. When `min_score` is set, pairs
+    with a lower confidence score (see `score_matches`) are not
+    added to the graph.
+
+    The parameters have the same meaning than in `recommend_matches`.
+
+    :param source_uuids: list of individual keys to find matches for
+    :param target_uuids: list of individual keys where to find matches
+    :param criteria: list of matching criteria (`email`, `name`, `username`, `fuzzy_name`)
+    :param exclude: ignore identities with values in the RecommenderExclusionTerm table
+    :param strict: strict matching with well-formed email addresses and names
+    :param match_source: only matching for identities with the same source
+    :param guess_github_user: infer usernames from GitHub-generated email addresses
+    :param last_modified: find groups only for individuals modified after this date
+    :param memory_budget: memory, in megabytes, available to find matches
+    :param workers: number of processes used to join identities
+    :param min_score: minimum confidence score of the pairs of
+        matches; when it is `None`, the value of `MATCH_MIN_SCORE`
+        setting is used; `0` means any pair is valid
+
+    :returns: a `UnionFind` object with the matching individuals
+    """
     logger.debug(
-        f"Generating matching recommendations; "
+        f"Generating matching groups; "
         f"source={source_uuids} target={target_uuids} criteria='{criteria}'; ..."
     )
 
-    aliases = defaultdict(list)
-    mk_sources = dict()
-    input_set = set()
-    target_set = set()
+    if memory_budget is None:
+        memory_budget = settings.MATCH_MEMORY_BUDGET
+    if workers is None:
+        workers = settings.MATCH_WORKERS
+    if min_score is None:
+        min_score = settings.MATCH_MIN_SCORE
 
     if source_uuids:
-        for uuid in source_uuids:
-            identities = _get_identities(uuid)
-            aliases[uuid] = [identity.uuid for identity in identities]
-            mk_sources[uuid] = identities[0].individual.mk if len(identities) > 0 else uuid
-            input_set.update(identities)
+        input_set, _, _ = _select_source_identities(source_uuids)
     else:
-        identities = Identity.objects.select_related('individual').filter(individual__last_modified__gte=last_modified)
-        input_set.update(identities)
-        for identity in identities:
-            aliases[identity.individual.mk].append(identity.uuid)
-            mk_sources[identity.uuid] = identity.individual.mk
-        source_uuids = aliases.keys()
-
-    if target_uuids:
-        for uuid in target_uuids:
-            identities = _get_identities(uuid)
-            target_set.update(identities)
+        input_set = [Identity.objects.filter(individual__last_modified__gte=last_modified)]
+
+    target_mks = _find_target_individuals(target_uuids) if target_uuids else None
+    target_set = _select_target_identities(target_mks, input_set, criteria, guess_github_user)
+
+    groups = UnionFind()
+
+    for pairs in _iter_matches(input_set, target_set, criteria, exclude=exclude,
+                               verbose=False, strict=strict, match_source=match_source,
+                               guess_github_user=guess_github_user,
+                               memory_budget=memory_budget, workers=workers):
+        pairs = pairs.drop_duplicates()
+        pairs = pairs.itertuples(index=False, name=None)
+
+        if min_score:
+            pairs = [pair for pair, (score, _) in score_matches(pairs).items()
+                     if score >= min_score]
+
+        groups.union_pairs(pairs)
+
+    logger.info(f"Matching groups generated; criteria='{criteria}'")
+
+    return groups
+
+
+def score_matches(pairs):
+    """Calculate the confidence score of pairs of matching individuals.
+
+    The score goes from 0 to 100 and it is calculated using the
+    matching index of the identities of both individuals. Each
+    criterion they match on adds its points (see `MATCH_SCORE_POINTS`).
+    When their names don't match exactly, the fuzzy similarity of
+    the most similar names adds a fraction of the `fuzzy_name`
+    points, as long as it is over `MATCH_FUZZY_NAME_THRESHOLD`.
+    Usernames found in GitHub-generated emails match other
+    usernames under the `github` criterion, as they do when
+    `guess_github_user` is set for matching.
+    Matching usernames from `MATCH_TRUSTED_SOURCES` and the
+    number of identities that match also increase the score.
+
+    Besides the score, the details of the match are returned:
+    the criteria that matched, the number of matching identities,
+    whether the match was on a trusted source and the similarity
+    of the names.
+
+    :param pairs: list of tuples with the main keys of two
+        matching individuals
+
+    :returns: a dictionary with a tuple `(score, details)`
+        for each pair
+    """
+    pairs = set(pairs)
+    mks = list(set(itertools.chain.from_iterable(pairs)))
+
+    keys = defaultdict(list)
+
+    for i in range(0, len(mks), INDEX_LOOKUP_CHUNK_SIZE):
+        chunk = mks[i:i + INDEX_LOOKUP_CHUNK_SIZE]
+        index = MatchingKey.objects.filter(individual__in=chunk)
+        index = index.values_list('individual', 'identity', 'source', 'criterion', 'value')
+
+        for mk, identity, source, criterion, value in index.iterator():
+            keys[mk].append((identity, source, criterion, value))
+
+    return {
+        (mk1, mk2): _score_pair(keys[mk1], keys[mk2])
+        for mk1, mk2 in pairs
+    }
+
+
+def _score_pair(keys_a, keys_b):
+    """Calculate the confidence score of the match between two lists of keys"""
+
+    def _group_keys(keys):
+        grouped = defaultdict(set)
+        for identity, source, criterion, value in keys:
+            grouped[(criterion, value)].add((identity, source))
+        return grouped
+
+    values_a = _group_keys(keys_a)
+    values_b = _group_keys(keys_b)
+
+    matches = [(key[0], values_a[key], values_b[key])
+               for key in values_a.keys() & values_b.keys()]
+
+    # GitHub usernames found in emails match usernames too
+    for values_x, values_y in ((values_a, values_b), (values_b, values_a)):
+        for criterion, value in values_x:
+            if criterion == 'github' and ('username', value) in values_y:
+                matches.append(('github', values_x[(criterion, value)], values_y[('username', value)]))
+
+    criteria = set()
+    identities = set()
+    trusted = False
+
+    for criterion, matched_a, matched_b in matches:
+        if criterion == FUZZY_NAME:
+            continue
+
+        criteria.add(criterion)
+        identities.update(identity for identity, _ in matched_a | matched_b)
+
+        if criterion == 'username':
+            trusted_sources = settings.MATCH_TRUSTED_SOURCES
+            trusted = trusted or (any(source in trusted_sources for _, source in matched_a) and
+                                  any(source in trusted_sources for _, source in matched_b))
+
+    names_a = [value for criterion, value in values_a if criterion == 'name']
+    names_b = [value for criterion, value in values_b if criterion == 'name']
+    similarity = max((name_similarity(name_a, name_b) for name_a in names_a for name_b in names_b),
+                     default=0.0)
+
+    score = sum(MATCH_SCORE_POINTS.get(criterion, 0) for criterion in criteria)
+
+    if 'name' not in criteria and similarity >= settings.MATCH_FUZZY_NAME_THRESHOLD:
+        criteria.add(FUZZY_NAME)
+        score += MATCH_SCORE_POINTS[FUZZY_NAME] * similarity
+
+    if trusted:
+        score += TRUSTED_SOURCE_POINTS
+
+    score += min(IDENTITY_POINTS * max(len(identities) - 2, 0), MAX_IDENTITY_POINTS)
+
+    details = {
+        'criteria': sorted(criteria),
+        'identities': len(identities),
+        'trusted_source': trusted,
+        'similarity': round(similarity, 2)
+    }
+
+    return min(int(round(score)), MAX_MATCH_SCORE), details
+
+
+def _iter_source_batches(source_uuids, last_modified, verbose, batch_size):
+    """Generate the batches of source individuals to find matches for.
+
+    When there are no `source_uuids`, the individuals modified after
+    `last_modified` are selected, sorted by their main key. When
+    `batch_size` is `0`, a single batch with all the individuals
+    is generated.
+
+    :returns: a generator of tuples with the keys of the individuals
+        of the batch, their identities as a list of querysets, the
+        uuids of the identities of each individual and the main key
+        of each individual
+    """
+    if source_uuids:
+        for batch in _batches(source_uuids, batch_size):
+            input_set, aliases, mk_sources = _select_source_identities(batch)
+            yield batch, input_set, aliases, mk_sources
+        return
+
+    identities = Identity.objects.filter(individual__last_modified__gte=last_modified)
+    mks = list(identities.order_by('individual').values_list('individual', flat=True).distinct())
+
+    for batch in _batches(mks, batch_size):
+        if len(batch) == len(mks):
+            input_set = [identities]
+        else:
+            input_set = list(_chunked_identities('individual', batch))
+
+        aliases = defaultdict(list)
+        mk_sources = {mk: mk for mk in batch}
+
+        if verbose:
+            for queryset in input_set:
+                rows = queryset.values_list('individual', 'uuid').iterator(chunk_size=LOAD_CHUNK_SIZE)
+                for mk, uuid in rows:
+                    aliases[mk].append(uuid)
+
+        yield batch, input_set, aliases, mk_sources
+
+
+def _batches(values, batch_size):
+    """Split a list of values in batches of `batch_size` values"""
+
+    if not batch_size:
+        yield values
+        return
+
+    for i in range(0, len(values), batch_size):
+        yield values[i:i + batch_size]
+
+
+def _get_individual_identities(uuid):
+    """Get the main key and the identities of an individual based on one of its uuids"""
+
+    try:
+        individual = find_individual_by_uuid(uuid)
+    except NotFoundError:
+        return None, []
     else:
-        identities = Identity.objects.all()
-        target_set.update(identities)
+        return individual.mk, list(individual.identities.values_list('uuid', flat=True))
+
+
+def _select_source_identities(source_uuids):
+    """Select the identities of a list of source individuals.
+
+    :returns: a tuple with the identities as a list of querysets,
+        the uuids of the identities of each source individual, and
+        the main key of each source individual
+    """
+    aliases = defaultdict(list)
+    mk_sources = dict()
+    input_mks = set()
 
-    matched = _find_matches(input_set, target_set, criteria, exclude=exclude, verbose=verbose, strict=strict,
-                            match_source=match_source, guess_github_user=guess_github_user)
-    # Return filtered results
     for uuid in source_uuids:
-        result = set()
-        if uuid in matched.keys():
-            result = set(matched[uuid])
+        mk, uuids = _get_individual_identities(uuid)
+        aliases[uuid] = uuids
+        mk_sources[uuid] = mk if uuids else uuid
+        if uuids:
+            input_mks.add(mk)
+
+    input_set = list(_chunked_identities('individual', input_mks))
+
+    return input_set, aliases, mk_sources
+
+
+def _find_target_individuals(target_uuids):
+    """Find the main keys of the target individuals"""
+
+    target_mks = set()
+
+    for uuid in target_uuids:
+        mk, uuids = _get_individual_identities(uuid)
+        if uuids:
+            target_mks.add(mk)
+
+    return target_mks
+
+
+def _select_target_identities(target_mks, input_set, criteria, guess_github_user, lookup=False):
+    """Select the identities where to find matches.
+
+    When there are no `target_mks`, candidates are looked up in
+    the matching index when the number of input identities is small
+    or when `lookup` is set; otherwise, the whole registry is selected.
+
+    :returns: the target identities as a list of querysets
+    """
+    if target_mks is not None:
+        return list(_chunked_identities('individual', target_mks))
+    elif lookup or sum(queryset.count() for queryset in input_set) <= MAX_INDEX_LOOKUP_IDENTITIES:
+        df = _load_identities(input_set, ['name', 'email', 'username'])
+        candidates = _find_candidate_identities(df, criteria, guess_github_user)
+        return list(_chunked_identities('uuid', candidates))
+    else:
+        return [Identity.objects.all()]
+
+
+def _identity_fields(criteria, verbose, match_source, guess_github_user):
+    """Select the identity fields needed to find matches.
+
+    Only the columns required by the given parameters are loaded,
+    keeping the memory footprint of the dataframes low.
+
+    :returns: a list of identity fields
+    """
+    fields = {'individual'}
+    fields.update(_criteria_fields(criteria))
+
+    if verbose:
+        fields.add('uuid')
+    if match_source:
+        fields.add('source')
+    if guess_github_user:
+        fields.update(['email', 'username'])
+
+    return [field for field in IDENTITY_FIELDS if field in fields]
+
+
+def _criteria_fields(criteria):
+    """Get the identity fields compared by a list of criteria"""
+
+    return ['name' if c == FUZZY_NAME else c for c in criteria]
+
+
+def _chunked_identities(field, values):
+    """Generate querysets of identities filtered by chunks of values"""
+
+    values = list(values)
+
+    for i in range(0, len(values), INDEX_LOOKUP_CHUNK_SIZE):
+        chunk = values[i:i + INDEX_LOOKUP_CHUNK_SIZE]
+        yield Identity.objects.filter(**{f'{field}__in': chunk})
+
+
+def _iter_identities(querysets, fields):
+    """Generate dataframes with the identities of a list of querysets.
+
+    Identities are read from the database as plain tuples, in
+    chunks, so no model instances are created. Each chunk is
+    converted into a dataframe with typed columns; individual
+    keys and sources are dictionary-encoded as categorical columns
+    because their values are repeated many times across the registry.
+
+    Empty strings are converted to `NaN` values.
+
+    :param querysets: iterable of identity querysets to load
+    :param fields: list of identity fields to load
+
+    :returns: a generator of Pandas `DataFrame` objects with
+        a column per field
+    """
+    for queryset in querysets:
+        rows = queryset.values_list(*fields).iterator(chunk_size=LOAD_CHUNK_SIZE)
+        while True:
+            chunk = list(itertools.islice(rows, LOAD_CHUNK_SIZE))
+            if not chunk:
+                break
+
+            data = {}
+            for field, values in zip(fields, zip(*chunk)):
+                if field in CATEGORICAL_FIELDS:
+                    data[field] = pandas.Categorical(values)
+                else:
+                    data[field] = numpy.array(values, dtype=object)
+
+            df = pandas.DataFrame(data, columns=fields)
+            for field in fields:
+                if field not in CATEGORICAL_FIELDS:
+                    df[field] = df[field].replace('', numpy.nan)
+
+            yield df
+
+
+def _load_identities(querysets, fields):
+    """Load the identities of a list of querysets into a `DataFrame`.
+
+    Identities are read in chunks (see `_iter_identities`) and
+    concatenated, keeping the categorical encoding of the columns.
+
+    :param querysets: iterable of identity querysets to load
+    :param fields: list of identity fields to load
+
+    :returns: a Pandas `DataFrame` with a column per field
+    """
+    frames = list(_iter_identities(querysets, fields))
+
+    data = {}
+
+    for field in fields:
+        if not frames:
+            data[field] = numpy.array([], dtype=object)
+        elif field in CATEGORICAL_FIELDS:
+            data[field] = union_categoricals([df[field] for df in frames])
         else:
-            for alias in aliases[uuid]:
-                if alias in matched.keys():
-                    result = set(matched[alias])
-        # Remove input uuid from results if needed
-        try:
-            result.remove(uuid)
-        except KeyError:
-            pass
-        yield uuid, mk_sources[uuid], sorted(result)
+            data[field] = numpy.concatenate([df[field].to_numpy() for df in frames])
 
-    logger.info(f"Matching recommendations generated; criteria='{criteria}'")
+    return pandas.DataFrame(data, columns=fields)
 
 
-def _find_matches(set_x, set_y, criteria, exclude, verbose, strict, match_source=False, guess_github_user=False):
-    """Find identities matches between two sets using Pandas' library.
+def _find_candidate_identities(df, criteria, guess_github_user=False):
+    """Find the identities that might match with a given set of identities.
 
-    This method find matches for the identities in `set_x` looking at
-    the identities from `set_y` given a list of criteria.
+    The function uses the matching index to find the identities of
+    the registry that share, at least, one of the normalized values
+    of the identities in `df` for the given `criteria`. The result
+    is a superset of the actual matches, so the identities must be
+    filtered afterwards with the same rules used for a full scan.
+
+    :param df: `DataFrame` with the identities to find candidates for
+    :param criteria: list of matching criteria (`email`, `name`, `username`)
+    :param guess_github_user: infer usernames from GitHub-generated email addresses
+
+    :returns: a list with the uuids of the candidate identities
+    """
+    lookups = defaultdict(set)
+
+    data = df.reindex(columns=['name', 'email', 'username']).astype(object)
+    data = data.where(data.notna(), None)
+
+    for name, email, username in data.itertuples(index=False, name=None):
+        keys = generate_matching_keys(name, email, username)
+        for criterion, value in keys:
+            if criterion in criteria:
+                lookups[criterion].add(value)
+            elif guess_github_user and criterion == 'github' and 'username' in criteria:
+                lookups['username'].add(value)
+
+    # GitHub usernames found in emails are compared to both
+    # usernames and other GitHub-generated emails
+    if guess_github_user and 'username' in criteria:
+        lookups['github'] = lookups['username']
+
+    uuids = set()
+
+    for criterion, values in lookups.items():
+        values = list(values)
+        for i in range(0, len(values), INDEX_LOOKUP_CHUNK_SIZE):
+            chunk = values[i:i + INDEX_LOOKUP_CHUNK_SIZE]
+            keys = MatchingKey.objects.filter(criterion=criterion,
+                                              value__in=chunk)
+            uuids.update(keys.values_list('identity_id', flat=True))
+
+    logger.debug(f"Matching index lookup; {len(uuids)} candidate identities found")
 
-    The identities sets are transformed into Pandas dataframes and
-    they are filtered according to the different criteria, then
-    merged and grouped by the identities from `set_x`. The grouped
-    results are transformed into sets of results taking into account
-    the results from the rest of results to generate complete sets
-    of matches per each identity from `set_x`.
+    return list(uuids)
 
-    :param set_x: list of individual keys to find matches for
-    :param set_y: list of individual keys where to find matches
+
+def _find_matches(set_x, set_y, criteria, exclude, verbose, strict,
+                  match_source=False, guess_github_user=False, memory_budget=None,
+                  workers=1):
+    """Find identities matches between two sets of identities.
+
+    This method find matches for the identities in `set_x` looking at
+    the identities from `set_y` given a list of criteria. The pairs
+    of matching identities (see `_iter_matches`) are grouped by the
+    identities from `set_x`, generating complete sets of matches per
+    each identity from `set_x`.
+
+    :param set_x: list of querysets with the identities to find matches for
+    :param set_y: list of querysets with the identities where to find matches
     :param criteria: list of matching criteria (`email`, `name`, `username`).
     :param exclude: if set to `True`, the results list will ignore individual identities
         if any value from the `email`, `name`, or `username` fields are found in the
@@ -180,24 +691,254 @@ def _find_matches(set_x, set_y, criteria, exclude, verbose, strict, match_source
     :param strict: strict matching with well-formed email addresses and names
     :param match_source: only find matches for the same source
     :param guess_github_user: infer usernames from GitHub-generated email addresses
+    :param memory_budget: memory, in megabytes, available to join the identities;
+        when it is not set, identities are joined in memory
+    :param workers: number of processes used to join identities
 
     :returns: a dictionary including the set of matches found for each
         identity from `set_x`.
     """
-    def _to_df(data_set):
-        """Convert identities set into a Pandas `Dataframe` object"""
-        df = pandas.DataFrame(data_set)
-        df.replace('', numpy.nan, inplace=True)
-        return df.sort_values(['individual'])
-
-    def _apply_recommender_exclusion_list(df):
-        """Apply RecommenderExclusionTerm to returns the dataframes that do not match
-        `name`, `username`, or `email` with this excluded list"""
-        excluded = fetch_recommender_exclusion_list()
-        excluded = [term.lower() for term in excluded]
-        df_excluded = df[~df['username'].isin(excluded) & ~df['email'].isin(excluded) & ~df['name'].isin(excluded)]
-        return df_excluded
+    matched = defaultdict(set)
+
+    for pairs in _iter_matches(set_x, set_y, criteria, exclude, verbose, strict,
+                               match_source=match_source,
+                               guess_github_user=guess_github_user,
+                               memory_budget=memory_budget,
+                               workers=workers):
+        for key, values in pairs.groupby('x')['y']:
+            matched[key].update(values)
+
+    return dict(matched)
+
+
+def _iter_matches(set_x, set_y, criteria, exclude, verbose, strict,
+                  match_source=False, guess_github_user=False, memory_budget=None,
+                  workers=1):
+    """Generate the pairs of matching identities between two sets.
 
+    When `memory_budget` is set, the sets are joined partitioning
+    them on disk (see `_match_identities_partitioned`). Otherwise,
+    both sets are loaded and joined in memory.
+
+    When `exclude` is set, identities with any value in the
+    RecommenderExclusionTerm table are filtered out by the
+    database, so they are never loaded.
+
+    The parameters have the same meaning than in `_find_matches`.
+
+    :returns: a generator of dataframes with the pairs of matches;
+        column `x` has the identities from `set_x` and column `y`
+        the identities from `set_y` they match with
+    """
+    if exclude:
+        set_x = [exclude_identities(queryset) for queryset in set_x]
+        set_y = [exclude_identities(queryset) for queryset in set_y]
+
+    if memory_budget:
+        yield from _match_identities_partitioned(set_x, set_y, criteria, verbose, strict,
+                                                 match_source=match_source,
+                                                 guess_github_user=guess_github_user,
+                                                 memory_budget=memory_budget,
+                                                 workers=workers)
+    else:
+        fields = _identity_fields(criteria, verbose, match_source, guess_github_user)
+        df_x = _load_identities(set_x, fields)
+        df_y = _load_identities(set_y, fields)
+        yield from _match_identities(df_x, df_y, criteria, verbose, strict,
+                                     match_source=match_source,
+                                     guess_github_user=guess_github_user,
+                                     workers=workers)
+
+
+def _match_identities(df_x, df_y, criteria, verbose, strict,
+                      match_source=False, guess_github_user=False, workers=1):
+    """Find identities matches between two sets using Pandas' library.
+
+    The identities dataframes are filtered according to the different
+    criteria and then merged. A dataframe with the pairs of matches is
+    generated for each criterion. Pairs of the same individual or
+    identity are removed.
+
+    When `workers` is greater than one, the merge of each criterion
+    runs in a pool of processes (see `_run_tasks`).
+
+    :param df_x: dataframe with the identities to find matches for
+    :param df_y: dataframe with the identities where to find matches
+    :param criteria: list of matching criteria (`email`, `name`, `username`).
+    :param verbose: if set to `True`, pairs will include individual identities.
+        Otherwise, pairs will include main keys from individuals.
+    :param strict: strict matching with well-formed email addresses and names
+    :param match_source: only find matches for the same source
+    :param guess_github_user: infer usernames from GitHub-generated email addresses
+    :param workers: number of processes used to merge the dataframes
+
+    :returns: a generator of dataframes with the pairs of matches
+    """
+    def _tasks():
+        for c in criteria:
+            cdf_x = _filter_criteria(df_x, c, strict, match_source)
+            cdf_y = _filter_criteria(df_y, c, strict, match_source)
+            yield cdf_x, cdf_y, c, match_source, verbose
+
+    if df_x.empty or df_y.empty:
+        return
+
+    df_x = _prepare_identities(df_x, criteria, guess_github_user)
+    df_y = _prepare_identities(df_y, criteria, guess_github_user)
+
+    yield from _run_tasks(_join_pairs, _tasks(), workers)
+
+
+def _match_identities_partitioned(set_x, set_y, criteria, verbose, strict,
+                                  match_source=False, guess_github_user=False,
+                                  memory_budget=None, workers=1):
+    """Find identities matches between two sets partitioning them on disk.
+
+    This method returns the same matches than `_match_identities` but
+    the identities are never loaded in memory at once. They are read
+    in chunks and each chunk is filtered as in `_match_identities`.
+    The rows of each criterion are hash-partitioned by their value and
+    written to temporary files. Rows sharing a value end up in the
+    same partition, so joining the sets is equivalent to joining
+    each pair of partitions, one after the other.
+
+    The number of partitions is estimated from the number of
+    identities and the size of the rows, so each join fits in
+    `memory_budget`. When `workers` is greater than one, partitions
+    are joined in a pool of processes; take into account each
+    process needs its own budget.
+
+    :param set_x: list of querysets with the identities to find matches for
+    :param set_y: list of querysets with the identities where to find matches
+    :param criteria: list of matching criteria (`email`, `name`, `username`).
+    :param verbose: if set to `True`, pairs will include individual identities.
+        Otherwise, pairs will include main keys from individuals.
+    :param strict: strict matching with well-formed email addresses and names
+    :param match_source: only find matches for the same source
+    :param guess_github_user: infer usernames from GitHub-generated email addresses
+    :param memory_budget: memory, in megabytes, available to join a partition
+    :param workers: number of processes used to join the partitions
+
+    :returns: a generator of dataframes with the pairs of matches
+    """
+    fields = _identity_fields(criteria, verbose, match_source, guess_github_user)
+
+    n_rows = sum(queryset.count() for queryset in itertools.chain(set_x, set_y))
+
+    with tempfile.TemporaryDirectory(prefix='sortinghat-matching-') as dirpath:
+        store = None
+
+        for name, identities in (('x', set_x), ('y', set_y)):
+            for df in _iter_identities(identities, fields):
+                if not store:
+                    row_size = df.memory_usage(deep=True).sum() / len(df)
+                    num_partitions = estimate_num_partitions(n_rows, row_size, memory_budget)
+                    store = HashPartitionStore(dirpath, num_partitions)
+                    logger.debug(f"Matching identities in {num_partitions} partitions; "
+                                 f"identities={n_rows} memory_budget={memory_budget}MB")
+
+                df = _prepare_identities(df, criteria, guess_github_user)
+
+                for c in criteria:
+                    cdf = _filter_criteria(df, c, strict, match_source)
+                    store.append(f"{name}-{c}", cdf, c)
+
+        if not store:
+            return
+
+        tasks = ((store, c, partition, match_source, verbose)
+                 for c in criteria for partition in range(store.num_partitions))
+
+        for pairs in _run_tasks(_join_partition_pairs, tasks, workers):
+            if pairs is not None:
+                yield pairs
+
+
+def _run_tasks(func, tasks, workers=1):
+    """Run a set of tasks and generate their results in order.
+
+    When `workers` is greater than one, tasks run in a pool of
+    processes. To keep the memory bounded, only a few tasks per
+    worker are submitted to the pool at the same time.
+
+    Processes are forked, so the tasks don't need to configure
+    Django. Tasks must not access the database because they would
+    share the connection of the parent process. When the platform
+    doesn't support `fork`, tasks run in the current process.
+
+    :param func: function that runs a task
+    :param tasks: iterable of tuples with the arguments of each task
+    :param workers: number of processes
+
+    :returns: a generator with the result of each task
+    """
+    if workers <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+        for args in tasks:
+            yield func(*args)
+        return
+
+    mp_context = multiprocessing.get_context('fork')
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+        pending = deque()
+
+        for args in tasks:
+            pending.append(executor.submit(func, *args))
+            if len(pending) >= MAX_PENDING_TASKS_PER_WORKER * workers:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+def _join_pairs(cdf_x, cdf_y, c, match_source, verbose):
+    """Merge two filtered dataframes and select the pairs of matches"""
+
+    cdf = _join_criteria(cdf_x, cdf_y, c, match_source)
+    return _select_pairs(cdf, verbose)
+
+
+def _join_partition_pairs(store, c, partition, match_source, verbose):
+    """Merge the partitions of both sets for a criterion and select the pairs of matches"""
+
+    cdf_x = store.load(f"x-{c}", partition)
+    cdf_y = store.load(f"y-{c}", partition)
+
+    if cdf_x is None or cdf_y is None:
+        return None
+
+    return _join_pairs(cdf_x, cdf_y, c, match_source, verbose)
+
+
+def _select_pairs(cdf, verbose):
+    """Select the pairs of different individuals or identities from a merged dataframe"""
+
+    col_y_name = 'uuid_y' if verbose else 'individual_y'
+    col_x_name = 'uuid_x' if verbose else 'individual_x'
+
+    # Categories of both sets differ so values are compared as objects
+    pairs = cdf[[col_x_name, col_y_name]].astype(object)
+    pairs.columns = ['x', 'y']
+
+    # Remove duplicated
+    return pairs[pairs['x'] != pairs['y']]
+
+
+def _prepare_identities(df, criteria, guess_github_user=False):
+    """Normalize a dataframe of identities before matching them.
+
+    Values of the criteria columns are converted to lowercase for
+    case-insensitive matching. When `guess_github_user` is set,
+    new rows with the usernames extracted from GitHub-generated email
+    addresses are added.
+
+    Rows are processed independently of each other, so applying this
+    function to the chunks of a dataset gives the same result than
+    applying it to the whole dataset.
+
+    Take into account the columns of the criteria are modified
+    in `df` to save memory.
+    """
     def _get_github_usernames_from_email(df):
         """Generate GitHub usernames from valid GitHub emails"""
         df_github = df[df['email'].str.match(GITHUB_EMAIL_ADDRESS_REGEX, na=False)].copy()
@@ -209,69 +950,93 @@ def _find_matches(set_x, set_y, criteria, exclude, verbose, strict, match_source
 
         return df
 
-    def _filter_criteria(df, c, strict=True, match_source=False):
-        """Filter dataframe creating a basic subset including a given column"""
-        cols = ['uuid', 'individual', c]
-        if match_source and c == 'username':
-            cols += ['source']
-            cdf = df[cols]
-            cdf = cdf[cdf['source'].isin(settings.MATCH_TRUSTED_SOURCES)]
-        else:
-            cdf = df[cols]
-        cdf = cdf.dropna(subset=[c])
+    # Convert to lowercase for case-insensitive matching
+    for c in set(_criteria_fields(criteria)):
+        df[c] = df[c].str.lower()
 
-        if strict and c == 'email':
-            cdf = cdf[cdf['email'].str.fullmatch(EMAIL_ADDRESS_REGEX)]
-        elif strict and c == 'name':
-            cdf = cdf[cdf['name'].str.match(NAME_REGEX)]
+    if guess_github_user:
+        df = _get_github_usernames_from_email(df)
 
-        return cdf
+    return df
 
-    data_x = [model_to_dict(fl) for fl in set_x]
-    data_y = [model_to_dict(fl) for fl in set_y]
 
-    if (not data_x) or (not data_y):
-        return {}
+def _filter_criteria(df, c, strict=True, match_source=False):
+    """Filter dataframe creating a basic subset including a given column"""
 
-    df_x = _to_df(data_x)
-    df_y = _to_df(data_y)
+    if c == FUZZY_NAME:
+        return _filter_fuzzy_name(df, strict)
 
-    # Convert to lowercase for case-insensitive matching
-    for c in criteria:
-        df_x[c] = df_x[c].str.lower()
-        df_y[c] = df_y[c].str.lower()
+    cols = [col for col in ('uuid', 'individual') if col in df] + [c]
+    if match_source and c == 'username':
+        cols += ['source']
+        cdf = df[cols]
+        cdf = cdf[cdf['source'].isin(settings.MATCH_TRUSTED_SOURCES)]
+    else:
+        cdf = df[cols]
+    cdf = cdf.dropna(subset=[c])
 
-    if exclude:
-        df_x = _apply_recommender_exclusion_list(df_x)
-        df_y = _apply_recommender_exclusion_list(df_y)
+    if strict and c == 'email':
+        cdf = cdf[cdf['email'].str.fullmatch(EMAIL_ADDRESS_REGEX)]
+    elif strict and c == 'name':
+        cdf = cdf[cdf['name'].str.match(NAME_REGEX)]
 
-    if guess_github_user:
-        df_x = _get_github_usernames_from_email(df_x)
-        df_y = _get_github_usernames_from_email(df_y)
+    return cdf
 
-    cdfs = []
 
-    for c in criteria:
-        cdf_x = _filter_criteria(df_x, c, strict, match_source)
-        cdf_y = _filter_criteria(df_y, c, strict, match_source)
-        if match_source and c == 'username':
-            cdf = pandas.merge(cdf_x, cdf_y, on=[c, 'source'], how='inner')
-        else:
-            cdf = pandas.merge(cdf_x, cdf_y, on=c, how='inner')
-        cdf = cdf[['individual_x', 'uuid_x', 'individual_y', 'uuid_y']]
-        cdfs.append(cdf)
+def _filter_fuzzy_name(df, strict=True):
+    """Filter dataframe creating a subset with the blocking keys of the names.
 
-    result = pandas.concat(cdfs)
+    Each name generates a row per blocking key (see `fuzzy_name_keys`)
+    under the `fuzzy_name` column.
+    """
+    cols = [col for col in ('uuid', 'individual') if col in df] + ['name']
+    cdf = df[cols].dropna(subset=['name'])
 
-    col_y_name = 'uuid_y' if verbose else 'individual_y'
-    col_x_name = 'uuid_x' if verbose else 'individual_x'
-    result = result[[col_x_name, col_y_name]]
+    if strict:
+        cdf = cdf[cdf['name'].str.match(NAME_REGEX)]
 
-    # Remove duplicated
-    result = result[result[col_x_name] != result[col_y_name]]
-    result_g = result.groupby(col_x_name, group_keys=False)
+    cdf = cdf.assign(**{FUZZY_NAME: cdf['name'].map(fuzzy_name_keys)})
+    cdf = cdf.explode(FUZZY_NAME).dropna(subset=[FUZZY_NAME])
+
+    return cdf
+
+
+def _join_criteria(cdf_x, cdf_y, c, match_source=False):
+    """Merge two filtered dataframes on the values of a given column"""
+
+    if c == FUZZY_NAME:
+        return _join_fuzzy_name(cdf_x, cdf_y)
+
+    if match_source and c == 'username':
+        cdf = pandas.merge(cdf_x, cdf_y, on=[c, 'source'], how='inner')
+    else:
+        cdf = pandas.merge(cdf_x, cdf_y, on=c, how='inner')
+
+    return cdf
+
+
+def _join_fuzzy_name(cdf_x, cdf_y):
+    """Merge two dataframes by their fuzzy name keys keeping similar names.
+
+    Only names that share a blocking key are compared. Pairs of names
+    with a similarity under `MATCH_FUZZY_NAME_THRESHOLD` setting are
+    removed. Blocks that would generate more than `MAX_FUZZY_BLOCK_PAIRS`
+    pairs are ignored to prevent a quadratic number of comparisons.
+    """
+    sizes_x = cdf_x[FUZZY_NAME].value_counts()
+    sizes_y = cdf_y[FUZZY_NAME].value_counts()
+    keys = sizes_x.index.intersection(sizes_y.index)
+    oversized = keys[(sizes_x[keys] * sizes_y[keys]).to_numpy() > MAX_FUZZY_BLOCK_PAIRS]
+
+    if len(oversized) > 0:
+        logger.debug(f"Ignoring {len(oversized)} fuzzy name blocks; too many pairs of names to compare")
+        cdf_x = cdf_x[~cdf_x[FUZZY_NAME].isin(oversized)]
+
+    cdf = pandas.merge(cdf_x, cdf_y, on=FUZZY_NAME, how='inner')
+    cdf = cdf.drop(columns=[FUZZY_NAME]).drop_duplicates()
 
-    # Convert the dataframe to a dict of sets
-    matched = result_g[col_y_name].apply(set).to_dict()
+    threshold = settings.MATCH_FUZZY_NAME_THRESHOLD
+    similar = [name_x == name_y or name_similarity(name_x, name_y) >= threshold
+               for name_x, name_y in zip(cdf['name_x'], cdf['name_y'])]
 
-    return matched
+    return cdf[numpy.array(similar, dtype=bool)]
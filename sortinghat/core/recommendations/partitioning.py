@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2021 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import math
+import os
+import pickle
+
+import pandas
+
+
+MEGABYTE = 1024 * 1024
+
+# Joining two partitions needs more memory than the size
+# of their data; this factor accounts for the copies made
+# while filtering and merging the dataframes
+JOIN_MEMORY_FACTOR = 4
+
+
+def estimate_num_partitions(n_rows, row_size, memory_budget):
+    """Estimate the number of partitions that fit in a memory budget.
+
+    :param n_rows: total number of rows to partition
+    :param row_size: average size of a row, in bytes
+    :param memory_budget: memory available, in megabytes, to process
+        a partition
+
+    :returns: the number of partitions; at least one partition is
+        always returned
+    """
+    size = n_rows * row_size * JOIN_MEMORY_FACTOR
+    budget = memory_budget * MEGABYTE
+
+    return max(1, math.ceil(size / budget))
+
+
+class HashPartitionStore:
+    """Store dataframes on disk split in hash partitions.
+
+    Rows are assigned to a partition hashing the values of a key
+    column, so rows that share a key value are always stored in the
+    same partition, no matter the dataframe they were appended with.
+    Joining two datasets by that key is then equivalent to joining
+    each pair of partitions with the same number.
+
+    Each partition is written to its own file under `dirpath`.
+    Dataframes are appended to the end of the file so the whole
+    dataset never needs to be kept in memory.
+
+    :param dirpath: directory where partition files are written
+    :param num_partitions: number of partitions
+    """
+    def __init__(self, dirpath, num_partitions):
+        self.dirpath = dirpath
+        self.num_partitions = num_partitions
+
+    def append(self, name, df, key):
+        """Append the rows of a dataframe to the partitions of a dataset.
+
+        :param name: name of the dataset
+        :param df: dataframe to append
+        :param key: column used to assign rows to partitions
+        """
+        if df.empty:
+            return
+
+        hashes = pandas.util.hash_pandas_object(df[key], index=False).to_numpy()
+        partitions = hashes % self.num_partitions
+
+        for partition, group in df.groupby(partitions, sort=False):
+            with open(self._filepath(name, partition), 'ab') as fd:
+                pickle.dump(group, fd, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load(self, name, partition):
+        """Load a partition of a dataset.
+
+        :param name: name of the dataset
+        :param partition: number of the partition
+
+        :returns: a dataframe with the rows of the partition or
+            `None` when the partition is empty
+        """
+        filepath = self._filepath(name, partition)
+
+        if not os.path.exists(filepath):
+            return None
+
+        frames = []
+
+        with open(filepath, 'rb') as fd:
+            while True:
+                try:
+                    frames.append(pickle.load(fd))
+                except EOFError:
+                    break
+
+        return pandas.concat(frames, ignore_index=True)
+
+    def _filepath(self, name, partition):
+        return os.path.join(self.dirpath, f"{name}-{partition}.pkl")
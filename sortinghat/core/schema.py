@@ -29,7 +29,6 @@ import graphql_jwt
 
 from django.conf import settings
 from django.core.paginator import Paginator
-from django.db import IntegrityError
 from django.db.models import (Q, Subquery, JSONField, Count)
 
 from graphene.types.generic import GenericScalar
@@ -60,6 +59,8 @@ from .api import (add_identity,
                   delete_domain,
                   delete_alias,
                   delete_merge_recommendations,
+                  apply_merge_recommendations,
+                  reject_merge_recommendations,
                   enroll,
                   withdraw,
                   update_enrollment,
@@ -69,9 +70,10 @@ from .api import (add_identity,
                   review)
 from .context import SortingHatContext
 from .decorators import (check_auth, check_permissions)
-from .errors import InvalidFilterError, EqualIndividualError, InvalidValueError
+from .errors import InvalidFilterError, InvalidValueError
 from .importer.backend import find_import_identities_backends
 from .jobs import (affiliate,
+                   affiliate_pending,
                    unify,
                    find_job,
                    get_jobs,
@@ -79,6 +81,7 @@ from .jobs import (affiliate,
                    recommend_affiliations,
                    recommend_matches,
                    recommend_gender,
+                   score_merge_recommendations,
                    genderize,
                    import_identities,
                    create_scheduled_task,
@@ -275,6 +278,7 @@ class IndividualType(DjangoObjectType):
 class IdentityType(DjangoObjectType):
     class Meta:
         model = Identity
+        exclude = ('email_domain_reversed',)
 
 
 class ProfileType(DjangoObjectType):
@@ -366,6 +370,21 @@ class JobResultType(graphene.Union):
                  GenderizeResultType)
 
 
+class JobPhaseType(graphene.ObjectType):
+    name = graphene.String(description='Name of the phase.')
+    elapsed = graphene.Float(description='Seconds spent on the phase.')
+
+
+class JobProgressType(graphene.ObjectType):
+    phase = graphene.String(description='Current phase of the job; empty when the job is not running any phase.')
+    processed = graphene.Int(description='Number of items processed in the current phase.')
+    total = graphene.Int(description='Number of items to process in the current phase, when it is known.')
+    rate = graphene.Float(description='Items processed per second in the current phase.')
+    eta = graphene.Float(description='Estimated seconds to finish the current phase.')
+    phases = graphene.List(JobPhaseType, description='Time spent on each completed phase.')
+    updated_at = graphene.DateTime(description='Time the progress was updated at.')
+
+
 class JobType(graphene.ObjectType):
     job_id = graphene.String(description='Job identifier.')
     job_type = graphene.String(description='Type of job.')
@@ -373,6 +392,26 @@ class JobType(graphene.ObjectType):
     result = graphene.List(JobResultType, description='List of job results.')
     errors = graphene.List(graphene.String, description='List of errors.')
     enqueued_at = graphene.DateTime(description='Time the job was enqueued at.')
+    progress = graphene.Field(JobProgressType, description='Progress of the job.')
+
+    def resolve_progress(self, info):
+        progress = self.progress
+
+        if not progress:
+            return None
+
+        phases = [
+            JobPhaseType(name=name, elapsed=elapsed)
+            for name, elapsed in progress['phases'].items()
+        ]
+
+        return JobProgressType(phase=progress['phase'],
+                               processed=progress['processed'],
+                               total=progress['total'],
+                               rate=progress['rate'],
+                               eta=progress['eta'],
+                               phases=phases,
+                               updated_at=progress['updated_at'])
 
 
 class IdentitiesImporterType(graphene.ObjectType):
@@ -486,6 +525,10 @@ class IdentityFilterType(graphene.InputObjectType):
         required=False,
         description='Filters individuals by the data source of their identities.'
     )
+    email_domain = graphene.String(
+        required=False,
+        description='Filters individuals with an email address in the given domain. Examples:\n * `example.com`'
+    )
     enrollment = graphene.String(
         required=False,
         description='Filters individuals affiliated to an organization.'
@@ -598,7 +641,7 @@ class ScheduledTasksFilterType(graphene.InputObjectType):
     )
     job_type = graphene.String(
         required=False,
-        description='Name of the scheduled job: `affiliate`, `unify` or `import_identities`.'
+        description='Name of the scheduled job: `affiliate`, `affiliate_pending`, `unify` or `import_identities`.'
     )
 
 
@@ -1228,6 +1271,27 @@ class RecommendGender(graphene.Mutation):
         )
 
 
+class ScoreMergeRecommendations(graphene.Mutation):
+    job_id = graphene.Field(lambda: graphene.String)
+
+    @check_permissions(['core.execute_job'])
+    @check_auth
+    def mutate(self, info):
+        user = info.context.user
+        tenant = get_db_tenant()
+        ctx = SortingHatContext(user=user, tenant=tenant)
+
+        job = get_tenant_queue(tenant).enqueue(score_merge_recommendations,
+                                               ctx,
+                                               job_timeout=-1,
+                                               result_ttl=DEFAULT_JOB_RESULT_TTL,
+                                               failure_ttl=DEFAULT_JOB_RESULT_TTL)
+
+        return ScoreMergeRecommendations(
+            job_id=job.id
+        )
+
+
 class Affiliate(graphene.Mutation):
     class Arguments:
         uuids = graphene.List(graphene.String,
@@ -1380,38 +1444,46 @@ class ManageMergeRecommendation(graphene.Mutation):
         tenant = get_db_tenant()
         ctx = SortingHatContext(user=user, tenant=tenant)
 
-        recommendation = MergeRecommendation.objects.get(id=int(recommendation_id))
-        to_indiv = recommendation.individual1
-        from_indiv = recommendation.individual2
         if apply:
-            # Update related individual removed
-            q = (Q(individual1=from_indiv.mk) | Q(individual2=from_indiv.mk)) & Q(applied=None)
-            for rec in MergeRecommendation.objects.filter(q):
-                if rec.individual1 == from_indiv:
-                    key = 'individual1'
-                else:
-                    key = 'individual2'
-                try:
-                    setattr(rec, key, to_indiv)
-                    rec.save()
-                except IntegrityError:
-                    rec.delete()
-
-            try:
-                merge(ctx, [from_indiv.mk], to_indiv.mk)
-            except EqualIndividualError:
-                pass
-            # Can't keep a recommendation in which one individual is missing
-            recommendation.delete()
+            apply_merge_recommendations(ctx, [recommendation_id])
         else:
-            recommendation.applied = False
-            recommendation.save()
+            reject_merge_recommendations(ctx, [recommendation_id])
 
         return ManageMergeRecommendation(
             applied=apply
         )
 
 
+class ManageMergeRecommendations(graphene.Mutation):
+    class Arguments:
+        recommendation_ids = graphene.List(graphene.Int, required=True)
+        apply = graphene.Boolean(required=True)
+
+    applied = graphene.Boolean()
+    uuids = graphene.Field(lambda: graphene.List(graphene.String))
+    individuals = graphene.Field(lambda: graphene.List(IndividualType))
+
+    @check_permissions(['core.change_mergerecommendation'])
+    def mutate(self, info, recommendation_ids, apply):
+        user = info.context.user
+        tenant = get_db_tenant()
+        ctx = SortingHatContext(user=user, tenant=tenant)
+
+        if apply:
+            uuids = apply_merge_recommendations(ctx, recommendation_ids)
+            individuals = Individual.objects.filter(mk__in=uuids)
+        else:
+            reject_merge_recommendations(ctx, recommendation_ids)
+            uuids = []
+            individuals = []
+
+        return ManageMergeRecommendations(
+            applied=apply,
+            uuids=uuids,
+            individuals=individuals
+        )
+
+
 class DeleteMergeRecommendations(graphene.Mutation):
     deleted = graphene.Boolean()
 
@@ -1588,6 +1660,8 @@ class UpdateScheduledTask(graphene.Mutation):
         task = update_scheduled_task(ctx, task_id, **data)
         if task.job_type == 'affiliate':
             job_fn = affiliate
+        elif task.job_type == 'affiliate_pending':
+            job_fn = affiliate_pending
         elif task.job_type == 'unify':
             job_fn = unify
         elif task.job_type == 'import_identities':
@@ -1713,7 +1787,7 @@ class SortingHatQuery:
         page=graphene.Int(),
         filters=RecommendationFilterType(required=False),
         description=(
-            'Get all identities merge recommendations.'
+            'Get all identities merge recommendations, sorted by their confidence score.'
             ''
             'Call without filters to get all the pending recommendations.'
             'Use the `isApplied` filter with `true` to get applied recommendations'
@@ -1871,6 +1945,10 @@ class SortingHatQuery:
             query = query.filter(mk__in=Subquery(Identity.objects
                                                  .filter(source=filters['source'])
                                                  .values_list('individual__mk')))
+        if filters and 'email_domain' in filters:
+            query = query.filter(mk__in=Subquery(Identity.objects
+                                                 .filter(email_domain=filters['email_domain'].lower())
+                                                 .values_list('individual__mk')))
         if filters and 'enrollment' in filters:
             query = query.filter(mk__in=Subquery(Enrollment.objects
                                                  .filter(group__name=filters['enrollment'])
@@ -1986,7 +2064,7 @@ class SortingHatQuery:
         result = None
         errors = None
 
-        if (job.result) and (job_type == 'affiliate'):
+        if (job.result) and (job_type in ('affiliate', 'affiliate_pending')):
             errors = job.result['errors']
             result = [
                 AffiliationResultType(uuid=uuid, organizations=orgs)
@@ -2009,7 +2087,7 @@ class SortingHatQuery:
                                          accuracy=rec['accuracy'])
                 for uuid, rec in job.result['results'].items()
             ]
-        elif (job.result) and (job_type == 'unify'):
+        elif (job.result) and (job_type in ('unify', 'unify_groups')):
             errors = job.result['errors']
             result = [
                 UnifyResultType(merged=job.result['results'])
@@ -2028,7 +2106,8 @@ class SortingHatQuery:
                        status=status,
                        result=result,
                        errors=errors,
-                       enqueued_at=enqueued_at)
+                       enqueued_at=enqueued_at,
+                       progress=job.meta.get('progress', None))
 
     @check_auth
     def resolve_jobs(self, info, page=1, page_size=settings.SORTINGHAT_API_PAGE_SIZE):
@@ -2047,7 +2126,8 @@ class SortingHatQuery:
                                   status=status,
                                   result=[],
                                   errors=[],
-                                  enqueued_at=enqueued_at))
+                                  enqueued_at=enqueued_at,
+                                  progress=job.meta.get('progress', None)))
 
         return JobPaginatedType.create_paginated_result(result,
                                                         page,
@@ -2133,17 +2213,8 @@ class SortingHatQuery:
         else:
             query = MergeRecommendation.objects.filter(applied=None)
 
-        query = query.annotate(individual_matches_count=Count(
-            'individual1__match_recommendation_individual_1',
-            filter=Q(individual1__match_recommendation_individual_1__applied=None),
-            distinct=True
-        ) + Count(
-            'individual1__match_recommendation_individual_2',
-            filter=Q(individual1__match_recommendation_individual_2__applied=None),
-            distinct=True
-        ))
-
-        query = query.order_by('-individual_matches_count', 'individual1__mk', 'created_at')
+        # Highest confidence first, using the score index
+        query = query.order_by('-score', 'individual1', 'created_at')
 
         return RecommendedMergePaginatedType.create_paginated_result(query,
                                                                      page,
@@ -2275,12 +2346,17 @@ class SortingHatMutation(graphene.ObjectType):
     )
     recommend_matches = RecommendMatches.Field(
         description='Recommend identity matches for a list of individuals based\
-        on a list of criteria composed by `email`, `name` and/or `username`.'
+        on a list of criteria composed by `email`, `name`, `username` and/or\
+        `fuzzy_name`, which matches similar names.'
     )
     recommend_gender = RecommendGender.Field(
         description='Recommend genders for a list of individuals based on their names\
         using the genderize.io API. `noStrictMatching` disables strict name validation.'
     )
+    score_merge_recommendations = ScoreMergeRecommendations.Field(
+        description='Calculate again the confidence score of the merge recommendations\
+        that were not applied or dismissed yet.'
+    )
     affiliate = Affiliate.Field(
         description='Affiliate a set of individuals using recommendations.'
     )
@@ -2300,6 +2376,11 @@ class SortingHatMutation(graphene.ObjectType):
     manage_merge_recommendation = ManageMergeRecommendation.Field(
         description='Manage a matching recommendation between identities.'
     )
+    manage_merge_recommendations = ManageMergeRecommendations.Field(
+        description='Manage several matching recommendations at once. When they\
+        are applied, recommendations sharing individuals are chained and each group\
+        of individuals is merged once.'
+    )
     manage_affiliation_recommendation = ManageAffiliationRecommendation.Field(
         description='Manage an affiliation recommendation for an identity.'
     )
@@ -2316,7 +2397,7 @@ class SortingHatMutation(graphene.ObjectType):
     )
     schedule_task = ScheduleTask.Field(
         description='Create a periodic task to run a job every `interval` minutes.\
-        Only the `affiliate`, `unify` and `import_identities` jobs can be scheduled.'
+        Only the `affiliate`, `affiliate_pending`, `unify` and `import_identities` jobs can be scheduled.'
     )
     delete_scheduled_task = DeleteScheduledTask.Field(
         description='Delete a periodic task.'
@@ -89,6 +89,21 @@ class TestBackend(TestCase):
         self.assertEqual(identity.source, 'test_backend')
         self.assertEqual(identity.username, 'test_user')
 
+    def test_iter_individuals(self):
+        """Test whether it generates the individuals of get_individuals by default"""
+
+        importer = MockedIdentitiesImporter(self.ctx, 'foo.url')
+        individuals = importer.iter_individuals()
+
+        indiv = next(individuals)
+        self.assertEqual(indiv.identities[0].username, 'test_user')
+
+        indiv = next(individuals)
+        self.assertEqual(indiv.identities[0].email, 'test@example.com')
+
+        with self.assertRaises(StopIteration):
+            next(individuals)
+
     def test_base_class_error(self):
         """Test the ImportIdentities class raise NotImplementedError"""
 
@@ -119,6 +134,22 @@ class TestBackend(TestCase):
         self.assertEqual(identities[0].source, 'test_backend')
         self.assertEqual(identities[0].username, 'test_user')
 
+    def test_load_individuals_offset(self):
+        """Test if the individuals before the offset are not loaded"""
+
+        progress = []
+
+        importer = MockedIdentitiesImporter(self.ctx, 'foo.url')
+        nidentities = importer.import_identities(offset=1,
+                                                 progress=lambda *args: progress.append(args))
+
+        self.assertEqual(nidentities, 1)
+        self.assertListEqual(progress, [(2, 1)])
+
+        identities = Identity.objects.all()
+        self.assertEqual(len(identities), 1)
+        self.assertEqual(identities[0].email, 'test@example.com')
+
     def test_post_processing_individuals(self):
         """Test if it runs the post processing method"""
 
@@ -20,6 +20,7 @@
 #
 
 import datetime
+import io
 import os
 import re
 import unittest.mock
@@ -44,11 +45,11 @@ def read_file(filename, mode='r'):
 
 def mock_fetch(cls, url):
     if url == 'valid_aliases':
-        return read_file('data/gitdm/gitdm_email_aliases_valid.txt')
+        return io.StringIO(read_file('data/gitdm/gitdm_email_aliases_valid.txt'))
     elif url == 'email_employer':
-        return read_file('data/gitdm/gitdm_email_to_employer_valid.txt')
+        return io.StringIO(read_file('data/gitdm/gitdm_email_to_employer_valid.txt'))
     elif url == 'invalid_email_employer':
-        return read_file('data/gitdm/gitdm_email_to_employer_invalid.txt')
+        return io.StringIO(read_file('data/gitdm/gitdm_email_to_employer_invalid.txt'))
 
 
 class TestGitdmImporter(TestCase):
@@ -307,6 +308,45 @@ class TestGitdmImporter(TestCase):
         self.assertEqual(org.start, datetime.datetime(2015, 1, 1, tzinfo=tzutc()))
         self.assertEqual(org.end, MAX_PERIOD_DATE)
 
+    def test_iter_individuals(self):
+        """Test whether the individuals are generated reading the files line by line"""
+
+        datadir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data/gitdm')
+        url = 'file://' + os.path.join(datadir, 'gitdm_email_to_employer_valid.txt')
+        aliases_url = 'file://' + os.path.join(datadir, 'gitdm_email_aliases_valid.txt')
+
+        importer = GitdmImporter(ctx=self.ctx, url=url, aliases_url=aliases_url)
+
+        lines = importer._fetch_data(url)
+        self.assertEqual(next(lines), '#\n')
+        self.assertEqual(next(lines), '# Gitdm enrollments example\n')
+        lines.close()
+
+        individuals = importer.iter_individuals()
+        self.assertNotIsInstance(individuals, list)
+
+        individuals = list(individuals)
+        self.assertEqual(len(individuals), 4)
+
+        expected = ['jdoe@example.com', 'jrae@example.net', 'jrae@mylaptop', 'jsmith@example.com']
+        self.assertListEqual([indv.uuid for indv in individuals], expected)
+
+        # The same individuals are returned as a list
+        individuals = importer.get_individuals()
+        self.assertListEqual([indv.uuid for indv in individuals], expected)
+
+        identities = individuals[1].identities
+        self.assertListEqual([identity.email for identity in identities],
+                             ['jrae@example.net', 'jrae@example.com'])
+
+        enrollments = individuals[3].enrollments
+        enrollments.sort(key=lambda x: x.organization.name)
+        self.assertEqual(len(enrollments), 2)
+        self.assertEqual(enrollments[0].organization.name, 'Bitergia')
+        self.assertEqual(enrollments[0].end, datetime.datetime(2015, 1, 1, tzinfo=tzutc()))
+        self.assertEqual(enrollments[1].organization.name, 'Example Company')
+        self.assertEqual(enrollments[1].start, datetime.datetime(2015, 1, 1, tzinfo=tzutc()))
+
     @unittest.mock.patch.object(GitdmImporter, '_fetch_data', mock_fetch)
     def test_email_validation(self):
         """Test whether the importer validates the emails"""
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from sortinghat.core.context import SortingHatContext
+from sortinghat.core.errors import InvalidFormatError
+from sortinghat.core.importer.backends.mailmap import MailmapImporter, MailmapParser
+from sortinghat.core.models import MAX_PERIOD_DATE, MIN_PERIOD_DATE
+
+
+MAILMAP_INVALID_FORMAT_ERROR = "line %(line)s: invalid format"
+
+MAILMAP_REAPPEARING = """John Smith <jsmith@example.com> <jsmith@users.noreply.github.com>
+Jane Rae <jrae@example.net> <jane.rae@example.com>
+J. Smith <jsmith@example.com> <john.smith@example.org>
+"""
+
+MAILMAP_ORGS = """Example Company <example.com> John Smith <jsmith@example.com>
+Bitergia <bitergia.com> John Smith <jsmith@example.com>
+Unaffiliated <unaffiliated> Jane Rae <jrae@example.net>
+"""
+
+
+def read_file(filename, mode='r'):
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), filename), mode) as f:
+        content = f.read()
+    return content
+
+
+class TestMailmapImporter(TestCase):
+    """Test Mailmap importer"""
+
+    def setUp(self):
+        """Initialize database"""
+
+        self.user = get_user_model().objects.create(username='test')
+        self.ctx = SortingHatContext(self.user)
+
+    def test_iter_individuals(self):
+        """Test whether the individuals are generated reading the file line by line"""
+
+        datadir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data/mailmap')
+        url = 'file://' + os.path.join(datadir, 'mailmap_valid.txt')
+
+        importer = MailmapImporter(ctx=self.ctx, url=url)
+
+        lines = importer._fetch_data()
+        self.assertEqual(next(lines), '#\n')
+        self.assertEqual(next(lines), '# Mailmap example\n')
+        lines.close()
+
+        individuals = importer.iter_individuals()
+        self.assertNotIsInstance(individuals, list)
+
+        individuals = list(individuals)
+        expected = ['jsmith@example.com', 'jrae@example.net', 'jdoe@example.com']
+        self.assertListEqual([indv.uuid for indv in individuals], expected)
+
+        # The same individuals are returned as a list
+        individuals = importer.get_individuals()
+        self.assertListEqual([indv.uuid for indv in individuals], expected)
+
+
+class TestMailmapParser(TestCase):
+    """Test Mailmap parser"""
+
+    def test_consecutive_lines(self):
+        """Test whether consecutive lines of an address are grouped in one individual"""
+
+        stream = read_file('data/mailmap/mailmap_valid.txt')
+
+        parser = MailmapParser()
+        individuals = list(parser.iter_individuals(stream.splitlines(keepends=True)))
+
+        self.assertEqual(len(individuals), 3)
+
+        # Individual 1
+        indv = individuals[0]
+        self.assertEqual(indv.uuid, 'jsmith@example.com')
+        self.assertListEqual(indv.enrollments, [])
+
+        identities = [(idt.name, idt.email, idt.source) for idt in indv.identities]
+        expected = [('John Smith', 'jsmith@example.com', 'mailmap'),
+                    (None, 'jsmith@users.noreply.github.com', 'mailmap'),
+                    ('John S', 'john.smith@example.org', 'mailmap')]
+        self.assertListEqual(identities, expected)
+
+        # Individual 2
+        indv = individuals[1]
+        self.assertEqual(indv.uuid, 'jrae@example.net')
+
+        identities = [(idt.name, idt.email) for idt in indv.identities]
+        expected = [('Jane Rae', 'jrae@example.net'),
+                    (None, 'jane.rae@example.com'),
+                    (None, 'jrae@laptop.local')]
+        self.assertListEqual(identities, expected)
+
+        # Individual 3
+        indv = individuals[2]
+        self.assertEqual(indv.uuid, 'jdoe@example.com')
+
+        identities = [(idt.name, idt.email) for idt in indv.identities]
+        expected = [('John Doe', 'jdoe@example.com'),
+                    (None, 'john.doe@example.com')]
+        self.assertListEqual(identities, expected)
+
+    def test_reappearing_address(self):
+        """Test whether an address found again generates a new individual with its first identity"""
+
+        parser = MailmapParser()
+        individuals = list(parser.iter_individuals(MAILMAP_REAPPEARING))
+
+        self.assertListEqual([indv.uuid for indv in individuals],
+                             ['jsmith@example.com', 'jrae@example.net', 'jsmith@example.com'])
+
+        # The first identity keeps the name of the first line of the address
+        indv = individuals[2]
+        identities = [(idt.name, idt.email) for idt in indv.identities]
+        expected = [('John Smith', 'jsmith@example.com'),
+                    (None, 'john.smith@example.org')]
+        self.assertListEqual(identities, expected)
+
+        # When the whole stream is parsed, both groups are merged
+        parser = MailmapParser(MAILMAP_REAPPEARING)
+        individuals = parser.individuals
+
+        self.assertListEqual([indv.uuid for indv in individuals],
+                             ['jsmith@example.com', 'jrae@example.net'])
+
+        identities = [idt.email for idt in individuals[0].identities]
+        expected = ['jsmith@example.com',
+                    'jsmith@users.noreply.github.com',
+                    'john.smith@example.org']
+        self.assertListEqual(identities, expected)
+
+    def test_has_orgs(self):
+        """Test whether lines are parsed as enrollments when the stream maps organizations"""
+
+        parser = MailmapParser(has_orgs=True)
+        individuals = list(parser.iter_individuals(MAILMAP_ORGS))
+
+        self.assertListEqual([indv.uuid for indv in individuals],
+                             ['jsmith@example.com', 'jrae@example.net'])
+
+        # Individual 1
+        indv = individuals[0]
+
+        identities = [(idt.name, idt.email) for idt in indv.identities]
+        self.assertListEqual(identities, [('John Smith', 'jsmith@example.com')])
+
+        enrollments = [(rol.organization.name, rol.start, rol.end) for rol in indv.enrollments]
+        expected = [('Example Company', MIN_PERIOD_DATE, MAX_PERIOD_DATE),
+                    ('Bitergia', MIN_PERIOD_DATE, MAX_PERIOD_DATE)]
+        self.assertListEqual(enrollments, expected)
+
+        # Unaffiliated individuals have no enrollments
+        indv = individuals[1]
+
+        identities = [(idt.name, idt.email) for idt in indv.identities]
+        self.assertListEqual(identities, [('Jane Rae', 'jrae@example.net')])
+        self.assertListEqual(indv.enrollments, [])
+
+        orgs = sorted(org.name for org in parser.organizations)
+        self.assertListEqual(orgs, ['Bitergia', 'Example Company'])
+
+    def test_invalid_format(self):
+        """Test whether it fails when a line is not valid"""
+
+        stream = "John Smith <jsmith@example.com>\nJane Rae jrae@example.net\n"
+
+        parser = MailmapParser()
+
+        with self.assertRaisesRegex(InvalidFormatError, MAILMAP_INVALID_FORMAT_ERROR % {'line': 2}):
+            list(parser.iter_individuals(stream))
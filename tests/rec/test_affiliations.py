@@ -19,13 +19,17 @@
 #     Santiago Dueñas <sduenas@bitergia.com>
 #
 import datetime
+import unittest.mock
 
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 
 from sortinghat.core import api
 from sortinghat.core.context import SortingHatContext
-from sortinghat.core.recommendations.affiliation import recommend_affiliations
+from sortinghat.core.recommendations.affiliation import (DomainsIndex,
+                                                         fetch_domains_index,
+                                                         find_individuals_by_domains,
+                                                         recommend_affiliations)
 
 
 class TestRecommendAffiliations(TestCase):
@@ -330,3 +334,258 @@ class TestRecommendAffiliations(TestCase):
 
         # Only Example Int. should be recommended (Example and Bitergia are excluded)
         self.assertListEqual(rec[2], ['Example Int.'])
+
+    def _add_individuals(self):
+        ctx = SortingHatContext(self.user)
+
+        jsmith = api.add_identity(ctx,
+                                  source='scm',
+                                  email='jsmith@us.example.com',
+                                  name='John Smith')
+        api.add_identity(ctx,
+                         source='scm',
+                         email='jsmith@bitergia.com',
+                         name='John Smith',
+                         uuid=jsmith.uuid)
+        api.enroll(ctx, jsmith.uuid, 'Bitergia')
+
+        jroe = api.add_identity(ctx,
+                                source='scm',
+                                email='jroe@es.u.example.com',
+                                name='Jane Roe')
+        jdoe = api.add_identity(ctx,
+                                source='scm',
+                                email='jdoe@example.org',
+                                name='John Doe')
+
+        return jsmith, jroe, jdoe
+
+    def test_chunks(self):
+        """Check if recommendations are the same when individuals are split in chunks"""
+
+        jsmith, jroe, jdoe = self._add_individuals()
+        uuids = [jdoe.uuid, jsmith.uuid, 'FFFFFFFFFFFFFFFFFF', jroe.uuid]
+
+        expected = [
+            (jdoe.uuid, jdoe.individual.mk, []),
+            (jsmith.uuid, jsmith.individual.mk, ['Example']),
+            (jroe.uuid, jroe.individual.mk, ['Example Int.'])
+        ]
+
+        recs = list(recommend_affiliations(uuids))
+        self.assertListEqual(recs, expected)
+
+        with unittest.mock.patch('sortinghat.core.recommendations.affiliation.AFFILIATION_CHUNK_SIZE', 1):
+            recs = list(recommend_affiliations(uuids))
+        self.assertListEqual(recs, expected)
+
+        with unittest.mock.patch('sortinghat.core.recommendations.affiliation.AFFILIATION_CHUNK_SIZE', 2):
+            recs = list(recommend_affiliations(None))
+        self.assertListEqual(sorted(recs), sorted(expected))
+
+    def test_number_of_queries(self):
+        """Check if the number of queries does not depend on the number of individuals"""
+
+        jsmith, jroe, jdoe = self._add_individuals()
+
+        # Build the index of domains before counting
+        list(recommend_affiliations([jsmith.uuid]))
+
+        # Domains fingerprint, individuals, email addresses and enrollments
+        with self.assertNumQueries(4):
+            recs = list(recommend_affiliations([jsmith.uuid, jroe.uuid, jdoe.uuid]))
+        self.assertEqual(len(recs), 3)
+
+        with self.assertNumQueries(4):
+            recs = list(recommend_affiliations(None))
+        self.assertEqual(len(recs), 3)
+
+        # Identities uuids are searched when they are not main keys
+        ctx = SortingHatContext(self.user)
+        jsmith2 = api.add_identity(ctx,
+                                   source='git',
+                                   email='jsmith@example.com',
+                                   uuid=jsmith.uuid)
+
+        with self.assertNumQueries(5):
+            recs = list(recommend_affiliations([jsmith2.uuid, jroe.uuid]))
+        self.assertEqual(recs[0][:2], (jsmith2.uuid, jsmith.individual.mk))
+
+
+class TestFindIndividualsByDomains(TestCase):
+    """Unit tests for find_individuals_by_domains"""
+
+    def setUp(self):
+        """Initialize database with domains and individuals"""
+
+        self.user = get_user_model().objects.create(username='test')
+        ctx = SortingHatContext(self.user)
+
+        api.add_organization(ctx, 'Example')
+        api.add_domain(ctx, 'Example', 'example.com', is_top_domain=True)
+        api.add_organization(ctx, 'Bitergia')
+        api.add_domain(ctx, 'Bitergia', 'bitergia.com', is_top_domain=False)
+
+        self.jsmith = api.add_identity(ctx, source='scm', email='jsmith@Example.com')
+        self.jdoe = api.add_identity(ctx, source='scm', email='jdoe@us.example.com')
+        self.jroe = api.add_identity(ctx, source='scm', email='jroe@dev.bitergia.com')
+        self.jrae = api.add_identity(ctx, source='scm', email='jrae@bitergia.com')
+        api.add_identity(ctx, source='scm', email='jsmith@example.net')
+
+    def test_top_domain(self):
+        """Check if individuals with addresses on sub-domains of a top domain are found"""
+
+        mks = find_individuals_by_domains(['example.com'])
+        self.assertSetEqual(mks, {self.jsmith.individual.mk, self.jdoe.individual.mk})
+
+    def test_top_domain_suffix(self):
+        """Check if domains that only share a suffix with a top domain are not found"""
+
+        ctx = SortingHatContext(self.user)
+        api.add_identity(ctx, source='scm', email='jdoe@myexample.com')
+        api.add_identity(ctx, source='scm', email='jdoe@us.myexample.com')
+
+        mks = find_individuals_by_domains(['example.com'])
+        self.assertSetEqual(mks, {self.jsmith.individual.mk, self.jdoe.individual.mk})
+
+    def test_not_top_domain(self):
+        """Check if only individuals with addresses on the domain are found"""
+
+        mks = find_individuals_by_domains(['bitergia.com'])
+        self.assertSetEqual(mks, {self.jrae.individual.mk})
+
+    def test_unknown_domain(self):
+        """Check if domains not in the registry are ignored"""
+
+        mks = find_individuals_by_domains(['example.net', 'example.org'])
+        self.assertSetEqual(mks, set())
+        self.assertSetEqual(find_individuals_by_domains([]), set())
+
+
+class TestDomainsIndex(TestCase):
+    """Unit tests for DomainsIndex"""
+
+    def setUp(self):
+        """Build an index with a set of domains"""
+
+        self.index = DomainsIndex([
+            ('example.com', True, 'Example'),
+            ('u.example.com', True, 'Example Int.'),
+            ('es.u.example.com', False, 'Example Int.'),
+            ('bitergia.com', False, 'Bitergia')
+        ])
+
+    def test_find(self):
+        """Check if the domain with the same name is found"""
+
+        self.assertEqual(len(self.index), 4)
+
+        entry = self.index.find('u.example.com')
+        self.assertEqual(entry.domain, 'u.example.com')
+        self.assertEqual(entry.is_top_domain, True)
+        self.assertEqual(entry.organization, 'Example Int.')
+
+        # Domains which are not top domains are also found
+        entry = self.index.find('bitergia.com')
+        self.assertEqual(entry.domain, 'bitergia.com')
+        self.assertEqual(entry.organization, 'Bitergia')
+
+    def test_find_top_domain(self):
+        """Check if the closest top domain is found for sub-domains"""
+
+        entry = self.index.find('us.example.com')
+        self.assertEqual(entry.domain, 'example.com')
+
+        entry = self.index.find('en.u.example.com')
+        self.assertEqual(entry.domain, 'u.example.com')
+
+        entry = self.index.find('a.b.u.example.com')
+        self.assertEqual(entry.domain, 'u.example.com')
+
+    def test_find_not_top_domain(self):
+        """Check if sub-domains of a domain that is not a top domain are not found"""
+
+        self.assertIsNone(self.index.find('dev.bitergia.com'))
+
+        # The closest domain is the one checked, not the top one
+        self.assertIsNone(self.index.find('en.es.u.example.com'))
+
+    def test_case_insensitive(self):
+        """Check if domains are found ignoring the case"""
+
+        entry = self.index.find('US.Example.COM')
+        self.assertEqual(entry.domain, 'example.com')
+
+    def test_no_match(self):
+        """Check if nothing is returned when there is no match"""
+
+        self.assertIsNone(self.index.find('example.net'))
+        self.assertIsNone(self.index.find('com'))
+        self.assertIsNone(self.index.find('example'))
+
+
+class TestFetchDomainsIndex(TestCase):
+    """Unit tests for fetch_domains_index"""
+
+    def setUp(self):
+        """Initialize database with a set of organizations and domains"""
+
+        self.user = get_user_model().objects.create(username='test')
+        self.ctx = SortingHatContext(self.user)
+
+        api.add_organization(self.ctx, 'Example')
+        api.add_domain(self.ctx, 'Example', 'example.com', is_top_domain=True)
+
+        api.add_organization(self.ctx, 'Bitergia')
+        api.add_domain(self.ctx, 'Bitergia', 'bitergia.com')
+
+    def test_fetch(self):
+        """Check if the index includes the domains of the registry"""
+
+        domains_index = fetch_domains_index()
+
+        self.assertEqual(len(domains_index), 2)
+        self.assertEqual(domains_index.find('example.com').organization, 'Example')
+        self.assertEqual(domains_index.find('bitergia.com').organization, 'Bitergia')
+
+    def test_cached_index(self):
+        """Check if the index is not built again when domains did not change"""
+
+        domains_index = fetch_domains_index()
+
+        # Only the fingerprint of the table is read
+        with self.assertNumQueries(1):
+            self.assertIs(fetch_domains_index(), domains_index)
+
+    def test_add_domain(self):
+        """Check if the index is built again when a domain is added"""
+
+        domains_index = fetch_domains_index()
+        self.assertIsNone(domains_index.find('example.org'))
+
+        api.add_domain(self.ctx, 'Example', 'example.org')
+
+        domains_index = fetch_domains_index()
+        self.assertEqual(domains_index.find('example.org').organization, 'Example')
+
+    def test_delete_domain(self):
+        """Check if the index is built again when a domain is deleted"""
+
+        domains_index = fetch_domains_index()
+        self.assertIsNotNone(domains_index.find('bitergia.com'))
+
+        api.delete_domain(self.ctx, 'bitergia.com')
+
+        domains_index = fetch_domains_index()
+        self.assertIsNone(domains_index.find('bitergia.com'))
+
+    def test_move_domain(self):
+        """Check if the index is built again when a domain is moved"""
+
+        domains_index = fetch_domains_index()
+        self.assertEqual(domains_index.find('bitergia.com').organization, 'Bitergia')
+
+        api.merge_organizations(self.ctx, 'Bitergia', 'Example')
+
+        domains_index = fetch_domains_index()
+        self.assertEqual(domains_index.find('bitergia.com').organization, 'Example')
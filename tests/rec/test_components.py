@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2021 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import unittest
+
+from sortinghat.core.recommendations.components import UnionFind
+
+
+class TestUnionFind(unittest.TestCase):
+    """Unit tests for UnionFind"""
+
+    def test_components(self):
+        """Check if connected components are found"""
+
+        uf = UnionFind()
+        uf.union_pairs([('A', 'B'), ('B', 'C'), ('D', 'E'), ('C', 'B'), ('F', 'F')])
+
+        self.assertEqual(len(uf), 6)
+
+        components = sorted(sorted(c) for c in uf.components())
+        self.assertListEqual(components, [['A', 'B', 'C'], ['D', 'E']])
+
+        self.assertEqual(uf.find('A'), uf.find('C'))
+        self.assertNotEqual(uf.find('A'), uf.find('D'))
+
+        # Single element components are returned when requested
+        components = sorted(sorted(c) for c in uf.components(min_size=1))
+        self.assertListEqual(components, [['A', 'B', 'C'], ['D', 'E'], ['F']])
+
+    def test_directed_edges(self):
+        """Check if components do not depend on the direction of the edges"""
+
+        uf = UnionFind()
+        uf.union_pairs([('A', 'B'), ('C', 'B')])
+
+        components = [sorted(c) for c in uf.components()]
+        self.assertListEqual(components, [['A', 'B', 'C']])
+
+    def test_stats(self):
+        """Check if the statistics of the size of components are calculated"""
+
+        uf = UnionFind()
+        uf.union_pairs([('A', 'B'), ('B', 'C'), ('C', 'D'),
+                        ('E', 'F'), ('G', 'H'), ('I', 'I')])
+
+        stats = uf.stats(max_size=3)
+
+        expected = {
+            'components': 3,
+            'elements': 8,
+            'max_size': 4,
+            'mean_size': 8 / 3,
+            'median_size': 2.0,
+            'oversized': 1
+        }
+        self.assertDictEqual(stats, expected)
+
+    def test_stats_empty(self):
+        """Check if empty statistics are returned when there are no components"""
+
+        uf = UnionFind()
+
+        stats = uf.stats()
+        self.assertEqual(stats['components'], 0)
+        self.assertEqual(stats['elements'], 0)
+        self.assertEqual(stats['oversized'], 0)
+
+    def test_find_not_found(self):
+        """Check if an error is raised when an element is not found"""
+
+        uf = UnionFind()
+
+        with self.assertRaises(KeyError):
+            uf.find('A')
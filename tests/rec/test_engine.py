@@ -19,10 +19,22 @@
 #     Santiago Dueñas <sduenas@bitergia.com>
 #
 
-from django.test import TestCase
+import datetime
+import unittest.mock
 
+import django_rq
+
+from dateutil.tz import UTC
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from sortinghat.core import api
+from sortinghat.core.context import SortingHatContext
 from sortinghat.core.errors import RecommendationEngineError
 from sortinghat.core.recommendations.engine import RecommendationEngine
+from sortinghat.core.recommendations.exclusion import add_recommender_exclusion_term
+from sortinghat.core.recommendations.matching import recommend_matches
 
 
 UNKNOWN_TYPE_ERROR = "Unknown '{}' recommendation type"
@@ -96,3 +108,183 @@ class TestRecommendationEngine(TestCase):
 
         types = RecommendationEngine.types()
         self.assertListEqual(types, ['affiliation', 'matches', 'gender'])
+
+
+@override_settings(MATCH_CACHE_TTL=60)
+class TestRecommendationEngineCache(TestCase):
+    """Unit tests for the cache of recommendations"""
+
+    def setUp(self):
+        """Initialize database with a dataset"""
+
+        conn = django_rq.get_connection()
+        conn.flushall()
+
+        self.user = get_user_model().objects.create(username='test')
+        self.ctx = SortingHatContext(self.user)
+
+        self.jsmith = api.add_identity(self.ctx,
+                                       email='jsmith@example.com',
+                                       name='John Smith',
+                                       source='scm')
+        self.jsmith_alt = api.add_identity(self.ctx,
+                                           email='jsmith@example.com',
+                                           source='git')
+        self.jrae = api.add_identity(self.ctx,
+                                     email='jrae@example.com',
+                                     source='scm')
+
+        self.recommender = unittest.mock.create_autospec(recommend_matches,
+                                                         side_effect=recommend_matches)
+        self.types = unittest.mock.patch.dict(RecommendationEngine.RECOMMENDATION_TYPES,
+                                              {'matches': self.recommender})
+        self.types.start()
+
+    def tearDown(self):
+        self.types.stop()
+
+    def _recommend(self, criteria, **kwargs):
+        engine = RecommendationEngine()
+        recs = engine.recommend('matches',
+                                [self.jsmith.uuid, self.jrae.uuid],
+                                None, criteria, **kwargs)
+        return {rec.key: rec.options for rec in recs}
+
+    def test_cached_recommendations(self):
+        """Check if recommendations are generated once for the same arguments"""
+
+        expected = {
+            self.jsmith.uuid: sorted([self.jsmith_alt.uuid]),
+            self.jrae.uuid: []
+        }
+
+        recs = self._recommend(['email'])
+        self.assertDictEqual(recs, expected)
+
+        recs = self._recommend(['email'], workers=2)
+        self.assertDictEqual(recs, expected)
+
+        self.assertEqual(self.recommender.call_count, 1)
+
+        # Different arguments generate new recommendations
+        recs = self._recommend(['name'])
+        self.assertDictEqual(recs, {self.jsmith.uuid: [], self.jrae.uuid: []})
+
+        self.assertEqual(self.recommender.call_count, 2)
+
+    def test_identities_changed(self):
+        """Check if cached recommendations are discarded when identities change"""
+
+        self._recommend(['email'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            jrae_alt = api.add_identity(self.ctx,
+                                        email='jrae@example.com',
+                                        source='git')
+
+        recs = self._recommend(['email'])
+
+        expected = {
+            self.jsmith.uuid: [self.jsmith_alt.uuid],
+            self.jrae.uuid: [jrae_alt.uuid]
+        }
+        self.assertDictEqual(recs, expected)
+        self.assertEqual(self.recommender.call_count, 2)
+
+    def test_exclusion_terms_changed(self):
+        """Check if cached recommendations are discarded when exclusion terms change"""
+
+        self._recommend(['email'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            add_recommender_exclusion_term(self.ctx, 'jsmith@example.com')
+
+        recs = self._recommend(['email'])
+
+        expected = {
+            self.jsmith.uuid: [],
+            self.jrae.uuid: []
+        }
+        self.assertDictEqual(recs, expected)
+        self.assertEqual(self.recommender.call_count, 2)
+
+    def test_settings_changed(self):
+        """Check if cached recommendations are discarded when the matching settings change"""
+
+        self._recommend(['email'])
+
+        with self.settings(MATCH_FUZZY_NAME_THRESHOLD=1.0):
+            self._recommend(['email'])
+
+        self.assertEqual(self.recommender.call_count, 2)
+
+        with self.settings(MATCH_TRUSTED_SOURCES=['scm']):
+            self._recommend(['email'])
+
+        self.assertEqual(self.recommender.call_count, 3)
+
+        # Results of the original settings are still cached
+        self._recommend(['email'])
+
+        self.assertEqual(self.recommender.call_count, 3)
+
+    def test_partial_results_not_cached(self):
+        """Check if results are not cached when they were not fully generated"""
+
+        engine = RecommendationEngine()
+        recs = engine.recommend('matches',
+                                [self.jsmith.uuid, self.jrae.uuid],
+                                None, ['email'])
+        next(recs)
+        recs.close()
+
+        self._recommend(['email'])
+
+        self.assertEqual(self.recommender.call_count, 2)
+
+    def test_whole_registry_not_cached(self):
+        """Check if recommendations for the whole registry are not cached"""
+
+        engine = RecommendationEngine()
+
+        for _ in range(2):
+            recs = engine.recommend('matches', [], None, ['email'])
+            self.assertEqual(len(list(recs)), 3)
+
+        self.assertEqual(self.recommender.call_count, 2)
+
+    def test_last_modified_not_cached(self):
+        """Check if recommendations for recently modified individuals are not cached"""
+
+        last_modified = datetime.datetime(2000, 1, 1, tzinfo=UTC)
+
+        self._recommend(['email'], last_modified=last_modified)
+        self._recommend(['email'], last_modified=last_modified)
+
+        self.assertEqual(self.recommender.call_count, 2)
+
+    @override_settings(MATCH_CACHE_MAX_SIZE=2)
+    def test_large_results_not_cached(self):
+        """Check if results over the maximum size are not cached"""
+
+        expected = {
+            self.jsmith.uuid: [self.jsmith_alt.uuid],
+            self.jrae.uuid: []
+        }
+
+        recs = self._recommend(['email'])
+        self.assertDictEqual(recs, expected)
+
+        recs = self._recommend(['email'])
+        self.assertDictEqual(recs, expected)
+
+        self.assertEqual(self.recommender.call_count, 2)
+
+    @override_settings(MATCH_CACHE_TTL=0)
+    def test_cache_disabled(self):
+        """Check if recommendations are not cached when the cache is disabled"""
+
+        self._recommend(['email'])
+        self._recommend(['email'])
+
+        self.assertEqual(self.recommender.call_count, 2)
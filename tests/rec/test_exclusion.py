@@ -20,13 +20,21 @@
 #
 
 
+import django_rq
+
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
 
 import sortinghat.core.errors
+from sortinghat.core import api
+from sortinghat.core.cache import EXCLUSION_TERMS, bump_registry_version
 from sortinghat.core.context import SortingHatContext
+from sortinghat.core.models import Identity, RecommenderExclusionTerm
 from sortinghat.core.recommendations.exclusion import (add_recommender_exclusion_term,
                                                        delete_recommend_exclusion_term,
+                                                       exclude_identities,
+                                                       fetch_excluded_terms,
                                                        fetch_recommender_exclusion_list)
 
 
@@ -105,3 +113,147 @@ class TestRecommenderExclusionTerm(TestCase):
 
         self.assertEqual(len(term), 0)
         self.assertListEqual(term, [])
+
+
+class TestFetchExcludedTerms(TestCase):
+    """Unit tests for fetch_excluded_terms"""
+
+    def setUp(self):
+        """Initialize"""
+
+        django_rq.get_connection().flushall()
+
+        self.user = get_user_model().objects.create(username='test')
+        self.ctx = SortingHatContext(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            add_recommender_exclusion_term(self.ctx, "JSmith")
+            add_recommender_exclusion_term(self.ctx, "John Smith")
+
+    def test_fetch_excluded_terms(self):
+        """Check if the normalized terms are returned"""
+
+        terms = fetch_excluded_terms()
+        self.assertSetEqual(terms, {'jsmith', 'john smith'})
+
+    def test_cached_terms(self):
+        """Check if terms are not read again when the list did not change"""
+
+        terms = fetch_excluded_terms()
+
+        # Only the version is read from Redis
+        with self.assertNumQueries(0):
+            cached = fetch_excluded_terms()
+
+        self.assertIs(cached, terms)
+
+    def test_changes_not_committed(self):
+        """Check if terms are not cached while a change is not committed"""
+
+        fetch_excluded_terms()
+        add_recommender_exclusion_term(self.ctx, "Bot@Example.com")
+
+        with self.assertNumQueries(1):
+            fetch_excluded_terms()
+        with self.assertNumQueries(1):
+            terms = fetch_excluded_terms()
+
+        self.assertSetEqual(terms, {'jsmith', 'john smith', 'bot@example.com'})
+
+    def test_add_term(self):
+        """Check if the cached terms are discarded when a term is added"""
+
+        fetch_excluded_terms()
+        add_recommender_exclusion_term(self.ctx, "Bot@Example.com")
+
+        terms = fetch_excluded_terms()
+        self.assertSetEqual(terms, {'jsmith', 'john smith', 'bot@example.com'})
+
+    def test_delete_term(self):
+        """Check if the cached terms are discarded when a term is removed"""
+
+        fetch_excluded_terms()
+        delete_recommend_exclusion_term(self.ctx, "JSmith")
+
+        terms = fetch_excluded_terms()
+        self.assertSetEqual(terms, {'john smith'})
+
+    def test_terms_changed_outside(self):
+        """Check if the cached terms are discarded when the table changes elsewhere"""
+
+        fetch_excluded_terms()
+
+        # Other processes increase the version once the change is committed
+        with self.captureOnCommitCallbacks(execute=True):
+            RecommenderExclusionTerm.objects.create(term='Jane Rae')
+            bump_registry_version(EXCLUSION_TERMS)
+
+        terms = fetch_excluded_terms()
+        self.assertSetEqual(terms, {'jsmith', 'john smith', 'jane rae'})
+
+
+class TestExcludeIdentities(TestCase):
+    """Unit tests for exclude_identities"""
+
+    def setUp(self):
+        """Initialize"""
+
+        self.user = get_user_model().objects.create(username='test')
+        self.ctx = SortingHatContext(self.user)
+
+        self.jsmith = api.add_identity(self.ctx,
+                                       name='John Smith',
+                                       email='jsmith@example.com',
+                                       source='scm')
+        self.jsmith_alt = api.add_identity(self.ctx,
+                                           username='JSMITH',
+                                           source='git')
+        self.jrae = api.add_identity(self.ctx,
+                                     name='Jane Rae',
+                                     email='jrae@example.com',
+                                     source='scm')
+
+    def test_exclude_identities(self):
+        """Check if identities with excluded values are removed, ignoring case"""
+
+        add_recommender_exclusion_term(self.ctx, "JSmith@example.com")
+        add_recommender_exclusion_term(self.ctx, "jsmith")
+
+        identities = exclude_identities(Identity.objects.all())
+
+        uuids = [identity.uuid for identity in identities]
+        self.assertListEqual(uuids, [self.jrae.uuid])
+
+    def test_fields_ignore_case(self):
+        """Check if the case of the name, email and username is ignored"""
+
+        add_recommender_exclusion_term(self.ctx, "jane rae")
+
+        identities = exclude_identities(Identity.objects.order_by('uuid'))
+
+        uuids = [identity.uuid for identity in identities]
+        expected = sorted([self.jsmith.uuid, self.jsmith_alt.uuid])
+        self.assertListEqual(uuids, expected)
+
+    def test_normalized_term_not_transformed(self):
+        """Check if only the values of the identities are converted to lowercase"""
+
+        identities = exclude_identities(Identity.objects.all())
+        query = str(identities.query)
+
+        qn = connection.ops.quote_name
+        term = f"U0.{qn('normalized_term')}"
+
+        for field in ['name', 'email', 'username']:
+            self.assertIn(f"LOWER({qn('identities')}.{qn(field)})", query)
+        self.assertNotIn(f"LOWER({term})", query)
+        self.assertIn(f"{term} =", query)
+
+    def test_no_terms(self):
+        """Check if no identity is removed when the exclusion list is empty"""
+
+        identities = exclude_identities(Identity.objects.order_by('uuid'))
+
+        uuids = [identity.uuid for identity in identities]
+        expected = sorted([self.jsmith.uuid, self.jsmith_alt.uuid, self.jrae.uuid])
+        self.assertListEqual(uuids, expected)
@@ -22,50 +22,74 @@
 #
 
 
+import datetime
 import json
+import os
+import tempfile
+import unittest.mock
+
 import httpretty
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import TestCase, override_settings
+
+from grimoirelab_toolkit.datetime import datetime_utcnow
 
 from sortinghat.core import api
 from sortinghat.core.context import SortingHatContext
-from sortinghat.core.recommendations.gender import recommend_gender
+from sortinghat.core.errors import InvalidValueError
+from sortinghat.core.models import GenderCache
+from sortinghat.core.recommendations.gender import (DictionaryProvider,
+                                                    GenderizeProvider,
+                                                    recommend_gender,
+                                                    genderize_names,
+                                                    get_gender_provider,
+                                                    _RateLimiter)
 from sortinghat.core.recommendations.exclusion import add_recommender_exclusion_term
 
 GENDERIZE_API_URL = "https://api.genderize.io/"
 
+GENDER_DICTIONARY = """name,gender,probability
+john,male,0.92
+Jane,female,0.89
+alex,male,0.5
+"""
+
 
 def setup_genderize_server():
     """Setup a mock HTTP server for genderize.io"""
 
     http_requests = []
 
-    def request_callback(method, uri, headers):
-        last_request = httpretty.last_request()
-        http_requests.append(last_request)
+    def request_callback(request, uri, headers):
+        http_requests.append(request)
 
-        params = last_request.querystring
-        name = params['name'][0].lower()
+        params = request.querystring
+        names = [name.lower() for name in params['name[]']]
 
-        if name == 'error':
+        if 'error' in names:
             return 502, headers, 'Bad Gateway'
 
-        if name == 'john':
-            data = {
-                'gender': 'male',
-                'probability': 0.92
-            }
-        elif name == 'jane':
-            data = {
-                'gender': 'female',
-                'probability': 0.89
-            }
-        else:
-            data = {
-                'gender': None,
-                'probability': None
-            }
+        data = []
+        for name in names:
+            if name == 'john':
+                data.append({
+                    'name': name,
+                    'gender': 'male',
+                    'probability': 0.92
+                })
+            elif name == 'jane':
+                data.append({
+                    'name': name,
+                    'gender': 'female',
+                    'probability': 0.89
+                })
+            else:
+                data.append({
+                    'name': name,
+                    'gender': None,
+                    'probability': None
+                })
 
         body = json.dumps(data)
 
@@ -250,7 +274,7 @@ class TestRecommendGender(TestCase):
         recs = list(recommend_gender(uuids))
 
         expected = {
-            'name': ['john'],
+            'name[]': ['john'],
             'apikey': ['fake-key']
         }
 
@@ -276,3 +300,380 @@ class TestRecommendGender(TestCase):
         self.assertEqual(len(http_requests), 6)
 
         self.assertEqual(len(recs), 0)
+
+    @httpretty.activate
+    def test_dictionary_provider(self):
+        """Check if genders are recommended offline using a dictionary"""
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'names.csv')
+            with open(path, 'w') as fd:
+                fd.write(GENDER_DICTIONARY)
+
+            with override_settings(SORTINGHAT_GENDER_PROVIDER='dictionary',
+                                   SORTINGHAT_GENDER_DICTIONARY_PATH=path):
+                uuids = [self.john_smith.uuid,
+                         self.jane_doe.uuid,
+                         self.john.uuid]
+                recs = list(recommend_gender(uuids, no_strict_matching=True))
+
+        self.assertEqual(len(recs), 3)
+
+        rec = recs[0]
+        self.assertEqual(rec[0], self.john_smith.uuid)
+        self.assertEqual(rec[2], ('male', 92))
+
+        rec = recs[1]
+        self.assertEqual(rec[0], self.jane_doe.uuid)
+        self.assertEqual(rec[2], ('female', 89))
+
+        rec = recs[2]
+        self.assertEqual(rec[0], self.john.uuid)
+        self.assertEqual(rec[2], ('male', 92))
+
+        # Local providers do not use the cache
+        self.assertEqual(GenderCache.objects.count(), 0)
+
+    def test_fixed_number_of_queries(self):
+        """Check if individuals are read in bulk, chunk by chunk"""
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'names.csv')
+            with open(path, 'w') as fd:
+                fd.write(GENDER_DICTIONARY)
+
+            uuids = [self.john_smith.uuid,
+                     self.jane_doe.uuid,
+                     self.john.uuid,
+                     self.no_name.uuid,
+                     self.double_space.uuid]
+
+            with override_settings(SORTINGHAT_GENDER_PROVIDER='dictionary',
+                                   SORTINGHAT_GENDER_DICTIONARY_PATH=path):
+                # Identities, individuals and profiles
+                with self.assertNumQueries(3):
+                    recs = list(recommend_gender(uuids, exclude=False))
+                self.assertEqual(len(recs), 3)
+
+                # Three queries per chunk
+                with unittest.mock.patch('sortinghat.core.recommendations.gender.GENDER_CHUNK_SIZE', 2):
+                    with self.assertNumQueries(9):
+                        recs = list(recommend_gender(uuids, exclude=False))
+                self.assertEqual(len(recs), 3)
+
+    @httpretty.activate
+    def test_identity_uuid(self):
+        """Check if individuals are found by the uuids of their identities"""
+
+        setup_genderize_server()
+
+        identity = api.add_identity(self.ctx,
+                                    email='jane@example.com',
+                                    source='git',
+                                    uuid=self.jane_doe.uuid)
+
+        recs = list(recommend_gender([identity.uuid]))
+
+        self.assertEqual(len(recs), 1)
+
+        rec = recs[0]
+        self.assertEqual(rec[0], identity.uuid)
+        self.assertEqual(rec[1], self.jane_doe.individual.mk)
+        self.assertEqual(rec[2], ('female', 89))
+
+    @httpretty.activate
+    def test_names_requested_once(self):
+        """Check if each distinct name is requested once in a batch"""
+
+        http_requests = setup_genderize_server()
+
+        uuids = [self.john_smith.uuid,
+                 self.jane_doe.uuid,
+                 self.double_space.uuid]
+        recs = list(recommend_gender(uuids))
+
+        self.assertEqual(len(recs), 3)
+
+        self.assertEqual(len(http_requests), 1)
+        self.assertListEqual(http_requests[0].querystring['name[]'], ['jane', 'john'])
+
+
+class TestGenderizeNames(TestCase):
+    """Unit tests for genderize_names"""
+
+    @httpretty.activate
+    def test_genderize_names(self):
+        """Check if the genders of the names are fetched and cached"""
+
+        http_requests = setup_genderize_server()
+
+        genders = genderize_names(['john', 'jane', 'jdoe'])
+
+        expected = {
+            'john': ('male', 92),
+            'jane': ('female', 89),
+            'jdoe': (None, None)
+        }
+        self.assertDictEqual(genders, expected)
+        self.assertEqual(len(http_requests), 1)
+
+        # Names are stored in the cache
+        cached = GenderCache.objects.order_by('name')
+        self.assertEqual(len(cached), 3)
+
+        entry = cached[0]
+        self.assertEqual(entry.name, 'jane')
+        self.assertEqual(entry.gender, 'female')
+        self.assertEqual(entry.accuracy, 89)
+
+        entry = cached[1]
+        self.assertEqual(entry.name, 'jdoe')
+        self.assertEqual(entry.gender, None)
+        self.assertEqual(entry.accuracy, None)
+
+        # The API is not called again for cached names
+        genders = genderize_names(['john', 'jane', 'jdoe'])
+
+        self.assertDictEqual(genders, expected)
+        self.assertEqual(len(http_requests), 1)
+
+    @httpretty.activate
+    def test_expired_cache(self):
+        """Check if names cached for longer than the TTL are fetched again"""
+
+        http_requests = setup_genderize_server()
+
+        GenderCache.objects.create(name='john', gender='female', accuracy=50)
+        GenderCache.objects.filter(name='john').update(
+            last_modified=datetime_utcnow() - datetime.timedelta(hours=2)
+        )
+        GenderCache.objects.create(name='jane', gender='female', accuracy=75)
+
+        genders = genderize_names(['john', 'jane'])
+
+        expected = {
+            'john': ('male', 92),
+            'jane': ('female', 75)
+        }
+        self.assertDictEqual(genders, expected)
+
+        self.assertEqual(len(http_requests), 1)
+        self.assertListEqual(http_requests[0].querystring['name[]'], ['john'])
+
+        entry = GenderCache.objects.get(name='john')
+        self.assertEqual(entry.gender, 'male')
+        self.assertEqual(entry.accuracy, 92)
+
+    @httpretty.activate
+    @override_settings(SORTINGHAT_GENDERIZE_CACHE_TTL=0)
+    def test_cache_disabled(self):
+        """Check if names are not cached when the TTL is 0"""
+
+        http_requests = setup_genderize_server()
+
+        GenderCache.objects.create(name='john', gender='female', accuracy=50)
+
+        genders = genderize_names(['john'])
+
+        self.assertDictEqual(genders, {'john': ('male', 92)})
+        self.assertEqual(len(http_requests), 1)
+
+        entry = GenderCache.objects.get(name='john')
+        self.assertEqual(entry.gender, 'female')
+
+    @httpretty.activate
+    def test_connection_error(self):
+        """Check if names that could not be fetched are not cached"""
+
+        setup_genderize_server()
+
+        provider = GenderizeProvider(batch_size=1)
+        provider.session.adapters['https://'].max_retries.total = 0
+
+        genders = genderize_names(['error', 'john'], provider=provider)
+
+        self.assertDictEqual(genders, {'john': ('male', 92)})
+
+        names = GenderCache.objects.values_list('name', flat=True)
+        self.assertListEqual(list(names), ['john'])
+
+
+class TestGenderizeProvider(TestCase):
+    """Unit tests for GenderizeProvider"""
+
+    @httpretty.activate
+    def test_batches(self):
+        """Check if names are sent in batches"""
+
+        http_requests = setup_genderize_server()
+
+        provider = GenderizeProvider(batch_size=2)
+        genders = provider.genderize(['john', 'jane', 'jdoe', 'jroe', 'jsmith'])
+
+        self.assertEqual(len(genders), 5)
+        self.assertEqual(genders['john'], ('male', 92))
+        self.assertEqual(genders['jane'], ('female', 89))
+        self.assertEqual(genders['jsmith'], (None, None))
+
+        self.assertEqual(len(http_requests), 3)
+
+        names = [request.querystring['name[]'] for request in http_requests]
+        self.assertListEqual(names, [['jane', 'jdoe'], ['john', 'jroe'], ['jsmith']])
+
+    @httpretty.activate
+    def test_concurrent_batches(self):
+        """Check if batches are requested concurrently"""
+
+        http_requests = setup_genderize_server()
+
+        provider = GenderizeProvider(batch_size=1, workers=3)
+        genders = provider.genderize(['john', 'jane', 'jdoe', 'jroe', 'jsmith'])
+
+        self.assertEqual(len(genders), 5)
+        self.assertEqual(genders['john'], ('male', 92))
+        self.assertEqual(genders['jane'], ('female', 89))
+        self.assertEqual(genders['jdoe'], (None, None))
+
+        self.assertEqual(len(http_requests), 5)
+
+    @httpretty.activate
+    def test_url(self):
+        """Check if the provider requests the given URL"""
+
+        http_requests = []
+
+        def request_callback(request, uri, headers):
+            http_requests.append(request)
+            return 200, headers, json.dumps([{'name': 'john', 'gender': 'male', 'probability': 0.5}])
+
+        httpretty.register_uri(httpretty.GET,
+                               "http://localhost:8080/",
+                               responses=[
+                                   httpretty.Response(body=request_callback)
+                               ])
+
+        provider = GenderizeProvider(url="http://localhost:8080/", api_key='mykey')
+        genders = provider.genderize(['john'])
+
+        self.assertDictEqual(genders, {'john': ('male', 50)})
+
+        expected = {
+            'name[]': ['john'],
+            'apikey': ['mykey']
+        }
+        self.assertEqual(http_requests[0].querystring, expected)
+
+
+class TestGetGenderProvider(TestCase):
+    """Unit tests for get_gender_provider"""
+
+    def test_default_provider(self):
+        """Check if the provider set in the settings is created"""
+
+        provider = get_gender_provider()
+        self.assertIsInstance(provider, GenderizeProvider)
+
+    def test_provider_name(self):
+        """Check if the provider is created by its name"""
+
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as fd:
+            fd.write(GENDER_DICTIONARY)
+            fd.flush()
+
+            with override_settings(SORTINGHAT_GENDER_DICTIONARY_PATH=fd.name):
+                provider = get_gender_provider('dictionary')
+
+        self.assertIsInstance(provider, DictionaryProvider)
+
+    def test_unknown_provider(self):
+        """Check if it fails when the provider does not exist"""
+
+        with self.assertRaisesRegex(InvalidValueError, "'mock' gender provider not available"):
+            get_gender_provider('mock')
+
+
+class TestDictionaryProvider(TestCase):
+    """Unit tests for DictionaryProvider"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'names.csv')
+
+        with open(self.path, 'w') as fd:
+            fd.write(GENDER_DICTIONARY)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_genderize(self):
+        """Check if genders are read from the dictionary"""
+
+        provider = DictionaryProvider(self.path)
+        genders = provider.genderize(['john', 'jane', 'alex', 'jdoe'])
+
+        expected = {
+            'john': ('male', 92),
+            'jane': ('female', 89),
+            'alex': ('male', 50),
+            'jdoe': (None, None)
+        }
+        self.assertDictEqual(genders, expected)
+
+    def test_reload_modified_file(self):
+        """Check if the dictionary is loaded again when the file changes"""
+
+        provider = DictionaryProvider(self.path)
+        self.assertEqual(provider.genderize(['jdoe']), {'jdoe': (None, None)})
+
+        with open(self.path, 'a') as fd:
+            fd.write("jdoe,female,0.75\n")
+        stat = os.stat(self.path)
+        os.utime(self.path, (stat.st_atime, stat.st_mtime + 10))
+
+        provider = DictionaryProvider(self.path)
+        self.assertEqual(provider.genderize(['jdoe']), {'jdoe': ('female', 75)})
+
+    def test_path_not_set(self):
+        """Check if it fails when the path to the dictionary is not set"""
+
+        with self.assertRaisesRegex(InvalidValueError, "path to the gender dictionary not set"):
+            DictionaryProvider()
+
+    def test_invalid_row(self):
+        """Check if it fails when a row of the dictionary is not valid"""
+
+        with open(self.path, 'a') as fd:
+            fd.write("jdoe,female,high\n")
+
+        with self.assertRaisesRegex(InvalidValueError, "invalid row in gender dictionary"):
+            DictionaryProvider(self.path)
+
+
+class TestRateLimiter(TestCase):
+    """Unit tests for the rate limiter of the genderize provider"""
+
+    @unittest.mock.patch('sortinghat.core.recommendations.gender.time')
+    def test_wait(self, mock_time):
+        """Check if calls are delayed to keep the rate"""
+
+        mock_time.monotonic.return_value = 100.0
+
+        limiter = _RateLimiter(4)
+        limiter.wait()
+        limiter.wait()
+        limiter.wait()
+
+        delays = [call.args[0] for call in mock_time.sleep.call_args_list]
+        self.assertListEqual(delays, [0.25, 0.5])
+
+    @unittest.mock.patch('sortinghat.core.recommendations.gender.time')
+    def test_no_limit(self, mock_time):
+        """Check if calls are not delayed when there is no limit"""
+
+        mock_time.monotonic.return_value = 100.0
+
+        limiter = _RateLimiter(0)
+        limiter.wait()
+        limiter.wait()
+
+        mock_time.sleep.assert_not_called()
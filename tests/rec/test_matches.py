@@ -20,6 +20,10 @@
 #     Miguel Ángel Fernández <mafesan@bitergia.com>
 #
 
+import unittest.mock
+
+import pandas
+
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 
@@ -27,7 +31,13 @@ from grimoirelab_toolkit.datetime import datetime_utcnow
 
 from sortinghat.core import api
 from sortinghat.core.context import SortingHatContext
-from sortinghat.core.recommendations.matching import recommend_matches
+from sortinghat.core.models import Identity, Individual
+from sortinghat.core.recommendations import matching
+from sortinghat.core.fuzzy import name_similarity
+from sortinghat.core.recommendations.matching import (recommend_matches,
+                                                      find_match_groups,
+                                                      score_matches,
+                                                      _load_identities)
 from sortinghat.core.recommendations.exclusion import add_recommender_exclusion_term
 
 
@@ -267,6 +277,45 @@ class TestRecommendMatches(TestCase):
         self.assertEqual(rec[1], self.js_alt.individual.mk)
         self.assertEqual(rec[2], [self.jsmith.individual.mk])
 
+    def test_recommend_matches_empty_target(self):
+        """Check if recommendations are obtained against the whole registry using the matching index"""
+
+        source_uuids = [self.john_smith.uuid, self.jrae_no_name.uuid, self.jr2.uuid]
+        criteria = ['email', 'name', 'username']
+
+        for strict in (True, False):
+            recs = list(recommend_matches(source_uuids,
+                                          None,
+                                          criteria,
+                                          strict=strict))
+
+            # Compare with a full scan of the registry
+            with unittest.mock.patch('sortinghat.core.recommendations.matching.MAX_INDEX_LOOKUP_IDENTITIES', 0):
+                expected = list(recommend_matches(source_uuids,
+                                                  None,
+                                                  criteria,
+                                                  strict=strict))
+
+            self.assertListEqual(recs, expected)
+
+        self.assertEqual(len(recs), 3)
+
+        rec = recs[0]
+        self.assertEqual(rec[0], self.john_smith.uuid)
+        self.assertEqual(rec[1], self.john_smith.individual.mk)
+        self.assertEqual(rec[2], sorted([self.jsmith.individual.mk,
+                                         self.jsmith_no_email.individual.mk]))
+
+        rec = recs[1]
+        self.assertEqual(rec[0], self.jrae_no_name.uuid)
+        self.assertEqual(rec[1], self.jrae_no_name.individual.mk)
+        self.assertEqual(rec[2], sorted([self.jrae2.individual.mk]))
+
+        rec = recs[2]
+        self.assertEqual(rec[0], self.jr2.uuid)
+        self.assertEqual(rec[1], self.jr2.individual.mk)
+        self.assertEqual(rec[2], sorted([self.jrae.individual.mk]))
+
     def test_recommend_matches_verbose(self):
         """Check if recommendations are obtained for the specified individuals, at identity level"""
 
@@ -557,6 +606,43 @@ class TestRecommendMatches(TestCase):
         self.assertEqual(len(rec[2]), 2)
         self.assertEqual(rec[2], sorted([github_email2.individual.mk, github_email_numbers2.individual.mk]))
 
+    def test_recommend_github_email_empty_target(self):
+        """Test if GitHub usernames are matched against the whole registry using the matching index"""
+
+        github_user = api.add_identity(self.ctx,
+                                       username='GitHub-User',
+                                       source='github')
+        github_email = api.add_identity(self.ctx,
+                                        email='github-user@users.noreply.github.com',
+                                        source='scm')
+        github_email_numbers = api.add_identity(self.ctx,
+                                                email='52891811+github-user@users.noreply.github.com',
+                                                source='scm')
+        api.add_identity(self.ctx,
+                         email='52891811+@users.noreply.github.com',
+                         source='scm')
+
+        source_uuids = [github_user.uuid, github_email.uuid]
+        criteria = ['email', 'name', 'username']
+
+        recs = list(recommend_matches(source_uuids,
+                                      None,
+                                      criteria,
+                                      strict=False,
+                                      guess_github_user=True))
+
+        self.assertEqual(len(recs), 2)
+
+        rec = recs[0]
+        self.assertEqual(rec[0], github_user.uuid)
+        self.assertEqual(rec[2], sorted([github_email.individual.mk,
+                                         github_email_numbers.individual.mk]))
+
+        rec = recs[1]
+        self.assertEqual(rec[0], github_email.uuid)
+        self.assertEqual(rec[2], sorted([github_user.individual.mk,
+                                         github_email_numbers.individual.mk]))
+
     def test_recommend_matches_case_insensitive(self):
         """Check if recommendations are obtained in a case insensitive way"""
 
@@ -636,3 +722,490 @@ class TestRecommendMatches(TestCase):
         self.assertEqual(rec[0], self.jr2.uuid)
         self.assertEqual(rec[1], self.jr2.individual.mk)
         self.assertEqual(rec[2], [self.jrae.individual.mk])
+
+    def test_recommend_matches_fuzzy_name(self):
+        """Check if individuals with similar names are matched"""
+
+        jonh_smith = api.add_identity(self.ctx,
+                                      name='Jonh Smith',
+                                      source='git')
+        api.add_identity(self.ctx,
+                         name='Jane Smith',
+                         source='git')
+
+        source_uuids = [jonh_smith.uuid]
+        criteria = ['fuzzy_name']
+
+        # Candidates are found using the matching index
+        recs = list(recommend_matches(source_uuids, None, criteria))
+
+        self.assertEqual(len(recs), 1)
+
+        rec = recs[0]
+        self.assertEqual(rec[0], jonh_smith.uuid)
+        self.assertEqual(rec[1], jonh_smith.individual.mk)
+        self.assertEqual(rec[2], sorted([self.john_smith.individual.mk,
+                                         self.jsmith.individual.mk]))
+
+        # The same results are found scanning the whole registry
+        with unittest.mock.patch('sortinghat.core.recommendations.matching.MAX_INDEX_LOOKUP_IDENTITIES', 0):
+            for memory_budget in (0, 0.0001):
+                expected = list(recommend_matches(source_uuids, None, criteria,
+                                                  memory_budget=memory_budget))
+                self.assertListEqual(recs, expected)
+
+        # A higher threshold only matches equal names
+        with self.settings(MATCH_FUZZY_NAME_THRESHOLD=1.0):
+            recs = list(recommend_matches(source_uuids, None, criteria))
+            self.assertListEqual(recs[0][2], [])
+
+    def test_recommend_matches_fuzzy_name_no_strict(self):
+        """Check if names that are not well-formed are only matched when strict mode is disabled"""
+
+        jrae = api.add_identity(self.ctx,
+                                name='J-Rae',
+                                source='git')
+
+        source_uuids = [jrae.uuid]
+        criteria = ['fuzzy_name']
+
+        recs = list(recommend_matches(source_uuids, None, criteria))
+        self.assertListEqual(recs[0][2], [])
+
+        with self.settings(MATCH_FUZZY_NAME_THRESHOLD=0.5):
+            recs = list(recommend_matches(source_uuids, None, criteria, strict=False))
+            self.assertListEqual(recs[0][2], sorted([self.jrae.individual.mk,
+                                                     self.jrae_no_name.individual.mk]))
+
+    def test_recommend_matches_partitioned(self):
+        """Check if matches found partitioning identities on disk are the same than in memory"""
+
+        api.add_identity(self.ctx,
+                         username='john_smith',
+                         source='github')
+        api.add_identity(self.ctx,
+                         email='john_smith@users.noreply.github.com',
+                         source='git')
+        add_recommender_exclusion_term(self.ctx, 'jrae')
+
+        criteria = ['email', 'name', 'username']
+        options = [
+            {},
+            {'verbose': True},
+            {'strict': False},
+            {'exclude': False},
+            {'match_source': True},
+            {'guess_github_user': True, 'strict': False},
+        ]
+
+        for kwargs in options:
+            expected = list(recommend_matches(None, None, criteria,
+                                              memory_budget=0, **kwargs))
+
+            # A budget of a few bytes splits identities in many partitions
+            recs = list(recommend_matches(None, None, criteria,
+                                          memory_budget=0.0001, **kwargs))
+            self.assertListEqual(recs, expected)
+
+            source_uuids = [self.john_smith.uuid, self.js_alt.uuid]
+            expected = list(recommend_matches(source_uuids, None, criteria,
+                                              memory_budget=0, **kwargs))
+            recs = list(recommend_matches(source_uuids, None, criteria,
+                                          memory_budget=0.0001, **kwargs))
+            self.assertListEqual(recs, expected)
+
+        # Recommendations are found in both modes
+        recs = dict((rec[0], rec[2]) for rec in expected)
+        self.assertEqual(recs[self.john_smith.uuid],
+                         sorted([self.jsmith.individual.mk,
+                                 self.jsmith_no_email.individual.mk]))
+
+    def test_recommend_matches_workers(self):
+        """Check if matches found in a pool of processes are the same than in a single process"""
+
+        criteria = ['email', 'name', 'username']
+
+        for kwargs in ({}, {'verbose': True}, {'memory_budget': 0.0001}):
+            expected = list(recommend_matches(None, None, criteria,
+                                              workers=1, **kwargs))
+            recs = list(recommend_matches(None, None, criteria,
+                                          workers=2, **kwargs))
+            self.assertListEqual(recs, expected)
+
+        recs = dict((rec[0], rec[2]) for rec in recs)
+        self.assertEqual(recs[self.john_smith.uuid], [self.jsmith.individual.mk])
+
+    @unittest.mock.patch('sortinghat.core.recommendations.matching._run_tasks',
+                         wraps=matching._run_tasks)
+    def test_recommend_matches_workers_setting(self, mock_run_tasks):
+        """Check if the number of workers is read from the settings when it is not given"""
+
+        criteria = ['email', 'name', 'username']
+
+        with self.settings(MATCH_WORKERS=3):
+            list(recommend_matches([self.john_smith.uuid], None, criteria))
+
+        self.assertEqual(mock_run_tasks.call_args.args[2], 3)
+
+    def test_recommend_matches_batches(self):
+        """Check if matches found in batches are the same than at once"""
+
+        source_uuids = [self.john_smith.uuid, self.jrae.uuid, self.jsmith.uuid, self.js_alt.uuid]
+        criteria = ['email', 'name', 'username']
+
+        for sources in (source_uuids, None):
+            for kwargs in ({}, {'verbose': True}, {'memory_budget': 0.0001}):
+                expected = list(recommend_matches(sources, None, criteria,
+                                                  batch_size=0, **kwargs))
+                recs = list(recommend_matches(sources, None, criteria,
+                                              batch_size=2, **kwargs))
+                self.assertListEqual(recs, expected)
+
+    @unittest.mock.patch('sortinghat.core.recommendations.matching.MAX_INDEX_LOOKUP_IDENTITIES', 1)
+    @unittest.mock.patch('sortinghat.core.recommendations.matching._find_candidate_identities',
+                         wraps=matching._find_candidate_identities)
+    def test_recommend_matches_batches_lookup(self, mock_find_candidates):
+        """Check if every batch looks up its candidates in the matching index"""
+
+        source_uuids = [self.john_smith.uuid, self.jrae.uuid, self.jsmith.uuid, self.js_alt.uuid]
+        criteria = ['email', 'name', 'username']
+
+        recs = list(recommend_matches(None, None, criteria, batch_size=2))
+
+        # Batches are capped, so they have one individual each
+        self.assertEqual(mock_find_candidates.call_count, Individual.objects.count())
+
+        expected = list(recommend_matches(None, None, criteria, batch_size=0))
+        self.assertListEqual(recs, expected)
+
+        recs = list(recommend_matches(source_uuids, None, criteria, batch_size=2))
+        expected = list(recommend_matches(source_uuids, None, criteria, batch_size=0))
+        self.assertListEqual(recs, expected)
+
+    @unittest.mock.patch('sortinghat.core.recommendations.matching._find_matches',
+                         wraps=matching._find_matches)
+    def test_recommend_matches_streaming(self, mock_find_matches):
+        """Check if recommendations are generated as soon as each batch is matched"""
+
+        source_uuids = [self.john_smith.uuid, self.jrae.uuid, self.jsmith.uuid]
+        criteria = ['email', 'name', 'username']
+
+        recs = recommend_matches(source_uuids, None, criteria, batch_size=2)
+
+        rec = next(recs)
+        self.assertEqual(rec[0], self.john_smith.uuid)
+        self.assertEqual(mock_find_matches.call_count, 1)
+
+        rec = next(recs)
+        self.assertEqual(rec[0], self.jrae.uuid)
+        self.assertEqual(mock_find_matches.call_count, 1)
+
+        rec = next(recs)
+        self.assertEqual(rec[0], self.jsmith.uuid)
+        self.assertEqual(mock_find_matches.call_count, 2)
+
+    @unittest.mock.patch('sortinghat.core.recommendations.matching._find_matches',
+                         wraps=matching._find_matches)
+    def test_recommend_matches_batch_size_setting(self, mock_find_matches):
+        """Check if the size of the batches is read from the settings when it is not given"""
+
+        source_uuids = [self.john_smith.uuid, self.jrae.uuid, self.jsmith.uuid]
+        criteria = ['email', 'name', 'username']
+
+        with self.settings(MATCH_BATCH_SIZE=1):
+            recs = list(recommend_matches(source_uuids, None, criteria))
+
+        self.assertEqual(len(recs), 3)
+        self.assertEqual(mock_find_matches.call_count, 3)
+
+    def test_recommend_matches_memory_budget_setting(self):
+        """Check if the memory budget is read from the settings when it is not given"""
+
+        source_uuids = [self.john_smith.uuid]
+        criteria = ['email', 'name', 'username']
+
+        target = 'sortinghat.core.recommendations.matching._match_identities_partitioned'
+
+        with self.settings(MATCH_MEMORY_BUDGET=512):
+            with unittest.mock.patch(target, return_value=[]) as mock_partitioned:
+                recs = list(recommend_matches(source_uuids, None, criteria))
+                self.assertEqual(mock_partitioned.call_args.kwargs['memory_budget'], 512)
+
+        self.assertListEqual(recs, [(self.john_smith.uuid, self.john_smith.individual.mk, [])])
+
+
+class TestFindMatchGroups(TestCase):
+    """Unit tests for find_match_groups"""
+
+    def setUp(self):
+        """Initialize database with a dataset"""
+
+        self.user = get_user_model().objects.create(username='test')
+        self.ctx = SortingHatContext(self.user)
+
+        self.jsmith = api.add_identity(self.ctx,
+                                       email='jsmith@example.com',
+                                       source='scm')
+        self.jsmith_alt = api.add_identity(self.ctx,
+                                           email='jsmith@example.com',
+                                           username='jsmith',
+                                           source='git')
+        self.jsmith_user = api.add_identity(self.ctx,
+                                            username='jsmith',
+                                            source='mls')
+        self.jdoe = api.add_identity(self.ctx,
+                                     name='John Doe',
+                                     source='scm')
+        self.jdoe_alt = api.add_identity(self.ctx,
+                                         name='John Doe',
+                                         source='git')
+        self.jrae = api.add_identity(self.ctx,
+                                     name='Jane Rae',
+                                     source='scm')
+
+    def test_find_groups(self):
+        """Check if matching individuals are grouped transitively"""
+
+        criteria = ['email', 'name', 'username']
+
+        for memory_budget in (0, 0.0001):
+            groups = find_match_groups(None, None, criteria, memory_budget=memory_budget)
+
+            components = sorted(sorted(c) for c in groups.components())
+            expected = sorted([
+                sorted([self.jsmith.uuid, self.jsmith_alt.uuid, self.jsmith_user.uuid]),
+                sorted([self.jdoe.uuid, self.jdoe_alt.uuid])
+            ])
+            self.assertListEqual(components, expected)
+
+            stats = groups.stats()
+            self.assertEqual(stats['components'], 2)
+            self.assertEqual(stats['elements'], 5)
+            self.assertEqual(stats['max_size'], 3)
+
+    def test_find_groups_target(self):
+        """Check if groups are found through target individuals"""
+
+        # The three individuals are grouped because they
+        # match with the same target individual
+        groups = find_match_groups([self.jsmith.uuid, self.jsmith_user.uuid],
+                                   [self.jsmith_alt.uuid],
+                                   ['email', 'username'])
+
+        components = [sorted(c) for c in groups.components()]
+        expected = [sorted([self.jsmith.uuid, self.jsmith_alt.uuid, self.jsmith_user.uuid])]
+        self.assertListEqual(components, expected)
+
+    def test_no_groups(self):
+        """Check if no groups are found when there are no matches"""
+
+        groups = find_match_groups([self.jrae.uuid], None, ['name'])
+
+        self.assertListEqual(list(groups.components()), [])
+
+    def test_min_score(self):
+        """Check if pairs with a low confidence score are not grouped"""
+
+        criteria = ['email', 'name', 'username']
+
+        groups = find_match_groups(None, None, criteria, min_score=30)
+
+        components = [sorted(c) for c in groups.components()]
+        expected = [sorted([self.jsmith.uuid, self.jsmith_alt.uuid])]
+        self.assertListEqual(components, expected)
+
+        # The setting is used by default
+        with self.settings(MATCH_MIN_SCORE=30):
+            groups = find_match_groups(None, None, criteria)
+
+        components = [sorted(c) for c in groups.components()]
+        self.assertListEqual(components, expected)
+
+
+class TestScoreMatches(TestCase):
+    """Unit tests for score_matches"""
+
+    def setUp(self):
+        """Initialize database with a dataset"""
+
+        self.user = get_user_model().objects.create(username='test')
+        self.ctx = SortingHatContext(self.user)
+
+        self.jsmith = api.add_identity(self.ctx,
+                                       email='jsmith@example.com',
+                                       username='jsmith',
+                                       source='github')
+        self.jsmith_alt = api.add_identity(self.ctx,
+                                           email='jsmith@example.com',
+                                           username='jsmith',
+                                           source='gitlab')
+        self.jsmith_mls = api.add_identity(self.ctx,
+                                           name='John Smith',
+                                           email='jsmith@example.com',
+                                           source='mls')
+        self.jsmyth = api.add_identity(self.ctx,
+                                       name='John Smyth',
+                                       source='scm')
+        self.jdoe = api.add_identity(self.ctx,
+                                     name='Jane Doe',
+                                     source='scm')
+
+    def test_score_matches(self):
+        """Check if the score and details of the matches are calculated"""
+
+        pairs = [
+            (self.jsmith.uuid, self.jsmith_alt.uuid),
+            (self.jsmith.uuid, self.jsmith_mls.uuid),
+            (self.jsmith_mls.uuid, self.jsmyth.uuid),
+            (self.jsmith.uuid, self.jdoe.uuid)
+        ]
+
+        scores = score_matches(pairs)
+
+        self.assertEqual(len(scores), 4)
+
+        # Email and username on trusted sources
+        score, details = scores[(self.jsmith.uuid, self.jsmith_alt.uuid)]
+        self.assertEqual(score, 90)
+        self.assertDictEqual(details, {
+            'criteria': ['email', 'username'],
+            'identities': 2,
+            'trusted_source': True,
+            'similarity': 0.0
+        })
+
+        # Only email
+        score, details = scores[(self.jsmith.uuid, self.jsmith_mls.uuid)]
+        self.assertEqual(score, 50)
+        self.assertDictEqual(details, {
+            'criteria': ['email'],
+            'identities': 2,
+            'trusted_source': False,
+            'similarity': 0.0
+        })
+
+        # Similar names
+        similarity = name_similarity('John Smith', 'John Smyth')
+
+        score, details = scores[(self.jsmith_mls.uuid, self.jsmyth.uuid)]
+        self.assertEqual(score, round(20 * similarity))
+        self.assertDictEqual(details, {
+            'criteria': ['fuzzy_name'],
+            'identities': 0,
+            'trusted_source': False,
+            'similarity': round(similarity, 2)
+        })
+
+        # No matches
+        score, details = scores[(self.jsmith.uuid, self.jdoe.uuid)]
+        self.assertEqual(score, 0)
+        self.assertListEqual(details['criteria'], [])
+
+    def test_matching_identities(self):
+        """Check if the number of matching identities increases the score"""
+
+        api.add_identity(self.ctx,
+                         email='jsmith@example.com',
+                         source='jira',
+                         uuid=self.jsmith.uuid)
+        api.add_identity(self.ctx,
+                         email='jsmith@example.com',
+                         source='slack',
+                         uuid=self.jsmith.uuid)
+
+        scores = score_matches([(self.jsmith.uuid, self.jsmith_mls.uuid)])
+
+        score, details = scores[(self.jsmith.uuid, self.jsmith_mls.uuid)]
+        self.assertEqual(details['identities'], 4)
+        self.assertEqual(score, 60)
+
+    def test_github_email(self):
+        """Check if GitHub-generated emails match usernames"""
+
+        jsmith_noreply = api.add_identity(self.ctx,
+                                          email='1234+jsmith@users.noreply.github.com',
+                                          source='git')
+
+        scores = score_matches([(self.jsmith.uuid, jsmith_noreply.uuid)])
+
+        score, details = scores[(self.jsmith.uuid, jsmith_noreply.uuid)]
+        self.assertEqual(score, 20)
+        self.assertDictEqual(details, {
+            'criteria': ['github'],
+            'identities': 2,
+            'trusted_source': False,
+            'similarity': 0.0
+        })
+
+        # The order of the pair does not change the score
+        scores = score_matches([(jsmith_noreply.uuid, self.jsmith.uuid)])
+        self.assertEqual(scores[(jsmith_noreply.uuid, self.jsmith.uuid)][0], 20)
+
+    def test_empty_pairs(self):
+        """Check if an empty dict is returned when there are no pairs"""
+
+        self.assertDictEqual(score_matches([]), {})
+
+
+class TestLoadIdentities(TestCase):
+    """Unit tests for _load_identities"""
+
+    def setUp(self):
+        """Initialize database with a dataset"""
+
+        self.user = get_user_model().objects.create(username='test')
+        self.ctx = SortingHatContext(self.user)
+
+        self.jsmith = api.add_identity(self.ctx,
+                                       email='jsmith@example.com',
+                                       name='John Smith',
+                                       source='scm')
+        api.add_identity(self.ctx,
+                         username='jsmith',
+                         source='git',
+                         uuid=self.jsmith.uuid)
+        self.jdoe = api.add_identity(self.ctx,
+                                     email='jdoe@example.com',
+                                     source='scm')
+
+    @unittest.mock.patch('sortinghat.core.recommendations.matching.LOAD_CHUNK_SIZE', 2)
+    def test_load_identities(self):
+        """Check if identities are loaded in columns, encoding individuals and sources"""
+
+        fields = ['uuid', 'individual', 'name', 'email', 'username', 'source']
+
+        df = _load_identities([Identity.objects.all()], fields)
+
+        self.assertEqual(len(df), 3)
+        self.assertListEqual(list(df.columns), fields)
+        self.assertEqual(df['individual'].dtype, 'category')
+        self.assertEqual(df['source'].dtype, 'category')
+        self.assertListEqual(sorted(df['individual'].cat.categories),
+                             sorted([self.jsmith.individual.mk, self.jdoe.individual.mk]))
+        self.assertListEqual(sorted(df['source'].cat.categories), ['git', 'scm'])
+
+        # Empty values are converted to null values
+        row = df[df['uuid'] == self.jdoe.uuid].iloc[0]
+        self.assertEqual(row['email'], 'jdoe@example.com')
+        self.assertTrue(pandas.isna(row['name']))
+        self.assertTrue(pandas.isna(row['username']))
+
+    def test_load_selected_fields(self):
+        """Check if only the given fields are loaded from several querysets"""
+
+        querysets = [Identity.objects.filter(uuid=self.jsmith.uuid),
+                     Identity.objects.filter(uuid=self.jdoe.uuid)]
+
+        df = _load_identities(querysets, ['individual', 'email'])
+
+        self.assertListEqual(list(df.columns), ['individual', 'email'])
+        self.assertListEqual(sorted(df['email']),
+                             ['jdoe@example.com', 'jsmith@example.com'])
+
+    def test_load_empty(self):
+        """Check if an empty dataframe is returned when there are no identities"""
+
+        df = _load_identities([Identity.objects.none()], ['uuid', 'individual'])
+
+        self.assertTrue(df.empty)
+        self.assertListEqual(list(df.columns), ['uuid', 'individual'])
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2021 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import shutil
+import tempfile
+import unittest
+
+import pandas
+
+from sortinghat.core.recommendations.partitioning import (HashPartitionStore,
+                                                          estimate_num_partitions)
+
+
+class TestEstimateNumPartitions(unittest.TestCase):
+    """Unit tests for estimate_num_partitions"""
+
+    def test_estimate(self):
+        """Check if the number of partitions fits the memory budget"""
+
+        # 1M rows of 256 bytes with an overhead of 4 take 1024MB
+        n = estimate_num_partitions(1000000, 256, 100)
+        self.assertEqual(n, 10)
+
+        n = estimate_num_partitions(1000000, 256, 1024)
+        self.assertEqual(n, 1)
+
+    def test_min_partitions(self):
+        """Check if at least one partition is returned"""
+
+        n = estimate_num_partitions(0, 256, 100)
+        self.assertEqual(n, 1)
+
+
+class TestHashPartitionStore(unittest.TestCase):
+    """Unit tests for HashPartitionStore"""
+
+    def setUp(self):
+        self.dirpath = tempfile.mkdtemp(prefix='sortinghat_')
+
+    def tearDown(self):
+        shutil.rmtree(self.dirpath)
+
+    def test_append_load(self):
+        """Check if rows with the same key are stored in the same partition"""
+
+        store = HashPartitionStore(self.dirpath, 4)
+
+        df1 = pandas.DataFrame({'uuid': ['1', '2', '3', '4'],
+                                'email': ['a@example.com', 'b@example.com',
+                                          'c@example.com', 'd@example.com']})
+        df2 = pandas.DataFrame({'uuid': ['5', '6'],
+                                'email': ['a@example.com', 'e@example.com']})
+
+        store.append('x', df1, 'email')
+        store.append('x', df2, 'email')
+
+        partitions = []
+        for partition in range(store.num_partitions):
+            df = store.load('x', partition)
+            if df is not None:
+                partitions.append(df)
+
+        # All the rows are stored once
+        df = pandas.concat(partitions)
+        self.assertListEqual(sorted(df['uuid']), ['1', '2', '3', '4', '5', '6'])
+
+        # Keys are not split among partitions
+        keys = [set(df['email']) for df in partitions]
+        for i, a in enumerate(keys):
+            for b in keys[i + 1:]:
+                self.assertSetEqual(a & b, set())
+
+        for df in partitions:
+            if 'a@example.com' in set(df['email']):
+                self.assertListEqual(sorted(df[df['email'] == 'a@example.com']['uuid']), ['1', '5'])
+
+    def test_load_empty_partition(self):
+        """Check if None is returned when a partition has no rows"""
+
+        store = HashPartitionStore(self.dirpath, 2)
+
+        df = pandas.DataFrame({'email': []})
+        store.append('x', df, 'email')
+
+        self.assertIsNone(store.load('x', 0))
+        self.assertIsNone(store.load('x', 1))
@@ -27,6 +27,7 @@ from dateutil.tz import UTC
 
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 from django.test import TestCase
 
 from grimoirelab_toolkit.datetime import datetime_utcnow, datetime_to_utc
@@ -42,6 +43,8 @@ from sortinghat.core.errors import (AlreadyExistsError,
 from sortinghat.core.models import (Country,
                                     Individual,
                                     Identity,
+                                    MatchingKey,
+                                    Profile,
                                     Enrollment,
                                     Organization,
                                     Team,
@@ -51,6 +54,7 @@ from sortinghat.core.models import (Country,
                                     ScheduledTask,
                                     Alias,
                                     MergeRecommendation)
+from sortinghat.core.recommendations.matching import score_matches
 
 NOT_FOUND_ERROR = "{entity} not found in the registry"
 ENROLLMENT_RANGE_INVALID = "range date '{start}'-'{end}' is part of an existing range for {org}"
@@ -5274,6 +5278,238 @@ class TestMergeIndividuals(TestCase):
         self.assertEqual(op8_args['individual'], 'e8284285566fdc1f41c8a22bb84a295fc3c4cbb3')
 
 
+class TestBulkMerge(TestCase):
+    """Unit tests for bulk_merge"""
+
+    def setUp(self):
+        """Load initial dataset"""
+
+        self.user = get_user_model().objects.create(username='test')
+        self.ctx = SortingHatContext(self.user)
+
+        api.add_organization(self.ctx, 'Example')
+        api.add_organization(self.ctx, 'Bitergia')
+
+        Country.objects.create(code='US',
+                               name='United States of America',
+                               alpha3='USA')
+
+        self.jsmith = api.add_identity(self.ctx, 'scm', email='jsmith@example')
+        self.jsmith_git = api.add_identity(self.ctx, 'git', email='jsmith-git@example',
+                                           uuid=self.jsmith.uuid)
+        api.enroll(self.ctx,
+                   self.jsmith.uuid, 'Example',
+                   from_date=datetime.datetime(1900, 1, 1),
+                   to_date=datetime.datetime(2017, 6, 1))
+        api.update_profile(self.ctx, self.jsmith.uuid,
+                           name='J. Smith', gender='male', gender_acc=75)
+
+        self.jsmith_btg = api.add_identity(self.ctx, 'scm', email='jsmith@bitergia')
+        api.enroll(self.ctx,
+                   self.jsmith_btg.uuid, 'Bitergia',
+                   from_date=datetime.datetime(2017, 6, 2),
+                   to_date=datetime.datetime(2100, 1, 1))
+        api.enroll(self.ctx,
+                   self.jsmith_btg.uuid, 'Example',
+                   from_date=datetime.datetime(2015, 1, 1),
+                   to_date=datetime.datetime(2018, 1, 1))
+        api.update_profile(self.ctx, self.jsmith_btg.uuid,
+                           email='jsmith@bitergia', is_bot=True, country_code='US')
+
+        self.jsmith_local = api.add_identity(self.ctx, 'scm', email='jsmith-local@bitergia')
+        api.enroll(self.ctx,
+                   self.jsmith_local.uuid, 'Bitergia',
+                   from_date=datetime.datetime(2017, 4, 1),
+                   to_date=datetime.datetime(2100, 1, 1))
+
+        self.jdoe = api.add_identity(self.ctx, 'scm', email='john.doe@bitergia')
+        api.enroll(self.ctx, self.jdoe.uuid, 'Bitergia')
+
+        self.jdoe_io = api.add_identity(self.ctx, 'scm', email='john.doe@biterg.io')
+        self.jdoe_phab = api.add_identity(self.ctx, 'phabricator', email='john.doe@phab',
+                                          uuid=self.jdoe_io.uuid)
+        api.update_profile(self.ctx, self.jdoe_io.uuid, name='John Doe')
+
+        self.jrae = api.add_identity(self.ctx, 'scm', email='jrae@example')
+        self.jrae_git = api.add_identity(self.ctx, 'git', email='jrae@example')
+
+    def _registry_state(self):
+        """Get the data of the registry that a merge modifies"""
+
+        identities = sorted(Identity.objects.values_list('uuid', 'individual'))
+        matching_keys = sorted(MatchingKey.objects.values_list('identity', 'criterion', 'value', 'individual'))
+        enrollments = sorted(Enrollment.objects.values_list('individual', 'group__name', 'start', 'end'))
+        profiles = sorted(Profile.objects.values_list('individual', 'name', 'email', 'gender',
+                                                      'gender_acc', 'is_bot', 'country'))
+        return identities, matching_keys, enrollments, profiles
+
+    def test_bulk_merge(self):
+        """Check whether the end state is the same as merging each group"""
+
+        groups = [
+            (self.jsmith_btg.uuid, [self.jsmith.uuid, self.jsmith_local.uuid]),
+            (self.jdoe.uuid, [self.jdoe_phab.uuid]),
+        ]
+
+        # Merge each group on a transaction that will be rolled back
+        with transaction.atomic():
+            for to_uuid, from_uuids in groups:
+                api.merge(self.ctx, from_uuids=from_uuids, to_uuid=to_uuid)
+            expected = self._registry_state()
+            transaction.set_rollback(True)
+
+        merged, errors = api.bulk_merge(self.ctx, groups)
+
+        self.assertListEqual(merged, [self.jsmith_btg.uuid, self.jdoe.uuid])
+        self.assertListEqual(errors, [])
+        self.assertEqual(self._registry_state(), expected)
+
+        individuals = Individual.objects.values_list('mk', flat=True)
+        self.assertListEqual(sorted(individuals),
+                             sorted([self.jsmith_btg.uuid, self.jdoe.uuid,
+                                     self.jrae.uuid, self.jrae_git.uuid]))
+
+        enrollments = Enrollment.objects.filter(individual=self.jsmith_btg.uuid).order_by('start')
+        self.assertEqual(len(enrollments), 2)
+        self.assertEqual(enrollments[0].group.name, 'Example')
+        self.assertEqual(enrollments[0].start, datetime_to_utc(datetime.datetime(2015, 1, 1)))
+        self.assertEqual(enrollments[0].end, datetime_to_utc(datetime.datetime(2018, 1, 1)))
+        self.assertEqual(enrollments[1].group.name, 'Bitergia')
+        self.assertEqual(enrollments[1].start, datetime_to_utc(datetime.datetime(2017, 4, 1)))
+        self.assertEqual(enrollments[1].end, datetime_to_utc(datetime.datetime(2100, 1, 1)))
+
+        profile = Individual.objects.get(mk=self.jsmith_btg.uuid).profile
+        self.assertEqual(profile.name, 'J. Smith')
+        self.assertEqual(profile.email, 'jsmith@bitergia')
+        self.assertEqual(profile.gender, 'male')
+        self.assertEqual(profile.gender_acc, 75)
+        self.assertEqual(profile.is_bot, True)
+        self.assertEqual(profile.country_id, 'US')
+
+    def test_skip_invalid_groups(self):
+        """Check whether invalid groups are skipped while the rest are merged"""
+
+        groups = [
+            (self.jsmith.uuid, []),
+            ('FFFFFFFFFFFFFFF', [self.jsmith.uuid]),
+            (self.jsmith.uuid, [self.jsmith_git.uuid]),
+            (self.jsmith.uuid, [self.jsmith_btg.uuid]),
+            (self.jsmith_local.uuid, [self.jsmith.uuid]),
+            (self.jdoe.uuid, [self.jdoe_io.uuid]),
+        ]
+
+        merged, errors = api.bulk_merge(self.ctx, groups)
+
+        self.assertListEqual(merged, [self.jsmith.uuid, self.jdoe.uuid])
+        self.assertEqual(len(errors), 4)
+
+        self.assertIsInstance(errors[0], InvalidValueError)
+        self.assertRegex(str(errors[0]), FROM_UUIDS_NONE_OR_EMPTY_ERROR)
+
+        self.assertIsInstance(errors[1], NotFoundError)
+        self.assertEqual(str(errors[1]), NOT_FOUND_ERROR.format(entity='FFFFFFFFFFFFFFF'))
+
+        self.assertIsInstance(errors[2], EqualIndividualError)
+        self.assertEqual(str(errors[2]), FROM_UUID_TO_UUID_EQUAL_ERROR.format(to_uuid=self.jsmith.uuid))
+
+        self.assertIsInstance(errors[3], InvalidValueError)
+        self.assertEqual(str(errors[3]), "individual {} is part of another group".format(self.jsmith.uuid))
+
+        individual = Individual.objects.get(mk=self.jsmith.uuid)
+        self.assertEqual(individual.identities.count(), 3)
+
+        individual = Individual.objects.get(mk=self.jsmith_local.uuid)
+        self.assertEqual(individual.identities.count(), 1)
+
+        individual = Individual.objects.get(mk=self.jdoe.uuid)
+        self.assertEqual(individual.identities.count(), 3)
+
+    def test_locked_individuals(self):
+        """Check whether groups with locked individuals are not merged"""
+
+        api.lock(self.ctx, self.jsmith.uuid)
+        api.lock(self.ctx, self.jdoe.uuid)
+
+        groups = [
+            (self.jsmith_btg.uuid, [self.jsmith.uuid]),
+            (self.jdoe.uuid, [self.jdoe_io.uuid]),
+            (self.jrae.uuid, [self.jrae_git.uuid])
+        ]
+
+        merged, errors = api.bulk_merge(self.ctx, groups)
+
+        self.assertListEqual(merged, [self.jrae.uuid])
+        self.assertEqual(len(errors), 2)
+
+        self.assertIsInstance(errors[0], LockedIdentityError)
+        self.assertEqual(str(errors[0]), UUID_LOCKED_ERROR.format(uuid=self.jsmith.uuid))
+
+        self.assertIsInstance(errors[1], LockedIdentityError)
+        self.assertEqual(str(errors[1]), UUID_LOCKED_ERROR.format(uuid=self.jdoe.uuid))
+
+        self.assertEqual(Individual.objects.filter(mk=self.jsmith.uuid).count(), 1)
+        self.assertEqual(Individual.objects.filter(mk=self.jdoe_io.uuid).count(), 1)
+        self.assertEqual(Individual.objects.filter(mk=self.jrae_git.uuid).count(), 0)
+
+    def test_no_groups_to_merge(self):
+        """Check whether no transaction is created when there is nothing to merge"""
+
+        timestamp = datetime_utcnow()
+
+        merged, errors = api.bulk_merge(self.ctx, [(self.jsmith.uuid, [self.jsmith_git.uuid])])
+
+        self.assertListEqual(merged, [])
+        self.assertEqual(len(errors), 1)
+
+        transactions = Transaction.objects.filter(created_at__gte=timestamp)
+        self.assertEqual(len(transactions), 0)
+
+    def test_operations(self):
+        """Check if the right operations are created when merging in bulk"""
+
+        timestamp = datetime_utcnow()
+
+        groups = [
+            (self.jsmith_btg.uuid, [self.jsmith.uuid]),
+            (self.jrae.uuid, [self.jrae_git.uuid])
+        ]
+        api.bulk_merge(self.ctx, groups)
+
+        transactions = Transaction.objects.filter(created_at__gte=timestamp)
+        self.assertEqual(len(transactions), 1)
+
+        trx = transactions[0]
+        self.assertEqual(trx.name, 'merge')
+        self.assertIsNotNone(trx.closed_at)
+
+        operations = Operation.objects.filter(trx=trx)
+        self.assertEqual(len(operations), 12)
+
+        ops = [(op.op_type, op.entity_type, op.target) for op in operations]
+        expected = [
+            (Operation.OpType.UPDATE.value, 'identity', self.jsmith.uuid),
+            (Operation.OpType.UPDATE.value, 'identity', self.jsmith_git.uuid),
+            (Operation.OpType.UPDATE.value, 'identity', self.jrae_git.uuid),
+            (Operation.OpType.DELETE.value, 'enrollment', self.jsmith.uuid),
+            (Operation.OpType.DELETE.value, 'enrollment', self.jsmith_btg.uuid),
+            (Operation.OpType.DELETE.value, 'enrollment', self.jsmith_btg.uuid),
+            (Operation.OpType.ADD.value, 'enrollment', self.jsmith_btg.uuid),
+            (Operation.OpType.ADD.value, 'enrollment', self.jsmith_btg.uuid),
+            (Operation.OpType.UPDATE.value, 'profile', self.jsmith_btg.uuid),
+            (Operation.OpType.UPDATE.value, 'profile', self.jrae.uuid),
+            (Operation.OpType.DELETE.value, 'individual', self.jsmith.uuid),
+            (Operation.OpType.DELETE.value, 'individual', self.jrae_git.uuid)
+        ]
+        self.assertCountEqual(ops[:3], expected[:3])
+        self.assertCountEqual(ops[3:6], expected[3:6])
+        self.assertCountEqual(ops[6:8], expected[6:8])
+        self.assertListEqual(ops[8:], expected[8:])
+
+        op_args = json.loads(operations[0].args)
+        self.assertEqual(len(op_args), 2)
+        self.assertIn(op_args['individual'], [self.jsmith_btg.uuid, self.jrae.uuid])
+
+
 class TestUnmergeIdentities(TestCase):
     """Unit tests for unmerge_identities"""
 
@@ -6798,6 +7034,269 @@ class TestDeleteMergeRecommendations(TestCase):
         self.assertEqual(op1_args['merge_recommendations'], [self.rec1.id, self.rec2.id])
 
 
+class TestApplyMergeRecommendations(TestCase):
+    """Unit tests for apply_merge_recommendations"""
+
+    def setUp(self):
+        """Load initial dataset"""
+
+        self.user = get_user_model().objects.create(username='test')
+        self.ctx = SortingHatContext(self.user)
+
+        self.jsmith = api.add_identity(self.ctx, 'scm', email='jsmith@example')
+        self.jsmith_mls = api.add_identity(self.ctx, 'mls', email='jsmith@example')
+        self.jsmith_git = api.add_identity(self.ctx, 'git', email='jsmith@example')
+        self.jdoe = api.add_identity(self.ctx, 'scm', email='jdoe@example')
+        self.jdoe_mls = api.add_identity(self.ctx, 'mls', email='jdoe@example')
+        self.jrae = api.add_identity(self.ctx, 'scm', email='jrae@example')
+
+        self.rec1 = MergeRecommendation.objects.create(individual1=self.jsmith.individual,
+                                                       individual2=self.jsmith_mls.individual)
+        self.rec2 = MergeRecommendation.objects.create(individual1=self.jsmith_mls.individual,
+                                                       individual2=self.jsmith_git.individual)
+        self.rec3 = MergeRecommendation.objects.create(individual1=self.jdoe.individual,
+                                                       individual2=self.jdoe_mls.individual)
+        self.rec4 = MergeRecommendation.objects.create(individual1=self.jsmith.individual,
+                                                       individual2=self.jsmith_git.individual)
+        self.rec5 = MergeRecommendation.objects.create(individual1=self.jsmith_git.individual,
+                                                       individual2=self.jrae.individual)
+
+    def test_apply_merge_recommendations(self):
+        """Check if recommendations are chained and each group is merged once"""
+
+        merged = api.apply_merge_recommendations(self.ctx, [self.rec1.id, self.rec2.id, self.rec3.id])
+
+        jsmith_mk = min(self.jsmith.uuid, self.jsmith_mls.uuid, self.jsmith_git.uuid)
+        jdoe_mk = min(self.jdoe.uuid, self.jdoe_mls.uuid)
+        self.assertListEqual(sorted(merged), sorted([jsmith_mk, jdoe_mk]))
+
+        individual = Individual.objects.get(mk=jsmith_mk)
+        uuids = sorted(identity.uuid for identity in individual.identities.all())
+        self.assertListEqual(uuids, sorted([self.jsmith.uuid, self.jsmith_mls.uuid, self.jsmith_git.uuid]))
+
+        individual = Individual.objects.get(mk=jdoe_mk)
+        uuids = sorted(identity.uuid for identity in individual.identities.all())
+        self.assertListEqual(uuids, sorted([self.jdoe.uuid, self.jdoe_mls.uuid]))
+
+        self.assertEqual(Individual.objects.count(), 3)
+
+    def test_pending_recommendations(self):
+        """Check if pending recommendations are moved or removed"""
+
+        api.apply_merge_recommendations(self.ctx, [self.rec1.id, self.rec2.id])
+
+        jsmith_mk = min(self.jsmith.uuid, self.jsmith_mls.uuid, self.jsmith_git.uuid)
+
+        # The recommendation between merged individuals was removed,
+        # the one with another individual now points to the target
+        recs = MergeRecommendation.objects.order_by('id')
+        self.assertEqual(len(recs), 2)
+
+        rec = recs[0]
+        self.assertEqual(rec.id, self.rec3.id)
+
+        rec = recs[1]
+        self.assertEqual(rec.id, self.rec5.id)
+        self.assertListEqual([rec.individual1_id, rec.individual2_id],
+                             sorted([jsmith_mk, self.jrae.uuid]))
+
+    def test_same_as_one_by_one(self):
+        """Check if the result is the same as applying recommendations one by one"""
+
+        api.apply_merge_recommendations(self.ctx, [self.rec5.id, self.rec1.id])
+        api.apply_merge_recommendations(self.ctx, [self.rec2.id])
+
+        mk = min(self.jsmith.uuid, self.jsmith_mls.uuid,
+                 self.jsmith_git.uuid, self.jrae.uuid)
+
+        individual = Individual.objects.get(mk=mk)
+        uuids = sorted(identity.uuid for identity in individual.identities.all())
+        self.assertListEqual(uuids, sorted([self.jsmith.uuid, self.jsmith_mls.uuid,
+                                            self.jsmith_git.uuid, self.jrae.uuid]))
+
+        recs = MergeRecommendation.objects.all()
+        self.assertEqual(len(recs), 1)
+        self.assertEqual(recs[0].id, self.rec3.id)
+
+    def test_locked_individual(self):
+        """Check if nothing is changed when an individual is locked"""
+
+        api.lock(self.ctx, self.jsmith_git.uuid)
+
+        with self.assertRaises(LockedIdentityError):
+            api.apply_merge_recommendations(self.ctx, [self.rec1.id, self.rec2.id, self.rec3.id])
+
+        self.assertEqual(Individual.objects.count(), 6)
+        self.assertEqual(MergeRecommendation.objects.count(), 5)
+
+    def test_recommendation_not_found(self):
+        """Check if it fails when a recommendation does not exist"""
+
+        msg = NOT_FOUND_ERROR.format(entity='11111')
+
+        with self.assertRaisesRegex(NotFoundError, msg):
+            api.apply_merge_recommendations(self.ctx, [self.rec1.id, 11111])
+
+        self.assertEqual(Individual.objects.count(), 6)
+        self.assertEqual(MergeRecommendation.objects.count(), 5)
+
+    def test_recommendation_not_pending(self):
+        """Check if it fails when a recommendation was already applied or rejected"""
+
+        self.rec2.applied = False
+        self.rec2.save()
+
+        msg = NOT_FOUND_ERROR.format(entity=str(self.rec2.id))
+
+        with self.assertRaisesRegex(NotFoundError, msg):
+            api.apply_merge_recommendations(self.ctx, [self.rec1.id, self.rec2.id])
+
+        self.assertEqual(Individual.objects.count(), 6)
+        self.assertEqual(MergeRecommendation.objects.count(), 5)
+
+    def test_rescore_pending_recommendations(self):
+        """Check if pending recommendations of the merged individuals are scored again"""
+
+        api.apply_merge_recommendations(self.ctx, [self.rec1.id, self.rec3.id])
+
+        jsmith_mk = min(self.jsmith.uuid, self.jsmith_mls.uuid)
+        pairs = {
+            self.rec2.id: tuple(sorted([jsmith_mk, self.jsmith_git.uuid])),
+            self.rec5.id: tuple(sorted([self.jsmith_git.uuid, self.jrae.uuid]))
+        }
+        expected = score_matches(pairs.values())
+
+        # rec4 was a duplicate of rec2 once it was moved
+        recs = MergeRecommendation.objects.order_by('id')
+        self.assertListEqual([rec.id for rec in recs], [self.rec2.id, self.rec5.id])
+
+        rec = recs[0]
+        score, details = expected[pairs[rec.id]]
+        self.assertGreater(score, 0)
+        self.assertEqual(rec.score, score)
+        self.assertDictEqual(rec.score_details, details)
+
+        # Recommendations of individuals not merged are not updated
+        rec = recs[1]
+        self.assertEqual(rec.score, 0)
+        self.assertIsNone(rec.score_details)
+
+    def test_none_or_empty_ids(self):
+        """Check if it fails when no recommendations are given"""
+
+        with self.assertRaisesRegex(InvalidValueError, "'recommendation_ids' cannot be"):
+            api.apply_merge_recommendations(self.ctx, None)
+
+        with self.assertRaisesRegex(InvalidValueError, "'recommendation_ids' cannot be"):
+            api.apply_merge_recommendations(self.ctx, [])
+
+    def test_transaction(self):
+        """Check if transactions are created when applying recommendations"""
+
+        timestamp = datetime_utcnow()
+
+        api.apply_merge_recommendations(self.ctx, [self.rec1.id])
+
+        transactions = Transaction.objects.filter(created_at__gte=timestamp).order_by('created_at')
+        self.assertEqual(len(transactions), 2)
+
+        trx = transactions[0]
+        self.assertEqual(trx.name, 'apply_merge_recommendations')
+        self.assertEqual(trx.authored_by, self.ctx.user.username)
+
+        trx = transactions[1]
+        self.assertEqual(trx.name, 'merge')
+        self.assertEqual(trx.authored_by, self.ctx.user.username)
+
+
+class TestRejectMergeRecommendations(TestCase):
+    """Unit tests for reject_merge_recommendations"""
+
+    def setUp(self):
+        """Load initial dataset"""
+
+        self.user = get_user_model().objects.create(username='test')
+        self.ctx = SortingHatContext(self.user)
+
+        self.jsmith = api.add_identity(self.ctx, 'scm', email='jsmith@example')
+        self.jsmith_mls = api.add_identity(self.ctx, 'mls', email='jsmith@example')
+        self.jdoe = api.add_identity(self.ctx, 'scm', email='jdoe@example')
+
+        self.rec1 = MergeRecommendation.objects.create(individual1=self.jsmith.individual,
+                                                       individual2=self.jsmith_mls.individual)
+        self.rec2 = MergeRecommendation.objects.create(individual1=self.jsmith.individual,
+                                                       individual2=self.jdoe.individual)
+
+    def test_reject_merge_recommendations(self):
+        """Check if recommendations are marked as rejected"""
+
+        rejected = api.reject_merge_recommendations(self.ctx, [self.rec2.id, self.rec1.id])
+        self.assertListEqual(rejected, sorted([self.rec1.id, self.rec2.id]))
+
+        for rec in MergeRecommendation.objects.all():
+            self.assertIs(rec.applied, False)
+
+        # Individuals are not merged
+        self.assertEqual(Individual.objects.count(), 3)
+
+    def test_recommendation_not_found(self):
+        """Check if it fails when a recommendation does not exist"""
+
+        msg = NOT_FOUND_ERROR.format(entity='11111')
+
+        with self.assertRaisesRegex(NotFoundError, msg):
+            api.reject_merge_recommendations(self.ctx, [self.rec1.id, 11111])
+
+        rec = MergeRecommendation.objects.get(id=self.rec1.id)
+        self.assertIsNone(rec.applied)
+
+    def test_recommendation_not_pending(self):
+        """Check if it fails when a recommendation was already rejected"""
+
+        api.reject_merge_recommendations(self.ctx, [self.rec1.id])
+
+        msg = NOT_FOUND_ERROR.format(entity=str(self.rec1.id))
+
+        with self.assertRaisesRegex(NotFoundError, msg):
+            api.reject_merge_recommendations(self.ctx, [self.rec1.id, self.rec2.id])
+
+        rec = MergeRecommendation.objects.get(id=self.rec2.id)
+        self.assertIsNone(rec.applied)
+
+    def test_none_or_empty_ids(self):
+        """Check if it fails when no recommendations are given"""
+
+        with self.assertRaisesRegex(InvalidValueError, "'recommendation_ids' cannot be"):
+            api.reject_merge_recommendations(self.ctx, None)
+
+        with self.assertRaisesRegex(InvalidValueError, "'recommendation_ids' cannot be"):
+            api.reject_merge_recommendations(self.ctx, [])
+
+    def test_transaction(self):
+        """Check if a transaction is created when rejecting recommendations"""
+
+        timestamp = datetime_utcnow()
+
+        api.reject_merge_recommendations(self.ctx, [self.rec1.id])
+
+        transactions = Transaction.objects.filter(created_at__gte=timestamp)
+        self.assertEqual(len(transactions), 1)
+
+        trx = transactions[0]
+        self.assertEqual(trx.name, 'reject_merge_recommendations')
+        self.assertEqual(trx.authored_by, self.ctx.user.username)
+
+        operations = Operation.objects.filter(trx=trx)
+        self.assertEqual(len(operations), 1)
+
+        op = operations[0]
+        self.assertEqual(op.op_type, Operation.OpType.UPDATE.value)
+        self.assertEqual(op.entity_type, 'merge_recommendation')
+        self.assertEqual(op.target, 'merge_recommendations')
+        self.assertDictEqual(json.loads(op.args),
+                             {'merge_recommendations': [self.rec1.id], 'applied': False})
+
+
 class TestReview(TestCase):
     """Unit tests for review"""
 
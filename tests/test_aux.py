@@ -22,7 +22,13 @@ from dateutil.tz import UTC
 
 from django.test import TestCase
 
-from sortinghat.core.aux import merge_datetime_ranges, validate_field
+from sortinghat.core.aux import (merge_datetime_ranges,
+                                 validate_field,
+                                 generate_matching_keys,
+                                 get_email_domain,
+                                 reverse_domain,
+                                 iter_chunks)
+from sortinghat.core.fuzzy import fuzzy_name_keys
 
 CANT_COMPARE_DATES_ERROR = "can't compare offset-naive and offset-aware datetimes"
 DATE_OUT_OF_BOUNDS_ERROR = "'{type}' date {date} is out of bounds"
@@ -429,3 +435,97 @@ class TestValidateField(TestCase):
 
         with self.assertRaisesRegex(TypeError, FIELD_TYPE_ERROR):
             validate_field('test_field', 42)
+
+
+class TestGenerateMatchingKeys(TestCase):
+    """Unit tests for generate_matching_keys"""
+
+    def test_generate_keys(self):
+        """Check if the keys are normalized"""
+
+        keys = generate_matching_keys(name='John Smith',
+                                      email='JSmith@Example.com',
+                                      username='JSMITH')
+        expected = {
+            ('name', 'john smith'),
+            ('email', 'jsmith@example.com'),
+            ('username', 'jsmith')
+        }
+        expected.update(('fuzzy_name', key) for key in fuzzy_name_keys('John Smith'))
+        self.assertSetEqual(keys, expected)
+
+    def test_github_email(self):
+        """Check if usernames are extracted from GitHub emails"""
+
+        keys = generate_matching_keys(email='1234+JSmith@users.noreply.github.com')
+        expected = {
+            ('email', '1234+jsmith@users.noreply.github.com'),
+            ('github', 'jsmith')
+        }
+        self.assertSetEqual(keys, expected)
+
+    def test_empty_values(self):
+        """Check if empty values are not included"""
+
+        keys = generate_matching_keys(name='', email=None, username='jsmith')
+        self.assertSetEqual(keys, {('username', 'jsmith')})
+
+        keys = generate_matching_keys()
+        self.assertSetEqual(keys, set())
+
+
+class TestGetEmailDomain(TestCase):
+    """Unit tests for get_email_domain"""
+
+    def test_domain(self):
+        """Check if the normalized domain of an address is returned"""
+
+        self.assertEqual(get_email_domain('jsmith@example.com'), 'example.com')
+        self.assertEqual(get_email_domain('JSmith@US.Example.COM'), 'us.example.com')
+
+    def test_invalid_address(self):
+        """Check if no domain is returned for addresses which are not well-formed"""
+
+        self.assertIsNone(get_email_domain(None))
+        self.assertIsNone(get_email_domain(''))
+        self.assertIsNone(get_email_domain('jsmith'))
+        self.assertIsNone(get_email_domain('jsmith@example'))
+        self.assertIsNone(get_email_domain('@example.com'))
+        self.assertIsNone(get_email_domain('jsmith@.example.com'))
+        self.assertIsNone(get_email_domain('jsmith@ex ample.com'))
+        self.assertIsNone(get_email_domain('jsmith@example@com.com'))
+
+
+class TestReverseDomain(TestCase):
+    """Unit tests for reverse_domain"""
+
+    def test_reverse(self):
+        """Check if the labels of the domain are reversed"""
+
+        self.assertEqual(reverse_domain('example.com'), 'com.example')
+        self.assertEqual(reverse_domain('es.U.Example.com'), 'com.example.u.es')
+        self.assertEqual(reverse_domain('localhost'), 'localhost')
+
+    def test_empty_domain(self):
+        """Check if None is returned for empty domains"""
+
+        self.assertIsNone(reverse_domain(None))
+        self.assertIsNone(reverse_domain(''))
+
+
+class TestIterChunks(TestCase):
+    """Unit tests for iter_chunks"""
+
+    def test_iter_chunks(self):
+        """Check if the iterable is split in lists of the given size"""
+
+        chunks = list(iter_chunks(iter(range(5)), 2))
+        self.assertListEqual(chunks, [[0, 1], [2, 3], [4]])
+
+        chunks = list(iter_chunks(['a', 'b'], 2))
+        self.assertListEqual(chunks, [['a', 'b']])
+
+    def test_empty_iterable(self):
+        """Check if no chunks are generated for an empty iterable"""
+
+        self.assertListEqual(list(iter_chunks([], 2)), [])
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import django_rq
+
+from django.test import TestCase
+
+from sortinghat.core.benchmarks import (BENCHMARKS,
+                                        generate_registry,
+                                        run_benchmarks)
+from sortinghat.core.recommendations.affiliation import recommend_affiliations
+from sortinghat.core.models import (Domain,
+                                    Identity,
+                                    Individual,
+                                    MatchingKey,
+                                    Organization,
+                                    Profile,
+                                    RecommenderExclusionTerm)
+
+
+class TestGenerateRegistry(TestCase):
+    """Unit tests for generate_registry"""
+
+    def test_generate_registry(self):
+        """Check if the synthetic registry is generated"""
+
+        summary = generate_registry(60,
+                                    identities_per_individual=3,
+                                    num_organizations=4,
+                                    duplicate_rate=0.5,
+                                    num_exclusion_terms=2,
+                                    seed=1)
+
+        self.assertEqual(summary['identities'], 60)
+        self.assertEqual(summary['organizations'], 4)
+        self.assertEqual(summary['exclusion_terms'], 2)
+
+        # Some people were split in two individuals
+        self.assertGreater(summary['individuals'], 20)
+        self.assertLessEqual(summary['individuals'], 40)
+
+        self.assertEqual(Identity.objects.count(), 60)
+        self.assertEqual(Individual.objects.count(), summary['individuals'])
+        self.assertEqual(Profile.objects.count(), summary['individuals'])
+        self.assertEqual(Organization.objects.count(), 4)
+        self.assertEqual(Domain.objects.count(), 4)
+        self.assertGreater(MatchingKey.objects.count(), 60)
+
+        # Domains of the emails are set like when identities are added
+        for identity in Identity.objects.exclude(email__isnull=True):
+            domain = identity.email.split('@')[-1].lower()
+            self.assertEqual(identity.email_domain, domain)
+            self.assertEqual(identity.email_domain_reversed, '.'.join(reversed(domain.split('.'))))
+
+        terms = RecommenderExclusionTerm.objects.values_list('normalized_term', flat=True)
+        self.assertEqual(len(terms), 2)
+        for term in terms:
+            self.assertTrue(Identity.objects.filter(email=term).exists())
+
+    def test_same_seed(self):
+        """Check if the same seed generates the same registry"""
+
+        generate_registry(30, num_organizations=2, seed=7)
+        expected = list(Identity.objects.order_by('uuid').values_list('uuid', 'individual', 'email'))
+
+        Individual.objects.all().delete()
+        Organization.objects.all().delete()
+        RecommenderExclusionTerm.objects.all().delete()
+
+        generate_registry(30, num_organizations=2, seed=7)
+        identities = list(Identity.objects.order_by('uuid').values_list('uuid', 'individual', 'email'))
+
+        self.assertListEqual(identities, expected)
+
+
+class TestRunBenchmarks(TestCase):
+    """Unit tests for run_benchmarks"""
+
+    def setUp(self):
+        """Generate a small registry"""
+
+        conn = django_rq.get_connection()
+        conn.flushall()
+
+        generate_registry(90,
+                          num_organizations=3,
+                          duplicate_rate=0.3,
+                          num_exclusion_terms=3,
+                          seed=0)
+
+    def test_run_benchmarks(self):
+        """Check if every benchmark is measured"""
+
+        individuals = Individual.objects.count()
+
+        measures = run_benchmarks(isolate=False)
+
+        names = [measure['benchmark'] for measure in measures]
+        self.assertListEqual(names, BENCHMARKS)
+
+        for measure in measures:
+            self.assertGreater(measure['wall_time'], 0)
+            self.assertGreater(measure['peak_rss'], 0)
+            self.assertGreater(measure['queries'], 0)
+
+        # Duplicated individuals were merged by unify
+        self.assertLess(Individual.objects.count(), individuals)
+
+    def test_affiliation_recommendations(self):
+        """Check if the registry generates affiliation recommendations"""
+
+        uuids = list(Individual.objects.values_list('mk', flat=True))
+
+        recommendations = [rec for rec in recommend_affiliations(uuids) if rec.options]
+        self.assertGreater(len(recommendations), 0)
+
+    def test_run_some_benchmarks(self):
+        """Check if only the given benchmarks run, in their usual order"""
+
+        measures = run_benchmarks(names=['gender', 'matches'], isolate=False)
+
+        names = [measure['benchmark'] for measure in measures]
+        self.assertListEqual(names, ['matches', 'gender'])
+
+    def test_unknown_benchmark(self):
+        """Check if an error is raised when a benchmark does not exist"""
+
+        with self.assertRaisesRegex(ValueError, 'Unknown benchmarks: mybench'):
+            run_benchmarks(names=['matches', 'mybench'], isolate=False)
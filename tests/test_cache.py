@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import django_rq
+
+from django.test import TestCase
+
+from sortinghat.core import tenant
+from sortinghat.core.cache import (IDENTITIES,
+                                   EXCLUSION_TERMS,
+                                   bump_registry_version,
+                                   cache_key,
+                                   get_cached_value,
+                                   get_registry_version,
+                                   set_cached_value)
+
+
+class TestRegistryVersion(TestCase):
+    """Unit tests for the versions of the registry"""
+
+    def setUp(self):
+        """Clean the cache"""
+
+        conn = django_rq.get_connection()
+        conn.flushall()
+
+    def test_initial_version(self):
+        """Check if the version of an unchanged registry is zero"""
+
+        version = get_registry_version(IDENTITIES, EXCLUSION_TERMS)
+        self.assertTupleEqual(version, (0, 0))
+
+    def test_bump_version(self):
+        """Check if the version increases after committing a change"""
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_registry_version(IDENTITIES)
+            bump_registry_version(IDENTITIES)
+
+        version = get_registry_version(IDENTITIES, EXCLUSION_TERMS)
+        self.assertTupleEqual(version, (2, 0))
+
+    def test_bump_version_not_committed(self):
+        """Check if the version does not change until the transaction is committed"""
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            bump_registry_version(EXCLUSION_TERMS)
+
+            version = get_registry_version(EXCLUSION_TERMS)
+            self.assertTupleEqual(version, (0,))
+
+        self.assertEqual(len(callbacks), 1)
+
+    def test_version_by_tenant(self):
+        """Check if each tenant has its own version"""
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_registry_version(IDENTITIES)
+
+        tenant.set_db_tenant('tenant_1')
+
+        try:
+            version = get_registry_version(IDENTITIES)
+            self.assertTupleEqual(version, (0,))
+        finally:
+            tenant.unset_db_tenant()
+
+        version = get_registry_version(IDENTITIES)
+        self.assertTupleEqual(version, (1,))
+
+
+class TestCachedValues(TestCase):
+    """Unit tests for cached values"""
+
+    def setUp(self):
+        """Clean the cache"""
+
+        conn = django_rq.get_connection()
+        conn.flushall()
+
+    def test_cache_key(self):
+        """Check if keys depend on the name, version and arguments"""
+
+        key = cache_key('matches', (1, 0), criteria=['email'], verbose=False)
+        self.assertTrue(key.startswith('sortinghat:default:cache:matches:'))
+
+        # The order of the arguments does not matter
+        same = cache_key('matches', (1, 0), verbose=False, criteria=['email'])
+        self.assertEqual(key, same)
+
+        other = cache_key('matches', (2, 0), criteria=['email'], verbose=False)
+        self.assertNotEqual(key, other)
+
+        other = cache_key('matches', (1, 0), criteria=['name'], verbose=False)
+        self.assertNotEqual(key, other)
+
+        other = cache_key('gender', (1, 0), criteria=['email'], verbose=False)
+        self.assertNotEqual(key, other)
+
+    def test_set_value(self):
+        """Check if a value is stored and retrieved"""
+
+        key = cache_key('matches', (1, 0))
+        set_cached_value(key, [['A', 'A', ['B', 'C']]], 60)
+
+        value = get_cached_value(key)
+        self.assertListEqual(value, [['A', 'A', ['B', 'C']]])
+
+        conn = django_rq.get_connection()
+        self.assertLessEqual(conn.ttl(key), 60)
+
+    def test_value_not_found(self):
+        """Check if None is returned when the value is not cached"""
+
+        key = cache_key('matches', (1, 0))
+
+        value = get_cached_value(key)
+        self.assertIsNone(value)
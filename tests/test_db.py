@@ -24,18 +24,22 @@
 import datetime
 import json
 
+import django_rq
+
 from dateutil.tz import UTC
 
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ObjectDoesNotExist
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from grimoirelab_toolkit.datetime import datetime_utcnow, datetime_to_utc
 
 from sortinghat.core import db
 from sortinghat.core.context import SortingHatContext
 from sortinghat.core.errors import AlreadyExistsError, NotFoundError, LockedIdentityError
+from sortinghat.core.fuzzy import fuzzy_name_keys
 from sortinghat.core.log import TransactionsLog
+from sortinghat.core.pending import INDIVIDUALS, DOMAINS, pop_pending_affiliations
 from sortinghat.core.models import (MIN_PERIOD_DATE,
                                     MAX_PERIOD_DATE,
                                     Organization,
@@ -45,6 +49,7 @@ from sortinghat.core.models import (MIN_PERIOD_DATE,
                                     Country,
                                     Individual,
                                     Identity,
+                                    MatchingKey,
                                     Profile,
                                     Enrollment,
                                     Transaction,
@@ -178,6 +183,36 @@ class TestFindIndividualbyUUID(TestCase):
             db.find_individual_by_uuid('zyxwuv')
 
 
+class TestFindIndividualsKeys(TestCase):
+    """Unit tests for find_individuals_keys"""
+
+    def test_find_individuals_keys(self):
+        """Test if individuals are found by their keys or the UUIDs of their identities"""
+
+        individual = Individual.objects.create(mk='AAAA')
+        Identity.objects.create(uuid='AAAA', source='scm', individual=individual)
+        Identity.objects.create(uuid='BBBB', source='git', individual=individual)
+
+        individual = Individual.objects.create(mk='CCCC')
+        Identity.objects.create(uuid='CCCC', source='scm', individual=individual)
+
+        with self.assertNumQueries(2):
+            keys = db.find_individuals_keys(['AAAA', 'BBBB', 'CCCC', 'ZZZZ'])
+
+        expected = {
+            'AAAA': 'AAAA',
+            'BBBB': 'AAAA',
+            'CCCC': 'CCCC'
+        }
+        self.assertDictEqual(keys, expected)
+
+    def test_empty_list(self):
+        """Test if an empty dict is returned when no UUIDs are given"""
+
+        keys = db.find_individuals_keys([])
+        self.assertDictEqual(keys, {})
+
+
 class TestFindIdentity(TestCase):
     """Unit tests for find_identity"""
 
@@ -1086,6 +1121,19 @@ class TestAddDomain(TestCase):
         self.assertEqual(dom.domain, domain_name)
         self.assertEqual(dom.is_top_domain, True)
 
+    @override_settings(AFFILIATE_INCREMENTAL=True)
+    def test_pending_affiliations(self):
+        """Check if the new domain is queued to be affiliated"""
+
+        django_rq.get_connection().flushall()
+
+        org = Organization.add_root(name='Example')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            db.add_domain(self.trxl, org, 'example.net')
+
+        self.assertListEqual(pop_pending_affiliations(DOMAINS, 10), ['example.net'])
+
     def test_add_multiple_domains(self):
         """Check if multiple domains can be added"""
 
@@ -1544,8 +1592,33 @@ class TestAddIdentity(TestCase):
         self.assertEqual(identity.source, 'scm')
         self.assertEqual(identity.name, 'John Smith')
         self.assertEqual(identity.email, 'jsmith@example.org')
+        self.assertEqual(identity.email_domain, 'example.org')
+        self.assertEqual(identity.email_domain_reversed, 'org.example')
         self.assertEqual(identity.username, 'jsmith')
 
+    @override_settings(AFFILIATE_INCREMENTAL=True)
+    def test_pending_affiliations(self):
+        """Check if individuals with new email addresses are queued to be affiliated"""
+
+        django_rq.get_connection().flushall()
+
+        individual = Individual.objects.create(mk='AAAA')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            db.add_identity(self.trxl, individual, 'AAAA', 'scm',
+                            email='jsmith@example.org')
+
+        self.assertListEqual(pop_pending_affiliations(INDIVIDUALS, 10), ['AAAA'])
+
+        # Identities without a valid email address are not queued
+        individual = Individual.objects.create(mk='CCCC')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            db.add_identity(self.trxl, individual, 'CCCC', 'scm',
+                            name='John Smith', email='jsmith')
+
+        self.assertListEqual(pop_pending_affiliations(INDIVIDUALS, 10), [])
+
     def test_add_multiple_identities(self):
         """Check if multiple identities can be added"""
 
@@ -1574,6 +1647,8 @@ class TestAddIdentity(TestCase):
         self.assertEqual(identity.source, 'scm')
         self.assertEqual(identity.name, 'John Smith')
         self.assertEqual(identity.email, None)
+        self.assertEqual(identity.email_domain, None)
+        self.assertEqual(identity.email_domain_reversed, None)
         self.assertEqual(identity.username, None)
 
         identity = identities[1]
@@ -1583,6 +1658,8 @@ class TestAddIdentity(TestCase):
         self.assertEqual(identity.source, 'its')
         self.assertEqual(identity.name, None)
         self.assertEqual(identity.email, 'jsmith@example.org')
+        self.assertEqual(identity.email_domain, 'example.org')
+        self.assertEqual(identity.email_domain_reversed, 'org.example')
         self.assertEqual(identity.username, None)
 
         identity = identities[2]
@@ -1592,8 +1669,40 @@ class TestAddIdentity(TestCase):
         self.assertEqual(identity.source, 'mls')
         self.assertEqual(identity.name, None)
         self.assertEqual(identity.email, None)
+        self.assertEqual(identity.email_domain, None)
+        self.assertEqual(identity.email_domain_reversed, None)
         self.assertEqual(identity.username, 'jsmith')
 
+    def test_matching_keys(self):
+        """Check if the normalized values of the identity are indexed"""
+
+        mk = '1234567890ABCDFE'
+
+        individual = Individual.objects.create(mk=mk)
+        db.add_identity(self.trxl, individual, mk, 'github',
+                        name='John Smith',
+                        email='1234+JSmith@users.noreply.github.com',
+                        username='jsmith')
+
+        keys = MatchingKey.objects.filter(identity__uuid=mk).exclude(criterion='fuzzy_name').order_by('criterion')
+        self.assertEqual(len(keys), 4)
+
+        expected = [
+            ('email', '1234+jsmith@users.noreply.github.com'),
+            ('github', 'jsmith'),
+            ('name', 'john smith'),
+            ('username', 'jsmith')
+        ]
+        self.assertListEqual([(key.criterion, key.value) for key in keys], expected)
+
+        for key in keys:
+            self.assertEqual(key.individual.mk, mk)
+            self.assertEqual(key.source, 'github')
+
+        # Blocking keys of the name are indexed for fuzzy matching
+        keys = MatchingKey.objects.filter(identity__uuid=mk, criterion='fuzzy_name')
+        self.assertSetEqual({key.value for key in keys}, set(fuzzy_name_keys('John Smith')))
+
     def test_last_modified(self):
         """Check if last modification date is updated"""
 
@@ -1876,6 +1985,22 @@ class TestDeleteIdentity(TestCase):
         jsmith.refresh_from_db()
         self.assertEqual(len(jsmith.identities.all()), 2)
 
+    def test_delete_matching_keys(self):
+        """Check whether the matching keys of the identity are removed"""
+
+        jsmith = Individual.objects.create(mk='AAAA')
+        identity = db.add_identity(self.trxl, jsmith, '0001', 'scm',
+                                   email='jsmith@example.net')
+        db.add_identity(self.trxl, jsmith, '0002', 'scm',
+                        email='jsmith@example.org')
+
+        db.delete_identity(self.trxl, identity)
+
+        keys = MatchingKey.objects.all()
+        self.assertEqual(len(keys), 1)
+        self.assertEqual(keys[0].identity.uuid, '0002')
+        self.assertEqual(keys[0].value, 'jsmith@example.org')
+
     def test_last_modified(self):
         """Check if last modification date is updated"""
 
@@ -2656,6 +2781,27 @@ class TestMoveIdentity(TestCase):
         self.assertEqual(identity.uuid, '0001')
         self.assertEqual(identity.name, 'John Smith')
 
+    def test_move_matching_keys(self):
+        """Test if the matching keys are moved to the new individual"""
+
+        from_indv = Individual.objects.create(mk='AAAA')
+        to_indv = Individual.objects.create(mk='BBBB')
+
+        identity = db.add_identity(self.trxl, from_indv, '0001', 'scm',
+                                   name='John Smith',
+                                   email='jsmith@example.com')
+
+        db.move_identity(self.trxl, identity, to_indv)
+
+        keys = MatchingKey.objects.filter(identity__uuid='0001')
+        self.assertEqual(len(keys), 2 + len(fuzzy_name_keys('John Smith')))
+
+        for key in keys:
+            self.assertEqual(key.individual.mk, 'BBBB')
+
+        keys = MatchingKey.objects.filter(individual__mk='AAAA')
+        self.assertEqual(len(keys), 0)
+
     def test_last_modified(self):
         """Check if last modification date is updated"""
 
@@ -2895,6 +3041,23 @@ class TestMoveDomain(TestCase):
         domains = organization.domains.all()
         self.assertEqual(len(domains), 1)
 
+    @override_settings(AFFILIATE_INCREMENTAL=True)
+    def test_pending_affiliations(self):
+        """Check if the moved domain is queued to be affiliated"""
+
+        django_rq.get_connection().flushall()
+
+        from_org = Organization.add_root(name='Organization 1')
+        to_org = Organization.add_root(name='Organization 2')
+        domain = Domain.objects.create(domain='example.com',
+                                       organization=from_org,
+                                       is_top_domain=True)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            db.move_domain(self.trxl, domain, to_org)
+
+        self.assertListEqual(pop_pending_affiliations(DOMAINS, 10), ['example.com'])
+
     def test_last_modified(self):
         """Check if last modification date is updated"""
 
@@ -3593,6 +3756,251 @@ class TestDeleteMergeRecommendations(TestCase):
         self.assertEqual(op1_args['merge_recommendations'], [rec1.id, rec2.id, rec3.id])
 
 
+class TestMoveMergeRecommendations(TestCase):
+    """Unit tests for move_merge_recommendations"""
+
+    def setUp(self):
+        """Load initial dataset"""
+
+        self.user = get_user_model().objects.create(username='test')
+        self.ctx = SortingHatContext(self.user)
+
+        self.trxl = TransactionsLog.open('move_merge_recommendations', self.ctx)
+
+        self.indv1 = Individual.objects.create(mk='AAAA')
+        self.indv2 = Individual.objects.create(mk='BBBB')
+        self.indv3 = Individual.objects.create(mk='CCCC')
+        self.indv4 = Individual.objects.create(mk='DDDD')
+        self.indv5 = Individual.objects.create(mk='EEEE')
+
+    def test_move_merge_recommendations(self):
+        """Check whether it moves the pending recommendations to the targets"""
+
+        rec1 = MergeRecommendation.objects.create(individual1=self.indv2, individual2=self.indv4)
+        rec2 = MergeRecommendation.objects.create(individual1=self.indv3, individual2=self.indv5)
+        rec3 = MergeRecommendation.objects.create(individual1=self.indv4, individual2=self.indv5)
+
+        updated, deleted = db.move_merge_recommendations(self.trxl, {'DDDD': 'AAAA'})
+
+        self.assertEqual(updated, 2)
+        self.assertEqual(deleted, 0)
+
+        rec1.refresh_from_db()
+        self.assertEqual(rec1.individual1.mk, 'AAAA')
+        self.assertEqual(rec1.individual2.mk, 'BBBB')
+
+        # Recommendations without the individual are not modified
+        rec2.refresh_from_db()
+        self.assertEqual(rec2.individual1.mk, 'CCCC')
+        self.assertEqual(rec2.individual2.mk, 'EEEE')
+
+        rec3.refresh_from_db()
+        self.assertEqual(rec3.individual1.mk, 'AAAA')
+        self.assertEqual(rec3.individual2.mk, 'EEEE')
+
+    def test_delete_duplicates(self):
+        """Check whether recommendations that already exist are deleted"""
+
+        MergeRecommendation.objects.create(individual1=self.indv1, individual2=self.indv3)
+        rec2 = MergeRecommendation.objects.create(individual1=self.indv2, individual2=self.indv3)
+        rec3 = MergeRecommendation.objects.create(individual1=self.indv2, individual2=self.indv5)
+        rec4 = MergeRecommendation.objects.create(individual1=self.indv4, individual2=self.indv5)
+        MergeRecommendation.objects.create(individual1=self.indv1, individual2=self.indv2)
+
+        targets = {'BBBB': 'AAAA', 'DDDD': 'AAAA'}
+        updated, deleted = db.move_merge_recommendations(self.trxl, targets)
+
+        self.assertEqual(updated, 1)
+        self.assertEqual(deleted, 3)
+
+        recs = MergeRecommendation.objects.order_by('individual1', 'individual2')
+        pairs = [(rec.individual1_id, rec.individual2_id) for rec in recs]
+        self.assertListEqual(pairs, [('AAAA', 'CCCC'), ('AAAA', 'EEEE')])
+
+        # Only the oldest recommendation of the duplicated ones is kept
+        self.assertEqual(recs[1].id, rec3.id)
+        self.assertFalse(MergeRecommendation.objects.filter(id__in=[rec2.id, rec4.id]).exists())
+
+    def test_reviewed_recommendations(self):
+        """Check whether recommendations already reviewed are not moved"""
+
+        rec = MergeRecommendation.objects.create(individual1=self.indv2,
+                                                 individual2=self.indv3,
+                                                 applied=False)
+
+        updated, deleted = db.move_merge_recommendations(self.trxl, {'BBBB': 'AAAA'})
+
+        self.assertEqual(updated, 0)
+        self.assertEqual(deleted, 0)
+
+        rec.refresh_from_db()
+        self.assertEqual(rec.individual1.mk, 'BBBB')
+        self.assertEqual(rec.individual2.mk, 'CCCC')
+
+    def test_empty_targets(self):
+        """Check whether nothing is done when there are no targets"""
+
+        MergeRecommendation.objects.create(individual1=self.indv1, individual2=self.indv2)
+
+        updated, deleted = db.move_merge_recommendations(self.trxl, {})
+
+        self.assertEqual(updated, 0)
+        self.assertEqual(deleted, 0)
+
+        operations = Operation.objects.all()
+        self.assertEqual(len(operations), 0)
+
+    def test_operations(self):
+        """Check if the right operations are created"""
+
+        timestamp = datetime_utcnow()
+
+        rec1 = MergeRecommendation.objects.create(individual1=self.indv2, individual2=self.indv3)
+        rec2 = MergeRecommendation.objects.create(individual1=self.indv1, individual2=self.indv2)
+
+        db.move_merge_recommendations(self.trxl, {'BBBB': 'AAAA'})
+
+        transactions = Transaction.objects.filter(name='move_merge_recommendations')
+        trx = transactions[0]
+
+        operations = Operation.objects.filter(trx=trx)
+        self.assertEqual(len(operations), 1)
+
+        op1 = operations[0]
+        self.assertIsInstance(op1, Operation)
+        self.assertEqual(op1.op_type, Operation.OpType.UPDATE.value)
+        self.assertEqual(op1.entity_type, 'merge_recommendation')
+        self.assertEqual(op1.trx, trx)
+        self.assertEqual(op1.target, 'merge_recommendations')
+        self.assertGreater(op1.timestamp, timestamp)
+
+        op1_args = json.loads(op1.args)
+        self.assertEqual(len(op1_args), 3)
+        self.assertDictEqual(op1_args['individuals'], {'BBBB': 'AAAA'})
+        self.assertEqual(op1_args['updated'], [rec1.id])
+        self.assertEqual(op1_args['deleted'], [rec2.id])
+
+
+class TestRejectMergeRecommendations(TestCase):
+    """Unit tests for reject_merge_recommendations"""
+
+    def setUp(self):
+        """Load initial dataset"""
+
+        self.user = get_user_model().objects.create(username='test')
+        self.ctx = SortingHatContext(self.user)
+
+        self.trxl = TransactionsLog.open('reject_merge_recommendations', self.ctx)
+
+        indv1 = Individual.objects.create(mk='AAAA')
+        indv2 = Individual.objects.create(mk='BBBB')
+        indv3 = Individual.objects.create(mk='CCCC')
+
+        self.rec1 = MergeRecommendation.objects.create(individual1=indv1, individual2=indv2)
+        self.rec2 = MergeRecommendation.objects.create(individual1=indv1, individual2=indv3)
+
+    def test_reject_merge_recommendations(self):
+        """Check whether it marks the recommendations as rejected"""
+
+        recommendations = MergeRecommendation.objects.filter(id=self.rec1.id)
+        db.reject_merge_recommendations(self.trxl, recommendations)
+
+        self.rec1.refresh_from_db()
+        self.assertIs(self.rec1.applied, False)
+
+        self.rec2.refresh_from_db()
+        self.assertIsNone(self.rec2.applied)
+
+    def test_invalid_queryset(self):
+        """Check if it fails when the queryset is not of merge recommendations"""
+
+        with self.assertRaisesRegex(ValueError, "'recommendations' must be a MergeRecommendation queryset"):
+            db.reject_merge_recommendations(self.trxl, Individual.objects.all())
+
+    def test_operations(self):
+        """Check if the right operations are created"""
+
+        timestamp = datetime_utcnow()
+
+        recommendations = MergeRecommendation.objects.filter(id=self.rec1.id)
+        db.reject_merge_recommendations(self.trxl, recommendations)
+
+        transactions = Transaction.objects.filter(name='reject_merge_recommendations')
+        trx = transactions[0]
+
+        operations = Operation.objects.filter(trx=trx)
+        self.assertEqual(len(operations), 1)
+
+        op1 = operations[0]
+        self.assertEqual(op1.op_type, Operation.OpType.UPDATE.value)
+        self.assertEqual(op1.entity_type, 'merge_recommendation')
+        self.assertEqual(op1.target, 'merge_recommendations')
+        self.assertGreater(op1.timestamp, timestamp)
+
+        op1_args = json.loads(op1.args)
+        self.assertDictEqual(op1_args, {'merge_recommendations': [self.rec1.id], 'applied': False})
+
+
+class TestUpdateMergeRecommendationsScores(TestCase):
+    """Unit tests for update_merge_recommendations_scores"""
+
+    def setUp(self):
+        """Load initial dataset"""
+
+        self.user = get_user_model().objects.create(username='test')
+        self.ctx = SortingHatContext(self.user)
+
+        self.trxl = TransactionsLog.open('update_merge_recommendations_scores', self.ctx)
+
+        indv1 = Individual.objects.create(mk='AAAA')
+        indv2 = Individual.objects.create(mk='BBBB')
+        indv3 = Individual.objects.create(mk='CCCC')
+
+        self.rec1 = MergeRecommendation.objects.create(individual1=indv1, individual2=indv2, score=10)
+        self.rec2 = MergeRecommendation.objects.create(individual1=indv1, individual2=indv3, score=20)
+
+    def test_update_scores(self):
+        """Check whether it updates the score of the recommendations"""
+
+        details = {'criteria': ['email'], 'identities': 2}
+        updated = db.update_merge_recommendations_scores(self.trxl, {self.rec1.id: (75, details)})
+        self.assertEqual(updated, 1)
+
+        self.rec1.refresh_from_db()
+        self.assertEqual(self.rec1.score, 75)
+        self.assertDictEqual(self.rec1.score_details, details)
+
+        self.rec2.refresh_from_db()
+        self.assertEqual(self.rec2.score, 20)
+
+    def test_no_scores(self):
+        """Check if nothing is updated when there are no scores"""
+
+        updated = db.update_merge_recommendations_scores(self.trxl, {})
+        self.assertEqual(updated, 0)
+
+        operations = Operation.objects.filter(trx__name='update_merge_recommendations_scores')
+        self.assertEqual(len(operations), 0)
+
+    def test_operations(self):
+        """Check if the right operations are created"""
+
+        db.update_merge_recommendations_scores(self.trxl, {self.rec2.id: (50, None),
+                                                           self.rec1.id: (75, None)})
+
+        operations = Operation.objects.filter(trx__name='update_merge_recommendations_scores')
+        self.assertEqual(len(operations), 1)
+
+        op1 = operations[0]
+        self.assertEqual(op1.op_type, Operation.OpType.UPDATE.value)
+        self.assertEqual(op1.entity_type, 'merge_recommendation')
+        self.assertEqual(op1.target, 'merge_recommendations')
+
+        op1_args = json.loads(op1.args)
+        self.assertEqual(op1_args['merge_recommendations'], [self.rec1.id, self.rec2.id])
+        self.assertDictEqual(op1_args['scores'], {str(self.rec1.id): 75, str(self.rec2.id): 50})
+
+
 class TestReview(TestCase):
     """Unit tests for review"""
 
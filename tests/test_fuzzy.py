@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2021 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+from django.test import TestCase
+
+from sortinghat.core.fuzzy import (normalize_name,
+                                   name_ngrams,
+                                   name_similarity,
+                                   fuzzy_name_keys,
+                                   NUM_BANDS)
+
+
+class TestNormalizeName(TestCase):
+    """Unit tests for normalize_name"""
+
+    def test_normalize(self):
+        """Check if names are unaccented, lowercased and their words sorted"""
+
+        self.assertEqual(normalize_name('John Smith'), 'john smith')
+        self.assertEqual(normalize_name('Smith, Jóhn'), 'john smith')
+        self.assertEqual(normalize_name('  J. Smíth-Doe '), 'doe j smith')
+
+    def test_empty(self):
+        """Check if names without words are normalized to empty strings"""
+
+        self.assertEqual(normalize_name(''), '')
+        self.assertEqual(normalize_name('., -'), '')
+
+
+class TestNameSimilarity(TestCase):
+    """Unit tests for name_similarity"""
+
+    def test_ngrams(self):
+        """Check if the n-grams of a name include its boundaries"""
+
+        self.assertSetEqual(name_ngrams('jo'), {' j', 'jo', 'o '})
+        self.assertSetEqual(name_ngrams(''), set())
+
+    def test_similarity(self):
+        """Check if similar names get higher values"""
+
+        self.assertEqual(name_similarity('John Smith', 'Smith, Jóhn'), 1.0)
+        self.assertLess(name_similarity('John Smith', 'Jane Rae'), 0.1)
+
+        typo = name_similarity('John Smith', 'Jonh Smith')
+        other = name_similarity('John Smith', 'Jane Smith')
+        self.assertGreaterEqual(typo, 0.6)
+        self.assertLess(other, 0.6)
+
+    def test_empty(self):
+        """Check if names without words are not similar to anything"""
+
+        self.assertEqual(name_similarity('', ''), 0.0)
+
+
+class TestFuzzyNameKeys(TestCase):
+    """Unit tests for fuzzy_name_keys"""
+
+    def test_keys(self):
+        """Check if a key is generated per band"""
+
+        keys = fuzzy_name_keys('John Smith')
+
+        self.assertEqual(len(keys), NUM_BANDS)
+        self.assertEqual(len(set(keys)), NUM_BANDS)
+        for band, key in enumerate(keys):
+            self.assertTrue(key.startswith(f"{band}-"))
+
+    def test_deterministic(self):
+        """Check if the same normalized names generate the same keys"""
+
+        self.assertListEqual(fuzzy_name_keys('John Smith'),
+                             fuzzy_name_keys('SMITH, Jóhn'))
+
+    def test_similar_names(self):
+        """Check if similar names share keys and different names do not"""
+
+        keys = set(fuzzy_name_keys('John Smith'))
+
+        self.assertTrue(keys & set(fuzzy_name_keys('John A. Smith')))
+        self.assertFalse(keys & set(fuzzy_name_keys('Jane Rae')))
+
+    def test_empty(self):
+        """Check if no keys are generated for names without words"""
+
+        self.assertListEqual(fuzzy_name_keys(''), [])
+        self.assertListEqual(fuzzy_name_keys('...'), [])
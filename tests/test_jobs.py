@@ -24,6 +24,7 @@ import datetime
 import unittest.mock
 import json
 
+import django_rq
 import httpretty
 
 from dateutil.tz import UTC
@@ -32,26 +33,38 @@ from django.contrib.auth import get_user_model
 from django.test import TestCase
 
 from django_rq import enqueue
+from rq.job import Job, JobStatus
 
 from grimoirelab_toolkit.datetime import datetime_utcnow
 
 from sortinghat.core import api
 from sortinghat.core.context import SortingHatContext
-from sortinghat.core.errors import DuplicateRangeError, NotFoundError
+from sortinghat.core.errors import DuplicateRangeError, InvalidValueError, NotFoundError
 from sortinghat.core.importer.backend import IdentitiesImporter
-from sortinghat.core.jobs import (find_job,
+from sortinghat.core.jobs import (JobCheckpoint,
+                                  JobProgress,
+                                  RecommendationsWriter,
+                                  find_job,
                                   affiliate,
+                                  affiliate_pending,
                                   unify,
                                   recommend_affiliations,
                                   recommend_matches,
                                   recommend_gender,
+                                  score_merge_recommendations,
                                   genderize,
-                                  import_identities)
+                                  import_identities,
+                                  on_failed_job)
 from sortinghat.core.models import (Individual,
+                                    ScheduledTask,
                                     Transaction,
                                     AffiliationRecommendation,
                                     MergeRecommendation,
                                     GenderRecommendation)
+from sortinghat.core.pending import (INDIVIDUALS,
+                                     DOMAINS,
+                                     count_pending_affiliations,
+                                     restore_pending_affiliations)
 from sortinghat.core.recommendations import RecommendationEngine
 
 JOB_NOT_FOUND_ERROR = "DEF not found in the registry"
@@ -62,6 +75,24 @@ def job_echo(s):
     return s
 
 
+def resume_job(func, *args, results=None, errors=None, data=None, **state):
+    """Run a job resuming it from a checkpoint with the given state"""
+
+    queue = django_rq.get_queue()
+    job = Job.create(func, args=args, connection=queue.connection)
+    job.save()
+
+    checkpoint = JobCheckpoint(job)
+    for key, value in (results or {}).items():
+        checkpoint.add_result(key, value)
+    checkpoint.add_errors(errors or [])
+    for key, value in (data or {}).items():
+        checkpoint.store(key, value)
+    checkpoint.update(force=True, **state)
+
+    return queue.enqueue_job(job)
+
+
 class TestFindJob(TestCase):
     """Unit tests for find_job"""
 
@@ -82,6 +113,352 @@ class TestFindJob(TestCase):
             find_job('DEF', 'default')
 
 
+class TestJobCheckpoint(TestCase):
+    """Unit tests for JobCheckpoint"""
+
+    def setUp(self):
+        """Create a job to store the checkpoints"""
+
+        self.user = get_user_model().objects.create(username='test')
+        self.ctx = SortingHatContext(self.user)
+
+        self.conn = django_rq.get_connection()
+        self.job = Job.create(job_echo, args=(self.ctx, 'a'), connection=self.conn)
+        self.job.save()
+
+    def test_resume(self):
+        """Check if the progress is read when the job runs again"""
+
+        checkpoint = JobCheckpoint(self.job)
+        self.assertFalse(checkpoint.resumed)
+        self.assertDictEqual(checkpoint.state, {})
+
+        checkpoint.add_result('A', ('male', 1))
+        checkpoint.add_errors(['error A'])
+        checkpoint.update(force=True, offset=10)
+
+        job = Job.fetch(self.job.id, connection=self.conn)
+        checkpoint = JobCheckpoint(job)
+        self.assertTrue(checkpoint.resumed)
+        self.assertDictEqual(checkpoint.state, {'offset': 10})
+        self.assertDictEqual(checkpoint.results, {'A': ('male', 1)})
+        self.assertListEqual(checkpoint.errors, ['error A'])
+
+    def test_results_not_in_meta(self):
+        """Check if only new results are written and they are not stored in the metadata"""
+
+        checkpoint = JobCheckpoint(self.job)
+        checkpoint.add_result('A', 1)
+        checkpoint.update(force=True, offset=1)
+
+        checkpoint.add_result('B', 2)
+        checkpoint.add_errors(['error B'])
+        checkpoint.update(force=True, offset=2)
+
+        job = Job.fetch(self.job.id, connection=self.conn)
+        self.assertDictEqual(job.meta['checkpoint']['state'], {'offset': 2})
+
+        checkpoint = JobCheckpoint(job)
+        self.assertDictEqual(checkpoint.results, {'A': 1, 'B': 2})
+        self.assertListEqual(checkpoint.errors, ['error B'])
+
+    def test_update_interval(self):
+        """Check if the progress is not written before the interval expires"""
+
+        checkpoint = JobCheckpoint(self.job, interval=3600)
+        checkpoint.update(offset=10)
+        self.assertDictEqual(checkpoint.state, {'offset': 10})
+
+        job = Job.fetch(self.job.id, connection=self.conn)
+        self.assertNotIn('checkpoint', job.meta)
+
+        checkpoint = JobCheckpoint(self.job, interval=0)
+        checkpoint.update(offset=20)
+
+        job = Job.fetch(self.job.id, connection=self.conn)
+        self.assertEqual(JobCheckpoint(job).state['offset'], 20)
+
+    def test_different_arguments(self):
+        """Check if a checkpoint is ignored when the arguments of the job changed"""
+
+        JobCheckpoint(self.job).update(force=True, offset=10)
+
+        job = Job.create(job_echo, args=(self.ctx, 'b'), meta=self.job.meta,
+                         connection=self.conn)
+        checkpoint = JobCheckpoint(job)
+        self.assertFalse(checkpoint.resumed)
+        self.assertDictEqual(checkpoint.state, {})
+
+        # The context is not taken into account
+        ctx = SortingHatContext(self.user, tenant='other')
+        job = Job.create(job_echo, args=(ctx, 'a'), meta=self.job.meta,
+                         connection=self.conn)
+        checkpoint = JobCheckpoint(job)
+        self.assertTrue(checkpoint.resumed)
+
+    def test_store(self):
+        """Check if data is stored out of the metadata of the job"""
+
+        checkpoint = JobCheckpoint(self.job)
+        checkpoint.store('groups', [('A', ['B', 'C'])])
+        checkpoint.update(force=True, grouped=True)
+
+        job = Job.fetch(self.job.id, connection=self.conn)
+        self.assertDictEqual(job.meta['checkpoint']['state'], {'grouped': True})
+
+        checkpoint = JobCheckpoint(job)
+        self.assertListEqual(checkpoint.load('groups'), [('A', ['B', 'C'])])
+        self.assertIsNone(checkpoint.load('chunks'))
+        self.assertEqual(checkpoint.load('chunks', []), [])
+
+    def test_clear(self):
+        """Check if the checkpoint is removed"""
+
+        checkpoint = JobCheckpoint(self.job)
+        checkpoint.add_result('A', 1)
+        checkpoint.store('groups', [])
+        checkpoint.update(force=True, offset=10)
+        checkpoint.clear()
+
+        self.assertDictEqual(checkpoint.state, {})
+
+        job = Job.fetch(self.job.id, connection=self.conn)
+        self.assertNotIn('checkpoint', job.meta)
+
+        key = JobCheckpoint.RESULTS_KEY.format(checkpoint_id=self.job.id)
+        self.assertFalse(self.conn.exists(key))
+        key = JobCheckpoint.DATA_KEY.format(checkpoint_id=self.job.id)
+        self.assertFalse(self.conn.exists(key))
+
+    def test_checkpoint_id(self):
+        """Check if a new job created from the metadata of another one finds its results"""
+
+        checkpoint = JobCheckpoint(self.job)
+        self.assertEqual(checkpoint.id, self.job.id)
+
+        checkpoint.add_result('A', 1)
+        checkpoint.add_errors(['error A'])
+        checkpoint.update(force=True, offset=1)
+
+        job = Job.create(job_echo, args=(self.ctx, 'a'), meta=self.job.meta,
+                         connection=self.conn)
+        checkpoint = JobCheckpoint(job)
+        self.assertTrue(checkpoint.resumed)
+        self.assertEqual(checkpoint.id, self.job.id)
+        self.assertDictEqual(checkpoint.results, {'A': 1})
+        self.assertListEqual(checkpoint.errors, ['error A'])
+
+        # Results of the first run are not orphaned
+        checkpoint.clear()
+
+        key = JobCheckpoint.RESULTS_KEY.format(checkpoint_id=self.job.id)
+        self.assertFalse(self.conn.exists(key))
+        key = JobCheckpoint.ERRORS_KEY.format(checkpoint_id=self.job.id)
+        self.assertFalse(self.conn.exists(key))
+
+
+class TestJobProgress(TestCase):
+    """Unit tests for JobProgress"""
+
+    def setUp(self):
+        """Create a job to publish its progress"""
+
+        self.user = get_user_model().objects.create(username='test')
+        self.ctx = SortingHatContext(self.user)
+
+        self.conn = django_rq.get_connection()
+        self.job = Job.create(job_echo, args=(self.ctx, 'a'), connection=self.conn)
+        self.job.save()
+
+    def test_phases(self):
+        """Check if the progress of each phase is published"""
+
+        progress = JobProgress(self.job)
+        progress.start('matching')
+
+        job = Job.fetch(self.job.id, connection=self.conn)
+        meta = job.meta['progress']
+        self.assertEqual(meta['phase'], 'matching')
+        self.assertEqual(meta['processed'], 0)
+        self.assertIsNone(meta['total'])
+        self.assertIsNone(meta['eta'])
+        self.assertDictEqual(meta['phases'], {})
+        self.assertIsInstance(meta['updated_at'], datetime.datetime)
+
+        progress.start('merging', total=10)
+        progress.update(processed=4, force=True)
+
+        job = Job.fetch(self.job.id, connection=self.conn)
+        meta = job.meta['progress']
+        self.assertEqual(meta['phase'], 'merging')
+        self.assertEqual(meta['processed'], 4)
+        self.assertEqual(meta['total'], 10)
+        self.assertGreater(meta['rate'], 0)
+        self.assertAlmostEqual(meta['eta'], 6 / meta['rate'])
+        self.assertListEqual(list(meta['phases'].keys()), ['matching'])
+
+        progress.finish()
+
+        job = Job.fetch(self.job.id, connection=self.conn)
+        meta = job.meta['progress']
+        self.assertIsNone(meta['phase'])
+        self.assertIsNone(meta['rate'])
+        self.assertIsNone(meta['eta'])
+        self.assertListEqual(list(meta['phases'].keys()), ['matching', 'merging'])
+
+    def test_update_interval(self):
+        """Check if the progress is not written before the interval expires"""
+
+        progress = JobProgress(self.job, interval=3600)
+        progress.start('merging', total=10)
+        progress.update(advance=2)
+        progress.update(advance=3)
+        self.assertEqual(progress.processed, 5)
+
+        job = Job.fetch(self.job.id, connection=self.conn)
+        self.assertEqual(job.meta['progress']['processed'], 0)
+
+        progress.interval = 0
+        progress.update(advance=1)
+
+        job = Job.fetch(self.job.id, connection=self.conn)
+        self.assertEqual(job.meta['progress']['processed'], 6)
+
+    def test_resumed_phase(self):
+        """Check if the rate only takes into account the items processed by this run"""
+
+        progress = JobProgress(self.job)
+        progress.start('affiliating', total=10, processed=8)
+
+        job = Job.fetch(self.job.id, connection=self.conn)
+        meta = job.meta['progress']
+        self.assertEqual(meta['processed'], 8)
+        self.assertEqual(meta['rate'], 0)
+        self.assertIsNone(meta['eta'])
+
+
+class TestRecommendationsWriter(TestCase):
+    """Unit tests for RecommendationsWriter"""
+
+    def setUp(self):
+        """Initialize database with a dataset"""
+
+        self.user = get_user_model().objects.create(username='test')
+        ctx = SortingHatContext(self.user)
+
+        api.add_organization(ctx, 'Example')
+        api.add_organization(ctx, 'Bitergia')
+        api.add_alias(ctx, 'Bitergia', 'Bitergia Inc.')
+
+        self.jsmith = api.add_identity(ctx, source='scm', email='jsmith@example.com')
+        self.jsmith_alt = api.add_identity(ctx, source='git', email='jsmith@example.com',
+                                           uuid=self.jsmith.uuid)
+        self.jdoe = api.add_identity(ctx, source='scm', email='jdoe@example.com')
+        self.jroe = api.add_identity(ctx, source='scm', email='jroe@example.com')
+
+    def test_affiliation_recommendations(self):
+        """Check if affiliation recommendations are stored in bulk"""
+
+        writer = RecommendationsWriter(AffiliationRecommendation)
+        writer.add(self.jsmith.uuid, 'Example')
+        writer.add(self.jsmith.uuid, 'Example')
+        writer.add(self.jsmith.uuid, 'Bitergia Inc.')
+        writer.add(self.jdoe.uuid, 'Unknown')
+        writer.add('FFFFFFFFFFFFFFFF', 'Example')
+
+        # Recommendations are not stored until the buffer is flushed
+        self.assertEqual(AffiliationRecommendation.objects.count(), 0)
+
+        writer.flush()
+
+        recs = AffiliationRecommendation.objects.order_by('organization__name')
+        recs = [(rec.individual_id, rec.organization.name) for rec in recs]
+
+        expected = [
+            (self.jsmith.uuid, 'Bitergia'),
+            (self.jsmith.uuid, 'Example')
+        ]
+        self.assertListEqual(recs, expected)
+
+        # Existing recommendations are not duplicated
+        writer.add(self.jsmith.uuid, 'Example')
+        writer.flush()
+
+        self.assertEqual(AffiliationRecommendation.objects.count(), 2)
+
+    def test_merge_recommendations(self):
+        """Check if merge recommendations are stored in bulk"""
+
+        mk1, mk2 = sorted([self.jsmith.uuid, self.jdoe.uuid])
+
+        writer = RecommendationsWriter(MergeRecommendation)
+        writer.add(mk2, mk1)
+        writer.add(mk1, mk2)
+        writer.add(self.jsmith.uuid, self.jsmith_alt.uuid)
+        writer.add(self.jroe.uuid, 'FFFFFFFFFFFFFFFF')
+        writer.flush()
+
+        recs = MergeRecommendation.objects.all()
+        recs = [(rec.individual1_id, rec.individual2_id) for rec in recs]
+        self.assertListEqual(recs, [(mk1, mk2)])
+
+        # Identities are converted into individuals
+        writer.add(self.jsmith_alt.uuid, self.jroe.uuid)
+        writer.add(mk1, mk2)
+        writer.flush()
+
+        recs = MergeRecommendation.objects.order_by('individual1', 'individual2')
+        recs = [(rec.individual1_id, rec.individual2_id) for rec in recs]
+
+        expected = sorted([(mk1, mk2), tuple(sorted([self.jsmith.uuid, self.jroe.uuid]))])
+        self.assertListEqual(recs, expected)
+
+    def test_gender_recommendations(self):
+        """Check if gender recommendations are stored or updated in bulk"""
+
+        writer = RecommendationsWriter(GenderRecommendation)
+        writer.add(self.jsmith.uuid, 'male', 90)
+        writer.add(self.jdoe.uuid, 'female', 80)
+        writer.flush()
+
+        GenderRecommendation.objects.update(applied=True)
+
+        writer.add(self.jsmith.uuid, 'male', 90)
+        writer.add(self.jdoe.uuid, 'female', 70)
+        writer.add(self.jroe.uuid, 'male', 60)
+        writer.add('FFFFFFFFFFFFFFFF', 'male', 60)
+        writer.flush()
+
+        recs = GenderRecommendation.objects.order_by('accuracy')
+        recs = [(rec.individual_id, rec.gender, rec.accuracy, rec.applied) for rec in recs]
+
+        expected = [
+            (self.jroe.uuid, 'male', 60, None),
+            (self.jdoe.uuid, 'female', 70, None),
+            (self.jsmith.uuid, 'male', 90, True)
+        ]
+        self.assertListEqual(recs, expected)
+
+    def test_batch_size(self):
+        """Check if recommendations are written when the buffer is full"""
+
+        writer = RecommendationsWriter(GenderRecommendation, batch_size=2)
+        writer.add(self.jsmith.uuid, 'male', 90)
+
+        self.assertEqual(GenderRecommendation.objects.count(), 0)
+
+        writer.add(self.jdoe.uuid, 'female', 80)
+        writer.add(self.jroe.uuid, 'male', 60)
+
+        self.assertEqual(GenderRecommendation.objects.count(), 2)
+        self.assertEqual(len(writer.buffer), 1)
+
+        writer.flush()
+
+        self.assertEqual(GenderRecommendation.objects.count(), 3)
+        self.assertEqual(len(writer.buffer), 0)
+
+
 class TestRecommendAffiliations(TestCase):
     """Unit tests for recommend_affiliations"""
 
@@ -545,6 +922,109 @@ class TestAffiliateIndividuals(TestCase):
 
         self.assertDictEqual(result, expected)
 
+    def test_affiliate_resume(self):
+        """Check if the job resumes from the last individual affiliated"""
+
+        ctx = SortingHatContext(self.user)
+
+        # The first individual was affiliated before the job was interrupted
+        expected = {
+            'results': {
+                '17ab00ed3825ec2f50483e33c88df223264182ba': ['Bitergia'],
+                'dc31d2afbee88a6d1dbc1ef05ec827b878067744': ['Example']
+            },
+            'errors': []
+        }
+
+        job = resume_job(affiliate, ctx,
+                         last_mk='17ab00ed3825ec2f50483e33c88df223264182ba',
+                         total=2, processed=1,
+                         results={'17ab00ed3825ec2f50483e33c88df223264182ba': ['Bitergia']},
+                         errors=[])
+        result = job.result
+
+        self.assertDictEqual(result, expected)
+        self.assertNotIn('checkpoint', job.meta)
+
+        # The progress counts the individuals of the previous run
+        progress = job.meta['progress']
+        self.assertEqual(progress['processed'], 2)
+        self.assertEqual(progress['total'], 2)
+
+        # Individuals before the checkpoint were not affiliated again
+        individual_db = Individual.objects.get(mk=self.jroe.uuid)
+        self.assertEqual(individual_db.enrollments.count(), 0)
+
+        individual_db = Individual.objects.get(mk=self.jsmith.uuid)
+        self.assertEqual(individual_db.enrollments.count(), 1)
+
+    def test_affiliate_rescheduled_resume(self):
+        """Check if a failed scheduled task resumes with the results of the failed run"""
+
+        ctx = SortingHatContext(self.user)
+
+        queue = django_rq.get_queue()
+        job = Job.create(affiliate, kwargs={'ctx': ctx}, connection=queue.connection)
+        job.save()
+
+        # The first individual was affiliated before the job failed
+        checkpoint = JobCheckpoint(job)
+        checkpoint.add_result('17ab00ed3825ec2f50483e33c88df223264182ba', ['Bitergia'])
+        checkpoint.add_errors(['error A'])
+        checkpoint.update(force=True,
+                          last_mk='17ab00ed3825ec2f50483e33c88df223264182ba',
+                          total=2, processed=1)
+
+        task = ScheduledTask.objects.create(job_type='affiliate', interval=60,
+                                            args={}, job_id=job.id)
+        on_failed_job(job, queue.connection, None)
+
+        task.refresh_from_db()
+        self.assertNotEqual(task.job_id, job.id)
+
+        new_job = Job.fetch(task.job_id, connection=queue.connection)
+        new_job = queue.enqueue_job(new_job)
+        result = new_job.result
+
+        expected = {
+            'results': {
+                '17ab00ed3825ec2f50483e33c88df223264182ba': ['Bitergia'],
+                'dc31d2afbee88a6d1dbc1ef05ec827b878067744': ['Example']
+            },
+            'errors': ['error A']
+        }
+        self.assertDictEqual(result, expected)
+
+        # The results of the failed run were removed
+        key = JobCheckpoint.RESULTS_KEY.format(checkpoint_id=job.id)
+        self.assertFalse(queue.connection.exists(key))
+
+        # Individuals before the checkpoint were not affiliated again
+        individual_db = Individual.objects.get(mk=self.jroe.uuid)
+        self.assertEqual(individual_db.enrollments.count(), 0)
+
+    def test_affiliate_uuids_resume(self):
+        """Check if the job resumes from the last uuid of the list"""
+
+        ctx = SortingHatContext(self.user)
+
+        expected = {
+            'results': {
+                'dc31d2afbee88a6d1dbc1ef05ec827b878067744': ['Example']
+            },
+            'errors': []
+        }
+
+        uuids = [self.jroe.uuid, self.jsmith.uuid]
+        job = resume_job(affiliate, ctx, uuids,
+                         offset=1, results={}, errors=[])
+        result = job.result
+
+        self.assertDictEqual(result, expected)
+
+        individual_db = Individual.objects.get(mk=self.jroe.uuid)
+        self.assertEqual(individual_db.enrollments.count(), 0)
+
     def test_transactions(self):
         """Check if the right transactions were created"""
 
@@ -570,6 +1050,149 @@ class TestAffiliateIndividuals(TestCase):
             self.assertEqual(trx.authored_by, ctx.user.username)
 
 
+class TestAffiliatePending(TestCase):
+    """Unit tests for affiliate_pending"""
+
+    def setUp(self):
+        """Initialize database with a dataset"""
+
+        django_rq.get_connection().flushall()
+
+        self.user = get_user_model().objects.create(username='test')
+        ctx = SortingHatContext(self.user)
+
+        # Organizations and domains
+        api.add_organization(ctx, 'Example')
+        api.add_domain(ctx, 'Example', 'example.com', is_top_domain=True)
+
+        api.add_organization(ctx, 'Bitergia')
+        api.add_domain(ctx, 'Bitergia', 'bitergia.com')
+
+        # John Smith identity
+        self.jsmith = api.add_identity(ctx,
+                                       source='scm',
+                                       email='jsmith@us.example.com',
+                                       name='John Smith',
+                                       username='jsmith')
+
+        # Jane Roe identity
+        self.jroe = api.add_identity(ctx,
+                                     source='scm',
+                                     email='jroe@example.com',
+                                     name='Jane Roe',
+                                     username='jroe')
+        api.add_identity(ctx,
+                         source='unknown',
+                         email='jroe@bitergia.com',
+                         uuid=self.jroe.uuid)
+
+    def test_affiliate_pending_individuals(self):
+        """Check if only the pending individuals are affiliated"""
+
+        ctx = SortingHatContext(self.user)
+
+        restore_pending_affiliations(INDIVIDUALS, [self.jsmith.uuid])
+
+        # Test
+        expected = {
+            'results': {
+                self.jsmith.uuid: ['Example']
+            },
+            'errors': []
+        }
+
+        job = affiliate_pending.delay(ctx)
+        result = job.result
+
+        self.assertDictEqual(result, expected)
+
+        # The queue was drained
+        self.assertEqual(count_pending_affiliations(INDIVIDUALS), 0)
+
+        # Jane Roe was not affiliated
+        individual_db = Individual.objects.get(mk=self.jroe.uuid)
+        enrollments_db = individual_db.enrollments.all()
+        self.assertEqual(len(enrollments_db), 0)
+
+    def test_affiliate_pending_domains(self):
+        """Check if the individuals with emails on the pending domains are affiliated"""
+
+        ctx = SortingHatContext(self.user)
+
+        restore_pending_affiliations(DOMAINS, ['bitergia.com'])
+
+        # Test
+        expected = {
+            'results': {
+                self.jroe.uuid: ['Bitergia', 'Example']
+            },
+            'errors': []
+        }
+
+        job = affiliate_pending.delay(ctx)
+        result = job.result
+
+        self.assertDictEqual(result, expected)
+        self.assertEqual(count_pending_affiliations(DOMAINS), 0)
+
+        # John Smith was not affiliated
+        individual_db = Individual.objects.get(mk=self.jsmith.uuid)
+        enrollments_db = individual_db.enrollments.all()
+        self.assertEqual(len(enrollments_db), 0)
+
+    def test_affiliate_pending_top_domain(self):
+        """Check if the sub-domains of a pending top domain are affiliated"""
+
+        ctx = SortingHatContext(self.user)
+
+        restore_pending_affiliations(DOMAINS, ['example.com'])
+
+        # Test
+        expected = {
+            'results': {
+                self.jsmith.uuid: ['Example'],
+                self.jroe.uuid: ['Bitergia', 'Example']
+            },
+            'errors': []
+        }
+
+        job = affiliate_pending.delay(ctx)
+        result = job.result
+
+        self.assertDictEqual(result, expected)
+
+    def test_empty_queue(self):
+        """Check if nothing is affiliated when the queue is empty"""
+
+        ctx = SortingHatContext(self.user)
+
+        job = affiliate_pending.delay(ctx)
+        result = job.result
+
+        self.assertDictEqual(result, {'results': {}, 'errors': []})
+
+        progress = job.meta['progress']
+        self.assertEqual(progress['phase'], None)
+        self.assertEqual(progress['processed'], 0)
+
+    @unittest.mock.patch('sortinghat.core.jobs._affiliate_individual')
+    def test_restore_pending_on_failure(self, mock_affiliate):
+        """Check if the pending elements are queued again when the job fails"""
+
+        mock_affiliate.side_effect = RuntimeError('unexpected error')
+
+        ctx = SortingHatContext(self.user)
+
+        restore_pending_affiliations(INDIVIDUALS, [self.jsmith.uuid])
+        restore_pending_affiliations(DOMAINS, ['bitergia.com'])
+
+        job = affiliate_pending.delay(ctx)
+
+        self.assertTrue(job.is_failed)
+        self.assertEqual(count_pending_affiliations(INDIVIDUALS), 1)
+        self.assertEqual(count_pending_affiliations(DOMAINS), 1)
+
+
 class TestRecommendMatches(TestCase):
     """Unit tests for recommend_matches"""
 
@@ -830,14 +1453,61 @@ class TestRecommendMatches(TestCase):
         for key in result['results']:
             result['results'][key] = sorted(result['results'][key])
 
-        self.assertDictEqual(result, expected)
+        self.assertDictEqual(result, expected)
+
+        self.assertEqual(MergeRecommendation.objects.count(), 2)
+
+        for rec in recommendations_expected:
+            self.assertTrue(
+                MergeRecommendation.objects.filter(individual1=rec[0],
+                                                   individual2=rec[1]).exists())
+
+    def test_recommend_matches_score(self):
+        """Check if recommendations are stored with their confidence score"""
+
+        ctx = SortingHatContext(self.user)
+
+        source_uuids = [self.john_smith.uuid]
+        target_uuids = [self.john_smith.uuid, self.jsmith.uuid]
+
+        criteria = ['email', 'name', 'username']
+
+        recommend_matches.delay(ctx,
+                                source_uuids,
+                                target_uuids,
+                                criteria)
+
+        self.assertEqual(MergeRecommendation.objects.count(), 1)
+
+        rec = MergeRecommendation.objects.get()
+        self.assertGreater(rec.score, 0)
+        self.assertEqual(rec.score_details['criteria'], ['email', 'name', 'username'])
+        self.assertEqual(rec.score_details['trusted_source'], False)
+
+    def test_recommend_matches_score_existing(self):
+        """Check if the score of recommendations already stored is updated"""
+
+        ctx = SortingHatContext(self.user)
 
-        self.assertEqual(MergeRecommendation.objects.count(), 2)
+        mk1, mk2 = sorted([self.john_smith.uuid, self.jsmith.uuid])
+        MergeRecommendation.objects.create(individual1_id=mk1,
+                                           individual2_id=mk2)
 
-        for rec in recommendations_expected:
-            self.assertTrue(
-                MergeRecommendation.objects.filter(individual1=rec[0],
-                                                   individual2=rec[1]).exists())
+        source_uuids = [self.john_smith.uuid]
+        target_uuids = [self.john_smith.uuid, self.jsmith.uuid]
+
+        criteria = ['email', 'name', 'username']
+
+        recommend_matches.delay(ctx,
+                                source_uuids,
+                                target_uuids,
+                                criteria)
+
+        self.assertEqual(MergeRecommendation.objects.count(), 1)
+
+        rec = MergeRecommendation.objects.get()
+        self.assertGreater(rec.score, 0)
+        self.assertEqual(rec.score_details['criteria'], ['email', 'name', 'username'])
 
     def test_recommend_matches_no_strict(self):
         """Check if recommendations are obtained for the specified individuals without strict mode"""
@@ -1326,6 +1996,106 @@ class TestRecommendMatches(TestCase):
         self.assertEqual(trx.authored_by, ctx.user.username)
 
 
+class TestScoreMergeRecommendations(TestCase):
+    """Unit tests for score_merge_recommendations"""
+
+    def setUp(self):
+        """Initialize database with a dataset"""
+
+        self.user = get_user_model().objects.create(username='test')
+        self.ctx = SortingHatContext(self.user)
+
+        self.john_smith = api.add_identity(self.ctx,
+                                           email='jsmith@example.com',
+                                           name='John Smith',
+                                           source='scm')
+        self.jsmith = api.add_identity(self.ctx,
+                                       email='jsmith@example.com',
+                                       name='John Smith',
+                                       source='git')
+        self.jrae = api.add_identity(self.ctx,
+                                     email='jrae@example.net',
+                                     name='Jane Rae',
+                                     source='scm')
+        self.jane_rae = api.add_identity(self.ctx,
+                                         email='jrae@example.net',
+                                         source='git')
+
+    def test_score_merge_recommendations(self):
+        """Check if the score of pending recommendations is calculated"""
+
+        mk1, mk2 = sorted([self.john_smith.uuid, self.jsmith.uuid])
+        rec1 = MergeRecommendation.objects.create(individual1_id=mk1,
+                                                  individual2_id=mk2)
+        mk1, mk2 = sorted([self.jrae.uuid, self.jane_rae.uuid])
+        rec2 = MergeRecommendation.objects.create(individual1_id=mk1,
+                                                  individual2_id=mk2,
+                                                  applied=False)
+
+        job = score_merge_recommendations.delay(self.ctx)
+        result = job.result
+
+        rec1.refresh_from_db()
+        self.assertGreater(rec1.score, 0)
+        self.assertEqual(rec1.score_details['criteria'], ['email', 'name'])
+        self.assertDictEqual(result, {'results': {rec1.id: rec1.score}})
+
+        # Dismissed recommendations are not scored
+        rec2.refresh_from_db()
+        self.assertEqual(rec2.score, 0)
+        self.assertIsNone(rec2.score_details)
+
+    @unittest.mock.patch('sortinghat.core.jobs.MAX_CHUNK_SIZE', 1)
+    def test_score_in_chunks(self):
+        """Check if recommendations are scored in chunks"""
+
+        mk1, mk2 = sorted([self.john_smith.uuid, self.jsmith.uuid])
+        rec1 = MergeRecommendation.objects.create(individual1_id=mk1,
+                                                  individual2_id=mk2)
+        mk1, mk2 = sorted([self.jrae.uuid, self.jane_rae.uuid])
+        rec2 = MergeRecommendation.objects.create(individual1_id=mk1,
+                                                  individual2_id=mk2)
+
+        job = score_merge_recommendations.delay(self.ctx)
+        result = job.result
+
+        self.assertListEqual(sorted(result['results'].keys()), sorted([rec1.id, rec2.id]))
+
+        rec2.refresh_from_db()
+        self.assertGreater(rec2.score, 0)
+        self.assertEqual(rec2.score_details['criteria'], ['email'])
+
+        progress = job.meta['progress']
+        self.assertEqual(progress['processed'], 2)
+        self.assertEqual(progress['total'], 2)
+
+    def test_transactions(self):
+        """Check if the right transactions were created"""
+
+        mk1, mk2 = sorted([self.john_smith.uuid, self.jsmith.uuid])
+        rec = MergeRecommendation.objects.create(individual1_id=mk1,
+                                                 individual2_id=mk2)
+
+        timestamp = datetime_utcnow()
+
+        job = score_merge_recommendations.delay(self.ctx)
+
+        transactions = Transaction.objects.filter(created_at__gte=timestamp)
+        self.assertEqual(len(transactions), 1)
+
+        trx = transactions[0]
+        self.assertEqual(trx.name, 'score_merge_recommendations')
+        self.assertEqual(trx.job_id, job.id)
+
+        operations = Operation.objects.filter(trx=trx)
+        self.assertEqual(len(operations), 1)
+        self.assertEqual(operations[0].entity_type, 'merge_recommendation')
+        self.assertEqual(operations[0].target, 'merge_recommendations')
+
+        args = json.loads(operations[0].args)
+        self.assertListEqual(args['merge_recommendations'], [rec.id])
+
+
 class TestUnify(TestCase):
     """Unit tests for unify"""
 
@@ -1859,6 +2629,321 @@ class TestUnify(TestCase):
 
         self.assertDictEqual(result, expected)
 
+    def test_unify_max_group_size(self):
+        """Check if groups larger than the maximum size are not merged"""
+
+        ctx = SortingHatContext(self.user)
+
+        source_uuids = [self.john_smith.uuid, self.jrae3.uuid, self.jr2.uuid]
+        criteria = ['email', 'name', 'username']
+
+        n_individuals = Individual.objects.count()
+
+        job = unify.delay(ctx,
+                          criteria,
+                          source_uuids,
+                          max_group_size=1)
+        result = job.result
+
+        self.assertListEqual(result['results'], [])
+        self.assertEqual(len(result['errors']), 2)
+
+        for error in result['errors']:
+            self.assertRegex(error, r"^Group of 2 individuals with [0-9a-f]+ exceeds the maximum size of 1; skipped$")
+
+        # Individuals were not merged
+        self.assertEqual(Individual.objects.count(), n_individuals)
+
+        # Statistics about the groups are stored in the job
+        stats = job.meta['groups']
+        self.assertEqual(stats['components'], 2)
+        self.assertEqual(stats['elements'], 4)
+        self.assertEqual(stats['max_size'], 2)
+        self.assertEqual(stats['oversized'], 2)
+
+    def test_unify_max_group_size_setting(self):
+        """Check if the maximum size of the groups is read from the settings"""
+
+        ctx = SortingHatContext(self.user)
+
+        source_uuids = [self.john_smith.uuid, self.jrae3.uuid, self.jr2.uuid]
+        criteria = ['email', 'name', 'username']
+
+        with self.settings(MATCH_MAX_GROUP_SIZE=1):
+            job = unify.delay(ctx,
+                              criteria,
+                              source_uuids)
+
+        result = job.result
+        self.assertListEqual(result['results'], [])
+        self.assertEqual(len(result['errors']), 2)
+
+    @unittest.mock.patch('sortinghat.core.jobs.MERGE_CHUNK_SIZE', 1)
+    def test_unify_progress(self):
+        """Check if the progress of the job is published"""
+
+        ctx = SortingHatContext(self.user)
+
+        source_uuids = [self.john_smith.uuid, self.jrae3.uuid, self.jr2.uuid]
+        criteria = ['email', 'name', 'username']
+
+        job = unify.delay(ctx,
+                          criteria,
+                          source_uuids)
+
+        progress = job.meta['progress']
+        self.assertIsNone(progress['phase'])
+        self.assertEqual(progress['processed'], 2)
+        self.assertEqual(progress['total'], 2)
+        self.assertListEqual(list(progress['phases'].keys()), ['matching', 'merging'])
+
+    @unittest.mock.patch('sortinghat.core.jobs.MERGE_CHUNK_SIZE', 1)
+    def test_unify_chunks(self):
+        """Check if groups are merged in chunks"""
+
+        ctx = SortingHatContext(self.user)
+
+        source_uuids = [self.john_smith.uuid, self.jrae3.uuid, self.jr2.uuid]
+        criteria = ['email', 'name', 'username']
+
+        timestamp = datetime_utcnow()
+
+        job = unify.delay(ctx,
+                          criteria,
+                          source_uuids)
+        result = job.result
+
+        self.assertEqual(len(result['results']), 2)
+        self.assertListEqual(result['errors'], [])
+
+        # A merge transaction for each chunk
+        transactions = Transaction.objects.filter(created_at__gte=timestamp,
+                                                  name__startswith='merge-')
+        self.assertEqual(len(transactions), 2)
+
+        for mk in result['results']:
+            individual = Individual.objects.get(mk=mk)
+            self.assertGreater(individual.identities.count(), 3)
+
+    @unittest.mock.patch('sortinghat.core.jobs.MERGE_CHUNK_SIZE', 1)
+    def test_unify_child_jobs(self):
+        """Check if chunks are merged by child jobs and their results aggregated"""
+
+        ctx = SortingHatContext(self.user)
+
+        source_uuids = [self.john_smith.uuid, self.jrae3.uuid, self.jr2.uuid]
+        criteria = ['email', 'name', 'username']
+
+        job = unify.delay(ctx,
+                          criteria,
+                          source_uuids)
+        result = job.result
+
+        children = job.meta['children']
+        self.assertEqual(len(children), 2)
+
+        merged = []
+        for child_id in children:
+            child = Job.fetch(child_id, connection=django_rq.get_connection())
+            self.assertEqual(child.func_name, 'sortinghat.core.jobs.unify_groups')
+            self.assertEqual(child.get_status(), JobStatus.FINISHED)
+            self.assertEqual(child.meta['parent'], job.id)
+            self.assertListEqual(child.return_value()['errors'], [])
+            merged.extend(child.return_value()['results'])
+
+        self.assertListEqual(sorted(result['results']), sorted([self.jsmith.uuid, self.jrae.uuid]))
+        self.assertListEqual(result['results'], merged)
+        self.assertListEqual(result['errors'], [])
+
+    @unittest.mock.patch('sortinghat.core.jobs.MERGE_CHUNK_SIZE', 1)
+    @unittest.mock.patch('sortinghat.core.jobs.get_tenant_queue')
+    def test_unify_take_queued_chunks(self, mock_queue):
+        """Check if the parent job merges the chunks no worker has started"""
+
+        # Child jobs stay in the queue because there are no workers
+        queue = django_rq.get_queue(is_async=True)
+        mock_queue.return_value = queue
+
+        ctx = SortingHatContext(self.user)
+
+        source_uuids = [self.john_smith.uuid, self.jrae3.uuid, self.jr2.uuid]
+        criteria = ['email', 'name', 'username']
+
+        job = unify.delay(ctx,
+                          criteria,
+                          source_uuids)
+        result = job.result
+
+        self.assertListEqual(sorted(result['results']), sorted([self.jsmith.uuid, self.jrae.uuid]))
+        self.assertListEqual(result['errors'], [])
+
+        # Chunks were merged by the parent, so the children were canceled
+        self.assertEqual(len(job.meta['children']), 2)
+        self.assertEqual(queue.count, 0)
+        for child_id in job.meta['children']:
+            child = Job.fetch(child_id, connection=queue.connection)
+            self.assertEqual(child.get_status(), JobStatus.CANCELED)
+
+        individual = Individual.objects.get(mk=self.jsmith.uuid)
+        self.assertEqual(individual.identities.count(), 6)
+
+    @unittest.mock.patch('sortinghat.core.jobs.MERGE_CHUNK_SIZE', 1)
+    @unittest.mock.patch('sortinghat.core.jobs.bulk_merge')
+    def test_unify_child_job_failed(self, mock_bulk_merge):
+        """Check if the errors of failed chunks are aggregated when the parent can't merge them either"""
+
+        mock_bulk_merge.side_effect = RuntimeError('unexpected error')
+
+        ctx = SortingHatContext(self.user)
+
+        source_uuids = [self.john_smith.uuid, self.jrae3.uuid, self.jr2.uuid]
+        criteria = ['email', 'name', 'username']
+
+        job = unify.delay(ctx,
+                          criteria,
+                          source_uuids)
+        result = job.result
+
+        self.assertListEqual(result['results'], [])
+        self.assertEqual(len(result['errors']), 2)
+
+        for child_id, error in zip(job.meta['children'], result['errors']):
+            msg = (f"Child job {child_id} did not finish (failed) and merging "
+                   "its chunk again failed: unexpected error; 1 groups were not merged")
+            self.assertEqual(error, msg)
+
+    @unittest.mock.patch('sortinghat.core.jobs.MERGE_CHUNK_SIZE', 1)
+    @unittest.mock.patch('sortinghat.core.jobs.bulk_merge')
+    def test_unify_child_job_retried(self, mock_bulk_merge):
+        """Check if the parent job merges again the chunks of failed child jobs"""
+
+        # Only the calls made by the child jobs fail
+        calls = []
+
+        def fail_children(*args, **kwargs):
+            calls.append(args)
+            if len(calls) <= 2:
+                raise RuntimeError('unexpected error')
+            return api.bulk_merge(*args, **kwargs)
+
+        mock_bulk_merge.side_effect = fail_children
+
+        ctx = SortingHatContext(self.user)
+
+        source_uuids = [self.john_smith.uuid, self.jrae3.uuid, self.jr2.uuid]
+        criteria = ['email', 'name', 'username']
+
+        job = unify.delay(ctx,
+                          criteria,
+                          source_uuids)
+        result = job.result
+
+        self.assertListEqual(sorted(result['results']), sorted([self.jsmith.uuid, self.jrae.uuid]))
+        self.assertListEqual(result['errors'], [])
+        self.assertEqual(len(calls), 4)
+
+        for child_id in job.meta['children']:
+            child = Job.fetch(child_id, connection=django_rq.get_connection())
+            self.assertEqual(child.get_status(), JobStatus.FAILED)
+
+        individual = Individual.objects.get(mk=self.jsmith.uuid)
+        self.assertEqual(individual.identities.count(), 6)
+
+    @unittest.mock.patch('sortinghat.core.jobs.MERGE_CHUNK_SIZE', 1)
+    @unittest.mock.patch('sortinghat.core.jobs.UNIFY_CHUNK_TIMEOUT', 1)
+    @unittest.mock.patch('sortinghat.core.jobs.get_tenant_queue')
+    @unittest.mock.patch('sortinghat.core.jobs.Job.get_status')
+    def test_unify_child_job_timeout(self, mock_status, mock_queue):
+        """Check if the chunks of child jobs still running after their timeout are not merged again"""
+
+        # Child jobs stay in the queue but they look like running
+        queue = django_rq.get_queue(is_async=True)
+        mock_queue.return_value = queue
+        self.addCleanup(queue.connection.flushall)
+        mock_status.return_value = JobStatus.STARTED
+
+        ctx = SortingHatContext(self.user)
+
+        source_uuids = [self.john_smith.uuid, self.jrae3.uuid, self.jr2.uuid]
+        criteria = ['email', 'name', 'username']
+
+        job = unify.delay(ctx,
+                          criteria,
+                          source_uuids)
+        result = job.result
+
+        self.assertListEqual(result['results'], [])
+        self.assertEqual(len(result['errors']), 2)
+
+        for child_id, error in zip(job.meta['children'], result['errors']):
+            msg = f"Child job {child_id} did not finish after 1 seconds; 1 groups were not merged"
+            self.assertEqual(error, msg)
+
+        # Chunks were not merged by the parent
+        self.assertEqual(queue.count, 2)
+        self.assertEqual(Individual.objects.filter(mk=self.john_smith.uuid).count(), 1)
+
+    @unittest.mock.patch('sortinghat.core.jobs.MERGE_CHUNK_SIZE', 1)
+    @unittest.mock.patch('sortinghat.core.jobs.find_match_groups')
+    def test_unify_resume(self, mock_find_groups):
+        """Check if unify resumes merging the chunks not merged yet"""
+
+        ctx = SortingHatContext(self.user)
+
+        source_uuids = [self.john_smith.uuid, self.jrae3.uuid, self.jr2.uuid]
+        criteria = ['email', 'name', 'username']
+
+        # The first chunk was merged before the job was interrupted
+        groups = [
+            (self.jsmith.uuid, [self.john_smith.uuid]),
+            (self.jrae.uuid, [self.jane_rae.uuid])
+        ]
+        job = resume_job(unify, ctx, criteria, source_uuids,
+                         results={'0': [self.jsmith.uuid]},
+                         errors=['Group skipped'],
+                         data={'groups': groups},
+                         grouped=True)
+        result = job.result
+
+        expected = {
+            'results': [self.jsmith.uuid, self.jrae.uuid],
+            'errors': ['Group skipped']
+        }
+        self.assertDictEqual(result, expected)
+        self.assertNotIn('checkpoint', job.meta)
+
+        # Groups were not searched again
+        mock_find_groups.assert_not_called()
+
+        # Only the pending chunk was merged
+        self.assertEqual(Individual.objects.filter(mk=self.john_smith.uuid).count(), 1)
+        self.assertEqual(Individual.objects.filter(mk=self.jane_rae.uuid).count(), 0)
+
+    @unittest.mock.patch('sortinghat.core.jobs.bulk_merge')
+    def test_unify_bulk_merge_error(self, mock_bulk_merge):
+        """Check if groups are merged one by one when the bulk merge fails"""
+
+        mock_bulk_merge.side_effect = InvalidValueError(msg='bulk merge failed')
+
+        ctx = SortingHatContext(self.user)
+
+        expected = {
+            'results': [self.jsmith.uuid,
+                        self.jrae.uuid],
+            'errors': []
+        }
+
+        source_uuids = [self.john_smith.uuid, self.jrae3.uuid, self.jr2.uuid]
+        criteria = ['email', 'name', 'username']
+
+        job = unify.delay(ctx,
+                          criteria,
+                          source_uuids)
+        result = job.result
+
+        self.assertDictEqual(result, expected)
+        self.assertEqual(mock_bulk_merge.call_count, 1)
+
     def test_transactions(self):
         """Check if the right transactions were created"""
 
@@ -1903,26 +2988,31 @@ def setup_genderize_server():
         http_requests.append(last_request)
 
         params = last_request.querystring
-        name = params['name'][0].lower()
+        names = [name.lower() for name in params['name[]']]
 
-        if name == 'error':
+        if 'error' in names:
             return 502, headers, 'Bad Gateway'
 
-        if name == 'john':
-            data = {
-                'gender': 'male',
-                'probability': 0.92
-            }
-        elif name == 'jane':
-            data = {
-                'gender': 'female',
-                'probability': 0.89
-            }
-        else:
-            data = {
-                'gender': None,
-                'probability': None
-            }
+        data = []
+        for name in names:
+            if name == 'john':
+                data.append({
+                    'name': name,
+                    'gender': 'male',
+                    'probability': 0.92
+                })
+            elif name == 'jane':
+                data.append({
+                    'name': name,
+                    'gender': 'female',
+                    'probability': 0.89
+                })
+            else:
+                data.append({
+                    'name': name,
+                    'gender': None,
+                    'probability': None
+                })
 
         body = json.dumps(data)
 
@@ -2086,6 +3176,38 @@ class TestGenderize(TestCase):
         gender_2 = individual_2.profile.gender
         self.assertEqual(gender_2, 'female')
 
+    @httpretty.activate
+    def test_genderize_resume(self):
+        """Check if the job resumes from the last chunk of individuals"""
+
+        ctx = SortingHatContext(self.user)
+
+        expected = {
+            'results': {
+                self.jsmith.uuid: ('male', 92),
+                self.jdoe.uuid: ('female', 89)
+            },
+            'errors': []
+        }
+
+        setup_genderize_server()
+
+        uuids = [self.jsmith.uuid, self.jdoe.uuid]
+        job = resume_job(genderize, ctx, uuids,
+                         offset=1,
+                         results={self.jsmith.uuid: ('male', 92)},
+                         errors=[])
+        result = job.result
+
+        self.assertDictEqual(result, expected)
+
+        # The profile of the first individual was not updated again
+        individual = Individual.objects.get(mk=self.jsmith.uuid)
+        self.assertIsNone(individual.profile.gender)
+
+        individual = Individual.objects.get(mk=self.jdoe.uuid)
+        self.assertEqual(individual.profile.gender, 'female')
+
 
 class MockTestImporter(IdentitiesImporter):
     NAME = 'test_backend'
@@ -2130,6 +3252,22 @@ class TestImportIdentities(TestCase):
         self.assertEqual(identity.source, 'test_backend')
         self.assertEqual(identity.username, 'test_user')
 
+    @unittest.mock.patch('sortinghat.core.importer.backend.find_backends')
+    def test_import_identities_resume(self, mock_find_backends):
+        """Check if the import resumes from the last individual imported"""
+
+        mock_find_backends.return_value = {'test_backend': MockTestImporter}
+
+        ctx = SortingHatContext(self.user)
+
+        job = resume_job(import_identities, ctx, 'test_backend', 'my_url',
+                         offset=1, imported=3)
+        result = job.result
+
+        # The only individual was imported before the interruption
+        self.assertEqual(result, 3)
+        self.assertEqual(Individual.objects.count(), 0)
+
     @unittest.mock.patch('sortinghat.core.importer.backend.find_backends')
     def test_backend_not_found(self, mock_find_backends):
         """Check if the importer is executed correctly"""
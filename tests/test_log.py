@@ -245,6 +245,83 @@ class TestLogTransaction(TestCase):
         self.assertEqual(operation_db.args, json.dumps(input_args2))
         self.assertEqual(input_args2, json.loads(operation_db.args))
 
+    def test_log_operations_in_bulk(self):
+        """Check if several operations are logged at once"""
+
+        trxl = TransactionsLog.open('test', self.ctx)
+        timestamp = datetime_utcnow()
+        input_args = [{'mk': '12345abcd'}, {'mk': '67890efgh'}]
+
+        ops = trxl.log_operations([
+            {
+                'op_type': Operation.OpType.ADD,
+                'entity_type': 'test_entity',
+                'timestamp': timestamp,
+                'args': args,
+                'target': args['mk']
+            }
+            for args in input_args
+        ])
+        self.assertEqual(len(ops), 2)
+
+        operations = Operation.objects.filter(trx=trxl.trx).order_by('target')
+        self.assertEqual(len(operations), 2)
+
+        for operation_db, op, args in zip(operations, ops, input_args):
+            self.assertEqual(operation_db.ouid, op.ouid)
+            self.assertEqual(operation_db.op_type, Operation.OpType.ADD.value)
+            self.assertEqual(operation_db.entity_type, 'test_entity')
+            self.assertEqual(operation_db.timestamp, timestamp)
+            self.assertEqual(operation_db.trx, trxl.trx)
+            self.assertEqual(operation_db.target, args['mk'])
+            self.assertEqual(args, json.loads(operation_db.args))
+
+    def test_log_operations_invalid(self):
+        """Check if no operation is logged when any of them is invalid"""
+
+        trxl = TransactionsLog.open('test', self.ctx)
+        timestamp = datetime_utcnow()
+
+        operations = [
+            {
+                'op_type': Operation.OpType.ADD,
+                'entity_type': 'test_entity',
+                'timestamp': timestamp,
+                'args': {'mk': '12345abcd'},
+                'target': 'test'
+            },
+            {
+                'op_type': '',
+                'entity_type': 'test_entity',
+                'timestamp': timestamp,
+                'args': {'mk': '67890efgh'},
+                'target': 'test'
+            }
+        ]
+
+        with self.assertRaisesRegex(TypeError, OPERATION_TYPE_EMPTY_ERROR):
+            trxl.log_operations(operations)
+
+        operations = Operation.objects.filter(trx=trxl.trx)
+        self.assertEqual(len(operations), 0)
+
+    def test_log_operations_closed_transaction(self):
+        """Check if it fails when logging operations on a closed transaction"""
+
+        trxl = TransactionsLog.open('test', self.ctx)
+        tuid = trxl.trx.tuid
+        trxl.close()
+
+        error_msg = OPERATION_TRANSACTION_CLOSED_ERROR.format(tuid=tuid)
+        with self.assertRaisesRegex(ClosedTransactionError, error_msg):
+            trxl.log_operations([{
+                'op_type': Operation.OpType.UPDATE,
+                'entity_type': 'test_entity',
+                'timestamp': datetime_utcnow(),
+                'args': {'mk': '12345abcd'},
+                'target': 'test'
+            }])
+
     def test_log_operation_closed_transaction(self):
         """Check if it fails when logging an operation on a closed transaction"""
 
@@ -788,6 +788,18 @@ class TestEnrollment(TransactionTestCase):
 class TestRecommenderExclusionTerm(TransactionTestCase):
     """Unit tests for RecommenderExclusionTerm class"""
 
+    def test_normalized_term(self):
+        """Check if the normalized term is stored in lowercase"""
+
+        term = RecommenderExclusionTerm.objects.create(term='John Smith')
+        self.assertEqual(term.normalized_term, 'john smith')
+
+        term.term = 'JSmith@Example.com'
+        term.save()
+
+        term.refresh_from_db()
+        self.assertEqual(term.normalized_term, 'jsmith@example.com')
+
     def test_unique_excluded(self):
         """Check whether the excluded term is in fact unique"""
 
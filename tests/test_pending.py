@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2020 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+import django_rq
+
+from django.test import TestCase, override_settings
+
+from sortinghat.core import tenant
+from sortinghat.core.pending import (INDIVIDUALS,
+                                     DOMAINS,
+                                     add_pending_affiliations,
+                                     count_pending_affiliations,
+                                     pop_pending_affiliations,
+                                     restore_pending_affiliations)
+
+
+@override_settings(AFFILIATE_INCREMENTAL=True)
+class TestPendingAffiliations(TestCase):
+    """Unit tests for the queue of pending affiliations"""
+
+    def setUp(self):
+        """Clean the queue"""
+
+        conn = django_rq.get_connection()
+        conn.flushall()
+
+    def test_add_pending(self):
+        """Check if individuals and domains are queued after committing"""
+
+        with self.captureOnCommitCallbacks(execute=True):
+            add_pending_affiliations(individuals=['AAAA', 'BBBB'])
+            add_pending_affiliations(individuals=['AAAA'], domains=['example.com'])
+
+        self.assertEqual(count_pending_affiliations(INDIVIDUALS), 2)
+        self.assertEqual(count_pending_affiliations(DOMAINS), 1)
+
+    def test_add_pending_not_committed(self):
+        """Check if nothing is queued until the transaction is committed"""
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            add_pending_affiliations(individuals=['AAAA'])
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(count_pending_affiliations(INDIVIDUALS), 0)
+
+    @override_settings(AFFILIATE_INCREMENTAL=False)
+    def test_disabled(self):
+        """Check if nothing is queued when the incremental affiliation is disabled"""
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            add_pending_affiliations(individuals=['AAAA'], domains=['example.com'])
+
+        self.assertEqual(len(callbacks), 0)
+        self.assertEqual(count_pending_affiliations(INDIVIDUALS), 0)
+        self.assertEqual(count_pending_affiliations(DOMAINS), 0)
+
+    def test_pop_pending(self):
+        """Check if elements are taken from the queue"""
+
+        with self.captureOnCommitCallbacks(execute=True):
+            add_pending_affiliations(individuals=['AAAA', 'BBBB', 'CCCC'])
+
+        first = pop_pending_affiliations(INDIVIDUALS, 2)
+        self.assertEqual(len(first), 2)
+
+        second = pop_pending_affiliations(INDIVIDUALS, 2)
+        self.assertEqual(len(second), 1)
+
+        self.assertListEqual(sorted(first + second), ['AAAA', 'BBBB', 'CCCC'])
+        self.assertListEqual(pop_pending_affiliations(INDIVIDUALS, 2), [])
+
+    def test_restore_pending(self):
+        """Check if elements are put back into the queue"""
+
+        restore_pending_affiliations(DOMAINS, ['example.com'])
+        restore_pending_affiliations(DOMAINS, [])
+
+        self.assertListEqual(pop_pending_affiliations(DOMAINS, 10), ['example.com'])
+
+    def test_pending_by_tenant(self):
+        """Check if each tenant has its own queue"""
+
+        with self.captureOnCommitCallbacks(execute=True):
+            add_pending_affiliations(individuals=['AAAA'])
+
+        tenant.set_db_tenant('tenant_1')
+
+        try:
+            self.assertEqual(count_pending_affiliations(INDIVIDUALS), 0)
+        finally:
+            tenant.unset_db_tenant()
+
+        self.assertEqual(count_pending_affiliations(INDIVIDUALS), 1)
@@ -79,7 +79,7 @@ DUPLICATED_RET_ERROR = "RecommenderExclusionTerm 'John Smith' already exists in
 DUPLICATED_ALIAS_ERROR = "Alias 'Example Inc.' already exists in the registry"
 TERM_EMPTY_ERROR = "'term' cannot be an empty string"
 TERM_EXAMPLE_DOES_NOT_EXIST_ERROR = "John Smith not found in the registry"
-RECOMMENDATION_MERGE_DOES_NOT_EXIST_ERROR = "MergeRecommendation matching query does not exist."
+RECOMMENDATION_MERGE_DOES_NOT_EXIST_ERROR = "1000 not found in the registry"
 RECOMMENDATION_GENDER_DOES_NOT_EXIST_ERROR = "GenderRecommendation matching query does not exist."
 RECOMMENDATION_AFFILIATION_DOES_NOT_EXIST_ERROR = "AffiliationRecommendation matching query does not exist."
 NAME_EMPTY_ERROR = "'name' cannot be an empty string"
@@ -661,6 +661,17 @@ SH_INDIVIDUALS_SOURCE_FILTER = """{
       }
     }
 }"""
+SH_INDIVIDUALS_EMAIL_DOMAIN_FILTER = """{
+    individuals(filters: {emailDomain: "%s"}) {
+      entities {
+        mk
+        identities {
+          email
+          emailDomain
+        }
+      }
+    }
+}"""
 SH_INDIVIDUALS_ENROLLMENT_FILTER = """{
     individuals(filters: {enrollment: "%s"}) {
       entities {
@@ -1053,6 +1064,26 @@ SH_JOB_QUERY_UNIFY = """{
     }
   }
 }"""
+SH_JOB_QUERY_PROGRESS = """{
+  job(
+    jobId:"%s"
+  ){
+    jobId
+    status
+    progress {
+      phase
+      processed
+      total
+      rate
+      eta
+      phases {
+        name
+        elapsed
+      }
+      updatedAt
+    }
+  }
+}"""
 SH_JOBS_QUERY = """{
   jobs(page: 1) {
     entities {
@@ -1216,6 +1247,19 @@ SH_MERGE_REC_QUERY = """{
     }
   }
 }"""
+SH_MERGE_REC_QUERY_SCORE = """{
+  recommendedMerge {
+    entities {
+      individual1 {
+        mk
+      }
+      individual2 {
+        mk
+      }
+      score
+    }
+  }
+}"""
 SH_MERGE_REC_QUERY_PAGINATION = """{
   recommendedMerge (
     page: %d
@@ -3471,6 +3515,47 @@ class TestQueryIndividuals(django.test.TestCase):
         individuals = executed['data']['individuals']['entities']
         self.assertEqual(len(individuals), 0)
 
+    def test_filter_email_domain(self):
+        """Check whether it returns the individuals with an email address in a domain"""
+
+        indv = Individual.objects.create(mk='c6d2504fde0e34b78a185c4b709e5442d045451c')
+        Identity.objects.create(uuid='B001',
+                                email='jdoe@Example.com',
+                                email_domain='example.com',
+                                source='git',
+                                individual=indv)
+        indv = Individual.objects.create(mk='17ab00ed3825ec2f50483e33c88df223264182ba')
+        Identity.objects.create(uuid='B002',
+                                email='jsmith@us.example.com',
+                                email_domain='us.example.com',
+                                source='git',
+                                individual=indv)
+
+        client = graphene.test.Client(schema)
+        executed = client.execute(SH_INDIVIDUALS_EMAIL_DOMAIN_FILTER % 'EXAMPLE.com',
+                                  context_value=self.context_value)
+
+        individuals = executed['data']['individuals']['entities']
+        self.assertEqual(len(individuals), 1)
+
+        indv = individuals[0]
+        self.assertEqual(indv['mk'], 'c6d2504fde0e34b78a185c4b709e5442d045451c')
+        self.assertEqual(indv['identities'][0]['emailDomain'], 'example.com')
+
+        executed = client.execute(SH_INDIVIDUALS_EMAIL_DOMAIN_FILTER % 'example.org',
+                                  context_value=self.context_value)
+
+        individuals = executed['data']['individuals']['entities']
+        self.assertEqual(len(individuals), 0)
+
+        # The reversed domain is only used internally
+        query = SH_INDIVIDUALS_EMAIL_DOMAIN_FILTER.replace('emailDomain\n', 'emailDomainReversed\n')
+        executed = client.execute(query % 'example.com',
+                                  context_value=self.context_value)
+
+        msg = executed['errors'][0]['message']
+        self.assertIn("Cannot query field 'emailDomainReversed'", msg)
+
     def test_filter_enrollment_date(self):
         """Check whether it returns the individual searched when using an enrollment date filter"""
 
@@ -5090,6 +5175,48 @@ class TestQueryRecommendedMerge(django.test.TestCase):
         self.assertEqual(rel1['individual1']['mk'], indv1.mk)
         self.assertEqual(rel1['individual2']['mk'], indv3.mk)
 
+    def test_recommended_merge_score(self):
+        """Check if recommendations are sorted by their confidence score"""
+
+        indv1 = Individual.objects.create(mk='AAAA')
+        Profile.objects.create(name='John Smith',
+                               email='jsmith@example.net',
+                               individual=indv1)
+        indv2 = Individual.objects.create(mk='BBBB')
+        Profile.objects.create(name='John Doe',
+                               email='jdoe@bitergia.com',
+                               individual=indv2)
+        indv3 = Individual.objects.create(mk='CCCC')
+        Profile.objects.create(name='Mary Doe',
+                               email='mdoe@bitergia.com',
+                               individual=indv3)
+        MergeRecommendation.objects.create(individual1=indv1, individual2=indv2, score=40)
+        MergeRecommendation.objects.create(individual1=indv1, individual2=indv3, score=90)
+        MergeRecommendation.objects.create(individual1=indv2, individual2=indv3, score=60)
+
+        # Tests
+        client = graphene.test.Client(schema)
+        executed = client.execute(SH_MERGE_REC_QUERY_SCORE,
+                                  context_value=self.context_value)
+
+        rels = executed['data']['recommendedMerge']['entities']
+        self.assertEqual(len(rels), 3)
+
+        rel = rels[0]
+        self.assertEqual(rel['individual1']['mk'], indv1.mk)
+        self.assertEqual(rel['individual2']['mk'], indv3.mk)
+        self.assertEqual(rel['score'], 90)
+
+        rel = rels[1]
+        self.assertEqual(rel['individual1']['mk'], indv2.mk)
+        self.assertEqual(rel['individual2']['mk'], indv3.mk)
+        self.assertEqual(rel['score'], 60)
+
+        rel = rels[2]
+        self.assertEqual(rel['individual1']['mk'], indv1.mk)
+        self.assertEqual(rel['individual2']['mk'], indv2.mk)
+        self.assertEqual(rel['score'], 40)
+
     def test_filter_is_applied(self):
         """Check whether it filter recommendations by is_applied"""
 
@@ -5349,13 +5476,14 @@ class TestQueryRecommendedGender(django.test.TestCase):
 class MockJob:
     """Class mock job queries."""
 
-    def __init__(self, job_id, func_name, status, result, error=None):
+    def __init__(self, job_id, func_name, status, result, error=None, meta=None):
         self.id = job_id
         self.func_name = func_name
         self.status = status
         self.result = result
         self.exc_info = error
         self.enqueued_at = datetime_utcnow()
+        self.meta = meta or {}
 
     def get_status(self):
         return self.status
@@ -5680,6 +5808,61 @@ class TestQueryJob(django.test.TestCase):
         self.assertEqual(job_data['errors'], None)
         self.assertEqual(job_data['result'], None)
 
+    @unittest.mock.patch('sortinghat.core.schema.find_job')
+    def test_job_progress(self, mock_job):
+        """Check if it returns the progress of a running job"""
+
+        meta = {
+            'progress': {
+                'phase': 'merging',
+                'processed': 250,
+                'total': 1000,
+                'rate': 50.0,
+                'eta': 15.0,
+                'phases': {
+                    'matching': 120.5
+                },
+                'updated_at': datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+            }
+        }
+
+        job = MockJob('90AB-CD12-3456-78EF', 'unify', 'started', None, meta=meta)
+        mock_job.return_value = job
+
+        # Tests
+        client = graphene.test.Client(schema)
+
+        query = SH_JOB_QUERY_PROGRESS % '90AB-CD12-3456-78EF'
+
+        executed = client.execute(query,
+                                  context_value=self.context_value)
+
+        progress = executed['data']['job']['progress']
+        self.assertEqual(progress['phase'], 'merging')
+        self.assertEqual(progress['processed'], 250)
+        self.assertEqual(progress['total'], 1000)
+        self.assertEqual(progress['rate'], 50.0)
+        self.assertEqual(progress['eta'], 15.0)
+        self.assertListEqual(progress['phases'], [{'name': 'matching', 'elapsed': 120.5}])
+        self.assertEqual(progress['updatedAt'], '2026-01-01T00:00:00+00:00')
+
+    @unittest.mock.patch('sortinghat.core.schema.find_job')
+    def test_job_no_progress(self, mock_job):
+        """Check if the progress is empty when the job did not publish it"""
+
+        job = MockJob('90AB-CD12-3456-78EF', 'unify', 'queued', None)
+        mock_job.return_value = job
+
+        # Tests
+        client = graphene.test.Client(schema)
+
+        query = SH_JOB_QUERY_PROGRESS % '90AB-CD12-3456-78EF'
+
+        executed = client.execute(query,
+                                  context_value=self.context_value)
+
+        self.assertIsNone(executed['data']['job']['progress'])
+
     def test_job_not_found(self):
         """Check if it returns an error when the job is not found"""
 
@@ -9912,6 +10095,94 @@ class TestUnmergeIdentitiesMutation(django.test.TestCase):
         self.assertEqual(msg, AUTHENTICATION_ERROR)
 
 
+class TestScoreMergeRecommendationsMutation(django.test.TestCase):
+    """Unit tests for mutation to score merge recommendations"""
+
+    SH_SCORE_MERGE_RECOMMENDATIONS = """
+        mutation scoreMergeRecommendations {
+            scoreMergeRecommendations {
+                jobId
+            }
+        }
+    """
+
+    def setUp(self):
+        """Load initial dataset and set queries context"""
+
+        conn = django_rq.get_connection()
+        conn.flushall()
+
+        self.user = get_user_model().objects.create(username='test',
+                                                    is_superuser=True)
+        self.context_value = RequestFactory().get(GRAPHQL_ENDPOINT)
+        self.context_value.user = self.user
+
+        self.ctx = SortingHatContext(self.user)
+
+        self.jsmith = api.add_identity(self.ctx,
+                                       source='scm',
+                                       email='jsmith@example.com',
+                                       name='John Smith')
+        self.john_smith = api.add_identity(self.ctx,
+                                           source='git',
+                                           email='jsmith@example.com',
+                                           name='John Smith')
+
+    @unittest.mock.patch('sortinghat.core.jobs.rq.job.uuid4')
+    def test_score_merge_recommendations(self, mock_job_id_gen):
+        """Check if pending merge recommendations are scored"""
+
+        mock_job_id_gen.return_value = "1234-5678-90AB-CDEF"
+
+        mk1, mk2 = sorted([self.jsmith.uuid, self.john_smith.uuid])
+        rec = MergeRecommendation.objects.create(individual1_id=mk1,
+                                                 individual2_id=mk2)
+
+        client = graphene.test.Client(schema)
+
+        executed = client.execute(self.SH_SCORE_MERGE_RECOMMENDATIONS,
+                                  context_value=self.context_value)
+
+        # Check if the job was run and the recommendation was scored
+        job_id = executed['data']['scoreMergeRecommendations']['jobId']
+        self.assertEqual(job_id, "1234-5678-90AB-CDEF")
+
+        rec.refresh_from_db()
+        self.assertGreater(rec.score, 0)
+
+    def test_authentication(self):
+        """Check if it fails when a non-authenticated user executes the query"""
+
+        context_value = RequestFactory().get(GRAPHQL_ENDPOINT)
+        context_value.user = AnonymousUser()
+
+        client = graphene.test.Client(schema)
+
+        executed = client.execute(self.SH_SCORE_MERGE_RECOMMENDATIONS,
+                                  context_value=context_value)
+
+        msg = executed['errors'][0]['message']
+
+        self.assertEqual(msg, AUTHENTICATION_ERROR)
+
+    def test_authorization(self):
+        """Check if it fails when a non-authorized user executes the job"""
+
+        user = get_user_model().objects.create(username='test_unauthorized')
+        context_value = RequestFactory().get(GRAPHQL_ENDPOINT)
+        context_value.user = user
+        client = graphene.test.Client(schema)
+
+        self.assertFalse(user.has_perm(EXECUTE_JOB_PERMISSION))
+
+        executed = client.execute(self.SH_SCORE_MERGE_RECOMMENDATIONS,
+                                  context_value=context_value)
+
+        msg = executed['errors'][0]['message']
+
+        self.assertEqual(msg, AUTHORIZATION_ERROR)
+
+
 class TestAffiliateMutation(django.test.TestCase):
     """Unit tests for mutation to affiliate individuals"""
 
@@ -10759,26 +11030,31 @@ def setup_genderize_server():
         http_requests.append(last_request)
 
         params = last_request.querystring
-        name = params['name'][0].lower()
+        names = [name.lower() for name in params['name[]']]
 
-        if name == 'error':
+        if 'error' in names:
             return 502, headers, 'Bad Gateway'
 
-        if name == 'john':
-            data = {
-                'gender': 'male',
-                'probability': 0.99
-            }
-        elif name == 'jane':
-            data = {
-                'gender': 'female',
-                'probability': 0.99
-            }
-        else:
-            data = {
-                'gender': None,
-                'probability': None
-            }
+        data = []
+        for name in names:
+            if name == 'john':
+                data.append({
+                    'name': name,
+                    'gender': 'male',
+                    'probability': 0.99
+                })
+            elif name == 'jane':
+                data.append({
+                    'name': name,
+                    'gender': 'female',
+                    'probability': 0.99
+                })
+            else:
+                data.append({
+                    'name': name,
+                    'gender': None,
+                    'probability': None
+                })
 
         body = json.dumps(data)
 
@@ -11273,6 +11549,34 @@ class TestManageRecommendationMergeMutation(django.test.TestCase):
         with self.assertRaises(django.core.exceptions.ObjectDoesNotExist):
             MergeRecommendation.objects.get(id=rec.id)
 
+    def test_apply_recommendation_merge_move(self):
+        """Check whether the recommendations of the merged individual are moved"""
+
+        indv1 = Individual.objects.create(mk='AAAA')
+        indv2 = Individual.objects.create(mk='BBBB')
+        indv3 = Individual.objects.create(mk='CCCC')
+        for indv in (indv1, indv2, indv3):
+            Profile.objects.create(individual=indv)
+        rec = MergeRecommendation.objects.create(individual1=indv1, individual2=indv2)
+        MergeRecommendation.objects.create(individual1=indv2, individual2=indv3)
+
+        timestamp = datetime_utcnow()
+
+        client = graphene.test.Client(schema)
+        executed = client.execute(self.SH_MANAGE_REC % (rec.id, "true"),
+                                  context_value=self.context_value)
+
+        rel = executed['data']['manageMergeRecommendation']
+        self.assertEqual(rel['applied'], True)
+
+        recs = MergeRecommendation.objects.values_list('individual1', 'individual2')
+        self.assertListEqual(list(recs), [('AAAA', 'CCCC')])
+
+        # The merge was logged
+        transactions = Transaction.objects.filter(created_at__gte=timestamp,
+                                                  name='apply_merge_recommendations')
+        self.assertEqual(len(transactions), 1)
+
     def test_dismiss_recommendation_merge(self):
         """Check whether it dismiss a recommendation"""
 
@@ -11330,6 +11634,182 @@ class TestManageRecommendationMergeMutation(django.test.TestCase):
         self.assertEqual(msg, AUTHENTICATION_ERROR)
 
 
+class TestManageRecommendationsMergeMutation(django.test.TestCase):
+    """Unit tests for mutation to manage several match recommendations"""
+
+    SH_MANAGE_RECS = """
+      mutation manageMergeRecommendations {
+        manageMergeRecommendations (recommendationIds: %s, apply: %s) {
+          applied
+          uuids
+          individuals {
+            mk
+          }
+        }
+      }
+    """
+
+    def setUp(self):
+        """Set queries context"""
+
+        self.user = get_user_model().objects.create(username='test', is_superuser=True)
+        self.context_value = RequestFactory().get(GRAPHQL_ENDPOINT)
+        self.context_value.user = self.user
+
+        self.indvs = []
+        for mk, email in [('AAAA', 'jsmith@example.com'),
+                          ('BBBB', 'jsmith2@example.com'),
+                          ('CCCC', 'jsmith3@example.com'),
+                          ('DDDD', 'jdoe@example.com')]:
+            indv = Individual.objects.create(mk=mk)
+            Profile.objects.create(name="John",
+                                   email=email,
+                                   individual=indv)
+            self.indvs.append(indv)
+
+        self.rec1 = MergeRecommendation.objects.create(individual1=self.indvs[1],
+                                                       individual2=self.indvs[2])
+        self.rec2 = MergeRecommendation.objects.create(individual1=self.indvs[0],
+                                                       individual2=self.indvs[1])
+        self.rec3 = MergeRecommendation.objects.create(individual1=self.indvs[2],
+                                                       individual2=self.indvs[3])
+
+    def test_apply_recommendations_merge(self):
+        """Check whether it merges the chained recommendations at once"""
+
+        client = graphene.test.Client(schema)
+        ids = [self.rec1.id, self.rec2.id]
+        executed = client.execute(self.SH_MANAGE_RECS % (ids, "true"),
+                                  context_value=self.context_value)
+
+        # Check result
+        rel = executed['data']['manageMergeRecommendations']
+        self.assertEqual(rel['applied'], True)
+        self.assertListEqual(rel['uuids'], ['AAAA'])
+        self.assertListEqual(rel['individuals'], [{'mk': 'AAAA'}])
+
+        # Tests
+        mks = [indv.mk for indv in Individual.objects.order_by('mk')]
+        self.assertListEqual(mks, ['AAAA', 'DDDD'])
+
+        recs = MergeRecommendation.objects.all()
+        self.assertEqual(len(recs), 1)
+
+        rec = recs[0]
+        self.assertEqual(rec.id, self.rec3.id)
+        self.assertEqual(rec.individual1.mk, 'AAAA')
+        self.assertEqual(rec.individual2.mk, 'DDDD')
+
+    def test_dismiss_recommendations_merge(self):
+        """Check whether it dismisses the recommendations"""
+
+        client = graphene.test.Client(schema)
+        ids = [self.rec1.id, self.rec3.id]
+        executed = client.execute(self.SH_MANAGE_RECS % (ids, "false"),
+                                  context_value=self.context_value)
+
+        # Check result
+        rel = executed['data']['manageMergeRecommendations']
+        self.assertEqual(rel['applied'], False)
+        self.assertListEqual(rel['uuids'], [])
+
+        # Tests
+        recs = MergeRecommendation.objects.order_by('id')
+        self.assertListEqual([rec.applied for rec in recs], [False, None, False])
+        self.assertEqual(Individual.objects.count(), 4)
+
+    def test_not_found_recommendation_merge(self):
+        """Check if it returns an error when an entry does not exist"""
+
+        client = graphene.test.Client(schema)
+        executed = client.execute(self.SH_MANAGE_RECS % ([self.rec1.id, 1000], "true"),
+                                  context_value=self.context_value)
+
+        # Check error
+        msg = executed['errors'][0]['message']
+        self.assertEqual(msg, "1000 not found in the registry")
+
+        # Nothing was merged
+        self.assertEqual(Individual.objects.count(), 4)
+        self.assertEqual(MergeRecommendation.objects.count(), 3)
+
+    def test_not_found_recommendation_dismiss(self):
+        """Check if it returns an error when dismissing an entry that does not exist"""
+
+        client = graphene.test.Client(schema)
+        executed = client.execute(self.SH_MANAGE_RECS % ([self.rec1.id, 1000], "false"),
+                                  context_value=self.context_value)
+
+        # Check error
+        msg = executed['errors'][0]['message']
+        self.assertEqual(msg, "1000 not found in the registry")
+
+        # Nothing was dismissed
+        recs = MergeRecommendation.objects.order_by('id')
+        self.assertListEqual([rec.applied for rec in recs], [None, None, None])
+
+    def test_dismissed_recommendation_merge(self):
+        """Check if it returns an error when applying a dismissed recommendation"""
+
+        self.rec1.applied = False
+        self.rec1.save()
+
+        client = graphene.test.Client(schema)
+        executed = client.execute(self.SH_MANAGE_RECS % ([self.rec1.id], "true"),
+                                  context_value=self.context_value)
+
+        # Check error
+        msg = executed['errors'][0]['message']
+        self.assertEqual(msg, f"{self.rec1.id} not found in the registry")
+
+        # Nothing was merged
+        self.assertEqual(Individual.objects.count(), 4)
+
+    def test_required_arguments(self):
+        """Check if it fails when the arguments are not given"""
+
+        mutation = """
+          mutation manageMergeRecommendations {
+            manageMergeRecommendations (recommendationIds: [1]) {
+              applied
+            }
+          }
+        """
+
+        client = graphene.test.Client(schema)
+        executed = client.execute(mutation, context_value=self.context_value)
+
+        msg = executed['errors'][0]['message']
+        self.assertIn("argument 'apply' of type 'Boolean!' is required", msg)
+
+        mutation = """
+          mutation manageMergeRecommendations {
+            manageMergeRecommendations (apply: true) {
+              applied
+            }
+          }
+        """
+
+        executed = client.execute(mutation, context_value=self.context_value)
+
+        msg = executed['errors'][0]['message']
+        self.assertIn("argument 'recommendationIds' of type '[Int]!' is required", msg)
+
+    def test_authentication(self):
+        """Check if it fails when a non-authenticated user executes the query"""
+
+        context_value = RequestFactory().get(GRAPHQL_ENDPOINT)
+        context_value.user = AnonymousUser()
+
+        client = graphene.test.Client(schema)
+
+        executed = client.execute(self.SH_MANAGE_RECS % ([1], "true"),
+                                  context_value=context_value)
+
+        msg = executed['errors'][0]['message']
+        self.assertEqual(msg, AUTHENTICATION_ERROR)
+
+
 class TestManageRecommendationGenderMutation(django.test.TestCase):
     """Unit tests for mutation to accept a match recommendation"""
 